@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import os
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from .file_lock import locked_open
+from .io import append_bytes
 from .storage_backend import sqlite_enabled, transaction, write_audit_event
 
+log = logging.getLogger(__name__)
+
 
 def iso_utc(dt: datetime) -> str:
     if dt.tzinfo is None:
@@ -37,10 +44,12 @@ def policy_hash(policy_obj: dict) -> str:
     return hashlib.sha256(b).hexdigest()[:16]
 
 
-def write_audit(store_root: Path, ev: AuditEvent) -> None:
-    (store_root / "audit").mkdir(parents=True, exist_ok=True)
-    p = store_root / "audit" / "audit.log.jsonl"
-    row = {
+def audit_log_path(store_root: Path) -> Path:
+    return store_root / "audit" / "audit.log.jsonl"
+
+
+def _audit_row(ev: AuditEvent) -> dict:
+    return {
         "ts": iso_utc(utc_now()),
         "action": ev.action,
         "bundle_id": ev.bundle_id,
@@ -50,8 +59,232 @@ def write_audit(store_root: Path, ev: AuditEvent) -> None:
         "reason": ev.reason,
         "policy_hash": ev.policy_hash,
     }
-    with locked_open(p, "a") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
-    if sqlite_enabled():
-        with transaction(store_root) as conn:
-            write_audit_event(conn, row)
+
+
+# Durability modes (LINKS_AUDIT_DURABILITY):
+#   event    - every event is written (and committed to SQLite) before write_audit returns (default)
+#   interval - events are buffered and written in one batch every LINKS_AUDIT_FLUSH_INTERVAL_MS
+#              (default 50) or once LINKS_AUDIT_MAX_BATCH (default 512) events are pending
+#   fsync    - like interval, and each batch is fsync'd before the flush completes
+DURABILITY_MODES = ("event", "interval", "fsync")
+
+# Chain-head sidecar of the single log is rewritten after this many rows.
+_HEADS_SAVE_ROWS = 256
+
+
+def _env_durability() -> str:
+    mode = os.environ.get("LINKS_AUDIT_DURABILITY", "event").strip().lower() or "event"
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"unknown LINKS_AUDIT_DURABILITY: {mode}")
+    return mode
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _unlinked(row: dict) -> dict:
+    """*row* without the chain fields of a failed write, ready to be linked again."""
+    return {k: v for k, v in row.items() if k not in ("seq", "chain")}
+
+
+class AuditWriter:
+    """
+    Appends audit rows for one store root, batching them when configured to.
+
+    A batch is written under one file lock and, with the SQLite backend, one
+    transaction.  Rows keep the order in which `write` was called: they are
+    queued under a lock and batches are written one at a time.  Buffered rows
+    are flushed by a background thread, when the batch limit is reached, by
+    `flush()`, and at interpreter exit.
+    """
+
+    def __init__(self, store_root: Path, durability: str = "event", flush_interval_ms: float = 50.0, max_batch: int = 512):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"unknown audit durability mode: {durability}")
+        self.store_root = store_root
+        self.path = audit_log_path(store_root)
+        self.durability = durability
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch = max(1, max_batch)
+        self._pending: list[dict] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flush_hooks: list[Callable[[Path, list[dict]], None]] = []
+        self.events_written = 0
+        self.batches_written = 0
+        self._heads: Optional[tuple] = None  # ((inode, log size), chain heads) after our last append
+        self._unsaved_rows = 0
+        self._written: list[dict] = []  # rows of the current batch known to be on disk
+        self._db_pending: list[dict] = []  # rows in the log whose SQLite insert failed
+        self._single_log = False  # last batch went to the single log (skips the layout lookup)
+        from .audit_store import layout_path
+
+        self._layout_file = str(layout_path(store_root))
+
+    def write(self, row: dict) -> None:
+        with self._pending_lock:
+            self._pending.append(row)
+            backlog = len(self._pending)
+        if self.durability == "event" or backlog >= self.max_batch:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def flush(self) -> int:
+        """Write every queued row now; returns the number written."""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                if self._db_pending:
+                    self._store_db([])
+                return 0
+            self._written = []
+            try:
+                self._append(batch)
+            except Exception:
+                # Rows that reached the file stay written; the rest go back ahead of anything
+                # queued since, in order, and are linked to the chain again on the retry.
+                done = {id(row) for row in self._written}
+                retry = [_unlinked(row) for row in batch if id(row) not in done]
+                with self._pending_lock:
+                    self._pending = retry + self._pending
+                self._db_pending.extend(self._written)
+                self.events_written += len(self._written)
+                raise
+            self._store_db(batch)
+            self.events_written += len(batch)
+            self.batches_written += 1
+            for hook in list(self.flush_hooks):
+                try:
+                    hook(self.store_root, batch)
+                except Exception:
+                    log.exception("audit flush hook %r failed for %s", hook, self.store_root)
+            return len(batch)
+
+    def _store_db(self, batch: list[dict]) -> None:
+        """Mirror rows already in the log into SQLite; failed rows are retried on the next flush."""
+        if not sqlite_enabled():
+            return
+        rows, self._db_pending = self._db_pending + batch, []
+        try:
+            with transaction(self.store_root) as conn:
+                for row in rows:
+                    write_audit_event(conn, row)
+        except Exception:
+            self._db_pending = rows
+            log.exception("audit rows reached %s but not SQLite; %d rows will be retried", self.path, len(rows))
+
+    def _append(self, batch: list[dict]) -> None:
+        from .audit_chain import link_row, save_single_heads, single_heads
+        from .audit_store import append_partitioned, partition_layout
+
+        fsync = self.durability == "fsync"
+        layout = None if self._single_log else partition_layout(self.store_root)
+        if layout is None:
+            if not self._single_log:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            with locked_open(self.path, "ab") as f:
+                # `links audit migrate` switches layouts while holding this lock.
+                self._single_log = not os.path.exists(self._layout_file)
+                if self._single_log:
+                    # Link each row to its village's hash chain (see links.audit_chain).  The
+                    # heads are reused while nobody else appended; the sidecar is saved every
+                    # _HEADS_SAVE_ROWS rows and readers roll a stale one forward.  Rows are
+                    # linked on a copy that replaces the cached heads only once they are on disk.
+                    st = os.fstat(f.fileno())
+                    if self._heads is not None and self._heads[0] == (st.st_ino, st.st_size):
+                        heads = dict(self._heads[1])
+                    else:
+                        heads = single_heads(self.store_root, self.path, st.st_size)
+                        self._unsaved_rows = _HEADS_SAVE_ROWS
+                    for row in batch:
+                        scope = row.get("village_id") or ""
+                        heads[scope] = link_row(row, heads.get(scope))
+                    data = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode("utf-8")
+                    try:
+                        append_bytes(f, data, fsync=fsync)
+                    except Exception:
+                        self._heads = None
+                        raise
+                    self._written.extend(batch)
+                    end = st.st_size + len(data)
+                    self._heads = ((st.st_ino, end), heads)
+                    self._unsaved_rows += len(batch)
+                    if self._unsaved_rows >= _HEADS_SAVE_ROWS:
+                        save_single_heads(self.store_root, self.path, heads, end)
+                        self._unsaved_rows = 0
+                    return
+            layout = partition_layout(self.store_root)
+        append_partitioned(self.store_root, batch, layout["granularity"], fsync=fsync, written_rows=self._written)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._pending_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="links-audit-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval_ms / 1000.0)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The batch was re-queued; keep the thread alive and retry on the next wake-up.
+                log.exception("audit flush to %s failed; %d rows pending", self.path, len(self._pending))
+
+
+_WRITERS: dict[str, AuditWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def audit_writer(store_root: Path) -> AuditWriter:
+    """The process-wide writer for *store_root*, configured from the environment."""
+    key = str(Path(store_root))
+    w = _WRITERS.get(key)
+    if w is None:
+        with _WRITERS_LOCK:
+            w = _WRITERS.get(key)
+            if w is None:
+                w = AuditWriter(
+                    store_root,
+                    durability=_env_durability(),
+                    flush_interval_ms=max(1.0, _env_number("LINKS_AUDIT_FLUSH_INTERVAL_MS", 50.0, float)),
+                    max_batch=_env_number("LINKS_AUDIT_MAX_BATCH", 512, int),
+                )
+                from .audit_chain import maybe_checkpoint
+                from .audit_counters import sync_audit_counters
+
+                # Batched modes keep the daily counters in step once per batch; with per-event
+                # durability they stay lazy and the quota reader (audit_action_count) syncs them.
+                if w.durability != "event":
+                    w.flush_hooks.append(lambda root, batch: sync_audit_counters(root, batch))
+                # Signed chain checkpoints every LINKS_AUDIT_CHECKPOINT_EVERY events per village.
+                w.flush_hooks.append(maybe_checkpoint)
+                _WRITERS[key] = w
+    return w
+
+
+def flush_audit(store_root: Optional[Path] = None) -> int:
+    """Flush buffered audit rows (for one store root or all); call before reading the log in-process."""
+    if store_root is not None:
+        w = _WRITERS.get(str(Path(store_root)))
+        return w.flush() if w is not None else 0
+    return sum(w.flush() for w in list(_WRITERS.values()))
+
+
+atexit.register(flush_audit)
+
+
+def write_audit(store_root: Path, ev: AuditEvent) -> None:
+    audit_writer(store_root).write(_audit_row(ev))
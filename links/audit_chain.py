@@ -0,0 +1,409 @@
+"""audit_chain — per-village hash chain over audit rows, with signed checkpoints.
+
+Every row the audit writer appends carries ``seq`` and
+``chain = sha256(prev_chain || canonical(row without "chain"))`` for its
+village, linked under the lock that serializes that chain's writers.
+Checkpoints in ``audit/checkpoints/<village>.jsonl`` record a signed head
+and its log position every ``LINKS_AUDIT_CHECKPOINT_EVERY`` events; they
+double as seek points for exports and :func:`verify_range`.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .file_lock import locked_open
+from .io import LogTail
+from .audit_store import (
+    GLOBAL_PARTITION,
+    UNDATED,
+    audit_dir,
+    list_partitions,
+    partition_dir,
+    partition_layout,
+)
+
+GENESIS = "0" * 64
+
+
+@dataclass(frozen=True)
+class ChainHead:
+    """Last linked row of a chain and the log position just after it.
+
+    Rows with a higher ``seq`` start at or after ``offset`` of ``file``
+    (relative to the audit dir).
+    """
+
+    seq: int
+    chain: str
+    file: str = ""
+    offset: int = 0
+
+
+def canonical_row(row: Dict[str, Any]) -> bytes:
+    body = {k: v for k, v in row.items() if k != "chain"}
+    return json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def chain_hash(prev: str, row: Dict[str, Any]) -> str:
+    return hashlib.sha256(bytes.fromhex(prev) + canonical_row(row)).hexdigest()
+
+
+def link_row(row: Dict[str, Any], prev: Optional[Tuple[int, str]]) -> Tuple[int, str]:
+    """Stamp ``seq``/``chain`` onto *row* after *prev* ``(seq, chain)``; returns the new head."""
+    seq = (prev[0] if prev else 0) + 1
+    row["seq"] = seq
+    row["chain"] = chain_hash(prev[1] if prev else GENESIS, row)
+    return seq, row["chain"]
+
+
+def _scope(village_id: Optional[str]) -> str:
+    return village_id or ""
+
+
+# ---------------------------------------------------------------------------
+# Chain heads
+# ---------------------------------------------------------------------------
+
+
+def _read_json(p: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(p: Path, doc: Dict[str, Any]) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(doc, sort_keys=True), encoding="utf-8")
+    tmp.replace(p)
+
+
+def _roll_forward(path: Path, start: int, end: int, heads: Dict[str, Tuple[int, str]]) -> None:
+    """Fold chained rows of *path* in ``[start, end)`` into *heads* (scope -> (seq, chain))."""
+    if end <= start:
+        return
+    for raw in LogTail(path, end=end).iter_range(start):
+        try:
+            ev = json.loads(raw)
+        except Exception:
+            continue
+        if isinstance(ev.get("seq"), int) and ev.get("chain"):
+            heads[_scope(ev.get("village_id"))] = (ev["seq"], ev["chain"])
+
+
+def single_heads_path(store_root: Path) -> Path:
+    return audit_dir(store_root) / "chain_heads.json"
+
+
+def single_heads(store_root: Path, log: Path, end: int) -> Dict[str, Tuple[int, str]]:
+    """Heads of every chain in the single log up to *end*; call with the log locked."""
+    try:
+        ino = log.stat().st_ino
+    except FileNotFoundError:
+        return {}
+    doc = _read_json(single_heads_path(store_root))
+    if doc is not None and doc.get("ino") == ino and int(doc.get("offset", 0)) <= end:
+        heads = {k: (int(v[0]), str(v[1])) for k, v in doc.get("heads", {}).items()}
+        start = int(doc["offset"])
+    else:
+        heads, start = {}, 0
+    _roll_forward(log, start, end, heads)
+    return heads
+
+
+def save_single_heads(store_root: Path, log: Path, heads: Dict[str, Tuple[int, str]], offset: int) -> None:
+    _write_json(single_heads_path(store_root), {"ino": log.stat().st_ino, "offset": offset, "heads": {k: list(v) for k, v in heads.items()}})
+
+
+def village_head_path(store_root: Path, village_id: Optional[str]) -> Path:
+    return partition_dir(store_root, village_id) / "chain_head.json"
+
+
+def chain_lock_path(store_root: Path, village_id: Optional[str]) -> Path:
+    return partition_dir(store_root, village_id) / "chain.lock"
+
+
+def partitioned_head(store_root: Path, village_id: Optional[str]) -> Optional[ChainHead]:
+    """Head of a village's chain in partitioned storage; call with its ``chain.lock`` held."""
+    base = audit_dir(store_root)
+    doc = _read_json(village_head_path(store_root, village_id))
+    parts = [p for p in list_partitions(store_root, village_id or GLOBAL_PARTITION) if p.stem != UNDATED]
+    if not parts:
+        return None
+    heads: Dict[str, Tuple[int, str]] = {}
+    start_file, start_off = None, 0
+    if doc is not None and (base / doc["file"]).exists():
+        if doc.get("seq"):
+            heads[_scope(village_id)] = (int(doc["seq"]), str(doc["chain"]))
+        start_file, start_off = base / doc["file"], int(doc["offset"])
+    for p in parts:
+        if start_file is not None and p.name < start_file.name:
+            continue
+        off = start_off if p == start_file else 0
+        _roll_forward(p, off, LogTail(p).end, heads)
+    newest = parts[-1]
+    seq, chain = heads.get(_scope(village_id), (0, GENESIS))
+    return ChainHead(seq, chain, newest.relative_to(base).as_posix(), LogTail(newest).end)
+
+
+def save_partitioned_head(store_root: Path, village_id: Optional[str], head: ChainHead) -> None:
+    _write_json(village_head_path(store_root, village_id), {"seq": head.seq, "chain": head.chain, "file": head.file, "offset": head.offset})
+
+
+def chain_head(store_root: Path, village_id: Optional[str]) -> Optional[ChainHead]:
+    """Current head of *village_id*'s chain (None before its first chained row)."""
+    store_root = Path(store_root)
+    if partition_layout(store_root) is None:
+        log = audit_dir(store_root) / "audit.log.jsonl"
+        if not log.exists():
+            return None
+        with locked_open(log, "rb", shared=True):
+            end = LogTail(log).end
+            heads = single_heads(store_root, log, end)
+        h = heads.get(_scope(village_id))
+        return ChainHead(h[0], h[1], log.name, end) if h else None
+    if not partition_dir(store_root, village_id).exists():
+        return None
+    with locked_open(chain_lock_path(store_root, village_id), "a", shared=True):
+        head = partitioned_head(store_root, village_id)
+    return head if head is not None and head.seq else None
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+
+
+def checkpoints_path(store_root: Path, village_id: Optional[str]) -> Path:
+    return audit_dir(store_root) / "checkpoints" / f"{village_id or GLOBAL_PARTITION}.jsonl"
+
+
+def checkpoint_payload(cp: Dict[str, Any]) -> bytes:
+    body = {k: cp.get(k) for k in ("village_id", "seq", "chain", "ts")}
+    return json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def list_checkpoints(store_root: Path, village_id: Optional[str]) -> List[Dict[str, Any]]:
+    p = checkpoints_path(store_root, village_id)
+    if not p.exists():
+        return []
+    out = []
+    with locked_open(p, "r", shared=True) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    out.append(json.loads(line))
+                except Exception:
+                    continue
+    return out
+
+
+def _last_checkpoint(p: Path) -> Optional[Dict[str, Any]]:
+    for _, raw in LogTail(p).iter_reverse():
+        try:
+            return json.loads(raw)
+        except Exception:
+            continue
+    return None
+
+
+def latest_checkpoint(store_root: Path, village_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    p = checkpoints_path(store_root, village_id)
+    if not p.exists():
+        return None
+    with locked_open(p, "rb", shared=True):
+        return _last_checkpoint(p)
+
+
+def _signing_key_or_none():
+    from .keys import load_signing_key_from_env
+
+    try:
+        return load_signing_key_from_env()
+    except Exception:
+        return None
+
+
+def record_checkpoint(store_root: Path, village_id: Optional[str], signing_key=None) -> Optional[Dict[str, Any]]:
+    """Append a checkpoint of the current head (returns the latest one if the head has not moved)."""
+    from .audit import iso_utc, utc_now
+
+    head = chain_head(store_root, village_id)
+    if head is None:
+        return None
+    p = checkpoints_path(store_root, village_id)
+    with locked_open(p, "a") as f:
+        last = _last_checkpoint(p)
+        if last is not None and int(last.get("seq", 0)) >= head.seq:
+            return last
+        cp: Dict[str, Any] = {
+            "village_id": village_id,
+            "seq": head.seq,
+            "chain": head.chain,
+            "ts": iso_utc(utc_now()),
+            "file": head.file,
+            "offset": head.offset,
+            "public_key": None,
+            "signature": None,
+        }
+        if signing_key is not None:
+            cp["public_key"] = base64.b64encode(signing_key.verify_key.encode()).decode("ascii")
+            cp["signature"] = signing_key.sign(checkpoint_payload(cp)).signature.hex()
+        f.write(json.dumps(cp, sort_keys=True) + "\n")
+    return cp
+
+
+def checkpoint_every() -> int:
+    try:
+        return max(0, int(os.environ.get("LINKS_AUDIT_CHECKPOINT_EVERY", 1000)))
+    except ValueError:
+        return 1000
+
+
+# (store_root, village scope) -> seq of the latest checkpoint this process knows about
+_LAST_CHECKPOINT: Dict[Tuple[str, str], int] = {}
+
+
+def maybe_checkpoint(store_root: Path, batch: Iterable[Dict[str, Any]]) -> int:
+    """Audit-writer flush hook: checkpoint villages that advanced enough; returns checkpoints written.
+
+    Uses the ``seq`` the writer just stamped on the batch, so the common
+    case touches no files.
+    """
+    every = checkpoint_every()
+    if not every:
+        return 0
+    newest: Dict[Optional[str], int] = {}
+    for row in batch:
+        if isinstance(row.get("seq"), int):
+            newest[row.get("village_id")] = max(newest.get(row.get("village_id"), 0), row["seq"])
+    written = 0
+    for vid, seq in newest.items():
+        key = (str(store_root), _scope(vid))
+        last = _LAST_CHECKPOINT.get(key)
+        if last is None:
+            cp = latest_checkpoint(store_root, vid)
+            last = _LAST_CHECKPOINT[key] = int(cp["seq"]) if cp else 0
+        if seq - last >= every:
+            cp = record_checkpoint(store_root, vid, _signing_key_or_none())
+            if cp is not None:
+                _LAST_CHECKPOINT[key] = int(cp["seq"])
+                written += 1
+    return written
+
+
+def verify_checkpoint_signature(cp: Dict[str, Any], public_key_b64: Optional[str] = None) -> bool:
+    """True if *cp* is signed (by *public_key_b64* when given) and the signature is valid."""
+    from .key_cache import verify_key_b64
+
+    if not cp.get("signature") or not cp.get("public_key"):
+        return False
+    if public_key_b64 is not None and cp["public_key"] != public_key_b64:
+        return False
+    try:
+        verify_key_b64(cp["public_key"]).verify(checkpoint_payload(cp), bytes.fromhex(cp["signature"]))
+        return True
+    except Exception:
+        return False
+
+
+def checkpoint_verify_key() -> Optional[str]:
+    """Key checkpoints must be signed by: ``LINKS_AUDIT_CHECKPOINT_PUBLIC_KEY_B64``, else this node's key (None if neither is set)."""
+    from .keys import node_signer
+
+    configured = os.environ.get("LINKS_AUDIT_CHECKPOINT_PUBLIC_KEY_B64", "").strip()
+    if configured:
+        return configured
+    try:
+        return node_signer().public_key_b64
+    except Exception:
+        return None
+
+
+def seek_checkpoint(store_root: Path, village_id: Optional[str], seq: int) -> Optional[Dict[str, Any]]:
+    """Newest checkpoint at or before *seq* whose position is still in the store."""
+    best = None
+    base = audit_dir(store_root)
+    for cp in list_checkpoints(store_root, village_id):
+        if int(cp.get("seq", 0)) <= seq and cp.get("file") and (base / cp["file"]).exists():
+            if best is None or cp["seq"] >= best["seq"]:
+                best = cp
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Verification
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ChainVerification:
+    ok: bool
+    reason: str
+    from_seq: int
+    to_seq: int
+    checked: int
+
+
+def verify_chain(
+    events: Iterable[Dict[str, Any]], start: Tuple[int, str] = (0, GENESIS), end: Optional[Tuple[int, str]] = None
+) -> ChainVerification:
+    """Check that *events* continue the chain from *start* and, if given, reach *end* exactly."""
+    seq, prev = start
+    checked = 0
+    for ev in events:
+        if end is not None and seq >= end[0]:
+            break
+        if ev.get("seq") != seq + 1:
+            return ChainVerification(False, f"expected seq {seq + 1}, found {ev.get('seq')}", start[0], seq, checked)
+        if chain_hash(prev, ev) != ev.get("chain"):
+            return ChainVerification(False, f"chain mismatch at seq {seq + 1}", start[0], seq, checked)
+        seq, prev = seq + 1, ev["chain"]
+        checked += 1
+    if end is not None and (seq, prev) != tuple(end):
+        return ChainVerification(False, f"chain ends at seq {seq}, expected seq {end[0]} with the checkpoint's hash", start[0], seq, checked)
+    return ChainVerification(True, "ok", start[0], seq, checked)
+
+
+def iter_chain_events(store_root: Path, village_id: Optional[str], after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+    """Chained events of *village_id* with ``seq > after_seq``, read from the nearest checkpoint."""
+    from .audit_store import audit_snapshot
+
+    scope = village_id or (GLOBAL_PARTITION if partition_layout(store_root) is not None else None)
+    events = audit_snapshot(store_root, scope, after_seq=after_seq).iter_events()
+    return (ev for ev in events if ev.get("village_id") == village_id)
+
+
+def verify_range(
+    store_root: Path, village_id: Optional[str], from_seq: int = 0, to_seq: Optional[int] = None, public_key_b64: Optional[str] = None
+) -> ChainVerification:
+    """Verify the events between two checkpoints (``from_seq=0`` is the genesis).
+
+    ``to_seq=None`` uses the latest checkpoint.  With *public_key_b64* both
+    checkpoints must be signed by that key; without it a signature is only
+    checked against the key embedded in the checkpoint, which anyone able
+    to rewrite the log could also re-sign, so callers pin
+    :func:`checkpoint_verify_key`.  Only the events in the range are read
+    and re-hashed.
+    """
+    cps = {int(cp["seq"]): cp for cp in list_checkpoints(store_root, village_id)}
+    if to_seq is None:
+        if not cps:
+            return ChainVerification(False, "no checkpoints", from_seq, from_seq, 0)
+        to_seq = max(cps)
+    if to_seq not in cps or (from_seq and from_seq not in cps):
+        return ChainVerification(False, "from_seq and to_seq must be checkpoint positions", from_seq, from_seq, 0)
+    ends = [cps[to_seq]] + ([cps[from_seq]] if from_seq else [])
+    for cp in ends:
+        if (cp.get("signature") or public_key_b64) and not verify_checkpoint_signature(cp, public_key_b64):
+            return ChainVerification(False, f"checkpoint at seq {cp['seq']} has an invalid signature", from_seq, from_seq, 0)
+    start = (from_seq, cps[from_seq]["chain"]) if from_seq else (0, GENESIS)
+    return verify_chain(iter_chain_events(store_root, village_id, from_seq), start, (to_seq, cps[to_seq]["chain"]))
@@ -0,0 +1,238 @@
+"""audit_counters — per-village, per-UTC-day audit action counters.
+
+Quota checks read ``<store_root>/audit/counters.sqlite3`` instead of parsing
+the audit log.  :func:`sync_audit_counters` folds in whatever the log (or
+each partition, tracked by its own offset) gained since the last sync; a
+replaced or truncated file is recounted.  Readers sync before they query,
+and with batched durability the audit writer syncs once per flushed batch.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from .audit import audit_log_path
+from .audit_store import GLOBAL_PARTITION, GRANULARITIES, list_partitions, partition_for, partition_layout, partition_path, partitions_root
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    village_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (village_id, day, action)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def counters_path(store_root: Path) -> Path:
+    return Path(store_root) / "audit" / "counters.sqlite3"
+
+
+def _utc_day(ts: str) -> Optional[str]:
+    if len(ts) >= 10 and ts.endswith("Z"):
+        return ts[:10]
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc).date().isoformat()
+    except Exception:
+        return None
+
+
+# One connection per counters database and process, opened (and the schema
+# applied) once; the lock serializes threads using it.
+_CONNS: Dict[tuple, tuple] = {}
+_CONNS_LOCK = threading.Lock()
+
+
+@contextmanager
+def _conn(store_root: Path) -> Iterator[sqlite3.Connection]:
+    p = counters_path(store_root)
+    key = (str(p), os.getpid())
+    with _CONNS_LOCK:
+        entry = _CONNS.get(key)
+        if entry is not None and not p.exists():
+            entry[0].close()
+            entry = None
+        if entry is None:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(p), timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            entry = _CONNS[key] = (conn, threading.Lock())
+    with entry[1]:
+        yield entry[0]
+
+
+def _meta(conn: sqlite3.Connection, key: str) -> Optional[int]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _fold(conn: sqlite3.Connection, log: Path, offset: int, size: int) -> tuple:
+    """Count the complete lines of *log* in ``[offset, size)``; returns ``(applied, new offset)``."""
+    with log.open("rb") as f:
+        f.seek(offset)
+        chunk = f.read(size - offset)
+    end = chunk.rfind(b"\n") + 1  # leave a partially written last line for later
+    deltas: Dict[tuple, int] = {}
+    applied = 0
+    for raw in chunk[:end].splitlines():
+        if not raw.strip():
+            continue
+        try:
+            ev = json.loads(raw)
+        except Exception:
+            continue
+        day = _utc_day(ev.get("ts") or "")
+        if day is None or not ev.get("action"):
+            continue
+        k = (ev.get("village_id") or "", day, ev["action"])
+        deltas[k] = deltas.get(k, 0) + 1
+        applied += 1
+    conn.executemany(
+        "INSERT INTO counters(village_id, day, action, count) VALUES(?,?,?,?) "
+        "ON CONFLICT(village_id, day, action) DO UPDATE SET count = count + excluded.count",
+        [(*k, n) for k, n in deltas.items()],
+    )
+    return applied, offset + end
+
+
+def _sync(conn: sqlite3.Connection, log: Path, force_rebuild: bool) -> int:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        try:
+            st = log.stat()
+        except FileNotFoundError:
+            st = None
+        offset = _meta(conn, "log_offset") or 0
+        ino = _meta(conn, "log_ino")
+        if force_rebuild or st is None or ino != st.st_ino or st.st_size < offset:
+            conn.execute("DELETE FROM counters")
+            offset = 0
+        applied = 0
+        if st is not None and st.st_size > offset:
+            applied, offset = _fold(conn, log, offset, st.st_size)
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES(?,?)",
+            [("log_offset", offset), ("log_ino", st.st_ino if st is not None else 0)],
+        )
+        conn.execute("COMMIT")
+        return applied
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _sync_partitions(conn: sqlite3.Connection, store_root: Path, parts: Optional[Iterable[Path]], force_rebuild: bool) -> int:
+    """Like :func:`_sync` for partition files, each with its own offset.
+
+    A replaced or truncated partition only resets the counters it feeds
+    (its village and period).  ``parts=None`` syncs every partition.
+    """
+    root = partitions_root(store_root)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if force_rebuild:
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM meta WHERE key LIKE 'part:%'")
+        applied = 0
+        for p in list_partitions(store_root) if parts is None else parts:
+            rel = p.relative_to(root).as_posix()
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                st = None
+            offset = _meta(conn, f"part:{rel}:offset") or 0
+            ino = _meta(conn, f"part:{rel}:ino")
+            if offset and (st is None or ino != st.st_ino or st.st_size < offset):
+                vid = "" if p.parent.name == GLOBAL_PARTITION else p.parent.name
+                conn.execute("DELETE FROM counters WHERE village_id = ? AND day LIKE ?", (vid, p.stem + "%"))
+                offset = 0
+            if st is None:
+                continue
+            if st.st_size > offset:
+                n, offset = _fold(conn, p, offset, st.st_size)
+                applied += n
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES(?,?)",
+                [(f"part:{rel}:offset", offset), (f"part:{rel}:ino", st.st_ino)],
+            )
+        conn.execute("COMMIT")
+        return applied
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _sync_store(conn: sqlite3.Connection, store_root: Path, force_rebuild: bool = False, parts: Optional[Iterable[Path]] = None) -> int:
+    store_root = Path(store_root)
+    if partition_layout(store_root) is None:
+        return _sync(conn, audit_log_path(store_root), force_rebuild)
+    return _sync_partitions(conn, store_root, None if force_rebuild else parts, force_rebuild)
+
+
+def sync_audit_counters(store_root: Path, rows: Optional[Iterable[dict]] = None) -> int:
+    """Fold audit events appended since the last sync; returns events applied.
+
+    With partitioned storage, *rows* (a just-written batch) limits the sync
+    to the partitions those rows went to.
+    """
+    parts = None
+    layout = partition_layout(Path(store_root))
+    if rows is not None and layout is not None:
+        parts = {partition_for(Path(store_root), r, layout["granularity"]) for r in rows}
+    with _conn(store_root) as conn:
+        return _sync_store(conn, store_root, parts=parts)
+
+
+def rebuild_audit_counters(store_root: Path) -> int:
+    """Recompute every counter from the full audit log; returns events counted."""
+    with _conn(store_root) as conn:
+        return _sync_store(conn, store_root, force_rebuild=True)
+
+
+def audit_action_count(store_root: Path, village_id: Optional[str], action: str, day: Optional[str] = None) -> int:
+    """Number of *action* events for *village_id* on UTC *day* (default: today)."""
+    day = day or datetime.now(timezone.utc).date().isoformat()
+    parts = None
+    layout = partition_layout(Path(store_root))
+    if layout is not None:
+        # Only the one partition that can hold this village's events for the day.
+        parts = [partition_path(Path(store_root), village_id, day[: GRANULARITIES[layout["granularity"]]])]
+    with _conn(store_root) as conn:
+        _sync_store(conn, store_root, parts=parts)
+        row = conn.execute(
+            "SELECT count FROM counters WHERE village_id = ? AND day = ? AND action = ?",
+            (village_id or "", day, action),
+        ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def daily_counts(store_root: Path, village_id: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """``{village_id: {day: {action: count}}}``, optionally filtered."""
+    sql = "SELECT village_id, day, action, count FROM counters WHERE 1=1"
+    args: list = []
+    if village_id is not None:
+        sql += " AND village_id = ?"
+        args.append(village_id)
+    if day is not None:
+        sql += " AND day = ?"
+        args.append(day)
+    out: Dict[str, Dict[str, Dict[str, int]]] = {}
+    with _conn(store_root) as conn:
+        parts = list_partitions(Path(store_root), village_id) if partition_layout(Path(store_root)) is not None else None
+        _sync_store(conn, store_root, parts=parts)
+        for v, d, a, n in conn.execute(sql + " ORDER BY village_id, day, action", args):
+            out.setdefault(v, {}).setdefault(d, {})[a] = n
+    return out
@@ -2,69 +2,163 @@ from __future__ import annotations
 
 import csv
 import hashlib
+import io
 import json
 from pathlib import Path
-from typing import Iterable, Dict, Any, List, Optional, Tuple
+from typing import Iterable, Iterator, Dict, Any, List, Optional, Tuple, Union
 
 from nacl.signing import SigningKey
 
+from .audit_store import AuditSnapshot
 from .file_lock import locked_open
+from .io import LogTail
 
+# Exports stream in constant memory: the log length is snapshotted under a
+# shared lock, then lines before that point are filtered, serialized and
+# hashed chunk by chunk.  Output bytes are identical to the original
+# build-everything-in-memory exports (links.audit.export.v1), which put
+# "count" before "events"; the JSON stream therefore reads the log twice,
+# once to count and once to emit.  Sources are either the single log's
+# path or an AuditSnapshot, which also covers partitioned storage (only the
+# village's own partitions are read).
 
-def iter_audit_events(audit_log_path: Path) -> Iterable[Dict[str, Any]]:
+JSON_FORMAT = "links.audit.export.v1"
+CSV_FIELDS = ["ts", "event_type", "village_id", "actor", "policy_hash", "bundle_id", "details"]
+_CHUNK = 64 * 1024
+
+AuditSource = Union[Path, AuditSnapshot]
+
+
+def audit_log_end(audit_log_path: Path) -> int:
+    """Byte length of the complete lines currently in the log (the export snapshot)."""
     if not audit_log_path.exists():
+        return 0
+    with locked_open(audit_log_path, "rb", shared=True):
+        return LogTail(audit_log_path).end
+
+
+def _snapshot(source: AuditSource, village_id: Optional[str], end: Optional[int]) -> AuditSnapshot:
+    if isinstance(source, AuditSnapshot):
+        return source
+    return AuditSnapshot.of_file(Path(source), village_id, end)
+
+
+def iter_audit_events(source: AuditSource, village_id: Optional[str] = None, end: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+    """Parsed audit events up to *end* (default: the current snapshot), optionally for one village.
+
+    *source* is the single log's path or an :class:`~links.audit_store.AuditSnapshot`
+    (which already fixes the village and end offsets).
+    """
+    if not isinstance(source, AuditSnapshot) and not Path(source).exists():
         return []
-    # JSONL
-    def _gen():
-        with locked_open(audit_log_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    yield json.loads(line)
-                except Exception:
-                    # Skip malformed lines; keep export resilient
-                    continue
-    return _gen()
-
-
-def export_audit_json(audit_log_path: Path, out_path: Path) -> Tuple[str, int]:
-    events = list(iter_audit_events(audit_log_path))
-    payload = {"format": "links.audit.export.v1", "count": len(events), "events": events}
-    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_bytes(data)
-    digest = hashlib.sha256(data).hexdigest()
-    return digest, len(events)
+    return _snapshot(source, village_id, end).iter_events()
+
+
+class HashingStream:
+    """Iterate byte chunks while hashing them; `hexdigest()` is valid once exhausted."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self._sha = hashlib.sha256()
+        self.size = 0
+        self.done = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self._sha.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+        self.done = True
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
 
+def _batched(parts: Iterable[str]) -> Iterator[bytes]:
+    buf: List[str] = []
+    size = 0
+    for p in parts:
+        buf.append(p)
+        size += len(p)
+        if size >= _CHUNK:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
 
-def export_audit_csv(audit_log_path: Path, out_path: Path) -> Tuple[str, int]:
-    events = list(iter_audit_events(audit_log_path))
+
+def stream_audit_json(source: AuditSource, village_id: Optional[str] = None, end: Optional[int] = None) -> Tuple[int, Iterator[bytes]]:
+    """Return ``(count, chunks)`` of the v1 JSON export."""
+    snap = _snapshot(source, village_id, end)
+    count = sum(1 for _ in snap.iter_events())
+
+    def _parts() -> Iterator[str]:
+        yield '{"count":%d,"events":[' % count
+        for i, ev in enumerate(snap.iter_events()):
+            yield ("," if i else "") + json.dumps(ev, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        yield '],"format":%s}' % json.dumps(JSON_FORMAT)
+
+    return count, _batched(_parts())
+
+
+def _csv_row(e: Dict[str, Any]) -> List[str]:
     # Flatten basic fields; keep extras as JSON
-    rows: List[Dict[str, Any]] = []
-    for e in events:
-        row = {
-            "ts": e.get("ts") or e.get("time") or "",
-            "event_type": e.get("event_type") or e.get("type") or "",
-            "village_id": e.get("village_id") or "",
-            "actor": e.get("actor") or "",
-            "policy_hash": e.get("policy_hash") or "",
-            "bundle_id": e.get("bundle_id") or "",
-            "details": json.dumps({k: v for k, v in e.items() if k not in {"ts","time","event_type","type","village_id","actor","policy_hash","bundle_id"}}, ensure_ascii=False, sort_keys=True),
-        }
-        rows.append(row)
+    return [
+        e.get("ts") or e.get("time") or "",
+        e.get("event_type") or e.get("type") or "",
+        e.get("village_id") or "",
+        e.get("actor") or "",
+        e.get("policy_hash") or "",
+        e.get("bundle_id") or "",
+        json.dumps({k: v for k, v in e.items() if k not in {"ts","time","event_type","type","village_id","actor","policy_hash","bundle_id"}}, ensure_ascii=False, sort_keys=True),
+    ]
+
+
+class _CountingCsv:
+    def __init__(self, events: Iterable[Dict[str, Any]]):
+        self.events = events
+        self.count = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(CSV_FIELDS)
+        for e in self.events:
+            w.writerow(_csv_row(e))
+            self.count += 1
+            if buf.tell() >= _CHUNK:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
 
+
+def stream_audit_csv(source: AuditSource, village_id: Optional[str] = None, end: Optional[int] = None) -> _CountingCsv:
+    """Chunks of the CSV export; the returned iterable's ``count`` is final once exhausted."""
+    return _CountingCsv(iter_audit_events(source, village_id, end))
+
+
+def _write_stream(chunks: Iterable[bytes], out_path: Path) -> str:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["ts","event_type","village_id","actor","policy_hash","bundle_id","details"])
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-    data = out_path.read_bytes()
-    digest = hashlib.sha256(data).hexdigest()
-    return digest, len(events)
+    hs = HashingStream(chunks)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        for chunk in hs:
+            f.write(chunk)
+    tmp.replace(out_path)
+    return hs.hexdigest()
+
+
+def export_audit_json(source: AuditSource, out_path: Path, village_id: Optional[str] = None) -> Tuple[str, int]:
+    count, chunks = stream_audit_json(source, village_id)
+    return _write_stream(chunks, out_path), count
+
+
+def export_audit_csv(source: AuditSource, out_path: Path, village_id: Optional[str] = None) -> Tuple[str, int]:
+    rows = stream_audit_csv(source, village_id)
+    digest = _write_stream(rows, out_path)
+    return digest, rows.count
 
 
 def sign_digest_hex(digest_hex: str, signing_key: SigningKey) -> str:
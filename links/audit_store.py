@@ -0,0 +1,619 @@
+"""audit_store — village-partitioned, time-indexed audit log storage.
+
+In the partitioned layout (recorded in ``audit/layout.json``; see
+:func:`migrate_audit_log`) events go to
+``audit/partitions/<village>/<period>.jsonl``, with ``@global`` for events
+without a village.  A sparse ``<period>.idx`` of ``{"o": offset, "t": ts}``
+rows lets readers seek close to a time range, and :class:`AuditSnapshot`
+freezes file ends so exports see a consistent view in either layout.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .file_lock import locked_open
+from .io import LogTail, append_bytes
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .audit_chain import ChainHead
+
+GLOBAL_PARTITION = "@global"
+UNDATED = "undated"
+GRANULARITIES = {"month": 7, "day": 10}
+LAYOUTS = ("single", "partitioned")
+
+# Rows may be appended slightly out of timestamp order (batching, several
+# processes); index seeks and early stops allow this much skew.
+_INDEX_SLACK = timedelta(seconds=60)
+_KEY_FMT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def _env_index_bytes() -> int:
+    try:
+        return max(1, int(os.environ.get("LINKS_AUDIT_INDEX_BYTES", 64 * 1024)))
+    except ValueError:
+        return 64 * 1024
+
+
+# ---------------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------------
+
+
+def audit_dir(store_root: Path) -> Path:
+    return Path(store_root) / "audit"
+
+
+def layout_path(store_root: Path) -> Path:
+    return audit_dir(store_root) / "layout.json"
+
+
+def partitions_root(store_root: Path) -> Path:
+    return audit_dir(store_root) / "partitions"
+
+
+def _single_log(store_root: Path) -> Path:
+    return audit_dir(store_root) / "audit.log.jsonl"
+
+
+# layout.json is written once and never changes afterwards.
+_LAYOUTS: Dict[str, Dict[str, Any]] = {}
+
+
+def _write_layout(store_root: Path, granularity: str, **extra: Any) -> Dict[str, Any]:
+    from .audit import iso_utc, utc_now
+
+    doc = {"layout": "partitioned", "granularity": granularity, "created_at": iso_utc(utc_now()), **extra}
+    p = layout_path(store_root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(doc, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(p)
+    return doc
+
+
+def partition_layout(store_root: Path) -> Optional[Dict[str, Any]]:
+    """The partitioned layout document of *store_root*, or None for the single log."""
+    key = str(Path(store_root))
+    doc = _LAYOUTS.get(key)
+    if doc is not None:
+        return doc
+    p = layout_path(store_root)
+    if not p.exists():
+        if os.environ.get("LINKS_AUDIT_LAYOUT", "single").strip().lower() != "partitioned":
+            return None
+        log = _single_log(store_root)
+        if log.exists() and log.stat().st_size > 0:
+            return None  # existing history: needs `links audit migrate`
+        granularity = os.environ.get("LINKS_AUDIT_PARTITION", "month").strip().lower() or "month"
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown LINKS_AUDIT_PARTITION: {granularity}")
+        _write_layout(store_root, granularity)
+    doc = json.loads(p.read_text(encoding="utf-8"))
+    _LAYOUTS[key] = doc
+    return doc
+
+
+def audit_layout(store_root: Path) -> str:
+    return "partitioned" if partition_layout(store_root) is not None else "single"
+
+
+# ---------------------------------------------------------------------------
+# Keys and paths
+# ---------------------------------------------------------------------------
+
+
+def ts_key(ts: Any) -> Optional[str]:
+    """Sortable UTC key (``YYYY-MM-DDTHH:MM:SS.ffffff``) for an event timestamp or bound."""
+    if not isinstance(ts, str) or not ts:
+        return None
+    # Fast path for the writer's own format (iso_utc): seconds or microseconds, "Z" suffix.
+    if ts.endswith("Z") and len(ts) in (20, 27) and ts[10] == "T":
+        return ts[:19] + (ts[19:26] if len(ts) == 27 else ".000000")
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime(_KEY_FMT)
+
+
+def _shift(key: str, delta: timedelta) -> str:
+    return (datetime.strptime(key, _KEY_FMT) + delta).strftime(_KEY_FMT)
+
+
+def _period_start(period: str) -> str:
+    return (period + "-01")[:10] + "T00:00:00.000000"
+
+
+def partition_dir(store_root: Path, village_id: Optional[str]) -> Path:
+    return partitions_root(store_root) / (village_id or GLOBAL_PARTITION)
+
+
+def partition_path(store_root: Path, village_id: Optional[str], period: str) -> Path:
+    return partition_dir(store_root, village_id) / f"{period}.jsonl"
+
+
+def index_path(partition: Path) -> Path:
+    return partition.with_suffix(".idx")
+
+
+def period_of(row: Dict[str, Any], granularity: str) -> str:
+    """Partition period of an event; rows without a parseable ``ts`` are kept under ``undated``."""
+    key = ts_key(row.get("ts"))
+    return key[: GRANULARITIES[granularity]] if key is not None else UNDATED
+
+
+def partition_for(store_root: Path, row: Dict[str, Any], granularity: str) -> Path:
+    return partition_path(store_root, row.get("village_id"), period_of(row, granularity))
+
+
+def list_partitions(
+    store_root: Path, village_id: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None
+) -> List[Path]:
+    """Partition files that can hold events of *village_id* (default: all) in ``[since, until)``.
+
+    *since* and *until* are :func:`ts_key` keys.  Sorted by village, then period.
+    A partition may hold rows stamped up to ``_INDEX_SLACK`` before its
+    period (see :func:`append_partitioned`), so *until* is widened by that.
+    """
+    root = partitions_root(store_root)
+    until = _shift(until, _INDEX_SLACK) if until is not None else None
+    dirs = [partition_dir(store_root, village_id)] if village_id else (sorted(root.iterdir()) if root.exists() else [])
+    out: List[Path] = []
+    for d in dirs:
+        if not d.is_dir():
+            continue
+        for p in sorted(d.glob("*.jsonl")):
+            period = p.stem
+            if since is not None and period < since[: len(period)]:
+                continue
+            if until is not None and _period_start(period) >= until:
+                continue
+            out.append(p)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def _last_index_offset(idx: Path) -> Optional[int]:
+    try:
+        with idx.open("rb") as f:
+            size = f.seek(0, 2)
+            f.seek(max(0, size - 256))
+            tail = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+    for raw in reversed(tail):
+        try:
+            return int(json.loads(raw)["o"])
+        except Exception:
+            continue
+    return None
+
+
+def append_partition(partition: Path, rows: Sequence[Dict[str, Any]], *, fsync: bool = False, index_bytes: Optional[int] = None) -> None:
+    """Append *rows* (already in order) to one partition, indexing it sparsely."""
+    if not rows:
+        return
+    every = index_bytes or _env_index_bytes()
+    with locked_open(partition, "ab") as f:
+        pos = f.seek(0, 2)
+        last = _last_index_offset(index_path(partition))
+        chunks: List[bytes] = []
+        entries: List[str] = []
+        for row in rows:
+            if last is None or pos - last >= every:
+                entries.append(json.dumps({"o": pos, "t": ts_key(row.get("ts"))}) + "\n")
+                last = pos
+            line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+            chunks.append(line)
+            pos += len(line)
+        if entries:
+            with index_path(partition).open("a", encoding="utf-8") as idx:
+                idx.write("".join(entries))
+        append_bytes(f, b"".join(chunks), fsync=fsync)
+
+
+def _newest_period(periods: Iterable[str]) -> Optional[str]:
+    dated = [p for p in periods if p != UNDATED]
+    return max(dated) if dated else None
+
+
+def append_partitioned(
+    store_root: Path,
+    rows: Iterable[Dict[str, Any]],
+    granularity: str,
+    *,
+    fsync: bool = False,
+    written_rows: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[Path, int]:
+    """Route *rows* to their partitions, chaining each village's rows; returns rows per partition.
+
+    Per village, under its ``chain.lock``: rows are linked to the village's
+    hash chain (:mod:`links.audit_chain`) and never go to a partition older
+    than the village's newest one, so file order and chain order agree even
+    when a row stamped just before a period boundary is flushed after it.
+    Rows are added to *written_rows* as their partition append completes, so
+    a caller can tell which rows of a failed call reached disk.
+    """
+    from .audit_chain import chain_lock_path, link_row, partitioned_head, save_partitioned_head, ChainHead
+
+    by_village: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_village.setdefault(row.get("village_id"), []).append(row)
+    written: Dict[Path, int] = {}
+    for vid, vrows in by_village.items():
+        with locked_open(chain_lock_path(store_root, vid), "a"):
+            head = partitioned_head(store_root, vid)
+            prev = (head.seq, head.chain) if head is not None and head.seq else None
+            floor = Path(head.file).stem if head is not None else None
+            groups: Dict[Path, List[Dict[str, Any]]] = {}
+            for row in vrows:
+                period = period_of(row, granularity)
+                if floor is not None and period != UNDATED and period < floor:
+                    period = floor
+                elif period != UNDATED:
+                    floor = period
+                prev = link_row(row, prev)
+                groups.setdefault(partition_path(store_root, vid, period), []).append(row)
+            for p, group in groups.items():
+                append_partition(p, group, fsync=fsync)
+                written[p] = len(group)
+                if written_rows is not None:
+                    written_rows.extend(group)
+            if prev is not None and floor is not None:
+                newest = partition_path(store_root, vid, floor)
+                save_partitioned_head(store_root, vid, ChainHead(prev[0], prev[1], newest.relative_to(audit_dir(store_root)).as_posix(), newest.stat().st_size))
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def _frozen_end(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with locked_open(path, "rb", shared=True):
+        return LogTail(path).end
+
+
+def _seek_offset(partition: Path, since: Optional[str]) -> int:
+    """Offset of the last index entry written before ``since - slack`` (0 without one)."""
+    if since is None:
+        return 0
+    bound = _shift(since, -_INDEX_SLACK)
+    start = 0
+    try:
+        with index_path(partition).open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except Exception:
+                    continue
+                if e.get("t") is not None and e["t"] <= bound:
+                    start = int(e["o"])
+                elif e.get("t") is not None:
+                    break
+    except FileNotFoundError:
+        return 0
+    return start
+
+
+@dataclass(frozen=True)
+class AuditSnapshot:
+    """Frozen ``(file, end offset)`` list covering the audit events of one village (or all).
+
+    ``village_filter`` is set when the files also hold other villages' events
+    (the single-log layout) and rows must be filtered while reading.
+    ``start`` skips everything before ``(file, offset)``, ``after_seq`` keeps
+    only chained rows past that sequence number, and ``head`` is the
+    village's chain head as of the snapshot (when taken by :func:`audit_snapshot`).
+    """
+
+    parts: Tuple[Tuple[Path, int], ...]
+    village_filter: Optional[str] = None
+    start: Optional[Tuple[Path, int]] = None
+    after_seq: Optional[int] = None
+    head: Optional["ChainHead"] = None
+
+    @classmethod
+    def of_file(cls, path: Path, village_id: Optional[str] = None, end: Optional[int] = None) -> "AuditSnapshot":
+        return cls(((Path(path), _frozen_end(Path(path)) if end is None else end),), village_id)
+
+    def position(self, store_root: Optional[Path] = None) -> Dict[str, int]:
+        """``{file: end offset}``; paths relative to the audit dir when *store_root* is given."""
+        base = audit_dir(store_root) if store_root is not None else None
+        out = {}
+        for p, end in self.parts:
+            try:
+                name = p.relative_to(base).as_posix() if base is not None else str(p)
+            except ValueError:
+                name = str(p)
+            out[name] = end
+        return out
+
+    def iter_lines(self) -> Iterator[bytes]:
+        parts = self.parts
+        first = 0
+        if self.start is not None:
+            names = [p for p, _ in parts]
+            if self.start[0] in names:
+                i = names.index(self.start[0])
+                parts, first = parts[i:], self.start[1]
+        for i, (p, end) in enumerate(parts):
+            begin = first if i == 0 else 0
+            if end > begin:
+                yield from LogTail(p, end=end).iter_range(begin)
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        for raw in self.iter_lines():
+            if not raw.strip():
+                continue
+            try:
+                ev = json.loads(raw)
+            except Exception:
+                # Skip malformed lines; keep readers resilient
+                continue
+            if self.village_filter is not None and ev.get("village_id") != self.village_filter:
+                continue
+            if self.after_seq is not None and not (isinstance(ev.get("seq"), int) and ev["seq"] > self.after_seq):
+                continue
+            yield ev
+
+
+def audit_snapshot(store_root: Path, village_id: Optional[str] = None, after_seq: Optional[int] = None) -> AuditSnapshot:
+    """Snapshot of the events of *village_id* (default: every village) in the store's layout.
+
+    For one village the snapshot also carries its chain head, taken under
+    the same lock as the file ends.  With *after_seq* only chained events
+    past that position are read, starting from the newest checkpoint at or
+    before it.
+    """
+    from .audit_chain import ChainHead, chain_lock_path, partitioned_head, seek_checkpoint, single_heads
+
+    store_root = Path(store_root)
+    start = None
+    if after_seq:
+        cp = seek_checkpoint(store_root, None if village_id == GLOBAL_PARTITION else village_id, after_seq)
+        if cp is not None:
+            start = (audit_dir(store_root) / cp["file"], int(cp["offset"]))
+
+    if partition_layout(store_root) is None:
+        log = _single_log(store_root)
+        if not log.exists():
+            return AuditSnapshot(((log, 0),), village_id, start, after_seq)
+        with locked_open(log, "rb", shared=True):
+            end = LogTail(log).end
+            h = single_heads(store_root, log, end).get(village_id or "") if village_id is not None else None
+        head = ChainHead(h[0], h[1], log.name, end) if h else None
+        return AuditSnapshot(((log, end),), village_id, start, after_seq, head)
+
+    if village_id is None or not partition_dir(store_root, village_id).exists():
+        return AuditSnapshot(tuple((p, _frozen_end(p)) for p in list_partitions(store_root, village_id)), None, start, after_seq)
+    vid = None if village_id == GLOBAL_PARTITION else village_id
+    with locked_open(chain_lock_path(store_root, vid), "a", shared=True):
+        parts = tuple((p, _frozen_end(p)) for p in list_partitions(store_root, village_id))
+        head = partitioned_head(store_root, vid)
+    return AuditSnapshot(parts, None, start, after_seq, head if head is not None and head.seq else None)
+
+
+def audit_log_exists(store_root: Path) -> bool:
+    if partition_layout(store_root) is None:
+        return _single_log(store_root).exists()
+    return partitions_root(store_root).exists()
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def _matches(ev: Dict[str, Any], village_id, action, actor, since, until) -> bool:
+    if village_id is not None and ev.get("village_id") != village_id:
+        return False
+    if action is not None and ev.get("action") != action:
+        return False
+    if actor is not None and ev.get("actor") != actor:
+        return False
+    if since is not None or until is not None:
+        k = ts_key(ev.get("ts"))
+        if k is None or (since is not None and k < since) or (until is not None and k >= until):
+            return False
+    return True
+
+
+def _scan(path: Path, end: int, start: int, descending: bool, since: Optional[str], until: Optional[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """``(ts key, event)`` of one file from *start*, stopping once rows are past the range."""
+    tail = LogTail(path, end=end)
+    if descending:
+        lines: Iterable[bytes] = (line for off, line in tail.iter_reverse() if off >= start)
+        stop = _shift(since, -_INDEX_SLACK) if since is not None else None
+    else:
+        lines = tail.iter_range(start)
+        stop = _shift(until, _INDEX_SLACK) if until is not None else None
+    for raw in lines:
+        if not raw.strip():
+            continue
+        try:
+            ev = json.loads(raw)
+        except Exception:
+            continue
+        k = ts_key(ev.get("ts")) or ""
+        if stop is not None and k and (k < stop if descending else k > stop):
+            return
+        yield k, ev
+
+
+def iter_audit_query(
+    store_root: Path,
+    village_id: Optional[str] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    descending: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Events matching every given filter, in time order (newest first with *descending*).
+
+    *since* (inclusive) and *until* (exclusive) are ISO timestamps or dates
+    (midnight UTC).  In the partitioned layout only the village's partitions
+    for the time range are opened, each from its index seek point; the
+    single log is scanned in full.
+    """
+    lo = ts_key(since) if since else None
+    hi = ts_key(until) if until else None
+    if (since and lo is None) or (until and hi is None):
+        raise ValueError("since/until must be ISO-8601 dates or timestamps")
+
+    if partition_layout(store_root) is None:
+        snap = AuditSnapshot.of_file(_single_log(store_root))
+        p, end = snap.parts[0]
+        if not end:
+            return
+        if descending:
+            events: Iterable[Dict[str, Any]] = (ev for _, ev in _scan(p, end, 0, True, None, None))
+        else:
+            events = snap.iter_events()
+        for ev in events:
+            if _matches(ev, village_id, action, actor, lo, hi):
+                yield ev
+        return
+
+    # Per village directory, partitions are in period order; villages are merged by ts.
+    per_village: Dict[str, List[Path]] = {}
+    for p in list_partitions(store_root, village_id, lo, hi):
+        per_village.setdefault(p.parent.name, []).append(p)
+
+    def _village_stream(parts: List[Path]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for p in reversed(parts) if descending else parts:
+            end = _frozen_end(p)
+            if end:
+                yield from _scan(p, end, _seek_offset(p, lo), descending, lo, hi)
+
+    streams = [_village_stream(parts) for _, parts in sorted(per_village.items())]
+    merged = heapq.merge(*streams, key=lambda kv: kv[0], reverse=descending) if len(streams) > 1 else (streams[0] if streams else iter(()))
+    for _, ev in merged:
+        if _matches(ev, None, action, actor, lo, hi):
+            yield ev
+
+
+def query_audit(
+    store_root: Path,
+    village_id: Optional[str] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Optional[int] = 100,
+    descending: bool = False,
+) -> List[Dict[str, Any]]:
+    """Up to *limit* events of :func:`iter_audit_query`."""
+    out: List[Dict[str, Any]] = []
+    for ev in iter_audit_query(store_root, village_id, action, actor, since, until, descending):
+        if limit is not None and len(out) >= limit:
+            break
+        out.append(ev)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Migration
+# ---------------------------------------------------------------------------
+
+_MIGRATE_BUFFER_BYTES = 8 * 1024 * 1024
+
+
+def migrate_audit_log(store_root: Path, granularity: str = "month") -> Dict[str, Any]:
+    """Split the single audit log into partitions and switch the store to them.
+
+    Partitions are built in a scratch directory and moved into place before
+    ``layout.json`` is written; the single log is then archived, under its
+    write lock so that writers racing the switch are redirected to the
+    partitions.  Rows keep their chain fields; each village's chain head is
+    carried over, and counters are rebuilt from the partitions.
+    """
+    from .audit import flush_audit
+    from .audit_chain import GENESIS, ChainHead, save_partitioned_head
+    from .audit_counters import rebuild_audit_counters
+
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"unknown granularity: {granularity}")
+    store_root = Path(store_root)
+    if layout_path(store_root).exists():
+        raise ValueError("audit log is already partitioned")
+    final = partitions_root(store_root)
+    if final.exists():
+        raise ValueError(f"{final} exists without layout.json; remove it (interrupted migration) and retry")
+    flush_audit(store_root)
+
+    log = _single_log(store_root)
+    scratch = final.with_name("partitions.migrating")
+    if scratch.exists():
+        shutil.rmtree(scratch)
+    events = skipped = 0
+    touched: set = set()
+    with locked_open(log, "ab") as lock:
+        with log.open("rb") as f:
+            buf: Dict[Path, List[Dict[str, Any]]] = {}
+            floors: Dict[Optional[str], str] = {}
+            heads: Dict[Optional[str], Tuple[int, str]] = {}
+            size = 0
+            for raw in f:
+                if not raw.endswith(b"\n") or not raw.strip():
+                    skipped += bool(raw.strip())
+                    continue
+                try:
+                    row = json.loads(raw)
+                except Exception:
+                    skipped += 1
+                    continue
+                vid = row.get("village_id")
+                # Same forward-only routing as the writer, so chain order stays file order.
+                period = period_of(row, granularity)
+                floor = floors.get(vid)
+                if floor is not None and period != UNDATED and period < floor:
+                    period = floor
+                elif period != UNDATED:
+                    floors[vid] = period
+                if isinstance(row.get("seq"), int) and row.get("chain"):
+                    heads[vid] = (row["seq"], row["chain"])
+                target = scratch / (vid or GLOBAL_PARTITION) / f"{period}.jsonl"
+                buf.setdefault(target, []).append(row)
+                touched.add(target)
+                events += 1
+                size += len(raw)
+                if size >= _MIGRATE_BUFFER_BYTES:
+                    for p2, rows in buf.items():
+                        append_partition(p2, rows)
+                    buf, size = {}, 0
+            for p2, rows in buf.items():
+                append_partition(p2, rows)
+        if not scratch.exists():
+            scratch.mkdir(parents=True)
+        scratch.replace(final)
+        for vid, floor in floors.items():
+            newest = partition_path(store_root, vid, floor)
+            seq, chain = heads.get(vid, (0, GENESIS))
+            save_partitioned_head(store_root, vid, ChainHead(seq, chain, newest.relative_to(audit_dir(store_root)).as_posix(), newest.stat().st_size))
+        archived = log.with_name(log.name + ".migrated")
+        doc = _write_layout(store_root, granularity, migrated_events=events, migrated_from=archived.name)
+        _LAYOUTS[str(store_root)] = doc
+        log.replace(archived)
+        lock.flush()
+    rebuild_audit_counters(store_root)
+    return {"events": events, "skipped": skipped, "partitions": len(touched), "granularity": granularity, "archived_log": str(archived)}
@@ -15,6 +15,10 @@ Design notes
 - Comparisons produce a ``CheckpointComparisonReport`` that distinguishes
   *policy divergence* from *publication lag*; see ``drift_classes`` for
   the full taxonomy.
+- Checkpoints carry a ``tree_size`` and an RFC 6962 Merkle ``checkpoint_hash``.
+  Given a consistency proof between the two tree sizes (served by the node
+  with the larger log), ``compare_checkpoints`` checks that one log is an
+  append-only extension of the other instead of trusting entry counts.
 - No server-side state is mutated here; this module is a pure client/tool
   surface.  The server endpoint is registered separately in ``server.py``.
 
@@ -34,6 +38,12 @@ Typical usage
 
     peer_artifact = fetch_peer_checkpoint("https://peer.example.org", "ops")
     report = compare_checkpoints(artifact, peer_artifact)
+
+    proof = fetch_peer_consistency_proof(
+        "https://peer.example.org", "ops",
+        first=artifact["tree_size"], second=peer_artifact["tree_size"],
+    )
+    report = compare_checkpoints(artifact, peer_artifact, consistency_proof=proof)
 """
 
 from __future__ import annotations
@@ -44,6 +54,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from links.merkle import verify_consistency
+
 # Optional nacl import – signing is opt-in
 try:
     from nacl.signing import SigningKey as _SigningKey  # type: ignore
@@ -110,7 +122,8 @@ def verify_checkpoint_signature(checkpoint: dict[str, Any], verify_key: Any) ->
     canonical = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
     try:
         from nacl.signing import VerifyKey
-        vk = verify_key if isinstance(verify_key, VerifyKey) else VerifyKey(bytes.fromhex(verify_key))
+        from .key_cache import verify_key as cached_verify_key
+        vk = verify_key if isinstance(verify_key, VerifyKey) else cached_verify_key(bytes.fromhex(verify_key))
         vk.verify(canonical.encode("utf-8"), bytes.fromhex(sig_hex))
         return True, "ok"
     except Exception as exc:  # noqa: BLE001
@@ -210,6 +223,7 @@ class CheckpointComparisonReport:
         drift_class: str,
         status: str,
         notes: list[str],
+        consistency: str = "not_checked",
     ) -> None:
         self.village_id = village_id
         self.compared_at = compared_at
@@ -222,6 +236,7 @@ class CheckpointComparisonReport:
         self.drift_class = drift_class
         self.status = status
         self.notes = notes
+        self.consistency = consistency
 
     def as_dict(self) -> dict[str, Any]:
         return {
@@ -236,12 +251,48 @@ class CheckpointComparisonReport:
             "drift_class": self.drift_class,
             "status": self.status,
             "notes": self.notes,
+            "consistency": self.consistency,
         }
 
 
+def verify_checkpoint_consistency(
+    local: dict[str, Any],
+    peer: dict[str, Any],
+    proof: dict[str, Any],
+) -> tuple[bool, str]:
+    """Check *proof* shows the larger of two checkpoints extends the smaller.
+
+    *proof* is the body of ``GET .../transparency/proof/consistency``; only
+    its ``first``, ``second`` and ``proof`` fields are used.  The roots are
+    taken from the checkpoints themselves, never from the proof.
+
+    Returns ``(True, "ok")`` or ``(False, reason)``.
+    """
+    try:
+        older, newer = sorted((local, peer), key=lambda c: int(c.get("tree_size", c.get("entry_count", 0))))
+        first = int(older.get("tree_size", older.get("entry_count", 0)))
+        second = int(newer.get("tree_size", newer.get("entry_count", 0)))
+        if int(proof.get("first", -1)) != first or int(proof.get("second", -1)) != second:
+            return False, f"proof covers {proof.get('first')}->{proof.get('second')}, checkpoints are {first}->{second}"
+        ok = verify_consistency(
+            first,
+            second,
+            bytes.fromhex(older.get("checkpoint_hash", "")),
+            bytes.fromhex(newer.get("checkpoint_hash", "")),
+            [bytes.fromhex(h) for h in proof.get("proof", [])],
+        )
+    except (TypeError, ValueError) as exc:
+        return False, f"malformed checkpoint or proof: {exc}"
+    if not ok:
+        return False, f"consistency proof {first}->{second} does not match the checkpoint hashes"
+    return True, "ok"
+
+
 def compare_checkpoints(
     local: dict[str, Any],
     peer: dict[str, Any],
+    *,
+    consistency_proof: dict[str, Any] | None = None,
 ) -> CheckpointComparisonReport:
     """Compare two checkpoint artifacts and classify any observed divergence.
 
@@ -254,6 +305,11 @@ def compare_checkpoints(
       governance disagreement
     - ``"unknown"`` — insufficient data to classify
 
+    If *consistency_proof* is given it is checked with
+    :func:`verify_checkpoint_consistency`.  A failed proof means the logs
+    are not prefixes of each other, so an otherwise ``aligned`` or
+    ``publication_lag`` result is raised to ``"history_only_divergence"``.
+
     Returns a :class:`CheckpointComparisonReport`.
     """
     from links.drift_classes import classify_checkpoint_drift  # local import to avoid circularity
@@ -273,6 +329,17 @@ def compare_checkpoints(
         peer_entry_count=peer_count,
     )
 
+    consistency = "not_checked"
+    if consistency_proof is not None:
+        ok, msg = verify_checkpoint_consistency(local, peer, consistency_proof)
+        consistency = "verified" if ok else "failed"
+        if ok:
+            notes.append("Consistency proof verified: the larger log extends the smaller one.")
+        else:
+            notes.append(f"Consistency proof failed: {msg}.")
+            if drift_class in ("aligned", "publication_lag"):
+                drift_class = "history_only_divergence"
+
     status = "aligned" if drift_class == "aligned" else "drift"
 
     return CheckpointComparisonReport(
@@ -287,6 +354,7 @@ def compare_checkpoints(
         drift_class=drift_class,
         status=status,
         notes=notes,
+        consistency=consistency,
     )
 
 
@@ -307,3 +375,32 @@ def write_comparison_report(
         encoding="utf-8",
     )
     return out_path.resolve()
+
+
+def fetch_peer_consistency_proof(
+    base_url: str,
+    village_id: str,
+    *,
+    first: int,
+    second: int | None = None,
+    token: str | None = None,
+) -> dict[str, Any]:
+    """Fetch a consistency proof between two tree sizes from a remote node.
+
+    Calls ``GET <base_url>/villages/<village_id>/transparency/proof/consistency``.
+    The node must hold the larger log; pass the peer's ``tree_size`` as
+    *second* when the peer is ahead.
+    """
+    if not _REQUESTS_AVAILABLE:
+        raise ImportError("requests is required for fetch_peer_consistency_proof")
+
+    url = f"{base_url.rstrip('/')}/villages/{village_id}/transparency/proof/consistency"
+    params: dict[str, Any] = {"first": first}
+    if second is not None:
+        params["second"] = second
+    headers: dict[str, str] = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    resp = _requests.get(url, headers=headers, params=params, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
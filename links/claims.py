@@ -8,9 +8,10 @@ from pathlib import Path
 from typing import Any, Optional
 
 from pydantic import BaseModel, Field
-from nacl.signing import SigningKey, VerifyKey
+from nacl.signing import SigningKey
 from nacl.exceptions import BadSignatureError
 
+from .key_cache import signing_key as cached_signing_key, verify_key_b64
 from .models import Link
 
 
@@ -124,7 +125,7 @@ def load_signing_key(path: Path) -> SigningKey:
         seed = data
     if len(seed) < 32:
         raise ValueError("Signing key seed must be at least 32 bytes (Ed25519).")
-    return SigningKey(seed[:32])
+    return cached_signing_key(seed[:32])
 
 
 def sign_bundle(bundle: ClaimBundle, signing_key: SigningKey) -> ClaimBundle:
@@ -145,7 +146,7 @@ def verify_bundle(bundle: ClaimBundle) -> bool:
     expected_id = compute_bundle_id(payload)
     if bundle.bundle_id != expected_id:
         return False
-    vk = VerifyKey(base64.b64decode(bundle.public_key))
+    vk = verify_key_b64(bundle.public_key)
     try:
         vk.verify(canonical_json(payload), base64.b64decode(bundle.signature))
         return True
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import List, Optional
 from datetime import datetime, timezone
 import json
 import base64
@@ -13,11 +14,13 @@ from links.server import create_app
 from links.policy_updates import VillagePolicyUpdate, verify_update_any, add_signature, sign_update_legacy, build_update, compute_policy_hash
 from links.policy_diff import diff_policies
 from links.policy_feed import PolicyFeedManifest, fill_history_gaps, verify_manifest_against_policy
-from links.reconcile import reconcile, write_reconciliation_report
+from links.lineage import load_lineage_index, rebuild_lineage_index
+from links.reconcile import reconcile, remote_view_from_diff, write_reconciliation_report
+from links.set_reconcile import http_range_exchange, reconcile_hash_sets
 from links.trust_anchors import TrustAnchorEntry, add_anchor_signature, verify_anchor_entry_any
 from links.policy_feed import signer_allowed
 from links.validate import validate_village_id
-from links.transparency import write_transparency_checkpoint
+from links.transparency import sign_tree_head, verify_transparency_state, write_transparency_checkpoint
 
 from links.norms import (
     init_norm_set,
@@ -104,7 +107,8 @@ def policy_pull(url: str, village_id: str, apply: bool = True, since: str = None
     """
     Pull policy updates from a remote node using:
       1) Signed manifest (if available)
-      2) Paginated updates (large-history optimization)
+      2) Range-based set reconciliation, fetching only missing updates by hash
+      3) Paginated updates (large-history optimization) when (2) is unavailable
 
     Reconcile rule (default): select latest update by (created_at, policy_hash).
     Also prints fork detection signals when previous_policy_hash links diverge.
@@ -124,52 +128,70 @@ def policy_pull(url: str, village_id: str, apply: bool = True, since: str = None
     except Exception:
         manifest = None
 
-    # 2) Fetch updates (paginated if supported)
-    updates = []
+    local_updates = []
     try:
-        cursor = None
-        while True:
-            pr = requests.get(
-                f"{base}/villages/{village_id}/policy/updates_page",
-                params={"since": since, "cursor": cursor, "limit": page_limit},
-                headers=headers,
-                timeout=30,
-            )
-            if pr.status_code != 200:
-                raise RuntimeError("updates_page not supported")
-            payload = pr.json()
-            updates.extend([VillagePolicyUpdate.model_validate(u) for u in payload.get("items", [])])
-            cursor = payload.get("next_cursor")
-            if not cursor:
-                break
+        from links.policy_feed import list_policy_updates
+        local_updates = list_policy_updates(Path("data"), village_id)
     except Exception:
-        # fallback: legacy endpoint
-        endpoint = f"{base}/villages/{village_id}/policy/updates"
-        params = {}
-        if since:
-            params["since"] = since
-        r = requests.get(endpoint, params=params, headers=headers, timeout=30)
-        r.raise_for_status()
-        updates = [VillagePolicyUpdate.model_validate(u) for u in r.json()]
+        local_updates = []
+    local_hashes = {u.policy_hash for u in local_updates}
+
+    # 2) Fetch updates: range-based set reconciliation first (traffic proportional
+    #    to the difference), then paginated updates, then the legacy full list.
+    updates = None
+    if not since:
+        try:
+            missing_local, missing_remote, _ = reconcile_hash_sets(local_hashes, http_range_exchange(base, village_id, headers=headers))
+            fetched = []
+            for h in sorted(missing_local):
+                resp = requests.get(f"{base}/villages/{village_id}/policy/by_hash/{h}", headers=headers, timeout=30)
+                resp.raise_for_status()
+                fetched.append(VillagePolicyUpdate.model_validate(resp.json()))
+            updates = remote_view_from_diff(local_updates, fetched, missing_remote)
+        except Exception:
+            updates = None
+
+    if updates is None:
+        updates = []
+        try:
+            cursor = None
+            while True:
+                pr = requests.get(
+                    f"{base}/villages/{village_id}/policy/updates_page",
+                    params={"since": since, "cursor": cursor, "limit": page_limit},
+                    headers=headers,
+                    timeout=30,
+                )
+                if pr.status_code != 200:
+                    raise RuntimeError("updates_page not supported")
+                payload = pr.json()
+                updates.extend([VillagePolicyUpdate.model_validate(u) for u in payload.get("items", [])])
+                cursor = payload.get("next_cursor")
+                if not cursor:
+                    break
+        except Exception:
+            # fallback: legacy endpoint
+            endpoint = f"{base}/villages/{village_id}/policy/updates"
+            params = {}
+            if since:
+                params["since"] = since
+            r = requests.get(endpoint, params=params, headers=headers, timeout=30)
+            r.raise_for_status()
+            updates = [VillagePolicyUpdate.model_validate(u) for u in r.json()]
 
     if not updates:
         typer.echo("No updates.")
         raise typer.Exit(code=0)
 
-    # Verify signature material (if any) for each update.
+    # Verify signature material (if any) for each update not already in the local feed.
     for u in updates:
+        if u.policy_hash in local_hashes:
+            continue
         has_any = bool(u.signatures) or bool(u.public_key) or bool(u.signature)
         if has_any and not verify_update_any(u):
             typer.echo(f"Invalid signature material for update policy_hash={u.policy_hash}")
             raise typer.Exit(code=1)
 
-    local_updates = []
-    try:
-        from links.policy_feed import list_policy_updates
-        local_updates = list_policy_updates(Path("data"), village_id)
-    except Exception:
-        local_updates = []
-
     current_policy = {}
     if load_village:
         try:
@@ -190,7 +212,6 @@ def policy_pull(url: str, village_id: str, apply: bool = True, since: str = None
             typer.echo(f"Manifest validation failed: {manifest_msg}")
             raise typer.Exit(code=1)
 
-    local_hashes = {u.policy_hash for u in local_updates}
     def _fetch_update_by_hash(policy_hash: str):
         try:
             resp = requests.get(f"{base}/villages/{village_id}/policy/by_hash/{policy_hash}", headers=headers, timeout=30)
@@ -206,7 +227,11 @@ def policy_pull(url: str, village_id: str, apply: bool = True, since: str = None
         fetch_update_by_hash=_fetch_update_by_hash,
     )
 
-    report = reconcile(local_updates, updates, village_id=village_id)
+    try:
+        local_index = load_lineage_index(Path("data"), village_id)
+    except Exception:
+        local_index = None
+    report = reconcile(local_updates, updates, village_id=village_id, local_index=local_index)
     chosen_hash = report.selected_head
     chosen = next((u for u in updates if u.policy_hash == chosen_hash), None)
     if chosen is None:
@@ -333,6 +358,23 @@ def policy_reconcile(local: Path, remote: Path, village_id: str, out: Path = typ
     typer.echo(json.dumps(report.to_dict(), indent=2))
     typer.echo(f"Wrote {out}")
 
+@policy.command("lineage")
+def policy_lineage(village_id: str, rebuild: bool = typer.Option(False, help="Rebuild the index from stored update files"), data_root: Path = Path("data")):
+    """
+    Show the persisted policy lineage index for a village (head, forks, missing parents).
+    """
+    validate_village_id(village_id)
+    idx = rebuild_lineage_index(data_root, village_id) if rebuild else load_lineage_index(data_root, village_id)
+    payload = {
+        "village_id": village_id,
+        "count": len(idx),
+        "head": idx.head,
+        "head_branch_length": idx.branch_length(idx.head) if idx.head else 0,
+        "fork_points": idx.fork_points(),
+        "lineage_issues": idx.lineage_issues(),
+    }
+    typer.echo(json.dumps(payload, indent=2))
+
 @policy.command("drift")
 def policy_drift(url: str, village_id: str, token: str = None, out: Path = typer.Option(None, help="Optional JSON output path")):
     """
@@ -383,51 +425,218 @@ audit = typer.Typer(help="Audit trails, exports, and digests.")
 app.add_typer(audit, name="audit")
 
 @audit.command("export")
-def audit_export_cmd(village_id: str, fmt: str = typer.Option("json", help="json|csv"), out: Path = typer.Option(Path("audit_export"), help="Output dir"), sign: bool = typer.Option(True, help="Sign digest with node key (env LINKS_NODE_SIGNING_KEY_B64)")):
-    """Export audit log for a village to JSON or CSV and optionally sign the digest."""
-    from .audit_export import export_audit_json, export_audit_csv, sign_digest_hex
+def audit_export_cmd(
+    village_id: str,
+    fmt: str = typer.Option("json", help="json|csv"),
+    out: Path = typer.Option(Path("audit_export"), help="Output dir"),
+    sign: bool = typer.Option(True, help="Sign digest with node key (env LINKS_NODE_SIGNING_KEY_B64)"),
+    after_seq: int = typer.Option(0, "--after-seq", help="Only events after this chain position (chain.to_seq of a previous export)"),
+    since: Path = typer.Option(None, "--since", help="Manifest of a previous export: only export what was added after it"),
+):
+    """Export audit log for a village to JSON or CSV and optionally sign the digest.
+
+    Every export writes ``<file>.manifest.json``; pass it to the next export
+    with ``--since`` for a delta that chains onto it.
+    """
+    from .audit import flush_audit
+    from .audit_export import sign_digest_hex
+    from .audit_store import audit_log_exists
+    from .deltas import export_audit, load_manifest
     from .keys import load_signing_key_from_env
-    from .file_lock import locked_open
     from .validate import validate_village_id
     import json as _json
 
     validate_village_id(village_id)
+    if fmt not in {"json", "csv"}:
+        raise typer.BadParameter("fmt must be json or csv")
     store_root = Path("data/store")
-    audit_path = store_root / "audit" / "audit.log.jsonl"
-    if not audit_path.exists():
+    flush_audit(store_root)
+    if not audit_log_exists(store_root):
         raise typer.Exit(code=2)
 
+    prev = load_manifest(since) if since is not None else None
+    if prev is not None:
+        after_seq = int(prev["position"]["seq"])
+    sk = None
+    if sign:
+        try:
+            sk = load_signing_key_from_env()
+        except Exception:
+            sk = None
+
     out.mkdir(parents=True, exist_ok=True)
-    filtered = out / f"{village_id}.audit.filtered.jsonl"
-    with locked_open(audit_path, "r") as f_in, locked_open(filtered, "w") as f_out:
-        for line in f_in:
-            try:
-                ev = _json.loads(line)
-            except Exception:
-                continue
-            if ev.get("village_id") == village_id:
-                f_out.write(_json.dumps(ev, ensure_ascii=False, sort_keys=True) + "\n")
-
-    target = out / f"{village_id}.audit.{fmt}"
-    if fmt == "json":
-        digest, count = export_audit_json(filtered, target)
-    elif fmt == "csv":
-        digest, count = export_audit_csv(filtered, target)
-    else:
-        raise typer.BadParameter("fmt must be json or csv")
+    target = out / (f"{village_id}.audit.after-{after_seq}.{fmt}" if after_seq else f"{village_id}.audit.{fmt}")
+    manifest = export_audit(store_root, village_id, target, fmt, since=prev, after_seq=after_seq, signing_key=sk)
+    digest, count = manifest["payload_sha256"], manifest["counts"]["events"]
 
     sig = None
-    if sign:
+    if sk is not None:
+        sig = sign_digest_hex(digest, sk)
+        (target.with_suffix(target.suffix + ".sha256")).write_text(digest + "\n", encoding="utf-8")
+        (target.with_suffix(target.suffix + ".sighex")).write_text(sig + "\n", encoding="utf-8")
+
+    chain = {"after_seq": after_seq, "to_seq": manifest["position"]["seq"], "to_chain": manifest["position"]["chain"]}
+    typer.echo(_json.dumps({"village_id": village_id, "format": fmt, "count": count, "sha256": digest, "signed": bool(sig), "path": str(target), "chain": chain, "manifest_seq": manifest["seq"]}, indent=2))
+
+
+@audit.command("import-delta")
+def audit_import_delta_cmd(
+    manifest: Path = typer.Argument(..., help="Manifest of an audit export (<file>.manifest.json)"),
+    mirror: Path = typer.Option(..., "--mirror", help="Local JSONL mirror to append the exported events to"),
+):
+    """Apply an audit export to a local mirror; deltas must be applied in manifest order."""
+    from .deltas import DeltaOrderError, apply_audit_delta
+
+    try:
+        n = apply_audit_delta(manifest, mirror)
+    except DeltaOrderError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=3)
+    typer.echo(json.dumps({"mirror": str(mirror), "appended": n}))
+
+
+@audit.command("tail")
+def audit_tail_cmd(
+    limit: int = typer.Option(20, "--limit", "-n", help="Number of events to show"),
+    village_id: str = typer.Option("", "--village", help="Only show events for this village"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Print the most recent audit events (JSONL, oldest first) without reading the whole log."""
+    from .audit_store import partition_layout, query_audit
+    from .file_lock import locked_open
+    from .io import LogTail
+
+    if partition_layout(store_root) is not None:
+        if village_id:
+            validate_village_id(village_id)
+        picked_events = query_audit(store_root, village_id or None, limit=limit, descending=True)
+        for ev in reversed(picked_events):
+            typer.echo(json.dumps(ev, ensure_ascii=False))
+        return
+    audit_path = store_root / "audit" / "audit.log.jsonl"
+    if not audit_path.exists():
+        raise typer.Exit(code=2)
+    with locked_open(audit_path, "rb", shared=True):
+        view = LogTail(audit_path)
+    if not village_id:
+        for line in view.iter_range(view.last(limit)):
+            typer.echo(line.decode("utf-8").rstrip("\n"))
+        return
+    validate_village_id(village_id)
+    picked: List[str] = []
+    for _, line in view.iter_reverse():
+        if len(picked) >= limit:
+            break
         try:
-            sk = load_signing_key_from_env()
-            sig = sign_digest_hex(digest, sk)
-            (target.with_suffix(target.suffix + ".sha256")).write_text(digest + "\n", encoding="utf-8")
-            (target.with_suffix(target.suffix + ".sighex")).write_text(sig + "\n", encoding="utf-8")
+            ev = json.loads(line)
         except Exception:
-            pass
+            continue
+        if ev.get("village_id") == village_id:
+            picked.append(line.decode("utf-8").rstrip("\n"))
+    for line in reversed(picked):
+        typer.echo(line)
+
+
+@audit.command("counters")
+def audit_counters_cmd(
+    village_id: str = typer.Option(None, "--village", help="Only this village"),
+    day: str = typer.Option(None, "--day", help="Only this UTC day (YYYY-MM-DD)"),
+    rebuild: bool = typer.Option(False, "--rebuild", help="Recompute all counters from the full audit log first"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Show per-village, per-UTC-day audit action counters (used by submission quotas)."""
+    from .audit_counters import daily_counts, rebuild_audit_counters
+
+    if village_id:
+        validate_village_id(village_id)
+    if rebuild:
+        typer.echo(f"Rebuilt counters from {rebuild_audit_counters(store_root)} events", err=True)
+    typer.echo(json.dumps(daily_counts(store_root, village_id, day), indent=2, sort_keys=True))
+
+
+@audit.command("query")
+def audit_query_cmd(
+    village_id: str = typer.Option(None, "--village", help="Only this village"),
+    action: str = typer.Option(None, "--action", help="Only this action (e.g. quarantine.approve)"),
+    actor: str = typer.Option(None, "--actor", help="Only events by this actor"),
+    since: str = typer.Option(None, "--since", help="ISO date/time, inclusive"),
+    until: str = typer.Option(None, "--until", help="ISO date/time, exclusive"),
+    limit: int = typer.Option(100, "--limit", "-n", help="Maximum events to print"),
+    desc: bool = typer.Option(False, "--desc", help="Newest first"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Print audit events matching the filters as JSONL (partitioned storage reads only matching partitions)."""
+    from .audit_store import iter_audit_query
+
+    if village_id:
+        validate_village_id(village_id)
+    try:
+        events = iter_audit_query(store_root, village_id, action, actor, since, until, descending=desc)
+        for i, ev in enumerate(events):
+            if i >= limit:
+                break
+            typer.echo(json.dumps(ev, ensure_ascii=False))
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
+@audit.command("checkpoint")
+def audit_checkpoint_cmd(
+    village_id: str = typer.Option(..., "--village", help="Village whose chain head to checkpoint"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Record a signed checkpoint of the village's audit hash chain now (key: LINKS_NODE_SIGNING_KEY_B64)."""
+    from .audit import flush_audit
+    from .audit_chain import record_checkpoint
+    from .keys import load_signing_key_from_env
+
+    validate_village_id(village_id)
+    flush_audit(store_root)
+    try:
+        sk = load_signing_key_from_env()
+    except ValueError:
+        sk = None
+        typer.echo("LINKS_NODE_SIGNING_KEY_B64 not set; checkpoint is unsigned", err=True)
+    cp = record_checkpoint(store_root, village_id, sk)
+    if cp is None:
+        typer.echo("no chained audit events for this village", err=True)
+        raise typer.Exit(code=2)
+    typer.echo(json.dumps(cp, indent=2, sort_keys=True))
+
+
+@audit.command("verify")
+def audit_verify_cmd(
+    village_id: str = typer.Option(..., "--village", help="Village whose chain to verify"),
+    from_seq: int = typer.Option(0, "--from-seq", help="Checkpoint to start from (0 = genesis)"),
+    to_seq: int = typer.Option(None, "--to-seq", help="Checkpoint to end at (default: latest)"),
+    public_key: str = typer.Option(None, "--public-key", help="Require checkpoints signed by this base64 Ed25519 key (default: LINKS_AUDIT_CHECKPOINT_PUBLIC_KEY_B64, else the node key)"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Re-hash the audit events between two chain checkpoints."""
+    from .audit_chain import checkpoint_verify_key, verify_range
+
+    validate_village_id(village_id)
+    public_key = public_key or checkpoint_verify_key()
+    r = verify_range(store_root, village_id, from_seq, to_seq, public_key)
+    typer.echo(json.dumps({"ok": r.ok, "reason": r.reason, "from_seq": r.from_seq, "to_seq": r.to_seq, "checked": r.checked, "public_key": public_key}, indent=2))
+    if not r.ok:
+        raise typer.Exit(code=1)
+
 
-    typer.echo(_json.dumps({"village_id": village_id, "format": fmt, "count": count, "sha256": digest, "signed": bool(sig), "path": str(target)}, indent=2))
+@audit.command("migrate")
+def audit_migrate_cmd(
+    granularity: str = typer.Option("month", "--granularity", help="Partition period: month|day"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root containing audit/"),
+):
+    """Split the single audit log into per-village, per-period partitions (run with the node stopped)."""
+    from .audit_store import migrate_audit_log
 
+    try:
+        summary = migrate_audit_log(store_root, granularity)
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=2)
+    typer.echo(json.dumps(summary, indent=2, sort_keys=True))
 
 
 # -----------------------------
@@ -437,47 +646,35 @@ registry = typer.Typer(help="Import/export village registry artifacts.")
 app.add_typer(registry, name="registry")
 
 @registry.command("export")
-def registry_export(village_id: str, out: Path = typer.Option(Path("registry_export.json"), help="Output JSON file")):
-    """Export a minimal trust-registry artifact (members, revocations, anchors, policy head)."""
-    from .validate import validate_village_id
-    from .villages import load_village, _members_path, _revocations_path
+def registry_export(
+    village_id: str,
+    out: Path = typer.Option(Path("registry_export.json"), help="Output JSON file"),
+    since: Path = typer.Option(None, "--since", help="Manifest of a previous export: only export what was added after it"),
+):
+    """Export a trust-registry artifact (members, revocations, anchors, policy head) and its manifest."""
+    from .deltas import export_registry, load_manifest, manifest_path_for
+    from .keys import load_signing_key_from_env
     validate_village_id(village_id)
-    root = Path("data")
-    v = load_village(root, village_id)
-    members = _members_path(root, village_id).read_text(encoding="utf-8").splitlines()
-    revocations = _revocations_path(root, village_id).read_text(encoding="utf-8").splitlines()
-    anchors_path = Path("data/store") / "anchors" / village_id / "anchors.jsonl"
-    anchors = []
-    if anchors_path.exists():
-        anchors = [json.loads(l) for l in anchors_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-    payload = {
-        "format": "links.external_registry.v1",
-        "village_id": village_id,
-        "policy": v.policy.model_dump(),
-        "members": [m for m in members if m.strip()],
-        "revocations": [r for r in revocations if r.strip()],
-        "trust_anchors": anchors,
-    }
-    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
-    typer.echo(str(out))
+    try:
+        sk = load_signing_key_from_env()
+    except Exception:
+        sk = None
+    m = export_registry(Path("data"), village_id, out, since=load_manifest(since) if since is not None else None, signing_key=sk)
+    typer.echo(json.dumps({"path": str(out), "manifest": str(manifest_path_for(out)), "seq": m["seq"], "base": m["base"], "counts": m["counts"]}))
 
 @registry.command("import")
 def registry_import(path: Path):
-    """Import a minimal trust-registry artifact into local data/ (best-effort)."""
-    payload = json.loads(path.read_text(encoding="utf-8"))
-    village_id = payload.get("village_id")
-    from .validate import validate_village_id
-    validate_village_id(village_id)
-    root = Path("data")
-    # write village policy
-    from .villages import save_village, Village
-    v = Village(village_id=village_id, policy=payload.get("policy", {}), capabilities={})
-    save_village(root, v)
-    # members/revocations
-    (root / "villages" / village_id).mkdir(parents=True, exist_ok=True)
-    (root / "villages" / village_id / "members.jsonl").write_text("\n".join(payload.get("members", [])) + "\n", encoding="utf-8")
-    (root / "villages" / village_id / "revocations.jsonl").write_text("\n".join(payload.get("revocations", [])) + "\n", encoding="utf-8")
-    typer.echo(f"Imported village {village_id}")
+    """Import a trust-registry artifact into local data/: a base replaces state, a delta appends to it."""
+    from .deltas import DeltaOrderError, import_registry
+    try:
+        summary = import_registry(Path("data"), path)
+    except DeltaOrderError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=3)
+    except ValueError as e:
+        typer.echo(f"Rejected registry artifact: {e}", err=True)
+        raise typer.Exit(code=2)
+    typer.echo(f"Imported village {summary['village_id']} ({summary['members']} members, {summary['revocations']} revocations, {summary['trust_anchors']} anchors)")
 
 
 # -----------------------------
@@ -487,9 +684,18 @@ drift = typer.Typer(help="Drift checks and alert hooks.")
 app.add_typer(drift, name="drift")
 
 @drift.command("checkpoint")
-def drift_checkpoint(village_id: str, out: Path = typer.Option(None, help="Optional output path for transparency checkpoint JSON")):
+def drift_checkpoint(
+    village_id: str,
+    out: Path = typer.Option(None, help="Optional output path for transparency checkpoint JSON"),
+    verify: bool = typer.Option(False, "--verify", help="Recompute from the full log and fail if the maintained checkpoint state disagrees"),
+):
     """Write a transparency checkpoint artifact for a village."""
     validate_village_id(village_id)
+    if verify:
+        ok, details = verify_transparency_state(Path("data/store"), village_id)
+        if not ok:
+            typer.echo(json.dumps(details, indent=2, sort_keys=True))
+            raise typer.Exit(code=1)
     if out is None:
         stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
         out = Path("artifacts/transparency") / village_id / f"checkpoint.{stamp}.json"
@@ -497,6 +703,15 @@ def drift_checkpoint(village_id: str, out: Path = typer.Option(None, help="Optio
     typer.echo(f"Wrote {out}")
 
 
+@drift.command("tree-head")
+def drift_tree_head(village_id: str, force: bool = typer.Option(False, "--force", help="Sign even if the latest head already covers the log")):
+    """Sign the current transparency tree head with the node key (env LINKS_NODE_SIGNING_KEY_B64)."""
+    from .keys import load_signing_key_from_env
+    validate_village_id(village_id)
+    sth = sign_tree_head(Path("data/store"), village_id, load_signing_key_from_env(), force=force)
+    typer.echo(json.dumps(sth, indent=2, sort_keys=True))
+
+
 @drift.command("check")
 def drift_check(village_id: str, remote_base: str = typer.Option(..., help="Remote node base URL"), webhook: str = typer.Option("", help="Optional webhook URL for alerts")):
     """Compare local policy head vs remote manifest head and emit a severity classification."""
@@ -527,8 +742,335 @@ def drift_check(village_id: str, remote_base: str = typer.Option(..., help="Remo
     report = {"village_id": village_id, "local_head": local_head, "remote_head": remote_head, "drift": drifted, "forks": forks, "severity": severity}
     typer.echo(json.dumps(report, indent=2))
 
-    if webhook:
-        try:
-            requests.post(webhook, json=report, timeout=10)
-        except Exception:
-            pass
+    # Alerts go through the durable outbox.  Only this check's own alerts are delivered before
+    # exiting, each POST bounded by a short timeout; anything that fails (and any older backlog)
+    # stays queued for `links notify worker` (or the server) to retry.
+    from .notify import NotificationOutbox, enqueue_event
+    outbox = NotificationOutbox(Path("data/store"), send_timeout=5.0)
+    ids = [outbox.enqueue(webhook, "drift.check", report)] if webhook else []
+    ids += enqueue_event(Path("data/store"), "drift.check", report)
+    if ids:
+        counts = outbox.drain(ids=ids)
+        if counts["retried"] or counts["dead"]:
+            typer.echo(f"Alert delivery failed; {counts['retried']} notification(s) queued for retry, {counts['dead']} dead-lettered", err=True)
+
+
+@drift.command("fleet")
+def drift_fleet(
+    inventory: Path = typer.Option(None, "--inventory", help="JSON inventory of peers and villages"),
+    peer: List[str] = typer.Option(None, "--peer", help="Peer base URL (repeatable; alternative to --inventory)"),
+    village: List[str] = typer.Option(None, "--village", help="Village ID (repeatable; alternative to --inventory)"),
+    token: str = typer.Option(None, help="Bearer token for --peer entries"),
+    per_peer: int = typer.Option(8, "--per-peer", help="Maximum concurrent requests per peer"),
+    timeout: float = typer.Option(10.0, help="Per-request timeout in seconds"),
+    scan_timeout: float = typer.Option(None, "--scan-timeout", help="Overall scan budget in seconds (default 3x --timeout)"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Local store root"),
+    out: Path = typer.Option(None, help="Optional JSON output path"),
+):
+    """Scan peers x villages concurrently and write one drift matrix report."""
+    from .fleet import FleetInventory, scan_fleet
+    if inventory is not None:
+        inv = FleetInventory.from_file(inventory)
+    elif peer and village:
+        inv = FleetInventory.from_dict({"villages": list(village), "peers": [{"url": p, "token": token} for p in peer]})
+    else:
+        raise typer.BadParameter("Provide --inventory or at least one --peer and --village")
+    report = scan_fleet(store_root, inv, per_peer_limit=per_peer, request_timeout=timeout, scan_timeout=scan_timeout)
+    if out is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        out = Path("artifacts/drift/fleet") / f"fleet.{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    typer.echo(json.dumps({"most_severe": report["rollups"]["most_severe"], "counts": report["rollups"]["counts"], "duration_seconds": report["duration_seconds"], "path": str(out)}, indent=2))
+
+
+@drift.command("monitor")
+def drift_monitor(
+    inventory: Path = typer.Option(None, "--inventory", help="JSON inventory of peers and villages"),
+    peer: List[str] = typer.Option(None, "--peer", help="Peer base URL (repeatable; alternative to --inventory)"),
+    village: List[str] = typer.Option(None, "--village", help="Village ID (repeatable; alternative to --inventory)"),
+    token: str = typer.Option(None, help="Bearer token for --peer entries"),
+    interval: float = typer.Option(60.0, help="Seconds between checks of one pair"),
+    jitter: float = typer.Option(0.1, help="Fractional +/- spread applied to each interval"),
+    max_backoff: float = typer.Option(900.0, "--max-backoff", help="Cap in seconds for exponential backoff of failing pairs"),
+    timeout: float = typer.Option(10.0, help="Per-request timeout in seconds"),
+    concurrency: int = typer.Option(16, help="Maximum checks run at once"),
+    state: Path = typer.Option(Path("data/store/drift/monitor_state.json"), help="Persisted monitor state (alerts.jsonl is written alongside)"),
+    metrics_port: int = typer.Option(0, "--metrics-port", help="Serve /healthz and /metrics on this port (0 = off)"),
+    webhook: str = typer.Option("", help="Optional webhook URL for drift-class transition alerts"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Local store root"),
+):
+    """Run a long-lived drift monitor that alerts only on drift class transitions."""
+    from .drift_monitor import DriftMonitor, MonitorConfig
+    from .fleet import FleetInventory
+    if inventory is not None:
+        inv = FleetInventory.from_file(inventory)
+    elif peer and village:
+        inv = FleetInventory.from_dict({"villages": list(village), "peers": [{"url": p, "token": token} for p in peer]})
+    else:
+        raise typer.BadParameter("Provide --inventory or at least one --peer and --village")
+
+    from .notify import NotificationOutbox, NotificationWorker, enqueue_event
+
+    def sink(alert):
+        if webhook:
+            NotificationOutbox(store_root).enqueue(webhook, "drift.transition", alert)
+        enqueue_event(store_root, "drift.transition", alert)
+
+    # The monitor is long-lived: deliver its alerts itself rather than rely on a separate worker.
+    NotificationWorker(NotificationOutbox(store_root)).start()
+
+    cfg = MonitorConfig(interval_seconds=interval, jitter=jitter, max_backoff_seconds=max_backoff, request_timeout=timeout, concurrency=concurrency, state_path=state)
+    mon = DriftMonitor(store_root, inv, cfg, alert_sink=sink)
+    if metrics_port:
+        mon.serve_metrics(metrics_port)
+    typer.echo(f"Monitoring {len(mon.pairs)} peer/village pairs every ~{interval}s (state: {state})")
+    try:
+        mon.run()
+    except KeyboardInterrupt:
+        mon.save_state()
+        typer.echo("Stopped")
+
+
+# -----------------------------
+# Notification outbox
+# -----------------------------
+notify = typer.Typer(help="Durable outbound webhook notifications.")
+app.add_typer(notify, name="notify")
+
+@notify.command("status")
+def notify_status(store_root: Path = typer.Option(Path("data/store"), "--store-root")):
+    """Show outbox depth, oldest pending age and delivery latency."""
+    from .notify import NotificationOutbox
+    typer.echo(json.dumps(NotificationOutbox(store_root).stats(), indent=2, sort_keys=True))
+
+
+@notify.command("drain")
+def notify_drain(store_root: Path = typer.Option(Path("data/store"), "--store-root"), batch_size: int = typer.Option(50, "--batch-size")):
+    """Deliver due notifications once and exit."""
+    from .notify import NotificationOutbox
+    typer.echo(json.dumps(NotificationOutbox(store_root, batch_size=batch_size).drain(), sort_keys=True))
+
+
+@notify.command("worker")
+def notify_worker(
+    store_root: Path = typer.Option(Path("data/store"), "--store-root"),
+    batch_size: int = typer.Option(50, "--batch-size", help="Maximum notifications per POST to one destination"),
+    max_attempts: int = typer.Option(8, "--max-attempts", help="Attempts before a notification is dead-lettered"),
+    poll: float = typer.Option(2.0, help="Seconds between drain passes"),
+):
+    """Drain the outbox continuously until interrupted."""
+    import time as _time
+    from .notify import NotificationOutbox
+    outbox = NotificationOutbox(store_root, batch_size=batch_size, max_attempts=max_attempts)
+    try:
+        while True:
+            counts = outbox.drain()
+            if any(counts.values()):
+                typer.echo(json.dumps(counts, sort_keys=True))
+            _time.sleep(poll)
+    except KeyboardInterrupt:
+        typer.echo("Stopped")
+
+
+@notify.command("retry-dead")
+def notify_retry_dead(store_root: Path = typer.Option(Path("data/store"), "--store-root"), destination: str = typer.Option("", help="Only this destination URL")):
+    """Re-queue dead-lettered notifications."""
+    from .notify import NotificationOutbox
+    typer.echo(f"Re-queued {NotificationOutbox(store_root).retry_dead(destination or None)} notifications")
+
+
+# -----------------------------
+# Gossip propagation
+# -----------------------------
+gossip = typer.Typer(help="Gossip-style policy feed propagation between nodes.")
+app.add_typer(gossip, name="gossip")
+
+@gossip.command("run")
+def gossip_run(
+    peer: List[str] = typer.Option(..., "--peer", help="Peer base URL (repeatable)"),
+    village: List[str] = typer.Option(..., "--village", help="Village ID to gossip (repeatable)"),
+    fanout: int = typer.Option(2, help="Peers contacted per round"),
+    interval: float = typer.Option(30.0, help="Seconds between rounds"),
+    rounds: int = typer.Option(0, help="Number of rounds to run (0 = run until interrupted)"),
+    token: str = typer.Option(None, help="Bearer token for peer access"),
+    data_root: Path = typer.Option(Path("data"), help="Local PolicyMesh data root"),
+):
+    """Periodically exchange feed summaries with random peers and fetch only missing updates."""
+    from .gossip import GossipConfig, GossipNode
+    for v in village:
+        validate_village_id(v)
+    node = GossipNode(data_root, GossipConfig(peers=list(peer), village_ids=list(village), fanout=fanout, interval_seconds=interval, token=token))
+    try:
+        node.run(rounds=rounds or None)
+    except KeyboardInterrupt:
+        pass
+    typer.echo(json.dumps(node.metrics.to_dict(), indent=2))
+
+
+# -----------------------------
+# Membership maintenance
+# -----------------------------
+members = typer.Typer(help="Village membership maintenance.")
+app.add_typer(members, name="members")
+
+@members.command("compact")
+def members_compact(village_id: str, actor: str = typer.Option("operator", help="Actor recorded in the audit log"), data_root: Path = typer.Option(Path("data"), help="Local PolicyMesh data root")):
+    """Fold members.jsonl/revocations.jsonl into snapshots of current membership."""
+    from .villages import compact_membership
+    validate_village_id(village_id)
+    typer.echo(json.dumps(compact_membership(data_root, village_id, actor=actor), indent=2, sort_keys=True))
+
+
+@members.command("revoke")
+def members_revoke(
+    village_id: str,
+    member_id: List[str] = typer.Argument(..., help="Member IDs whose tokens are revoked"),
+    actor: str = typer.Option("operator", help="Actor recorded in the audit log"),
+    reason: str = typer.Option("revoked", help="Revocation reason"),
+    data_root: Path = typer.Option(Path("data"), help="Local PolicyMesh data root"),
+):
+    """Revoke all current tokens of one or more members in a single pass."""
+    from .villages import revoke_members
+    validate_village_id(village_id)
+    typer.echo(json.dumps(revoke_members(data_root, village_id, list(member_id), actor=actor, reason=reason), indent=2, sort_keys=True))
+
+
+# -----------------------------
+# Quarantine review
+# -----------------------------
+quarantine = typer.Typer(help="Review quarantined external bundles.")
+app.add_typer(quarantine, name="quarantine")
+
+
+def _quarantine_selection(store_root: Path, village_id: Optional[str], bundle_ids: List[str], issuer: Optional[str], issuer_key_hash: Optional[str], reason: Optional[str]) -> List[Path]:
+    from .quarantine import quarantine_dir, quarantine_entries
+    if bundle_ids:
+        qd = quarantine_dir(store_root, village_id)
+        return [qd / f"{b}.json" for b in bundle_ids]
+    if issuer is None and issuer_key_hash is None and reason is None:
+        raise typer.BadParameter("give bundle IDs or at least one of --issuer, --issuer-key-hash, --reason")
+    return [e.path(store_root) for e in quarantine_entries(store_root, village_id, issuer=issuer, issuer_key_hash=issuer_key_hash, reason=reason)]
+
+
+@quarantine.command("list")
+def quarantine_list(
+    village_id: str = typer.Option(None, "--village", help="Village quarantine (default: bundles without a village)"),
+    issuer: str = typer.Option(None, "--issuer", help="Only bundles from this issuer ID"),
+    issuer_key_hash: str = typer.Option(None, "--issuer-key-hash", help="Only bundles signed by this key hash"),
+    reason: str = typer.Option(None, "--reason", help="Only bundles whose quarantine reason contains this text"),
+    since: str = typer.Option(None, "--since", help="Quarantined at or after (ISO-8601)"),
+    eligible: bool = typer.Option(False, "--eligible", help="Only bundles marked eligible under the village's current policy"),
+    limit: int = typer.Option(None, "--limit", "-n", help="Maximum entries"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root"),
+    data_root: Path = typer.Option(Path("data"), "--data-root", help="Local PolicyMesh data root"),
+):
+    """List quarantined bundles (JSONL, oldest first) from the quarantine index."""
+    from dataclasses import asdict
+    from .policy_eval import compiled_policy_for_village
+    from .quarantine import quarantine_entries
+    if eligible and not village_id:
+        raise typer.BadParameter("--eligible needs --village")
+    eligible_under = compiled_policy_for_village(data_root, village_id).policy_hash if eligible else None
+    for e in quarantine_entries(store_root, village_id, issuer=issuer, issuer_key_hash=issuer_key_hash, reason=reason, since=since, eligible_under=eligible_under, limit=limit):
+        typer.echo(json.dumps(asdict(e), sort_keys=True))
+
+
+@quarantine.command("approve")
+def quarantine_approve(
+    bundle_ids: List[str] = typer.Argument(None, help="Bundle IDs (or select with --issuer/--issuer-key-hash/--reason)"),
+    village_id: str = typer.Option(None, "--village", help="Village quarantine (default: bundles without a village)"),
+    issuer: str = typer.Option(None, "--issuer", help="Approve every bundle from this issuer ID"),
+    issuer_key_hash: str = typer.Option(None, "--issuer-key-hash", help="Approve every bundle signed by this key hash"),
+    reason: str = typer.Option(None, "--reason", help="Approve every bundle whose quarantine reason contains this text"),
+    workers: int = typer.Option(None, "--workers", help="Verification threads (default LINKS_QUARANTINE_VERIFY_WORKERS)"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root"),
+    data_root: Path = typer.Option(Path("data"), "--data-root", help="Local PolicyMesh data root"),
+):
+    """Re-verify and approve quarantined bundles in one batch."""
+    from .quarantine import approve_quarantine_batch
+    paths = _quarantine_selection(store_root, village_id, bundle_ids or [], issuer, issuer_key_hash, reason)
+    results = approve_quarantine_batch(store_root, paths, villages_root=data_root, workers=workers)
+    for r in results:
+        typer.echo(json.dumps(r.to_dict(), sort_keys=True))
+    if not all(r.ok for r in results):
+        raise typer.Exit(code=1)
+
+
+@quarantine.command("reject")
+def quarantine_reject(
+    bundle_ids: List[str] = typer.Argument(None, help="Bundle IDs (or select with --issuer/--issuer-key-hash/--match-reason)"),
+    reason: str = typer.Option(..., "--reason", help="Rejection reason recorded in the audit log"),
+    village_id: str = typer.Option(None, "--village", help="Village quarantine (default: bundles without a village)"),
+    issuer: str = typer.Option(None, "--issuer", help="Reject every bundle from this issuer ID"),
+    issuer_key_hash: str = typer.Option(None, "--issuer-key-hash", help="Reject every bundle signed by this key hash"),
+    match_reason: str = typer.Option(None, "--match-reason", help="Reject every bundle whose quarantine reason contains this text"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root"),
+):
+    """Move quarantined bundles to rejected/ in one batch."""
+    from .quarantine import reject_quarantine_batch
+    paths = _quarantine_selection(store_root, village_id, bundle_ids or [], issuer, issuer_key_hash, match_reason)
+    for r in reject_quarantine_batch(store_root, paths, village_id, reason):
+        typer.echo(json.dumps(r.to_dict(), sort_keys=True))
+
+
+@quarantine.command("reevaluate")
+def quarantine_reevaluate(
+    village_id: str = typer.Option(..., "--village", help="Village whose quarantine backlog is re-evaluated"),
+    workers: int = typer.Option(None, "--workers", help="Worker threads (default LINKS_QUARANTINE_VERIFY_WORKERS)"),
+    chunk: int = typer.Option(256, "--chunk", help="Bundles evaluated per batch of writes"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report decisions without rejecting or marking bundles"),
+    status: bool = typer.Option(False, "--status", help="Show the outcome of the last background re-evaluation and exit"),
+    actor: str = typer.Option("operator", help="Actor recorded in the audit log"),
+    store_root: Path = typer.Option(Path("data/store"), "--store-root", help="Store root"),
+    data_root: Path = typer.Option(Path("data"), "--data-root", help="Local PolicyMesh data root"),
+):
+    """Reject quarantined bundles the current policy denies and mark the rest eligible."""
+    from .quarantine_reeval import last_background_job, reevaluate_quarantine
+
+    if status:
+        job = last_background_job(store_root, village_id)
+        typer.echo(json.dumps(job, indent=2, sort_keys=True))
+        if job is not None and not job["ok"]:
+            raise typer.Exit(code=1)
+        return
+
+    def _progress(r):
+        typer.echo(f"{r.scanned}/{r.total} scanned, {r.rejected} rejected, {r.eligible} eligible, {r.per_second:.0f} bundles/s", err=True)
+
+    report = reevaluate_quarantine(store_root, village_id, data_root, workers=workers, chunk=chunk, dry_run=dry_run, actor=actor, progress=_progress)
+    typer.echo(json.dumps(report.to_dict(), indent=2, sort_keys=True))
+
+
+# -----------------------------
+# Trust anchors
+# -----------------------------
+@anchors.command("state")
+def anchors_state(
+    village_id: str,
+    key_hash: str = typer.Option(None, "--key-hash", help="Only report whether this key hash is an active anchor"),
+    data_root: Path = typer.Option(Path("data"), "--data-root", help="Local PolicyMesh data root"),
+):
+    """Show the materialized trust-anchor state (active anchors by key hash, revocations)."""
+    from .trust_anchors import anchor_state
+    validate_village_id(village_id)
+    state = anchor_state(data_root, village_id)
+    if key_hash:
+        typer.echo(json.dumps({"key_hash": key_hash, "active": state.is_active(key_hash), "revoked": state.is_revoked(key_hash), "version": state.version}))
+        return
+    typer.echo(json.dumps(state.to_dict(), indent=2))
+
+
+@anchors.command("verify-state")
+def anchors_verify_state(
+    village_id: str,
+    repair: bool = typer.Option(False, "--repair", help="Replace a mismatching state with the replayed one"),
+    data_root: Path = typer.Option(Path("data"), "--data-root", help="Local PolicyMesh data root"),
+):
+    """Cross-check the materialized trust-anchor state against a full replay of the entries."""
+    from .trust_anchors import verify_anchor_state
+    validate_village_id(village_id)
+    result = verify_anchor_state(data_root, village_id, repair=repair)
+    typer.echo(json.dumps(result, indent=2, sort_keys=True))
+    if not result["ok"]:
+        raise typer.Exit(code=1)
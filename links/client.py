@@ -27,13 +27,28 @@ class LinksClient:
         r.raise_for_status()
         return r.json()
 
+    def policy_summary(self, village_id: str) -> Dict[str, Any]:
+        r = requests.get(f"{self.base_url}/villages/{village_id}/policy/summary", headers=self._headers(), timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
     def policy_update_by_hash(self, village_id: str, policy_hash: str) -> Dict[str, Any]:
         r = requests.get(f"{self.base_url}/villages/{village_id}/policy/by_hash/{policy_hash}", headers=self._headers(), timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
-    def transparency_log(self, village_id: str, limit: int = 500) -> Iterable[Dict[str, Any]]:
-        r = requests.get(f"{self.base_url}/villages/{village_id}/transparency/policy_log", headers=self._headers(), params={"limit": limit}, timeout=self.timeout, stream=True)
+    def reconcile_ranges(self, village_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        r = requests.post(f"{self.base_url}/villages/{village_id}/policy/reconcile_ranges", headers=self._headers(), json=request, timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def transparency_log(self, village_id: str, limit: int = 500, since_entry_hash: Optional[str] = None, offset: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+        params: Dict[str, Any] = {"limit": limit}
+        if since_entry_hash is not None:
+            params["since_entry_hash"] = since_entry_hash
+        if offset is not None:
+            params["offset"] = offset
+        r = requests.get(f"{self.base_url}/villages/{village_id}/transparency/policy_log", headers=self._headers(), params=params, timeout=self.timeout, stream=True)
         r.raise_for_status()
         for line in r.iter_lines(decode_unicode=True):
             if not line:
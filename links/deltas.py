@@ -0,0 +1,315 @@
+"""deltas — incremental (delta) audit and registry exports with chained manifests.
+
+Every export writes a ``links.export.manifest.v1`` manifest recording where
+it ended (the audit chain head, or membership log positions); passing it
+back as ``since`` exports only what was added after it.  Manifests chain by
+``prev_manifest_sha256``, and importers refuse anything that does not
+follow the last manifest they applied.  Base exports replace state; deltas
+only append.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_FORMAT = "links.export.manifest.v1"
+REGISTRY_FORMAT = "links.external_registry.v1"
+REGISTRY_DELTA_FORMAT = "links.registry.delta.v1"
+
+
+class DeltaOrderError(ValueError):
+    """A delta does not chain onto the last manifest applied by the importer."""
+
+
+# ---------------------------------------------------------------------------
+# Manifests
+# ---------------------------------------------------------------------------
+
+
+def manifest_path_for(payload_path: Path) -> Path:
+    return payload_path.with_name(payload_path.name + ".manifest.json")
+
+
+def manifest_digest(manifest: Dict[str, Any]) -> str:
+    body = {k: v for k, v in manifest.items() if k not in {"manifest_sha256", "signature_hex"}}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    m = json.loads(Path(path).read_text(encoding="utf-8"))
+    if m.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not an export manifest")
+    if m.get("manifest_sha256") != manifest_digest(m):
+        raise ValueError(f"{path}: manifest digest mismatch")
+    return m
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_manifest(
+    kind: str,
+    village_id: str,
+    payload_path: Path,
+    payload_sha256: str,
+    position: Dict[str, Any],
+    counts: Dict[str, int],
+    since: Optional[Dict[str, Any]],
+    base: bool,
+    signing_key=None,
+) -> Dict[str, Any]:
+    from .audit import iso_utc, utc_now
+
+    if since is not None and (since.get("kind") != kind or since.get("village_id") != village_id):
+        raise ValueError(f"--since manifest is for {since.get('kind')}/{since.get('village_id')}, not {kind}/{village_id}")
+    m: Dict[str, Any] = {
+        "format": MANIFEST_FORMAT,
+        "kind": kind,
+        "village_id": village_id,
+        "seq": int(since["seq"]) + 1 if since is not None else 1,
+        "base": base,
+        "prev_manifest_sha256": since["manifest_sha256"] if since is not None else None,
+        "payload": payload_path.name,
+        "payload_sha256": payload_sha256,
+        "position": position,
+        "counts": counts,
+        "created_at": iso_utc(utc_now()),
+    }
+    m["manifest_sha256"] = manifest_digest(m)
+    if signing_key is not None:
+        m["signature_hex"] = signing_key.sign(bytes.fromhex(m["manifest_sha256"])).signature.hex()
+    out = manifest_path_for(payload_path)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(m, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(out)
+    return m
+
+
+def _payload_for(manifest: Dict[str, Any], manifest_file: Path) -> Path:
+    payload = manifest_file.parent / manifest["payload"]
+    if _file_sha256(payload) != manifest["payload_sha256"]:
+        raise ValueError(f"{payload}: payload digest does not match its manifest")
+    return payload
+
+
+class _SyncState:
+    """Digest and seq of the last manifest an importer applied (``<target>.sync.json``)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def check(self, manifest: Dict[str, Any]) -> None:
+        if manifest.get("base"):
+            return
+        last = self.load()
+        if manifest.get("prev_manifest_sha256") != last.get("manifest_sha256"):
+            raise DeltaOrderError(
+                f"delta seq {manifest.get('seq')} follows a manifest this importer has not applied (last applied seq {last.get('seq')})"
+            )
+
+    def load(self) -> Dict[str, Any]:
+        return json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+
+    def save(self, manifest: Dict[str, Any], **extra: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        doc = {"seq": manifest["seq"], "manifest_sha256": manifest["manifest_sha256"], **extra}
+        self.path.write_text(json.dumps(doc, sort_keys=True), encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Audit
+# ---------------------------------------------------------------------------
+
+
+def export_audit(
+    store_root: Path,
+    village_id: str,
+    out_path: Path,
+    fmt: str = "json",
+    since: Optional[Dict[str, Any]] = None,
+    after_seq: int = 0,
+    signing_key=None,
+) -> Dict[str, Any]:
+    """Export a village's audit events after *since*'s chain position (or *after_seq*) and write its manifest."""
+    from .audit_export import export_audit_csv, export_audit_json
+    from .audit_store import audit_snapshot
+
+    if since is not None:
+        after_seq = int(since["position"]["seq"])
+    snap = audit_snapshot(store_root, village_id, after_seq=after_seq or None)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    digest, count = (export_audit_json if fmt == "json" else export_audit_csv)(snap, out_path)
+    if snap.head is not None:
+        position = {"seq": snap.head.seq, "chain": snap.head.chain}
+    elif since is not None:
+        position = dict(since["position"])
+    else:
+        position = {"seq": after_seq, "chain": None}
+    base = since is None and not after_seq
+    return _write_manifest("audit", village_id, out_path, digest, position, {"events": count}, since, base, signing_key)
+
+
+def apply_audit_delta(manifest_file: Path, mirror: Path) -> int:
+    """Append the events of an audit export to a local JSONL *mirror*, in manifest order.
+
+    The events of a delta must continue the hash chain from the previous
+    manifest's position to this one's; returns the number of events appended.
+    """
+    from .audit_chain import verify_chain
+
+    manifest = load_manifest(manifest_file)
+    if manifest["kind"] != "audit":
+        raise ValueError("not an audit export manifest")
+    payload = _payload_for(manifest, manifest_file)
+    if payload.suffix != ".json":
+        raise ValueError("only JSON audit exports can be applied to a mirror")
+    state = _SyncState(mirror.with_name(mirror.name + ".sync.json"))
+    state.check(manifest)
+    doc = json.loads(payload.read_text(encoding="utf-8"))
+    events: List[Dict[str, Any]] = doc.get("events", [])
+    if not manifest["base"]:
+        prev = state.load().get("position") or {}
+        pos = manifest["position"]
+        if prev.get("chain") is not None and pos.get("chain") is not None:
+            r = verify_chain(events, (int(prev["seq"]), prev["chain"]), (int(pos["seq"]), pos["chain"]))
+            if not r.ok:
+                raise ValueError(f"audit delta does not continue the hash chain: {r.reason}")
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+    with mirror.open("w" if manifest["base"] else "a", encoding="utf-8") as f:
+        for ev in events:
+            f.write(json.dumps(ev, ensure_ascii=False, sort_keys=True) + "\n")
+    # The chain position is kept for the next delta's continuity check.
+    state.save(manifest, position=manifest["position"])
+    return len(events)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+
+def _anchor_files(villages_root: Path, village_id: str, after: str = "") -> List[Path]:
+    d = villages_root / "villages" / village_id / "trust_anchors"
+    return [p for p in sorted(d.glob("*.json")) if p.name > after] if d.exists() else []
+
+
+def export_registry(villages_root: Path, village_id: str, out_path: Path, since: Optional[Dict[str, Any]] = None, signing_key=None) -> Dict[str, Any]:
+    """Write a registry artifact for *village_id* (a delta after *since* when possible) and its manifest."""
+    from .villages import load_village, members_since, revocations_since
+
+    pos = (since or {}).get("position", {})
+    members, m_pos, m_rebased = members_since(villages_root, village_id, pos.get("members") if since else None)
+    revocations, r_pos, r_rebased = revocations_since(villages_root, village_id, pos.get("revocations") if since else None)
+    base = since is None or m_rebased or r_rebased
+    if base and since is not None:
+        # One log was compacted: re-read both in full so the base is consistent.
+        members, m_pos, _ = members_since(villages_root, village_id, None)
+        revocations, r_pos, _ = revocations_since(villages_root, village_id, None)
+    anchor_files = _anchor_files(villages_root, village_id, "" if base else pos.get("anchors", ""))
+    anchors = [json.loads(p.read_text(encoding="utf-8")) for p in anchor_files]
+    v = load_village(villages_root, village_id)
+
+    if base:
+        payload: Dict[str, Any] = {
+            "format": REGISTRY_FORMAT,
+            "village_id": village_id,
+            "village": v.model_dump(mode="json"),
+            "policy": v.policy.model_dump(),
+            "members": [json.dumps(m, ensure_ascii=False) for m in members],
+            "revocations": [json.dumps(r, ensure_ascii=False) for r in revocations],
+            "trust_anchors": anchors,
+        }
+    else:
+        payload = {
+            "format": REGISTRY_DELTA_FORMAT,
+            "village_id": village_id,
+            "policy": v.policy.model_dump(),
+            "members": members,
+            "revocations": revocations,
+            "trust_anchors": anchors,
+        }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(out_path)
+    position = {
+        "members": m_pos,
+        "revocations": r_pos,
+        "anchors": anchor_files[-1].name if anchor_files else ("" if base else pos.get("anchors", "")),
+    }
+    counts = {"members": len(members), "revocations": len(revocations), "trust_anchors": len(anchors)}
+    return _write_manifest("registry", village_id, out_path, _file_sha256(out_path), position, counts, since, base, signing_key)
+
+
+def import_registry(villages_root: Path, payload_path: Path) -> Dict[str, Any]:
+    """Apply a registry artifact: a base replaces the village's state, a delta appends to it.
+
+    When ``<payload>.manifest.json`` exists the manifest chain is enforced
+    (state in ``villages/<id>/registry_sync.json``); a delta without one is
+    refused.  Trust-anchor entries must belong to the village and carry a
+    valid signature.  Returns counts applied.
+    """
+    from .audit import iso_utc, utc_now
+    from .trust_anchors import TrustAnchorEntry, store_anchor_entry, verify_anchor_entry_any
+    from .validate import validate_village_id
+    from .villages import Village, VillagePolicy, append_membership, load_village, save_village, village_dir, write_membership
+
+    payload = json.loads(payload_path.read_text(encoding="utf-8"))
+    village_id = validate_village_id(payload.get("village_id"))
+    mf = manifest_path_for(payload_path)
+    manifest = load_manifest(mf) if mf.exists() else None
+    if manifest is not None:
+        _payload_for(manifest, mf)
+    fmt = payload.get("format", REGISTRY_FORMAT)
+    if fmt == REGISTRY_DELTA_FORMAT and manifest is None:
+        raise DeltaOrderError(f"registry delta {payload_path} has no manifest ({mf.name})")
+    state = _SyncState(village_dir(villages_root, village_id) / "registry_sync.json")
+    if manifest is not None:
+        state.check(manifest)
+
+    anchors = [TrustAnchorEntry.model_validate(a) for a in payload.get("trust_anchors", [])]
+    for e in anchors:
+        if validate_village_id(e.village_id) != village_id:
+            raise ValueError(f"trust anchor {e.anchor_id} belongs to village {e.village_id}, not {village_id}")
+        if not verify_anchor_entry_any(e):
+            raise ValueError(f"trust anchor {e.anchor_id} has no valid signature")
+
+    if fmt == REGISTRY_FORMAT:
+        if payload.get("village"):
+            v = Village.model_validate(payload["village"])
+        else:
+            v = Village(
+                village_id=village_id,
+                name=village_id,
+                created_at=iso_utc(utc_now()),
+                governance={},
+                policy=VillagePolicy.model_validate(payload.get("policy", {})),
+            )
+        save_village(villages_root, v)
+        members = [json.loads(l) for l in payload.get("members", []) if l.strip()]
+        revocations = [json.loads(l) for l in payload.get("revocations", []) if l.strip()]
+        # members/revocations (replaces any compacted snapshot)
+        write_membership(villages_root, village_id, members, revocations)
+    elif fmt == REGISTRY_DELTA_FORMAT:
+        v = load_village(villages_root, village_id)
+        if payload.get("policy") is not None:
+            v = v.model_copy(update={"policy": VillagePolicy.model_validate(payload["policy"])})
+            save_village(villages_root, v)
+        members, revocations = payload.get("members", []), payload.get("revocations", [])
+        append_membership(villages_root, village_id, members, revocations)
+    else:
+        raise ValueError(f"unknown registry format: {fmt}")
+
+    for e in anchors:
+        store_anchor_entry(villages_root, e)
+    if manifest is not None:
+        state.save(manifest)
+    return {"village_id": village_id, "format": fmt, "members": len(members), "revocations": len(revocations), "trust_anchors": len(anchors)}
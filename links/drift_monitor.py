@@ -0,0 +1,372 @@
+"""drift_monitor — long-running drift monitor with persisted per-pair state.
+
+Each (peer, village) pair of a :class:`links.fleet.FleetInventory` is checked
+on its own jittered schedule, backing off exponentially while it fails.  The
+last peer checkpoint, its ETag and drift class are kept in a JSON state file
+so a restart resumes where it stopped; ``If-None-Match`` revalidation skips
+the comparison when neither side changed.  Alerts fire only when a pair's
+drift class changes, and :meth:`DriftMonitor.serve_metrics` exposes
+``/healthz`` and Prometheus ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from .drift_classes import classify_checkpoint_drift, drift_severity
+from .fleet import FleetInventory, FleetPeer
+from .transparency import build_transparency_checkpoint
+
+
+# (url, request_headers) -> (status_code, json_body or None, response_headers)
+Fetch = Callable[[str, Dict[str, str]], Tuple[int, Any, Dict[str, str]]]
+AlertSink = Callable[[Dict[str, Any]], None]
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def http_fetch(token: Optional[str] = None, timeout: float = 10.0) -> Fetch:
+    """Build a keep-alive ``requests`` fetcher for one peer."""
+    session = requests.Session()
+    base_headers: Dict[str, str] = {}
+    if token:
+        base_headers["Authorization"] = f"Bearer {token}"
+
+    def _fetch(url: str, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        resp = session.get(url, headers={**base_headers, **headers}, timeout=timeout)
+        body = resp.json() if resp.status_code == 200 else None
+        return resp.status_code, body, dict(resp.headers)
+
+    return _fetch
+
+
+# ---------------------------------------------------------------------------
+# Configuration, state and metrics
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class MonitorConfig:
+    interval_seconds: float = 60.0
+    jitter: float = 0.1
+    max_backoff_seconds: float = 900.0
+    request_timeout: float = 10.0
+    concurrency: int = 16
+    state_path: Path = Path("data/store/drift/monitor_state.json")
+
+
+@dataclass
+class PairState:
+    """Persisted view of one (peer, village) pair."""
+
+    peer: str
+    village_id: str
+    drift_class: Optional[str] = None
+    etag: Optional[str] = None
+    peer_checkpoint: Dict[str, Any] = field(default_factory=dict)
+    local_checkpoint_hash: Optional[str] = None
+    last_checked_at: Optional[str] = None
+    last_changed_at: Optional[str] = None
+    next_due: float = 0.0
+    failures: int = 0
+    last_error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.peer}|{self.village_id}"
+
+
+@dataclass
+class MonitorMetrics:
+    checks: int = 0
+    comparisons: int = 0
+    not_modified: int = 0
+    failures: int = 0
+    alerts: int = 0
+    last_tick_at: Optional[float] = None
+    check_seconds_sum: float = 0.0
+    check_seconds_max: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def observe(self, seconds: float) -> None:
+        with self.lock:
+            self.checks += 1
+            self.check_seconds_sum += seconds
+            self.check_seconds_max = max(self.check_seconds_max, seconds)
+
+
+# ---------------------------------------------------------------------------
+# Monitor
+# ---------------------------------------------------------------------------
+
+
+class DriftMonitor:
+    """Schedules drift checks per (peer, village) pair and alerts on class changes."""
+
+    def __init__(
+        self,
+        store_root: Path,
+        inventory: FleetInventory,
+        config: Optional[MonitorConfig] = None,
+        *,
+        fetch_factory: Optional[Callable[[FleetPeer], Fetch]] = None,
+        alert_sink: Optional[AlertSink] = None,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store_root = Path(store_root)
+        self.config = config or MonitorConfig()
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.alert_sink = alert_sink
+        self.metrics = MonitorMetrics()
+        factory = fetch_factory or (lambda peer: http_fetch(peer.token, self.config.request_timeout))
+        self._fetchers: Dict[str, Fetch] = {}
+        self.pairs: Dict[str, PairState] = {}
+        persisted = self._load_state()
+        now = self.clock()
+        for peer, village_id in inventory.pairs():
+            base = peer.url.rstrip("/")
+            if base not in self._fetchers:
+                self._fetchers[base] = factory(peer)
+            ps = PairState(peer=base, village_id=village_id)
+            if ps.key in persisted:
+                ps = persisted[ps.key]
+            else:
+                # Spread first checks over one interval instead of a thundering herd.
+                ps.next_due = now + self.rng.uniform(0, self.config.interval_seconds * self.config.jitter)
+            self.pairs[ps.key] = ps
+        self._state_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -- persistence -------------------------------------------------------
+
+    @property
+    def alerts_path(self) -> Path:
+        return self.config.state_path.with_name("alerts.jsonl")
+
+    def _load_state(self) -> Dict[str, PairState]:
+        try:
+            data = json.loads(self.config.state_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        out: Dict[str, PairState] = {}
+        for row in data.get("pairs", []):
+            try:
+                ps = PairState(**row)
+            except TypeError:
+                continue
+            out[ps.key] = ps
+        return out
+
+    def save_state(self) -> None:
+        p = self.config.state_path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with self._state_lock:
+            rows = [asdict(ps) for ps in self.pairs.values()]
+        tmp = p.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"saved_at": _iso(self.clock()), "pairs": rows}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        tmp.replace(p)
+
+    # -- scheduling --------------------------------------------------------
+
+    def _schedule(self, ps: PairState, now: float) -> None:
+        base = self.config.interval_seconds
+        if ps.failures:
+            base = min(self.config.max_backoff_seconds, base * (2 ** ps.failures))
+        spread = base * self.config.jitter
+        ps.next_due = now + max(0.0, base + self.rng.uniform(-spread, spread))
+
+    def due(self, now: Optional[float] = None) -> List[PairState]:
+        now = self.clock() if now is None else now
+        return sorted((ps for ps in self.pairs.values() if ps.next_due <= now), key=lambda ps: ps.next_due)
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        now = self.clock() if now is None else now
+        if not self.pairs:
+            return self.config.interval_seconds
+        return max(0.0, min(ps.next_due for ps in self.pairs.values()) - now)
+
+    # -- checks ------------------------------------------------------------
+
+    def _alert(self, ps: PairState, previous: Optional[str], notes: List[str]) -> None:
+        alert = {
+            "at": _iso(self.clock()),
+            "peer": ps.peer,
+            "village_id": ps.village_id,
+            "previous_class": previous,
+            "drift_class": ps.drift_class,
+            "escalated": drift_severity(ps.drift_class or "unknown") > drift_severity(previous or "aligned"),
+            "notes": notes,
+        }
+        with self.metrics.lock:
+            self.metrics.alerts += 1
+        self.alerts_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._state_lock, self.alerts_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(alert, ensure_ascii=False, sort_keys=True) + "\n")
+        if self.alert_sink is not None:
+            try:
+                self.alert_sink(alert)
+            except Exception:
+                pass
+
+    def check(self, ps: PairState, local: Dict[str, Any]) -> None:
+        """Run one check for *ps* against the *local* checkpoint and reschedule it."""
+        t0 = time.perf_counter()
+        now = self.clock()
+        headers = {"If-None-Match": ps.etag} if ps.etag else {}
+        try:
+            status, body, resp_headers = self._fetchers[ps.peer](
+                f"{ps.peer}/villages/{ps.village_id}/transparency/checkpoint", headers
+            )
+            if status not in (200, 304):
+                raise RuntimeError(f"checkpoint status={status}")
+        except Exception as exc:
+            ps.failures += 1
+            ps.last_error = f"{type(exc).__name__}: {exc}"
+            ps.last_checked_at = _iso(now)
+            with self.metrics.lock:
+                self.metrics.failures += 1
+            self._schedule(ps, now)
+            self.metrics.observe(time.perf_counter() - t0)
+            return
+
+        ps.failures = 0
+        ps.last_error = None
+        ps.last_checked_at = _iso(now)
+        local_hash = local.get("checkpoint_hash")
+        if status == 304:
+            with self.metrics.lock:
+                self.metrics.not_modified += 1
+            peer_ckpt = ps.peer_checkpoint
+        else:
+            ps.etag = resp_headers.get("ETag") or resp_headers.get("etag")
+            peer_ckpt = {k: body.get(k) for k in ("checkpoint_hash", "entry_count", "latest_policy_hash", "tree_size")}
+
+        unchanged = peer_ckpt == ps.peer_checkpoint and local_hash == ps.local_checkpoint_hash
+        if not (unchanged and ps.drift_class is not None):
+            with self.metrics.lock:
+                self.metrics.comparisons += 1
+            drift_class, notes = classify_checkpoint_drift(
+                local_policy_hash=local.get("latest_policy_hash") or "",
+                peer_policy_hash=peer_ckpt.get("latest_policy_hash") or "",
+                local_entry_count=int(local.get("entry_count") or 0),
+                peer_entry_count=int(peer_ckpt.get("entry_count") or 0),
+                local_checkpoint_hash=local_hash or "",
+                peer_checkpoint_hash=peer_ckpt.get("checkpoint_hash") or "",
+            )
+            previous = ps.drift_class
+            ps.peer_checkpoint = peer_ckpt
+            ps.local_checkpoint_hash = local_hash
+            if drift_class != previous:
+                ps.drift_class = drift_class
+                ps.last_changed_at = _iso(now)
+                if previous is not None or drift_class != "aligned":
+                    self._alert(ps, previous, notes)
+        self._schedule(ps, now)
+        self.metrics.observe(time.perf_counter() - t0)
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Run every due check concurrently, persist state and return how many ran."""
+        due = self.due(now)
+        if due:
+            local: Dict[str, Dict[str, Any]] = {}
+            for v in {ps.village_id for ps in due}:
+                try:
+                    local[v] = build_transparency_checkpoint(self.store_root, v)
+                except Exception:
+                    local[v] = {}
+            workers = max(1, min(self.config.concurrency, len(due)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drift-monitor") as pool:
+                list(pool.map(lambda ps: self.check(ps, local[ps.village_id]), due))
+            self.save_state()
+        self.metrics.last_tick_at = self.clock()
+        return len(due)
+
+    def run(self, *, max_ticks: Optional[int] = None, sleep: Callable[[float], None] = time.sleep) -> None:
+        """Run until :meth:`stop` is called (or *max_ticks* ticks have run)."""
+        n = 0
+        while not self._stop.is_set() and (max_ticks is None or n < max_ticks):
+            self.tick()
+            n += 1
+            if max_ticks is None or n < max_ticks:
+                sleep(min(self.next_due_in(), self.config.interval_seconds))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # -- health and metrics ------------------------------------------------
+
+    def health(self) -> Tuple[bool, Dict[str, Any]]:
+        """Healthy while the loop ticked within two intervals."""
+        last = self.metrics.last_tick_at
+        lag = None if last is None else self.clock() - last
+        ok = lag is not None and lag <= 2 * self.config.interval_seconds + self.config.request_timeout
+        failing = sorted(ps.key for ps in self.pairs.values() if ps.failures)
+        return ok, {"ok": ok, "seconds_since_tick": lag, "pairs": len(self.pairs), "failing_pairs": failing}
+
+    def prometheus(self) -> str:
+        m = self.metrics
+        by_class: Dict[str, int] = {}
+        for ps in self.pairs.values():
+            by_class[ps.drift_class or "pending"] = by_class.get(ps.drift_class or "pending", 0) + 1
+        lines = [
+            "# TYPE links_drift_monitor_checks_total counter",
+            f"links_drift_monitor_checks_total {m.checks}",
+            "# TYPE links_drift_monitor_comparisons_total counter",
+            f"links_drift_monitor_comparisons_total {m.comparisons}",
+            "# TYPE links_drift_monitor_not_modified_total counter",
+            f"links_drift_monitor_not_modified_total {m.not_modified}",
+            "# TYPE links_drift_monitor_failures_total counter",
+            f"links_drift_monitor_failures_total {m.failures}",
+            "# TYPE links_drift_monitor_alerts_total counter",
+            f"links_drift_monitor_alerts_total {m.alerts}",
+            "# TYPE links_drift_monitor_check_seconds summary",
+            f"links_drift_monitor_check_seconds_sum {m.check_seconds_sum:.6f}",
+            f"links_drift_monitor_check_seconds_count {m.checks}",
+            "# TYPE links_drift_monitor_check_seconds_max gauge",
+            f"links_drift_monitor_check_seconds_max {m.check_seconds_max:.6f}",
+            "# TYPE links_drift_monitor_pairs gauge",
+        ]
+        for cls, n in sorted(by_class.items()):
+            lines.append(f'links_drift_monitor_pairs{{drift_class="{cls}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve ``/healthz`` and ``/metrics`` from a daemon thread."""
+        monitor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path == "/healthz":
+                    ok, info = monitor.health()
+                    body, ctype, code = json.dumps(info).encode(), "application/json", 200 if ok else 503
+                elif self.path == "/metrics":
+                    body, ctype, code = monitor.prometheus().encode(), "text/plain; version=0.0.4", 200
+                else:
+                    body, ctype, code = b"not found\n", "text/plain", 404
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, name="drift-monitor-metrics", daemon=True).start()
+        return server
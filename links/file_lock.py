@@ -12,16 +12,18 @@ except Exception:  # pragma: no cover
 
 
 @contextmanager
-def locked_open(path: Path, mode: str):
+def locked_open(path: Path, mode: str, *, shared: bool = False):
     """
     Open a file and hold an exclusive lock for the duration of the context.
     Intended for append/write of JSONL logs under multi-request or multi-worker conditions.
+    With shared=True a shared lock is taken instead, so concurrent readers do not
+    block each other while still excluding writers.
     """
     path.parent.mkdir(parents=True, exist_ok=True)
-    f = path.open(mode, encoding="utf-8")
+    f = path.open(mode) if "b" in mode else path.open(mode, encoding="utf-8")
     try:
         if fcntl is not None:
-            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
         yield f
     finally:
         try:
@@ -0,0 +1,280 @@
+"""fleet — concurrent drift scanning across many peers and villages.
+
+Every (peer, village) pair of a :class:`FleetInventory` is checked
+concurrently, with at most ``per_peer_limit`` requests in flight per peer,
+by classifying the peer's transparency checkpoint against ours; drifting
+pairs also fetch the peer's feed summary.  A peer that refuses connections
+or times out has its remaining cells skipped; other failures only mark that
+one cell as ``"error"``.  The result is one matrix report with rollups.
+
+Inventory file format (JSON)::
+
+    {
+      "villages": ["ops", "finance"],
+      "peers": [
+        {"url": "https://peer-a.example.org", "token": "...", "villages": ["ops"]},
+        "https://peer-b.example.org"
+      ]
+    }
+
+A peer's optional ``villages`` list overrides the inventory-wide list.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from .drift_classes import classify_checkpoint_drift, most_severe
+from .gossip import Transport, feed_summary, http_transport
+from .transparency import build_transparency_checkpoint
+from .validate import validate_village_id
+
+
+# ---------------------------------------------------------------------------
+# Inventory
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class FleetPeer:
+    url: str
+    token: Optional[str] = None
+    villages: Optional[List[str]] = None
+
+
+@dataclass
+class FleetInventory:
+    """Peers x villages to scan."""
+
+    peers: List[FleetPeer]
+    villages: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FleetInventory":
+        peers: List[FleetPeer] = []
+        for p in data.get("peers", []):
+            if isinstance(p, str):
+                peers.append(FleetPeer(url=p))
+            else:
+                peers.append(FleetPeer(url=p["url"], token=p.get("token"), villages=p.get("villages")))
+        inv = cls(peers=peers, villages=list(data.get("villages", [])))
+        for _, v in inv.pairs():
+            validate_village_id(v)
+        return inv
+
+    @classmethod
+    def from_file(cls, path: Path) -> "FleetInventory":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def pairs(self) -> List[Tuple[FleetPeer, str]]:
+        return [(p, v) for p in self.peers for v in (p.villages if p.villages is not None else self.villages)]
+
+
+# ---------------------------------------------------------------------------
+# Scanner
+# ---------------------------------------------------------------------------
+
+
+def _iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# Failures that say the peer itself is unreachable; anything else (a bad
+# response for one village) only fails that village's cell.
+_UNREACHABLE = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+
+
+class _PeerDown(Exception):
+    pass
+
+
+def _local_checkpoints(store_root: Path, villages: List[str]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    for v in villages:
+        try:
+            out[v] = build_transparency_checkpoint(store_root, v)
+        except Exception:
+            out[v] = {}
+    return out
+
+
+def scan_fleet(
+    store_root: Path,
+    inventory: FleetInventory,
+    *,
+    villages_root: Optional[Path] = None,
+    per_peer_limit: int = 8,
+    request_timeout: float = 10.0,
+    scan_timeout: Optional[float] = None,
+    transport_factory: Optional[Callable[[FleetPeer], Transport]] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> Dict[str, Any]:
+    """Scan every (peer, village) pair concurrently and return a matrix report.
+
+    Parameters
+    ----------
+    store_root:
+        Local store root holding ``transparency/<village>/``.
+    inventory:
+        Peers and villages to scan.
+    villages_root:
+        Local data root for feed summaries of drifting pairs
+        (default: ``store_root.parent``).
+    per_peer_limit:
+        Maximum concurrent requests to any single peer.
+    request_timeout:
+        Timeout passed to the transport for each request.
+    scan_timeout:
+        Wall-clock budget for the whole scan (default ``3 * request_timeout``).
+    transport_factory:
+        Builds the transport for a peer; defaults to
+        :func:`links.gossip.http_transport` with the peer's token.
+    """
+    villages_root = Path(villages_root) if villages_root is not None else Path(store_root).parent
+    scan_timeout = 3 * request_timeout if scan_timeout is None else scan_timeout
+    factory = transport_factory or (lambda peer: http_transport(peer.token, request_timeout))
+    pairs = inventory.pairs()
+    villages = sorted({v for _, v in pairs})
+    local = _local_checkpoints(Path(store_root), villages)
+    local_summaries: Dict[str, Dict[str, Any]] = {}
+
+    down: Dict[str, str] = {}
+    started = clock()
+    slowest = 0.0
+
+    def _check(peer: FleetPeer, transport: Transport, village_id: str) -> Dict[str, Any]:
+        base = peer.url.rstrip("/")
+        if base in down:
+            raise _PeerDown(down[base])
+
+        def _get(path: str) -> Tuple[int, Any]:
+            nonlocal slowest
+            t0 = clock()
+            try:
+                return transport("GET", f"{base}{path}", None)
+            except _UNREACHABLE as exc:
+                down.setdefault(base, f"{type(exc).__name__}: {exc}")
+                raise
+            finally:
+                slowest = max(slowest, clock() - t0)
+
+        t0 = clock()
+        status, ckpt = _get(f"/villages/{village_id}/transparency/checkpoint")
+        cell: Dict[str, Any] = {"peer": base, "village_id": village_id}
+        if status != 200 or not isinstance(ckpt, dict):
+            cell.update(status="error", drift_class="unknown", notes=[f"checkpoint status={status}"])
+            return cell
+        mine = local.get(village_id) or {}
+        drift_class, notes = classify_checkpoint_drift(
+            local_policy_hash=mine.get("latest_policy_hash") or "",
+            peer_policy_hash=ckpt.get("latest_policy_hash") or "",
+            local_entry_count=int(mine.get("entry_count") or 0),
+            peer_entry_count=int(ckpt.get("entry_count") or 0),
+            local_checkpoint_hash=mine.get("checkpoint_hash") or "",
+            peer_checkpoint_hash=ckpt.get("checkpoint_hash") or "",
+        )
+        cell.update(
+            status="ok",
+            drift_class=drift_class,
+            notes=notes,
+            peer_entry_count=ckpt.get("entry_count"),
+            peer_checkpoint_hash=ckpt.get("checkpoint_hash"),
+            peer_latest_policy_hash=ckpt.get("latest_policy_hash"),
+        )
+        if drift_class != "aligned":
+            try:
+                s_status, summary = _get(f"/villages/{village_id}/policy/summary")
+            except _UNREACHABLE:
+                raise
+            except Exception as exc:  # the checkpoint answered; keep the cell
+                s_status, summary = None, None
+                cell["notes"] = list(notes) + [f"policy summary failed: {type(exc).__name__}: {exc}"]
+            if s_status == 200 and isinstance(summary, dict):
+                cell["peer_feed"] = {k: summary.get(k) for k in ("count", "head_policy_hash", "merkle_root")}
+        cell["latency_seconds"] = round(clock() - t0, 4)
+        return cell
+
+    pools: List[ThreadPoolExecutor] = []
+    futures: Dict[Future, Tuple[str, str]] = {}
+    by_peer: Dict[str, List[Tuple[FleetPeer, str]]] = {}
+    for peer, v in pairs:
+        by_peer.setdefault(peer.url.rstrip("/"), []).append((peer, v))
+    for base, items in by_peer.items():
+        pool = ThreadPoolExecutor(max_workers=max(1, min(per_peer_limit, len(items))), thread_name_prefix="fleet")
+        pools.append(pool)
+        transport = factory(items[0][0])
+        for peer, v in items:
+            futures[pool.submit(_check, peer, transport, v)] = (base, v)
+
+    cells: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    pending = set(futures)
+    while pending:
+        remaining = scan_timeout - (clock() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for fut in done:
+            base, v = futures[fut]
+            try:
+                cells[(base, v)] = fut.result()
+            except _PeerDown as exc:
+                cells[(base, v)] = {"peer": base, "village_id": v, "status": "skipped", "drift_class": "unknown", "notes": [f"peer unreachable: {exc}"]}
+            except Exception as exc:
+                cells[(base, v)] = {"peer": base, "village_id": v, "status": "error", "drift_class": "unknown", "notes": [f"{type(exc).__name__}: {exc}"]}
+    for fut in pending:
+        base, v = futures[fut]
+        fut.cancel()
+        down.setdefault(base, "scan timeout")
+        cells[(base, v)] = {"peer": base, "village_id": v, "status": "timeout", "drift_class": "unknown", "notes": [f"no answer within {scan_timeout}s"]}
+    for pool in pools:
+        pool.shutdown(wait=False)
+
+    for base, v in cells:
+        if cells[(base, v)]["drift_class"] != "aligned" and v not in local_summaries:
+            try:
+                local_summaries[v] = {k: feed_summary(villages_root, v).get(k) for k in ("count", "head_policy_hash", "merkle_root")}
+            except Exception:
+                local_summaries[v] = {}
+
+    matrix: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (base, v), cell in cells.items():
+        matrix.setdefault(base, {})[v] = cell
+    peer_roll = {base: most_severe([c["drift_class"] for c in row.values()]) for base, row in matrix.items()}
+    village_roll = {v: most_severe([row[v]["drift_class"] for row in matrix.values() if v in row]) for v in villages}
+    counts: Dict[str, int] = {}
+    for cell in cells.values():
+        counts[cell["drift_class"]] = counts.get(cell["drift_class"], 0) + 1
+
+    return {
+        "scanned_at": _iso_now(),
+        "peers": sorted(matrix),
+        "villages": villages,
+        "local": {
+            v: {
+                "entry_count": local[v].get("entry_count"),
+                "checkpoint_hash": local[v].get("checkpoint_hash"),
+                "latest_policy_hash": local[v].get("latest_policy_hash"),
+                **({"feed": local_summaries[v]} if v in local_summaries else {}),
+            }
+            for v in villages
+        },
+        "matrix": matrix,
+        "rollups": {
+            "most_severe": most_severe(list(peer_roll.values())) if peer_roll else "unknown",
+            "by_peer": peer_roll,
+            "by_village": village_roll,
+            "counts": counts,
+        },
+        "pairs": len(pairs),
+        "duration_seconds": round(clock() - started, 4),
+        "slowest_request_seconds": round(slowest, 4),
+        "unreachable_peers": dict(sorted(down.items())),
+    }
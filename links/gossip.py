@@ -0,0 +1,274 @@
+"""gossip — optional gossip-style policy feed propagation between nodes.
+
+Every ``interval_seconds`` a node picks ``fanout`` random peers and compares
+its compact feed summary for each village with theirs.  Only diverging
+villages are reconciled (``links.set_reconcile``, falling back to the
+manifest item list); fetched updates are verified and checked with
+``signer_allowed`` like a manual pull, then stored but not applied.
+The transport is a plain callable so tests can run nodes in-process.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from .lineage import load_lineage_index
+from .policy_feed import (
+    build_policy_feed_manifest,
+    list_policy_updates,
+    signer_allowed,
+    store_policy_update,
+)
+from .policy_updates import VillagePolicyUpdate, verify_update_any
+from .reconcile import reconcile
+from .set_reconcile import reconcile_hash_sets
+
+# (method, url, json_payload) -> (status_code, json_body or None)
+Transport = Callable[[str, str, Optional[Dict[str, Any]]], Tuple[int, Any]]
+
+
+# ---------------------------------------------------------------------------
+# Configuration and metrics
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class GossipConfig:
+    """Static configuration for a gossiping node."""
+
+    peers: List[str]
+    village_ids: List[str]
+    fanout: int = 2
+    interval_seconds: float = 30.0
+    token: Optional[str] = None
+    timeout: float = 10.0
+
+
+@dataclass
+class GossipMetrics:
+    """Counters describing gossip activity and convergence for one node."""
+
+    rounds: int = 0
+    messages_sent: int = 0
+    exchanges: int = 0
+    divergences_detected: int = 0
+    updates_fetched: int = 0
+    updates_stored: int = 0
+    updates_rejected: int = 0
+    errors: int = 0
+    convergence_seconds: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        samples = self.convergence_seconds
+        d["convergence_max_seconds"] = max(samples) if samples else None
+        d["convergence_mean_seconds"] = (sum(samples) / len(samples)) if samples else None
+        return d
+
+
+# ---------------------------------------------------------------------------
+# Feed summaries
+# ---------------------------------------------------------------------------
+
+
+def feed_summary(villages_root: Path, village_id: str) -> Dict[str, Any]:
+    """Return the compact summary of a village policy feed.
+
+    The summary carries the manifest integrity metadata without the per-update
+    ``items`` list, so exchanging it costs the same regardless of history size.
+    """
+    m = build_policy_feed_manifest(villages_root, village_id)
+    return {
+        "village_id": village_id,
+        "count": m.count,
+        "merkle_root": m.merkle_root,
+        "chain_head": m.chain_head,
+        "head_policy_hash": m.head_policy_hash,
+    }
+
+
+def summaries_match(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Return True when two feed summaries describe the same update set."""
+    return (
+        a.get("count") == b.get("count")
+        and a.get("merkle_root") == b.get("merkle_root")
+        and a.get("chain_head") == b.get("chain_head")
+    )
+
+
+def http_transport(token: Optional[str] = None, timeout: float = 10.0) -> Transport:
+    """Build a ``requests``-backed transport for :class:`GossipNode`."""
+    session = requests.Session()
+    headers: Dict[str, str] = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    def _call(method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        resp = session.request(method, url, json=payload, headers=headers, timeout=timeout)
+        if resp.status_code != 200:
+            return resp.status_code, None
+        return resp.status_code, resp.json()
+
+    return _call
+
+
+# ---------------------------------------------------------------------------
+# Node
+# ---------------------------------------------------------------------------
+
+
+class GossipNode:
+    """A single participant in gossip-style feed propagation."""
+
+    def __init__(
+        self,
+        villages_root: Path,
+        config: GossipConfig,
+        *,
+        transport: Optional[Transport] = None,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.villages_root = Path(villages_root)
+        self.config = config
+        self.transport = transport or http_transport(config.token, config.timeout)
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.metrics = GossipMetrics()
+        self._divergent_since: Dict[Tuple[str, str], float] = {}
+
+    def _call(self, method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        self.metrics.messages_sent += 1
+        return self.transport(method, url, payload)
+
+    def _current_policy(self, village_id: str) -> dict:
+        try:
+            from .villages import cached_village
+            return cached_village(self.villages_root, village_id).policy.model_dump()
+        except Exception:
+            return {}
+
+    def select_peers(self) -> List[str]:
+        k = max(0, min(int(self.config.fanout), len(self.config.peers)))
+        return self.rng.sample(list(self.config.peers), k)
+
+    def _missing_hashes(self, base: str, village_id: str, local_hashes: set[str]) -> List[str]:
+        def _exchange(request: Dict[str, Any]) -> Dict[str, Any]:
+            status, body = self._call("POST", f"{base}/villages/{village_id}/policy/reconcile_ranges", request)
+            if status != 200 or not isinstance(body, dict):
+                raise RuntimeError(f"reconcile_ranges unavailable (status={status})")
+            return body
+
+        try:
+            missing_local, _, _ = reconcile_hash_sets(local_hashes, _exchange)
+            return sorted(missing_local)
+        except RuntimeError:
+            pass
+
+        status, manifest = self._call("GET", f"{base}/villages/{village_id}/policy/manifest")
+        if status != 200 or not isinstance(manifest, dict):
+            raise RuntimeError(f"manifest unavailable (status={status})")
+        wanted: List[str] = []
+        for item in manifest.get("items", []):
+            h = item.get("policy_hash")
+            if h and h not in local_hashes and h not in wanted:
+                wanted.append(h)
+        return wanted
+
+    def _fetch_missing(self, base: str, village_id: str, local_hashes: set[str]) -> List[VillagePolicyUpdate]:
+        fetched: List[VillagePolicyUpdate] = []
+        for h in self._missing_hashes(base, village_id, local_hashes):
+            status, body = self._call("GET", f"{base}/villages/{village_id}/policy/by_hash/{h}")
+            if status != 200 or body is None:
+                continue
+            fetched.append(VillagePolicyUpdate.model_validate(body))
+        return fetched
+
+    def exchange(self, peer: str, village_id: str) -> Dict[str, Any]:
+        """Run one summary exchange with *peer* for *village_id*."""
+        base = peer.rstrip("/")
+        key = (base, village_id)
+        self.metrics.exchanges += 1
+        status, remote = self._call("GET", f"{base}/villages/{village_id}/policy/summary")
+        if status != 200 or not isinstance(remote, dict):
+            self.metrics.errors += 1
+            return {"peer": base, "village_id": village_id, "status": "error", "detail": f"summary status={status}"}
+
+        local = feed_summary(self.villages_root, village_id)
+        if summaries_match(local, remote):
+            started = self._divergent_since.pop(key, None)
+            if started is not None:
+                self.metrics.convergence_seconds.append(self.clock() - started)
+            return {"peer": base, "village_id": village_id, "status": "in_sync"}
+
+        self.metrics.divergences_detected += 1
+        self._divergent_since.setdefault(key, self.clock())
+
+        local_updates = list_policy_updates(self.villages_root, village_id)
+        local_hashes = {u.policy_hash for u in local_updates}
+        try:
+            fetched = self._fetch_missing(base, village_id, local_hashes)
+        except Exception as exc:
+            self.metrics.errors += 1
+            return {"peer": base, "village_id": village_id, "status": "error", "detail": str(exc)}
+        self.metrics.updates_fetched += len(fetched)
+
+        current_policy = self._current_policy(village_id)
+        accepted: List[VillagePolicyUpdate] = []
+        rejected: List[Dict[str, str]] = []
+        for u in fetched:
+            if u.village_id != village_id:
+                rejected.append({"policy_hash": u.policy_hash, "reason": "village_id mismatch"})
+                continue
+            has_any = bool(u.signatures) or bool(u.public_key) or bool(u.signature)
+            if has_any and not verify_update_any(u):
+                rejected.append({"policy_hash": u.policy_hash, "reason": "invalid signature material"})
+                continue
+            ok, msg = signer_allowed(current_policy, u)
+            if not ok:
+                rejected.append({"policy_hash": u.policy_hash, "reason": msg})
+                continue
+            accepted.append(u)
+
+        report = reconcile(local_updates, local_updates + accepted, village_id=village_id, local_index=load_lineage_index(self.villages_root, village_id))
+        for u in accepted:
+            store_policy_update(self.villages_root, u)
+        self.metrics.updates_stored += len(accepted)
+        self.metrics.updates_rejected += len(rejected)
+        return {
+            "peer": base,
+            "village_id": village_id,
+            "status": "diverged",
+            "stored": [u.policy_hash for u in accepted],
+            "rejected": rejected,
+            "reconcile_status": report.status,
+        }
+
+    def run_round(self) -> List[Dict[str, Any]]:
+        """Exchange summaries with ``fanout`` random peers for every village."""
+        self.metrics.rounds += 1
+        results: List[Dict[str, Any]] = []
+        for peer in self.select_peers():
+            for village_id in self.config.village_ids:
+                try:
+                    results.append(self.exchange(peer, village_id))
+                except Exception as exc:  # noqa: BLE001
+                    self.metrics.errors += 1
+                    results.append({"peer": peer, "village_id": village_id, "status": "error", "detail": str(exc)})
+        return results
+
+    def run(self, rounds: Optional[int] = None, *, sleep: Callable[[float], None] = time.sleep) -> GossipMetrics:
+        """Run gossip rounds every ``interval_seconds``; ``rounds=None`` runs forever."""
+        n = 0
+        while rounds is None or n < rounds:
+            self.run_round()
+            n += 1
+            if rounds is None or n < rounds:
+                sleep(max(0.0, float(self.config.interval_seconds)))
+        return self.metrics
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Iterable, Type, TypeVar
+from typing import Callable, Iterable, Iterator, Type, TypeVar
 
 from pydantic import BaseModel
 
@@ -16,6 +17,28 @@ def write_jsonl(path: Path, rows: Iterable[dict]) -> None:
             f.write(json.dumps(row, ensure_ascii=False) + "\n")
 
 
+def append_bytes(f, data: bytes, *, fsync: bool = False) -> None:
+    """Append *data* to the binary file *f* unbuffered, all or nothing.
+
+    If the write (or fsync) fails, the file is cut back to its previous end
+    so a retry does not leave a partial or duplicated row behind.
+    """
+    fd = f.fileno()
+    start = os.lseek(fd, 0, os.SEEK_END)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if fsync:
+            os.fsync(fd)
+    except BaseException:
+        try:
+            os.ftruncate(fd, start)
+        except OSError:
+            pass
+        raise
+
+
 def read_jsonl(path: Path) -> list[dict]:
     out: list[dict] = []
     with path.open("r", encoding="utf-8") as f:
@@ -41,3 +64,151 @@ def validate_jsonl(model: Type[T], input_path: Path, output_path: Path) -> int:
             f.write(obj.model_dump_json() + "\n")
             n += 1
     return n
+
+
+class JsonlTailReader:
+    """
+    Incrementally read rows appended to a JSONL file since the previous call.
+
+    Tracks the file identity (inode) and the byte offset of the last complete
+    line consumed.  If the file was replaced or truncated, `read_new` starts
+    over from the beginning and reports `reset=True` so callers can discard
+    state derived from the old contents.  A trailing partial line (writer
+    mid-append) is left for the next call.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._ino: int | None = None
+        self._offset = 0
+
+    def read_new(self) -> tuple[bool, list[dict]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            reset = self._ino is not None
+            self._ino, self._offset = None, 0
+            return reset, []
+        reset = False
+        if self._ino != st.st_ino or st.st_size < self._offset:
+            reset = self._ino is not None
+            self._ino, self._offset = st.st_ino, 0
+        if st.st_size == self._offset:
+            return reset, []
+        with self.path.open("rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return reset, []
+        rows: list[dict] = []
+        for raw in chunk[: end + 1].splitlines():
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                rows.append(json.loads(raw))
+            except Exception:
+                continue
+        self._offset += end + 1
+        return reset, rows
+
+
+class LogTail:
+    """
+    Byte-offset view over an append-only JSONL log, read from the end.
+
+    The view snapshots the log length at construction (callers typically hold
+    a shared `locked_open` lock for that moment only) and ignores a trailing
+    partial line.  Everything before `end` is immutable for an append-only
+    log, so lines can be streamed afterwards without holding the lock.
+
+    Offsets double as follow cursors: `last(n)` and `after(start, n)` return
+    line-aligned byte offsets, and `find(pred)` returns the offset just past the
+    newest matching line.  Only the blocks needed to answer a query are read.
+    """
+
+    def __init__(self, path: Path, *, end: int | None = None, block_size: int = 64 * 1024):
+        self.path = Path(path)
+        self.block_size = block_size
+        size = self.path.stat().st_size if self.path.exists() else 0
+        self.end = self._align(min(size, end) if end is not None else size)
+
+    def _align(self, end: int) -> int:
+        if end == 0:
+            return 0
+        with self.path.open("rb") as f:
+            pos = end
+            while pos > 0:
+                step = min(self.block_size, pos)
+                pos -= step
+                f.seek(pos)
+                idx = f.read(step).rfind(b"\n")
+                if idx >= 0:
+                    return pos + idx + 1
+        return 0
+
+    def iter_reverse(self) -> Iterator[tuple[int, bytes]]:
+        """Yield `(start_offset, line)` pairs newest first; lines keep their newline."""
+        with self.path.open("rb") as f:
+            pos = self.end
+            buf = b""
+            while pos > 0:
+                step = min(self.block_size, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                while True:
+                    idx = buf.rfind(b"\n", 0, len(buf) - 1)
+                    if idx < 0:
+                        break
+                    yield pos + idx + 1, buf[idx + 1:]
+                    buf = buf[: idx + 1]
+            if buf:
+                yield 0, buf
+
+    def last(self, n: int) -> int:
+        """Offset where the last *n* lines start."""
+        start = self.end
+        for i, (off, _) in enumerate(self.iter_reverse()):
+            if i >= n:
+                break
+            start = off
+        return start
+
+    def find(self, predicate: Callable[[bytes], bool]) -> int | None:
+        """Offset just past the newest line matching *predicate*, or None."""
+        for off, line in self.iter_reverse():
+            if predicate(line):
+                return off + len(line)
+        return None
+
+    def is_line_boundary(self, offset: int) -> bool:
+        if offset == 0:
+            return True
+        if offset > self.end:
+            return False
+        with self.path.open("rb") as f:
+            f.seek(offset - 1)
+            return f.read(1) == b"\n"
+
+    def iter_range(self, start: int, stop: int | None = None) -> Iterator[bytes]:
+        """Stream complete lines in `[start, stop)` oldest first."""
+        stop = self.end if stop is None else min(stop, self.end)
+        with self.path.open("rb") as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                if pos >= stop:
+                    break
+                pos += len(line)
+                yield line
+
+    def after(self, start: int, n: int) -> int:
+        """Offset just past the first *n* lines starting at *start*."""
+        pos = start
+        for i, line in enumerate(self.iter_range(start)):
+            if i >= n:
+                break
+            pos += len(line)
+        return pos
@@ -0,0 +1,149 @@
+"""key_cache — process-wide cache of parsed signing and verify keys.
+
+Parsed Ed25519 and ECDSA P-256 key objects are kept in one bounded LRU keyed
+by ``(alg, raw key bytes)``; private keys are keyed by a SHA-256 of their
+material.  Only successfully parsed keys are cached.
+``LINKS_KEY_CACHE_SIZE`` sets the bound (default 4096, ``0`` disables it).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+_DEFAULT_SIZE = 4096
+
+
+def _env_size() -> int:
+    try:
+        return max(0, int(os.environ.get("LINKS_KEY_CACHE_SIZE", _DEFAULT_SIZE)))
+    except ValueError:
+        return _DEFAULT_SIZE
+
+
+class KeyCache:
+    """Bounded LRU of parsed key objects keyed by ``(kind, key bytes)``."""
+
+    def __init__(self, maxsize: int = _DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Tuple[str, bytes], Any]" = OrderedDict()
+
+    def get(self, kind: str, raw: bytes, load: Callable[[bytes], Any]) -> Any:
+        if self.maxsize <= 0:
+            return load(raw)
+        key = (kind, raw)
+        with self._lock:
+            obj = self._items.get(key)
+            if obj is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return obj
+            self.misses += 1
+        obj = load(raw)
+        with self._lock:
+            self._items[key] = obj
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return obj
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_cache = KeyCache(_env_size())
+
+
+def configure_key_cache(maxsize: int) -> None:
+    """Resize (``0`` disables) the process-wide cache and drop its entries."""
+    _cache.maxsize = max(0, int(maxsize))
+    _cache.clear()
+
+
+def clear_key_cache() -> None:
+    _cache.clear()
+
+
+def key_cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+
+# ---------------------------------------------------------------------------
+# Loaders
+# ---------------------------------------------------------------------------
+
+
+def _ed25519_verify(raw: bytes) -> Any:
+    from nacl.signing import VerifyKey
+
+    return VerifyKey(raw)
+
+
+def _ed25519_signing(seed: bytes) -> Any:
+    from nacl.signing import SigningKey
+
+    return SigningKey(seed)
+
+
+def _p256_public(pem: bytes) -> Any:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    pub = serialization.load_pem_public_key(pem)
+    if not isinstance(pub, ec.EllipticCurvePublicKey):
+        raise ValueError("Not an EC public key")
+    return pub
+
+
+def _p256_private(pem: bytes) -> Any:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    priv = serialization.load_pem_private_key(pem, password=None)
+    if not isinstance(priv, ec.EllipticCurvePrivateKey):
+        raise ValueError("Not an EC private key")
+    return priv
+
+
+_VERIFY_LOADERS = {"ed25519": _ed25519_verify, "ecdsa_p256": _p256_public}
+_SIGNING_LOADERS = {"ed25519": _ed25519_signing, "ecdsa_p256": _p256_private}
+
+
+# ---------------------------------------------------------------------------
+# Public helpers
+# ---------------------------------------------------------------------------
+
+
+def verify_key(raw: bytes, alg: str = "ed25519") -> Any:
+    """Parsed public key for *raw* key bytes (Ed25519 key or P-256 PEM)."""
+    alg = alg.lower()
+    if alg not in _VERIFY_LOADERS:
+        raise ValueError(f"Unsupported alg: {alg}")
+    return _cache.get(f"verify:{alg}", bytes(raw), _VERIFY_LOADERS[alg])
+
+
+def verify_key_b64(public_key_b64: str, alg: str = "ed25519", *, validate: bool = False) -> Any:
+    """:func:`verify_key` for a base64-encoded public key."""
+    return verify_key(base64.b64decode(public_key_b64, validate=validate), alg)
+
+
+def signing_key(raw: bytes, alg: str = "ed25519") -> Any:
+    """Parsed private key for *raw* material (Ed25519 seed or P-256 PEM), cached by its SHA-256."""
+    alg = alg.lower()
+    if alg not in _SIGNING_LOADERS:
+        raise ValueError(f"Unsupported alg: {alg}")
+    raw = bytes(raw)
+    load = _SIGNING_LOADERS[alg]
+    return _cache.get(f"signing:{alg}", hashlib.sha256(raw).digest(), lambda _digest: load(raw))
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import os
+import threading
 from pathlib import Path
+from typing import Dict, Tuple
+
 from nacl.signing import SigningKey
 
+from .key_cache import signing_key
+
 
 def generate_ed25519_keypair(out_dir: Path) -> tuple[Path, Path]:
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -19,13 +26,43 @@ def generate_ed25519_keypair(out_dir: Path) -> tuple[Path, Path]:
     return priv_path, pub_path
 
 
-def load_signing_key_from_env(env_var: str = "LINKS_NODE_SIGNING_KEY_B64") -> SigningKey:
-    """Load an Ed25519 SigningKey from a base64-encoded 32-byte seed in an environment variable."""
-    import os
+class NodeSigner:
+    """The node's Ed25519 signing key, loaded once and shared by every signing path."""
+
+    def __init__(self, key: SigningKey):
+        self.signing_key = key
+        self.public_key = key.verify_key.encode()
+        self.public_key_b64 = base64.b64encode(self.public_key).decode("utf-8")
+        self.key_hash = hashlib.sha256(self.public_key).hexdigest()
+
+    def sign(self, message: bytes) -> bytes:
+        """Detached signature over *message*."""
+        return self.signing_key.sign(message).signature
+
+
+_signers_lock = threading.Lock()
+# env var -> (env value the signer was loaded from, signer)
+_signers: Dict[str, Tuple[str, NodeSigner]] = {}
+
+
+def node_signer(env_var: str = "LINKS_NODE_SIGNING_KEY_B64") -> NodeSigner:
+    """Signer for the base64-encoded 32-byte Ed25519 seed in *env_var*, reloaded only when the variable changes."""
     v = os.environ.get(env_var, "").strip()
+    with _signers_lock:
+        hit = _signers.get(env_var)
+    if hit is not None and hit[0] == v:
+        return hit[1]
     if not v:
         raise ValueError(f"Missing {env_var} (base64-encoded 32-byte Ed25519 seed)")
     raw = base64.b64decode(v, validate=True)
     if len(raw) != 32:
         raise ValueError(f"{env_var} must decode to 32 bytes (got {len(raw)})")
-    return SigningKey(raw)
+    signer = NodeSigner(signing_key(raw))
+    with _signers_lock:
+        _signers[env_var] = (v, signer)
+    return signer
+
+
+def load_signing_key_from_env(env_var: str = "LINKS_NODE_SIGNING_KEY_B64") -> SigningKey:
+    """Load an Ed25519 SigningKey from a base64-encoded 32-byte seed in an environment variable."""
+    return node_signer(env_var).signing_key
@@ -0,0 +1,299 @@
+"""lineage — persistent policy lineage DAG index per village.
+
+Policy updates form a DAG through ``previous_policy_hash``.  The index in
+``villages/<id>/policy_lineage.jsonl`` holds one small record per update and
+is read incrementally, so parent, children, head and fork lookups are O(1)
+and fork points are found by walking only the branches involved.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .file_lock import locked_open
+from .io import JsonlTailReader
+from .policy_updates import VillagePolicyUpdate, compute_update_hash
+from .validate import validate_village_id
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_ts(ts: str) -> datetime:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def lineage_record(u: VillagePolicyUpdate) -> Dict[str, Any]:
+    """Return the compact index record for a policy update."""
+    return {
+        "policy_hash": u.policy_hash,
+        "previous_policy_hash": u.previous_policy_hash,
+        "created_at": _iso(u.created_at),
+        "update_hash": compute_update_hash(u),
+        "lifecycle_state": u.lifecycle_state,
+    }
+
+
+# ---------------------------------------------------------------------------
+# In-memory DAG
+# ---------------------------------------------------------------------------
+
+
+class LineageIndex:
+    """Parent/child index over policy updates keyed by ``policy_hash``."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._created: Dict[str, datetime] = {}
+        self._head_key: Optional[Tuple[datetime, str]] = None
+        self._forks: Set[str] = set()
+        self._missing_parents: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_updates(cls, ups: Iterable[VillagePolicyUpdate]) -> "LineageIndex":
+        idx = cls()
+        idx.add_many(ups)
+        return idx
+
+    def __contains__(self, policy_hash: object) -> bool:
+        return policy_hash in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def copy(self) -> "LineageIndex":
+        other = LineageIndex()
+        other.nodes = dict(self.nodes)
+        other._children = {k: list(v) for k, v in self._children.items()}
+        other._created = dict(self._created)
+        other._head_key = self._head_key
+        other._forks = set(self._forks)
+        other._missing_parents = {k: list(v) for k, v in self._missing_parents.items()}
+        return other
+
+    # -- mutation ----------------------------------------------------------
+
+    def add_record(self, rec: Dict[str, Any]) -> bool:
+        """Add one index record; returns False if the hash is already indexed."""
+        h = rec.get("policy_hash")
+        if not h or h in self.nodes:
+            return False
+        self.nodes[h] = rec
+        created = _parse_ts(rec["created_at"])
+        self._created[h] = created
+        key = (created, h)
+        if self._head_key is None or key > self._head_key:
+            self._head_key = key
+
+        self._missing_parents.pop(h, None)
+        prev = rec.get("previous_policy_hash")
+        if prev:
+            siblings = self._children.setdefault(prev, [])
+            siblings.append(h)
+            if len(siblings) > 1:
+                self._forks.add(prev)
+            if prev not in self.nodes:
+                self._missing_parents.setdefault(prev, []).append(h)
+        return True
+
+    def add(self, u: VillagePolicyUpdate) -> bool:
+        if u.policy_hash in self.nodes:
+            return False
+        return self.add_record(lineage_record(u))
+
+    def add_many(self, ups: Iterable[VillagePolicyUpdate]) -> int:
+        return sum(1 for u in ups if self.add(u))
+
+    # -- lookups -----------------------------------------------------------
+
+    @property
+    def head(self) -> Optional[str]:
+        """Latest update by ``(created_at, policy_hash)``."""
+        return self._head_key[1] if self._head_key else None
+
+    def parent(self, policy_hash: str) -> Optional[str]:
+        rec = self.nodes.get(policy_hash)
+        return rec.get("previous_policy_hash") if rec else None
+
+    def children(self, policy_hash: str) -> List[str]:
+        return list(self._children.get(policy_hash, []))
+
+    def ancestors(self, policy_hash: str) -> Iterator[str]:
+        """Yield indexed ancestors of *policy_hash*, nearest first."""
+        seen = {policy_hash}
+        cur = self.parent(policy_hash)
+        while cur and cur in self.nodes and cur not in seen:
+            yield cur
+            seen.add(cur)
+            cur = self.parent(cur)
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        return any(a == ancestor for a in self.ancestors(descendant))
+
+    def common_ancestor(self, a: str, b: str) -> Optional[str]:
+        """Return the nearest common ancestor (fork point) of two heads.
+
+        A head counts as its own ancestor, so if one head descends from the
+        other the older head is returned.
+        """
+        if a not in self.nodes or b not in self.nodes:
+            return None
+        line_a = {a}
+        line_a.update(self.ancestors(a))
+        if b in line_a:
+            return b
+        for h in self.ancestors(b):
+            if h in line_a:
+                return h
+        return None
+
+    def branch_length(self, policy_hash: str, base: Optional[str] = None) -> int:
+        """Number of parent links from *policy_hash* back to *base* (or its root)."""
+        if base == policy_hash:
+            return 0
+        n = 0
+        for h in self.ancestors(policy_hash):
+            n += 1
+            if h == base:
+                return n
+        if base is not None:
+            raise ValueError(f"{base} is not an ancestor of {policy_hash}")
+        return n
+
+    def fork_points(self) -> List[str]:
+        return sorted(self._forks)
+
+    def fork_reports(self) -> List[Dict[str, Any]]:
+        """Fork details in the shape produced by ``reconcile.detect_forks``."""
+        forks: List[Dict[str, Any]] = []
+        for prev in self._forks:
+            kids = [self.nodes[c] for c in self._children.get(prev, [])]
+            forks.append({
+                "previous_policy_hash": prev,
+                "children": sorted([
+                    {
+                        "policy_hash": c["policy_hash"],
+                        "created_at": self._created[c["policy_hash"]].isoformat(),
+                        "update_hash": c["update_hash"],
+                        "lifecycle_state": c.get("lifecycle_state"),
+                    } for c in kids
+                ], key=lambda x: (x["created_at"], x["policy_hash"])),
+            })
+        forks.sort(key=lambda f: f["children"][0]["created_at"] if f["children"] else "")
+        return forks
+
+    def lineage_issues(self) -> List[Dict[str, Any]]:
+        issues: List[Dict[str, Any]] = []
+        for prev, kids in self._missing_parents.items():
+            for h in kids:
+                issues.append({"policy_hash": h, "previous_policy_hash": prev, "issue": "missing_parent"})
+        return issues
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+
+def lineage_index_path(villages_root: Path, village_id: str) -> Path:
+    validate_village_id(village_id)
+    return villages_root / "villages" / village_id / "policy_lineage.jsonl"
+
+
+_LOADED: Dict[str, Tuple[JsonlTailReader, LineageIndex]] = {}
+# index path -> mtime of policy_updates/ whose files are all indexed
+_DIR_SYNCED: Dict[str, int] = {}
+
+
+def rebuild_lineage_index(villages_root: Path, village_id: str) -> LineageIndex:
+    """Rebuild the persisted index from the stored policy update files."""
+    from .policy_feed import list_policy_updates
+
+    p = lineage_index_path(villages_root, village_id)
+    idx = LineageIndex()
+    rows: List[str] = []
+    for u in list_policy_updates(villages_root, village_id):
+        rec = lineage_record(u)
+        if idx.add_record(rec):
+            rows.append(json.dumps(rec, ensure_ascii=False, sort_keys=True))
+    tmp = p.with_suffix(".jsonl.tmp")
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    tmp.write_text("".join(r + "\n" for r in rows), encoding="utf-8")
+    tmp.replace(p)
+    _LOADED.pop(str(p), None)
+    return idx
+
+
+def load_lineage_index(villages_root: Path, village_id: str) -> LineageIndex:
+    """Return the village's lineage index, reading only records appended since the last call.
+
+    The returned object is shared within the process; callers that want to add
+    remote updates for a what-if comparison should work on ``copy()``.
+    """
+    p = lineage_index_path(villages_root, village_id)
+    if not p.exists():
+        rebuild_lineage_index(villages_root, village_id)
+    key = str(p)
+    reader, idx = _LOADED.get(key) or (JsonlTailReader(p), LineageIndex())
+    reset, rows = reader.read_new()
+    if reset:
+        idx = LineageIndex()
+    for rec in rows:
+        idx.add_record(rec)
+    _LOADED[key] = (reader, idx)
+    return idx
+
+
+def sync_lineage_index(villages_root: Path, village_id: str) -> LineageIndex:
+    """Like :func:`load_lineage_index`, also indexing update files written without ``store_policy_update``.
+
+    The update directory is listed only when its mtime changed since the last
+    full pass, and files named ``<ts>.<policy_hash>.json`` whose hash is
+    already indexed are not read.
+    """
+    idx = load_lineage_index(villages_root, village_id)
+    p = lineage_index_path(villages_root, village_id)
+    d = p.parent / "policy_updates"
+    try:
+        mtime = d.stat().st_mtime_ns
+    except FileNotFoundError:
+        return idx
+    if _DIR_SYNCED.get(str(p)) == mtime:
+        return idx
+    recs: List[Dict[str, Any]] = []
+    for f in sorted(d.glob("*.json")):
+        parts = f.name.split(".")
+        if len(parts) == 3 and parts[1] in idx:
+            continue
+        try:
+            u = VillagePolicyUpdate.model_validate_json(f.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        rec = lineage_record(u)
+        if idx.add_record(rec):
+            recs.append(rec)
+    if recs:
+        with locked_open(p, "a") as f:
+            f.write("".join(json.dumps(rec, ensure_ascii=False, sort_keys=True) + "\n" for rec in recs))
+    # Directory mtimes are coarse: trust one only once it is safely in the past.
+    if time.time_ns() - mtime > 2_000_000_000:
+        _DIR_SYNCED[str(p)] = mtime
+    return idx
+
+
+def record_policy_update(villages_root: Path, u: VillagePolicyUpdate) -> bool:
+    """Append *u* to the persisted lineage index if it is not indexed yet."""
+    idx = load_lineage_index(villages_root, u.village_id)
+    if u.policy_hash in idx:
+        return False
+    rec = lineage_record(u)
+    with locked_open(lineage_index_path(villages_root, u.village_id), "a") as f:
+        f.write(json.dumps(rec, ensure_ascii=False, sort_keys=True) + "\n")
+    load_lineage_index(villages_root, u.village_id)
+    return True
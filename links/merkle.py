@@ -0,0 +1,317 @@
+"""merkle — append-only Merkle tree helpers for transparency logs.
+
+Hashing follows RFC 6962: ``leaf = SHA-256(0x00 || leaf)``,
+``node = SHA-256(0x01 || left || right)``, empty tree ``SHA-256(b"")``.
+Leaves are the raw 32 bytes of transparency ``entry_hash`` values.  A log is
+summarised by its *frontier* (roots of the perfect subtrees of its size), and
+:class:`MerkleLevels` persists complete subtree hashes so inclusion and
+consistency proofs read O(log^2 n) stored hashes instead of rehashing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def frontier_append_nodes(
+    frontier: List[bytes], size: int, leaf: bytes
+) -> Tuple[List[bytes], List[Tuple[int, int, bytes]]]:
+    """Like :func:`frontier_append`, also returning the completed subtrees.
+
+    The second element lists ``(level, index, hash)`` for the new leaf and for
+    every complete subtree the append closed, lowest level first.
+    """
+    out = list(frontier)
+    node = leaf
+    nodes = [(0, size, leaf)]
+    k = size
+    level = 0
+    while k & 1:
+        node = node_hash(out.pop(), node)
+        k >>= 1
+        level += 1
+        nodes.append((level, k, node))
+    out.append(node)
+    return out, nodes
+
+
+def frontier_append(frontier: List[bytes], size: int, leaf: bytes) -> List[bytes]:
+    """Return the frontier of a tree of ``size + 1`` leaves.
+
+    *frontier* must describe a tree of *size* leaves; it is not modified.
+    """
+    return frontier_append_nodes(frontier, size, leaf)[0]
+
+
+def frontier_root(frontier: List[bytes]) -> bytes:
+    """Return the Merkle tree head described by *frontier*."""
+    if not frontier:
+        return EMPTY_ROOT
+    root = frontier[-1]
+    for sub in reversed(frontier[:-1]):
+        root = node_hash(sub, root)
+    return root
+
+
+def root_from_leaves(leaves: Iterable[bytes]) -> bytes:
+    """Compute the tree head of already-hashed *leaves* from scratch."""
+    frontier: List[bytes] = []
+    size = 0
+    for leaf in leaves:
+        frontier = frontier_append(frontier, size, leaf)
+        size += 1
+    return frontier_root(frontier)
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than *n* (n > 1)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+# ---------------------------------------------------------------------------
+# Persisted subtree hashes and proofs
+# ---------------------------------------------------------------------------
+
+
+# One connection per leaf index database and process; the lock serializes threads using it.
+_LEAF_DBS: Dict[Tuple[str, int], Tuple[sqlite3.Connection, threading.Lock]] = {}
+_LEAF_DBS_LOCK = threading.Lock()
+
+
+class MerkleLevels:
+    """Hashes of every complete, aligned subtree, one file per tree level.
+
+    ``level-KK.bin`` holds, at offset ``32 * i``, the hash of leaves
+    ``[i * 2**K, (i + 1) * 2**K)``.  Writes are positional, so replaying an
+    append after a crash rewrites the same bytes.  ``leaves.sqlite3`` maps
+    each leaf hash to its first index so inclusion proofs can find a leaf
+    without scanning level 0.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, level: int) -> Path:
+        return self.directory / f"level-{level:02d}.bin"
+
+    @contextmanager
+    def _leaf_db(self) -> Iterator[sqlite3.Connection]:
+        p = self.directory / "leaves.sqlite3"
+        key = (str(p), os.getpid())
+        with _LEAF_DBS_LOCK:
+            entry = _LEAF_DBS.get(key)
+            if entry is not None and not p.exists():
+                entry[0].close()
+                entry = None
+            if entry is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(p), timeout=30, isolation_level=None, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS leaves (leaf BLOB PRIMARY KEY, idx INTEGER NOT NULL)")
+                entry = _LEAF_DBS[key] = (conn, threading.Lock())
+        with entry[1]:
+            yield entry[0]
+
+    def _index_leaves(self, conn: sqlite3.Connection, leaves: Sequence[Tuple[bytes, int]]) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO leaves(leaf, idx) VALUES(?,?)", leaves)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put(self, level: int, index: int, h: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path(level), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, h, index * 32)
+        finally:
+            os.close(fd)
+
+    def put_nodes(self, nodes: Iterable[Tuple[int, int, bytes]]) -> None:
+        leaves: List[Tuple[bytes, int]] = []
+        for level, index, h in nodes:
+            self.put(level, index, h)
+            if level == 0:
+                leaves.append((h, index))
+        if leaves:
+            with self._leaf_db() as conn:
+                self._index_leaves(conn, leaves)
+
+    def get(self, level: int, index: int) -> bytes:
+        with self._path(level).open("rb") as f:
+            f.seek(index * 32)
+            h = f.read(32)
+        if len(h) != 32:
+            raise ValueError(f"missing subtree hash level={level} index={index}")
+        return h
+
+    def truncate(self, size: int) -> None:
+        """Drop subtrees not fully contained in the first *size* leaves."""
+        if not self.directory.exists():
+            return
+        for p in self.directory.glob("level-*.bin"):
+            level = int(p.stem.split("-")[1])
+            keep = (size >> level) * 32
+            if keep == 0:
+                p.unlink()
+            elif p.stat().st_size > keep:
+                os.truncate(p, keep)
+        if (self.directory / "leaves.sqlite3").exists():
+            with self._leaf_db() as conn:
+                conn.execute("DELETE FROM leaves WHERE idx >= ?", (size,))
+
+    def range_hash(self, start: int, end: int) -> bytes:
+        """Merkle tree hash of leaves ``[start, end)``.
+
+        *start* must be a multiple of a power of two that is at least
+        ``end - start``, which holds for every subtree RFC 6962 proofs use.
+        """
+        if end <= start:
+            raise ValueError("empty range")
+        chunks: List[bytes] = []
+        pos = start
+        while pos < end:
+            level = (end - pos).bit_length() - 1
+            while pos & ((1 << level) - 1):
+                level -= 1
+            chunks.append(self.get(level, pos >> level))
+            pos += 1 << level
+        root = chunks[-1]
+        for c in reversed(chunks[:-1]):
+            root = node_hash(c, root)
+        return root
+
+    def leaf_index(self, leaf: bytes, size: int) -> Optional[int]:
+        """Index of the first leaf equal to *leaf* among the first *size*, or None."""
+        p = self._path(0)
+        if not p.exists():
+            return None
+        with self._leaf_db() as conn:
+            row = conn.execute("SELECT MAX(idx) FROM leaves").fetchone()
+            indexed = 0 if row[0] is None else row[0] + 1
+            if indexed < size:
+                # Leaves written before the index existed are indexed once, in chunks.
+                with p.open("rb") as f:
+                    f.seek(indexed * 32)
+                    for start in range(indexed, size, 4096):
+                        data = f.read(min(4096, size - start) * 32)
+                        self._index_leaves(conn, [(data[i : i + 32], start + i // 32) for i in range(0, len(data) - 31, 32)])
+            row = conn.execute("SELECT idx FROM leaves WHERE leaf = ?", (leaf,)).fetchone()
+        return row[0] if row is not None and row[0] < size else None
+
+    def inclusion_path(self, index: int, size: int) -> List[bytes]:
+        """RFC 6962 audit path for leaf *index* in the tree of *size* leaves."""
+        if not 0 <= index < size:
+            raise ValueError(f"leaf index {index} outside tree of size {size}")
+        path: List[bytes] = []
+        lo, hi = 0, size
+        while hi - lo > 1:
+            k = _split(hi - lo)
+            if index < lo + k:
+                path.append(self.range_hash(lo + k, hi))
+                hi = lo + k
+            else:
+                path.append(self.range_hash(lo, lo + k))
+                lo += k
+        return path[::-1]
+
+    def consistency_path(self, first: int, second: int) -> List[bytes]:
+        """RFC 6962 consistency proof between tree sizes *first* and *second*."""
+        if not 0 <= first <= second:
+            raise ValueError(f"invalid tree sizes {first} -> {second}")
+        if first in (0, second):
+            return []
+        path: List[bytes] = []
+        lo, hi, m, complete = 0, second, first, True
+        while True:
+            n = hi - lo
+            if m == n:
+                if not complete:
+                    path.append(self.range_hash(lo, hi))
+                break
+            k = _split(n)
+            if m <= k:
+                path.append(self.range_hash(lo + k, hi))
+                hi = lo + k
+            else:
+                path.append(self.range_hash(lo, lo + k))
+                lo += k
+                m -= k
+                complete = False
+        return path[::-1]
+
+
+def verify_inclusion(leaf: bytes, index: int, size: int, path: Sequence[bytes], root: bytes) -> bool:
+    """Check an audit path for *leaf* at *index* against the tree head *root*."""
+    if not 0 <= index < size:
+        return False
+    fn, sn = index, size - 1
+    r = leaf
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+def verify_consistency(first: int, second: int, first_root: bytes, second_root: bytes, path: Sequence[bytes]) -> bool:
+    """Check that the tree of *second* leaves extends the tree of *first* leaves."""
+    if first > second or first < 0:
+        return False
+    if first == second:
+        return not path and first_root == second_root
+    if first == 0:
+        return not path
+    if not path:
+        return False
+    nodes = list(path)
+    if first & (first - 1) == 0:
+        nodes.insert(0, first_root)
+    fn, sn = first - 1, second - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = nodes[0]
+    for c in nodes[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(c, fr)
+            sr = node_hash(c, sr)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            sr = node_hash(sr, c)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and fr == first_root and sr == second_root
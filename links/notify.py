@@ -0,0 +1,301 @@
+"""notify — durable outbound notification queue (webhook outbox).
+
+Producers enqueue notifications into ``<store_root>/notify/outbox.sqlite3``
+and return immediately; a worker (or ``drain()`` from the CLI) claims due
+rows per destination under a lease and POSTs them as one batch.  Delivery is
+at-least-once: failures back off with jitter and are dead-lettered after
+``max_attempts``.  ``enqueue_event`` fans out to ``LINKS_NOTIFY_WEBHOOKS``
+and is a no-op when none are configured.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional
+
+import requests
+
+
+# (destination_url, json_body) -> HTTP status code
+Sender = Callable[[str, Dict[str, Any]], int]
+
+
+def configured_destinations() -> List[str]:
+    raw = os.environ.get("LINKS_NOTIFY_WEBHOOKS", "")
+    return [d.strip() for d in raw.split(",") if d.strip()]
+
+
+def outbox_path(store_root: Path) -> Path:
+    return Path(store_root) / "notify" / "outbox.sqlite3"
+
+
+def http_sender(timeout: float = 10.0) -> Sender:
+    session = requests.Session()
+
+    def _send(url: str, body: Dict[str, Any]) -> int:
+        return session.post(url, json=body, timeout=timeout).status_code
+
+    return _send
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY,
+    destination TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_notifications_dest ON notifications(destination, status);
+"""
+
+
+class NotificationOutbox:
+    """SQLite-backed outbox of webhook notifications."""
+
+    def __init__(
+        self,
+        store_root: Path,
+        *,
+        batch_size: int = 50,
+        max_attempts: int = 8,
+        base_backoff_seconds: float = 5.0,
+        max_backoff_seconds: float = 3600.0,
+        lease_seconds: float = 60.0,
+        send_timeout: float = 10.0,
+        sender: Optional[Sender] = None,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.path = outbox_path(store_root)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.send_timeout = send_timeout
+        self._sender = sender
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            yield conn
+        finally:
+            conn.close()
+
+    @property
+    def sender(self) -> Sender:
+        if self._sender is None:
+            self._sender = http_sender(self.send_timeout)
+        return self._sender
+
+    # -- producers ---------------------------------------------------------
+
+    def enqueue(self, destination: str, event_type: str, payload: Dict[str, Any]) -> str:
+        """Queue one notification for *destination* and return its id."""
+        nid = uuid.uuid4().hex
+        now = self.clock()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO notifications(id, destination, event_type, payload_json, created_at, next_attempt_at) VALUES(?,?,?,?,?,?)",
+                (nid, destination, event_type, json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str), now, now),
+            )
+        return nid
+
+    # -- worker ------------------------------------------------------------
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (attempts - 1)))
+        return delay * self.rng.uniform(0.8, 1.2)
+
+    def _claim(self, conn: sqlite3.Connection, now: float, ids: Optional[Collection[str]] = None) -> Dict[str, List[sqlite3.Row]]:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            due = "((status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND lease_until <= ?))"
+            if ids is not None:
+                due += f" AND id IN ({','.join('?' * len(ids))})"
+            args = (now, now, *(ids or ()))
+            dests = [r[0] for r in conn.execute(f"SELECT DISTINCT destination FROM notifications WHERE {due}", args)]
+            # The last destination is only sent to after every earlier POST has had its timeout.
+            lease_until = now + self.lease_seconds + len(dests) * self.send_timeout
+            claimed: Dict[str, List[sqlite3.Row]] = {}
+            for dest in dests:
+                rows = conn.execute(
+                    f"SELECT * FROM notifications WHERE destination = ? AND {due} ORDER BY created_at LIMIT ?",
+                    (dest, *args, self.batch_size),
+                ).fetchall()
+                if not rows:
+                    continue
+                conn.executemany(
+                    "UPDATE notifications SET status = 'sending', lease_until = ? WHERE id = ?",
+                    [(lease_until, r["id"]) for r in rows],
+                )
+                claimed[dest] = rows
+            conn.execute("COMMIT")
+            return claimed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def drain(self, ids: Optional[Collection[str]] = None) -> Dict[str, int]:
+        """Deliver every due notification once (one batch per destination).
+
+        With *ids* only those notifications are claimed, so a producer can
+        deliver what it just queued without taking on anyone else's backlog.
+        Returns counts of ``delivered``, ``retried`` and ``dead`` rows.
+        """
+        counts = {"delivered": 0, "retried": 0, "dead": 0}
+        if ids is not None and not ids:
+            return counts
+        with self._conn() as conn:
+            claimed = self._claim(conn, self.clock(), list(ids) if ids is not None else None)
+            for dest, rows in claimed.items():
+                body = {
+                    "notifications": [
+                        {
+                            "id": r["id"],
+                            "event_type": r["event_type"],
+                            "created_at": r["created_at"],
+                            "attempt": r["attempts"] + 1,
+                            "payload": json.loads(r["payload_json"]),
+                        }
+                        for r in rows
+                    ]
+                }
+                error: Optional[str] = None
+                try:
+                    status = self.sender(dest, body)
+                    if not 200 <= int(status) < 300:
+                        error = f"HTTP {status}"
+                except Exception as exc:  # noqa: BLE001
+                    error = f"{type(exc).__name__}: {exc}"
+                done_at = self.clock()
+                if error is None:
+                    conn.executemany(
+                        "UPDATE notifications SET status = 'delivered', attempts = attempts + 1, delivered_at = ?, lease_until = NULL, last_error = NULL WHERE id = ?",
+                        [(done_at, r["id"]) for r in rows],
+                    )
+                    counts["delivered"] += len(rows)
+                    continue
+                for r in rows:
+                    attempts = r["attempts"] + 1
+                    if attempts >= self.max_attempts:
+                        conn.execute(
+                            "UPDATE notifications SET status = 'dead', attempts = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                            (attempts, error, r["id"]),
+                        )
+                        counts["dead"] += 1
+                    else:
+                        conn.execute(
+                            "UPDATE notifications SET status = 'pending', attempts = ?, next_attempt_at = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                            (attempts, done_at + self._backoff(attempts), error, r["id"]),
+                        )
+                        counts["retried"] += 1
+        return counts
+
+    def retry_dead(self, destination: Optional[str] = None) -> int:
+        """Move dead-lettered rows back to pending with a fresh attempt budget."""
+        with self._conn() as conn:
+            sql = "UPDATE notifications SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+            args: List[Any] = [self.clock()]
+            if destination:
+                sql += " AND destination = ?"
+                args.append(destination)
+            return conn.execute(sql, args).rowcount
+
+    def prune(self, older_than_seconds: float = 7 * 86400) -> int:
+        """Delete delivered rows older than *older_than_seconds*."""
+        with self._conn() as conn:
+            return conn.execute(
+                "DELETE FROM notifications WHERE status = 'delivered' AND delivered_at < ?",
+                (self.clock() - older_than_seconds,),
+            ).rowcount
+
+    def stats(self, latency_window: int = 1000) -> Dict[str, Any]:
+        """Queue depth per status, oldest pending age and recent delivery latency."""
+        now = self.clock()
+        with self._conn() as conn:
+            by_status = {r[0]: r[1] for r in conn.execute("SELECT status, COUNT(*) FROM notifications GROUP BY status")}
+            oldest = conn.execute("SELECT MIN(created_at) FROM notifications WHERE status IN ('pending', 'sending')").fetchone()[0]
+            lat = sorted(
+                r[0]
+                for r in conn.execute(
+                    "SELECT delivered_at - created_at FROM notifications WHERE status = 'delivered' ORDER BY delivered_at DESC LIMIT ?",
+                    (latency_window,),
+                )
+            )
+
+        def _pct(p: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 4)
+
+        return {
+            "by_status": by_status,
+            "oldest_pending_age_seconds": round(now - oldest, 3) if oldest is not None else None,
+            "delivery_latency_seconds": {"p50": _pct(0.5), "p95": _pct(0.95), "max": round(lat[-1], 4) if lat else None, "samples": len(lat)},
+        }
+
+
+def enqueue_event(store_root: Path, event_type: str, payload: Dict[str, Any], destinations: Optional[List[str]] = None) -> List[str]:
+    """Queue *event_type* for each configured destination; never raises."""
+    dests = configured_destinations() if destinations is None else destinations
+    if not dests:
+        return []
+    try:
+        outbox = NotificationOutbox(store_root)
+        return [outbox.enqueue(d, event_type, payload) for d in dests]
+    except Exception:
+        return []
+
+
+class NotificationWorker:
+    """Background thread that drains an outbox every ``poll_seconds``."""
+
+    def __init__(self, outbox: NotificationOutbox, poll_seconds: float = 2.0) -> None:
+        self.outbox = outbox
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.outbox.drain()
+            except Exception:
+                pass
+            self._stop.wait(self.poll_seconds)
+
+    def start(self) -> "NotificationWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="links-notify", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,196 @@
+"""policy_eval — compiled village policy for bundle acceptance decisions.
+
+A :class:`CompiledVillagePolicy` turns the policy lists into sets once and
+answers every rule (window, predicates, issuer key hash, issuer id) with
+O(1) lookups.  Compiled policies are cached by policy hash and pinned to the
+shared cached ``Village``; :func:`evaluate_bundles` compiles each village's
+policy once per batch.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .audit import policy_hash
+
+
+@dataclass(frozen=True)
+class PolicyDecision:
+    allowed: bool
+    reason: str = "ok"
+    rule: Optional[str] = None  # "window" | "predicate" | "issuer_key" | "issuer_id"
+
+
+_OK = PolicyDecision(True)
+
+
+def issuer_key_hash(public_key_b64: str) -> str:
+    import base64
+    import hashlib
+
+    return hashlib.sha256(base64.b64decode(public_key_b64)).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledVillagePolicy:
+    policy_hash: str
+    max_window_days: int
+    allowed_predicates: FrozenSet[str]
+    issuer_allowlist: FrozenSet[str]
+    issuer_blocklist: FrozenSet[str]
+    require_issuer_allowlist: bool
+    issuer_id_allowlist: FrozenSet[str]
+    issuer_id_blocklist: FrozenSet[str]
+
+    @classmethod
+    def from_policy(cls, policy, policy_hash_hex: Optional[str] = None) -> "CompiledVillagePolicy":
+        return cls(
+            policy_hash=policy_hash_hex or policy_hash(policy.model_dump()),
+            max_window_days=int(policy.max_window_days),
+            allowed_predicates=frozenset(policy.allowed_predicates),
+            issuer_allowlist=frozenset(policy.issuer_allowlist),
+            issuer_blocklist=frozenset(policy.issuer_blocklist),
+            require_issuer_allowlist=bool(policy.require_issuer_allowlist),
+            issuer_id_allowlist=frozenset(policy.issuer_id_allowlist),
+            issuer_id_blocklist=frozenset(policy.issuer_id_blocklist),
+        )
+
+    # -- individual rules ---------------------------------------------------
+
+    def check_window(self, bundle: Dict[str, Any]) -> PolicyDecision:
+        window = int(bundle.get("window_days", 0))
+        if window > self.max_window_days:
+            return PolicyDecision(False, f"bundle window_days={window} exceeds max_window_days={self.max_window_days}", "window")
+        return _OK
+
+    def check_predicates(self, bundle: Dict[str, Any]) -> PolicyDecision:
+        for c in bundle.get("claims", []):
+            pred = c.get("predicate")
+            if pred and pred not in self.allowed_predicates:
+                return PolicyDecision(False, f"predicate '{pred}' not allowed", "predicate")
+        return _OK
+
+    def issuer_key_allowed(self, key_hash: str) -> bool:
+        if key_hash in self.issuer_blocklist:
+            return False
+        if self.require_issuer_allowlist or self.issuer_allowlist:
+            return key_hash in self.issuer_allowlist
+        return True
+
+    def issuer_id_allowed(self, issuer_id: str) -> bool:
+        if issuer_id in self.issuer_id_blocklist:
+            return False
+        if self.issuer_id_allowlist:
+            return issuer_id in self.issuer_id_allowlist
+        return True
+
+    # -- entry points -------------------------------------------------------
+
+    def evaluate(self, bundle: Dict[str, Any], issuer_key_hash_hex: Optional[str] = None) -> PolicyDecision:
+        """Decide whether *bundle* (a bundle dict) is acceptable under this policy.
+
+        *issuer_key_hash_hex* may be passed when the caller already derived it;
+        otherwise it is computed from ``bundle["public_key"]`` if present.
+        """
+        d = self.check_window(bundle)
+        if not d.allowed:
+            return d
+        d = self.check_predicates(bundle)
+        if not d.allowed:
+            return d
+        kh = issuer_key_hash_hex
+        if kh is None and bundle.get("public_key"):
+            try:
+                kh = issuer_key_hash(bundle["public_key"])
+            except Exception:
+                return PolicyDecision(False, "issuer public_key is not valid base64", "issuer_key")
+        if kh and not self.issuer_key_allowed(kh):
+            return PolicyDecision(False, f"issuer key {kh[:16]} not allowed", "issuer_key")
+        issuer_id = bundle.get("issuer")
+        if issuer_id and not self.issuer_id_allowed(issuer_id):
+            return PolicyDecision(False, f"issuer '{issuer_id}' not allowed", "issuer_id")
+        return _OK
+
+    def evaluate_many(self, bundles: Iterable[Dict[str, Any]]) -> List[PolicyDecision]:
+        return [self.evaluate(b) for b in bundles]
+
+    def same_rules(self, other: "CompiledVillagePolicy") -> bool:
+        """True if *other* decides every bundle the same way (other policy fields may differ)."""
+        return replace(self, policy_hash="") == replace(other, policy_hash="")
+
+
+# ---------------------------------------------------------------------------
+# Caches
+# ---------------------------------------------------------------------------
+
+_MAX_COMPILED = 128
+_compiled: "OrderedDict[str, CompiledVillagePolicy]" = OrderedDict()
+# (villages_root, village_id) -> (shared Village object, its compiled policy)
+_pinned: Dict[Tuple[str, str], Tuple[Any, CompiledVillagePolicy]] = {}
+_lock = threading.Lock()
+
+
+def compile_policy(policy) -> CompiledVillagePolicy:
+    """Compiled form of *policy*, reused for every policy with the same hash."""
+    h = policy_hash(policy.model_dump())
+    with _lock:
+        hit = _compiled.get(h)
+        if hit is not None:
+            _compiled.move_to_end(h)
+            return hit
+    compiled = CompiledVillagePolicy.from_policy(policy, h)
+    with _lock:
+        _compiled[h] = compiled
+        while len(_compiled) > _MAX_COMPILED:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def compiled_policy_for_village(villages_root: Path, village_id: str) -> CompiledVillagePolicy:
+    """Compiled policy of a village, read through the shared village cache."""
+    from .villages import cached_village
+
+    v = cached_village(villages_root, village_id)
+    key = (str(villages_root), village_id)
+    pinned = _pinned.get(key)
+    if pinned is not None and pinned[0] is v:
+        return pinned[1]
+    compiled = compile_policy(v.policy)
+    with _lock:
+        _pinned[key] = (v, compiled)
+    return compiled
+
+
+def clear_policy_cache() -> None:
+    with _lock:
+        _compiled.clear()
+        _pinned.clear()
+
+
+def evaluate_bundles(
+    villages_root: Path, bundles: Iterable[Dict[str, Any]], default_village_id: Optional[str] = None
+) -> List[PolicyDecision]:
+    """Evaluate many bundle dicts, each against its ``village_id``'s current policy.
+
+    Bundles without a village (and no *default_village_id*) are allowed, as on
+    the single-bundle paths.  A village that cannot be loaded denies its bundles.
+    """
+    by_village: Dict[str, Optional[CompiledVillagePolicy]] = {}
+    out: List[PolicyDecision] = []
+    for b in bundles:
+        vid = b.get("village_id") or default_village_id
+        if not vid:
+            out.append(_OK)
+            continue
+        if vid not in by_village:
+            try:
+                by_village[vid] = compiled_policy_for_village(villages_root, vid)
+            except Exception:
+                by_village[vid] = None
+        compiled = by_village[vid]
+        out.append(compiled.evaluate(b) if compiled is not None else PolicyDecision(False, f"village '{vid}' not found", "village"))
+    return out
@@ -7,12 +7,14 @@ from pathlib import Path
 from typing import Optional, Iterable, Tuple, Dict, List, Any
 from datetime import timezone, datetime
 
-from nacl.signing import SigningKey, VerifyKey
+from nacl.signing import SigningKey
 from nacl.exceptions import BadSignatureError
 
 from pydantic import BaseModel
 
+from .key_cache import verify_key_b64
 from .validate import validate_village_id
+from .lineage import record_policy_update, sync_lineage_index
 from .policy_updates import (
     VillagePolicyUpdate,
     verify_update_any,
@@ -38,6 +40,7 @@ def store_policy_update(villages_root: Path, u: VillagePolicyUpdate) -> Path:
     ts = u.created_at.astimezone(timezone.utc).isoformat().replace("+00:00", "Z").replace(":", "").replace("-", "")
     p = d / f"{ts}.{u.policy_hash}.json"
     p.write_text(u.model_dump_json(indent=2), encoding="utf-8")
+    record_policy_update(villages_root, u)
     return p
 
 
@@ -57,6 +60,11 @@ def list_policy_updates(villages_root: Path, village_id: str) -> List[VillagePol
 
 
 def latest_policy_update(villages_root: Path, village_id: str) -> Optional[VillagePolicyUpdate]:
+    head = sync_lineage_index(villages_root, village_id).head
+    if head:
+        u = get_policy_update_by_hash(villages_root, village_id, head)
+        if u is not None:
+            return u
     ups = list_policy_updates(villages_root, village_id)
     if not ups:
         return None
@@ -232,7 +240,7 @@ def verify_manifest(m: PolicyFeedManifest, trusted_signer_key_hashes: Optional[L
         return False, "manifest signer not trusted"
 
     payload = _manifest_payload(m)
-    vk = VerifyKey(base64.b64decode(m.signer_public_key))
+    vk = verify_key_b64(m.signer_public_key)
     try:
         vk.verify(canonical_json(payload), base64.b64decode(m.signature))
     except BadSignatureError:
@@ -264,6 +272,15 @@ def verify_manifest_against_policy(policy: dict, m: PolicyFeedManifest) -> tuple
 
 
 def get_policy_update_by_hash(villages_root: Path, village_id: str, policy_hash: str) -> Optional[VillagePolicyUpdate]:
+    # Update files are named <ts>.<policy_hash>.json, so try a direct match first.
+    d = _updates_dir(villages_root, village_id)
+    for p in sorted(d.glob(f"*.{policy_hash}.json")):
+        try:
+            u = VillagePolicyUpdate.model_validate_json(p.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if u.policy_hash == policy_hash:
+            return u
     for u in iter_policy_updates(villages_root, village_id):
         if u.policy_hash == policy_hash:
             return u
@@ -5,9 +5,10 @@ from datetime import datetime
 from typing import Optional, List, Dict, Set, Tuple, Any
 
 from pydantic import BaseModel, Field, ConfigDict, model_validator, computed_field
-from nacl.signing import SigningKey, VerifyKey
+from nacl.signing import SigningKey
 from nacl.exceptions import BadSignatureError
 
+from .key_cache import verify_key_b64
 from .utils import canonical_json, sha256_hex, utc_now
 
 
@@ -180,7 +181,7 @@ def add_signature(u: VillagePolicyUpdate, signing_key: SigningKey) -> VillagePol
 def _verify_one(payload: dict, public_key_b64: str, signature_b64: str, alg: str = 'ed25519') -> bool:
     if (alg or 'ed25519').lower() != 'ed25519':
         return False
-    vk = VerifyKey(base64.b64decode(public_key_b64))
+    vk = verify_key_b64(public_key_b64)
     try:
         vk.verify(canonical_json(payload), base64.b64decode(signature_b64))
         return True
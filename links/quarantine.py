@@ -1,17 +1,36 @@
+"""quarantine — holding area for external bundles awaiting review.
+
+Each quarantine directory keeps an append-only ``index.jsonl`` (``add``,
+``remove`` and ``eligible`` rows) so listing never opens the bundles; it is
+compacted once dead rows dominate and rebuilt from the files when missing.
+Batch approve/reject verify signatures on a thread pool and store approved
+bundles and their audit events together.
+"""
+
 from __future__ import annotations
 
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from .claims import ClaimBundle, verify_bundle
-from .store import ingest_bundle_file
-from .audit import write_audit, AuditEvent, policy_hash
-from .villages import load_village, enforce_policy_on_bundle, issuer_key_hash_from_public_key_b64, issuer_allowed
-from .file_lock import locked_open
+from .store import ingest_verified_bundles
+from .audit import write_audit, flush_audit, AuditEvent, iso_utc, utc_now
+from .villages import cached_village
+from .policy_eval import compiled_policy_for_village, issuer_key_hash as _issuer_key_hash
+from .audit_counters import audit_action_count
 from .validate import validate_village_id
 from .denials import write_denial_artifact
+from .file_lock import locked_open
 from .keys import load_signing_key_from_env
+from .notify import enqueue_event
+
+_INDEX_NAME = "index.jsonl"
+_COMPACT_MIN_DEAD = 256
 
 
 def quarantine_dir(store_root: Path, village_id: Optional[str]) -> Path:
@@ -32,109 +51,343 @@ def rejected_dir(store_root: Path, village_id: Optional[str]) -> Path:
     return r
 
 
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class QuarantineEntry:
+    bundle_id: str
+    village_id: Optional[str]
+    issuer: Optional[str]
+    issuer_key_hash: Optional[str]
+    reason: str
+    size: int
+    claims: int
+    ts: str
+    eligible: Optional[str] = None  # policy hash under which a re-evaluation found it acceptable
+
+    def path(self, store_root: Path) -> Path:
+        return quarantine_dir(store_root, self.village_id) / f"{self.bundle_id}.json"
+
+
+def _entry_row(bundle_obj: dict, bundle_id: str, village_id: Optional[str], reason: str, issuer_key_hash_hex: Optional[str], size: int, ts: str) -> dict:
+    if issuer_key_hash_hex is None and bundle_obj.get("public_key"):
+        try:
+            issuer_key_hash_hex = _issuer_key_hash(bundle_obj["public_key"])
+        except Exception:
+            issuer_key_hash_hex = None
+    claims = bundle_obj.get("claims")
+    return {
+        "op": "add",
+        "bundle_id": bundle_id,
+        "village_id": village_id,
+        "issuer": bundle_obj.get("issuer"),
+        "issuer_key_hash": issuer_key_hash_hex,
+        "reason": reason,
+        "size": size,
+        "claims": len(claims) if isinstance(claims, list) else 0,
+        "ts": ts,
+    }
+
+
+def _append_index(qd: Path, rows: List[dict]) -> None:
+    if not rows:
+        return
+    idx = qd / _INDEX_NAME
+    if not idx.exists():
+        _rebuild_index(qd)
+    with locked_open(idx, "a") as f:
+        f.write("".join(json.dumps(r, ensure_ascii=False, sort_keys=True) + "\n" for r in rows))
+
+
+def _fold(lines: List[str]) -> Tuple[Dict[str, dict], int]:
+    live: Dict[str, dict] = {}
+    dead = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if row.get("op") == "remove":
+            dead += 1 + (row["bundle_id"] in live)
+            live.pop(row["bundle_id"], None)
+        elif row.get("op") == "eligible":
+            dead += 1
+            if row["bundle_id"] in live:
+                live[row["bundle_id"]]["eligible"] = row["policy_hash"]
+        else:
+            live[row["bundle_id"]] = row
+    return live, dead
+
+
+def _rebuild_index(qd: Path) -> int:
+    """Recreate ``index.jsonl`` from the bundle files in *qd*; returns the number indexed."""
+    village_id = qd.name if qd.parent.name == "quarantine" and qd.name != "quarantine" else None
+    rows = []
+    for p in sorted(qd.glob("*.json")):
+        try:
+            raw = p.read_bytes()
+            obj = json.loads(raw)
+        except Exception:
+            continue
+        ts = iso_utc(datetime.fromtimestamp(p.stat().st_mtime, tz=timezone.utc))
+        rows.append(_entry_row(obj, p.stem, village_id, "", None, len(raw), ts))
+    idx = qd / _INDEX_NAME
+    with locked_open(idx, "a+") as f:
+        f.seek(0)
+        f.truncate(0)
+        f.write("".join(json.dumps(r, ensure_ascii=False, sort_keys=True) + "\n" for r in rows))
+    return len(rows)
+
+
+def _read_index(qd: Path) -> Dict[str, dict]:
+    idx = qd / _INDEX_NAME
+    if not idx.exists():
+        _rebuild_index(qd)
+    with locked_open(idx, "r", shared=True) as f:
+        live, dead = _fold(f.read().splitlines())
+    if dead > max(_COMPACT_MIN_DEAD, len(live)):
+        with locked_open(idx, "a+") as f:
+            f.seek(0)
+            live, _ = _fold(f.read().splitlines())
+            f.seek(0)
+            f.truncate(0)
+            f.write("".join(json.dumps(r, ensure_ascii=False, sort_keys=True) + "\n" for r in live.values()))
+    return live
+
+
+def rebuild_quarantine_index(store_root: Path, village_id: Optional[str] = None) -> int:
+    return _rebuild_index(quarantine_dir(store_root, village_id))
+
+
+def quarantine_entries(
+    store_root: Path,
+    village_id: Optional[str] = None,
+    *,
+    issuer: Optional[str] = None,
+    issuer_key_hash: Optional[str] = None,
+    reason: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    eligible_under: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[QuarantineEntry]:
+    """
+    Quarantined bundles of one directory, oldest first, filtered on the index only.
+
+    *reason* matches as a substring; *since*/*until* compare against the
+    quarantine timestamp (ISO-8601, ``until`` exclusive); *eligible_under*
+    keeps bundles marked eligible under that policy hash.
+    """
+    out: List[QuarantineEntry] = []
+    rows = sorted(_read_index(quarantine_dir(store_root, village_id)).values(), key=lambda r: (r["ts"], r["bundle_id"]))
+    for r in rows:
+        if issuer is not None and r.get("issuer") != issuer:
+            continue
+        if issuer_key_hash is not None and r.get("issuer_key_hash") != issuer_key_hash:
+            continue
+        if reason is not None and reason not in (r.get("reason") or ""):
+            continue
+        if since is not None and r["ts"] < since:
+            continue
+        if until is not None and r["ts"] >= until:
+            continue
+        if eligible_under is not None and r.get("eligible") != eligible_under:
+            continue
+        out.append(QuarantineEntry(**{k: r.get(k) for k in QuarantineEntry.__dataclass_fields__}))
+        if limit is not None and len(out) >= limit:
+            break
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Quarantine and review
+# ---------------------------------------------------------------------------
+
+
 def quarantine_bundle(store_root: Path, bundle_obj: dict, bundle_id: str, village_id: Optional[str], reason: str, issuer_key_hash: Optional[str] = None) -> Path:
     qd = quarantine_dir(store_root, village_id)
     p = qd / f"{bundle_id}.json"
-    p.write_text(json.dumps(bundle_obj, ensure_ascii=False, indent=2), encoding="utf-8")
-    write_audit(store_root, AuditEvent(action="ingest.quarantine", bundle_id=bundle_id, village_id=village_id, issuer_key_hash=issuer_key_hash, reason=reason))
+    text = json.dumps(bundle_obj, ensure_ascii=False, indent=2)
+    p.write_text(text, encoding="utf-8")
+    row = _entry_row(bundle_obj, bundle_id, village_id, reason, issuer_key_hash, len(text.encode("utf-8")), iso_utc(utc_now()))
+    _append_index(qd, [row])
+    write_audit(store_root, AuditEvent(action="ingest.quarantine", bundle_id=bundle_id, village_id=village_id, issuer_key_hash=row["issuer_key_hash"], reason=reason))
+    enqueue_event(store_root, "quarantine.add", {"bundle_id": bundle_id, "village_id": village_id, "issuer_key_hash": row["issuer_key_hash"], "reason": reason})
     return p
 
 
 def list_quarantine(store_root: Path, village_id: Optional[str] = None) -> list[Path]:
     qd = quarantine_dir(store_root, village_id)
-    return sorted(qd.glob("*.json"))
+    return sorted(qd / f"{bundle_id}.json" for bundle_id in _read_index(qd))
 
 
-def approve_quarantine(store_root: Path, bundle_path: Path, villages_root: Path = Path("data")) -> tuple[bool, str]:
+def mark_eligible(store_root: Path, village_id: Optional[str], bundle_ids: Sequence[str], policy_hash_hex: str) -> None:
+    """Record that *bundle_ids* are acceptable under *policy_hash_hex* (approval still re-checks)."""
+    now = iso_utc(utc_now())
+    rows = [{"op": "eligible", "bundle_id": b, "policy_hash": policy_hash_hex, "ts": now} for b in bundle_ids]
+    _append_index(quarantine_dir(store_root, village_id), rows)
+
+
+@dataclass(frozen=True)
+class ReviewResult:
+    bundle_id: str
+    ok: bool
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def verify_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("LINKS_QUARANTINE_VERIFY_WORKERS", "")))
+    except ValueError:
+        return min(8, os.cpu_count() or 1)
+
+
+def _load_and_verify(path: Path) -> Tuple[Optional[dict], Optional[ClaimBundle], bool]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+        cb = ClaimBundle.model_validate(obj)
+    except Exception:
+        return None, None, False
+    return obj, cb, verify_bundle(cb)
+
+
+def write_bundle_denial(store_root: Path, village_id: str, bundle_id: str, reason: str, signing_key) -> None:
+    """Emit a signed denial artifact if the node key is available."""
+    if signing_key is None:
+        return
+    try:
+        out = rejected_dir(store_root, village_id) / f"{bundle_id}.denial.json"
+        write_denial_artifact(out, village_id=village_id, subject_type="bundle", subject_id=bundle_id, reason=reason, signing_key=signing_key)
+    except Exception:
+        pass
+
+
+def approve_quarantine_batch(
+    store_root: Path, bundle_paths: Sequence[Path], villages_root: Path = Path("data"), workers: Optional[int] = None
+) -> List[ReviewResult]:
     """
-    Approve a quarantined bundle, but re-check current policy before ingestion.
-    - verifies signature + bundle_id
-    - if village_id present, loads current village policy and re-checks predicates/window/issuer allowlists
+    Approve quarantined bundles, re-checking current policy before ingestion.
+    - verifies signature + bundle_id of every bundle on a thread pool
+    - per village: evaluates the current compiled policy and the daily
+      submission quota (counted once, then decremented per approval)
+    - stores all approved bundles in one batch and flushes their audit events together
+    Returns one result per path, in order.
     """
-    obj = json.loads(bundle_path.read_text(encoding="utf-8"))
-    cb = ClaimBundle.model_validate(obj)
-    if not verify_bundle(cb):
-        return False, "bundle failed verification (cannot approve)"
-    village_id = getattr(cb, "village_id", None)
+    paths = list(bundle_paths)
+    n = max(1, min(workers or verify_workers(), len(paths) or 1))
+    if n > 1:
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="quarantine-verify") as pool:
+            loaded = list(pool.map(_load_and_verify, paths))
+    else:
+        loaded = [_load_and_verify(p) for p in paths]
 
-    if village_id:
-        v = load_village(villages_root, village_id)
-        okp, msgp = enforce_policy_on_bundle(v, obj)
-        if not okp:
-            reason = f"policy no longer allows approval: {msgp}"
-            try:
-                sk = load_signing_key_from_env()
-                out = rejected_dir(store_root, village_id) / f"{bundle_path.stem}.denial.json"
-                write_denial_artifact(out, village_id=village_id, subject_type="bundle", subject_id=bundle_path.stem, reason=reason, signing_key=sk)
-            except Exception:
-                pass
-            return False, reason
-        issuer_hash = issuer_key_hash_from_public_key_b64(cb.public_key) if cb.public_key else None
-        if issuer_hash and not issuer_allowed(v.policy, issuer_hash):
-            return False, "policy no longer allows issuer"
-
-
-    # Village-level submission quota (if configured)
-    if village_id:
-        v = load_village(villages_root, village_id)
-        quota = getattr(v.policy, "submission_quota_per_day", 0) or 0
-        if quota > 0:
-            used = _count_quarantine_approvals_today(store_root, village_id)
-            if used >= quota:
-                reason = f"submission quota exceeded for UTC day (used {used}/{quota})"
-                # Emit a signed denial artifact if node key is available
-                try:
-                    sk = load_signing_key_from_env()
-                    out = rejected_dir(store_root, village_id) / f"{bundle_path.stem}.denial.json"
-                    write_denial_artifact(out, village_id=village_id, subject_type="bundle", subject_id=bundle_path.stem, reason=reason, signing_key=sk)
-                except Exception:
-                    pass
-                return False, reason
-    
-    ok, msg = ingest_bundle_file(bundle_path, store_root=store_root)
-    if ok:
+    results: List[Optional[ReviewResult]] = [None] * len(paths)
+    accepted: List[Tuple[int, Optional[str], ClaimBundle]] = []
+    remaining: Dict[str, Optional[int]] = {}
+    sk: Any = False
+    for i, (path, (obj, cb, ok)) in enumerate(zip(paths, loaded)):
+        if not ok or obj is None or cb is None:
+            results[i] = ReviewResult(path.stem, False, "bundle failed verification (cannot approve)")
+            continue
+        # ClaimBundle does not model village_id; fall back to the raw document.
+        village_id = getattr(cb, "village_id", None) or obj.get("village_id")
+        if village_id:
+            decision = compiled_policy_for_village(villages_root, village_id).evaluate(obj)
+            if decision.rule in ("issuer_key", "issuer_id"):
+                results[i] = ReviewResult(path.stem, False, "policy no longer allows issuer")
+                continue
+            reason = None
+            if not decision.allowed:
+                reason = f"policy no longer allows approval: {decision.reason}"
+            else:
+                # Village-level submission quota (if configured)
+                if village_id not in remaining:
+                    quota = getattr(cached_village(villages_root, village_id).policy, "submission_quota_per_day", 0) or 0
+                    remaining[village_id] = quota - _count_quarantine_approvals_today(store_root, village_id) if quota > 0 else None
+                left = remaining[village_id]
+                if left is not None:
+                    if left <= 0:
+                        quota = cached_village(villages_root, village_id).policy.submission_quota_per_day
+                        reason = f"submission quota exceeded for UTC day (used {quota - left}/{quota})"
+                    else:
+                        remaining[village_id] = left - 1
+            if reason is not None:
+                if sk is False:
+                    try:
+                        sk = load_signing_key_from_env()
+                    except Exception:
+                        sk = None
+                write_bundle_denial(store_root, village_id, path.stem, reason, sk)
+                results[i] = ReviewResult(path.stem, False, reason)
+                continue
+        accepted.append((i, village_id, cb))
+
+    stored = ingest_verified_bundles(store_root, [cb for _, _, cb in accepted])
+    removed: Dict[Path, List[dict]] = {}
+    now = iso_utc(utc_now())
+    for (i, village_id, _), (ok, msg) in zip(accepted, stored):
+        path = paths[i]
+        results[i] = ReviewResult(path.stem, ok, msg)
+        if not ok:
+            continue
+        path.unlink(missing_ok=True)
+        removed.setdefault(path.parent, []).append({"op": "remove", "bundle_id": path.stem, "outcome": "approve", "ts": now})
+        write_audit(store_root, AuditEvent(action="quarantine.approve", bundle_id=path.stem, village_id=village_id, reason=msg))
+        enqueue_event(store_root, "quarantine.approve", {"bundle_id": path.stem, "village_id": village_id, "reason": msg})
+    for qd, rows in removed.items():
+        _append_index(qd, rows)
+    if removed:
+        flush_audit(store_root)
+    return [r for r in results if r is not None]
+
+
+def approve_quarantine(store_root: Path, bundle_path: Path, villages_root: Path = Path("data")) -> tuple[bool, str]:
+    """Approve one quarantined bundle; see :func:`approve_quarantine_batch`."""
+    r = approve_quarantine_batch(store_root, [bundle_path], villages_root=villages_root, workers=1)[0]
+    return r.ok, r.message
+
+
+def reject_quarantine_batch(store_root: Path, bundle_paths: Sequence[Path], village_id: Optional[str], reason: Union[str, Sequence[str]]) -> List[ReviewResult]:
+    """Move quarantined bundles to ``rejected/`` with one index update and one audit flush.
+
+    *reason* is either one reason for all bundles or one per bundle.
+    """
+    reasons = [reason] * len(bundle_paths) if isinstance(reason, str) else list(reason)
+    rd = rejected_dir(store_root, village_id)
+    results: List[ReviewResult] = []
+    removed: Dict[Path, List[dict]] = {}
+    now = iso_utc(utc_now())
+    for bundle_path, why in zip(bundle_paths, reasons):
+        try:
+            text = bundle_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            results.append(ReviewResult(bundle_path.stem, False, "not in quarantine"))
+            continue
+        out = rd / bundle_path.name
+        out.write_text(text, encoding="utf-8")
         bundle_path.unlink(missing_ok=True)
-        write_audit(store_root, AuditEvent(action="quarantine.approve", bundle_id=bundle_path.stem, village_id=village_id, reason=msg))
-    return ok, msg
+        removed.setdefault(bundle_path.parent, []).append({"op": "remove", "bundle_id": bundle_path.stem, "outcome": "reject", "ts": now})
+        write_audit(store_root, AuditEvent(action="quarantine.reject", bundle_id=bundle_path.stem, village_id=village_id, reason=why))
+        enqueue_event(store_root, "quarantine.reject", {"bundle_id": bundle_path.stem, "village_id": village_id, "reason": why})
+        results.append(ReviewResult(bundle_path.stem, True, f"moved to rejected: {out}"))
+    for qd, rows in removed.items():
+        _append_index(qd, rows)
+    if removed:
+        flush_audit(store_root)
+    return results
 
 
 def reject_quarantine(store_root: Path, bundle_path: Path, village_id: Optional[str], reason: str) -> tuple[bool, str]:
-    rd = rejected_dir(store_root, village_id)
-    out = rd / bundle_path.name
-    out.write_text(bundle_path.read_text(encoding="utf-8"), encoding="utf-8")
-    bundle_path.unlink(missing_ok=True)
-    write_audit(store_root, AuditEvent(action="quarantine.reject", bundle_id=bundle_path.stem, village_id=village_id, reason=reason))
-    return True, f"moved to rejected: {out}"
+    r = reject_quarantine_batch(store_root, [bundle_path], village_id, reason)[0]
+    return r.ok, r.message
 
 
 def _count_quarantine_approvals_today(store_root: Path, village_id: str) -> int:
     """Count today's quarantine.approve events for a village (UTC day)."""
-    audit_path = store_root / "audit" / "audit.log.jsonl"
-    if not audit_path.exists():
-        return 0
-    from datetime import datetime, timezone
-
-    today = datetime.now(timezone.utc).date()
-    n = 0
-    with locked_open(audit_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                ev = json.loads(line)
-            except Exception:
-                continue
-            if ev.get("action") != "quarantine.approve":
-                continue
-            if ev.get("village_id") != village_id:
-                continue
-            ts = ev.get("ts") or ""
-            try:
-                # ISO-8601 Z
-                dt = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc)
-            except Exception:
-                continue
-            if dt.date() == today:
-                n += 1
-    return n
+    flush_audit(store_root)
+    return audit_action_count(store_root, village_id, "quarantine.approve")
@@ -0,0 +1,238 @@
+"""quarantine_reeval — re-evaluate a village's quarantine backlog after a policy change.
+
+:func:`reevaluate_quarantine` streams the quarantine index in chunks and
+evaluates each chunk on a thread pool against one compiled policy: denied
+bundles are rejected with a denial artifact, allowed ones are marked
+*eligible* (approval still re-checks everything).  ``apply_policy_update``
+schedules a run when the compiled rules change; ``LINKS_QUARANTINE_REEVALUATE``
+selects ``sync`` (the default outside the server), ``background`` (the
+server's default) or ``off``.  Background failures are logged and the last
+outcome is kept for ``links quarantine reevaluate --status``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .audit import AuditEvent, write_audit, flush_audit, iso_utc, utc_now
+from .keys import load_signing_key_from_env
+from .policy_eval import CompiledVillagePolicy, PolicyDecision, compiled_policy_for_village
+from .quarantine import (
+    QuarantineEntry,
+    mark_eligible,
+    quarantine_dir,
+    quarantine_entries,
+    reject_quarantine_batch,
+    verify_workers,
+    write_bundle_denial,
+)
+from .validate import validate_village_id
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ReevaluationReport:
+    village_id: str
+    policy_hash: str
+    total: int = 0
+    scanned: int = 0
+    eligible: int = 0
+    rejected: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    completed: bool = False
+
+    @property
+    def per_second(self) -> float:
+        return self.scanned / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["per_second"] = round(self.per_second, 1)
+        d["seconds"] = round(self.seconds, 3)
+        return d
+
+
+def _evaluate(compiled: CompiledVillagePolicy, store_root: Path, entry: QuarantineEntry) -> Optional[PolicyDecision]:
+    try:
+        obj = json.loads(entry.path(store_root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return compiled.evaluate(obj, issuer_key_hash_hex=entry.issuer_key_hash)
+
+
+def reevaluate_quarantine(
+    store_root: Path,
+    village_id: str,
+    villages_root: Path = Path("data"),
+    *,
+    workers: Optional[int] = None,
+    chunk: int = 256,
+    dry_run: bool = False,
+    actor: Optional[str] = None,
+    progress: Optional[Callable[[ReevaluationReport], None]] = None,
+) -> ReevaluationReport:
+    """Reject or mark eligible every quarantined bundle of *village_id* under its current policy."""
+    validate_village_id(village_id)
+    compiled = compiled_policy_for_village(villages_root, village_id)
+    entries = [e for e in quarantine_entries(store_root, village_id) if e.eligible != compiled.policy_hash]
+    report = ReevaluationReport(village_id=village_id, policy_hash=compiled.policy_hash, total=len(entries))
+    t0 = time.perf_counter()
+    sk: Any = False
+    n = max(1, min(workers or verify_workers(), len(entries) or 1))
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="quarantine-reeval") as pool:
+        for i in range(0, len(entries), max(1, chunk)):
+            part = entries[i : i + max(1, chunk)]
+            decisions = list(pool.map(lambda e: _evaluate(compiled, store_root, e), part))
+            if compiled_policy_for_village(villages_root, village_id).policy_hash != compiled.policy_hash:
+                break  # superseded: the newer policy schedules its own pass
+            eligible: List[str] = []
+            rejects: List[Tuple[QuarantineEntry, str]] = []
+            for e, d in zip(part, decisions):
+                if d is None:
+                    report.errors += 1
+                elif d.allowed:
+                    eligible.append(e.bundle_id)
+                else:
+                    rejects.append((e, f"policy {compiled.policy_hash[:12]} does not allow bundle: {d.reason}"))
+            if not dry_run:
+                if eligible:
+                    mark_eligible(store_root, village_id, eligible, compiled.policy_hash)
+                if rejects:
+                    if sk is False:
+                        try:
+                            sk = load_signing_key_from_env()
+                        except Exception:
+                            sk = None
+                    results = reject_quarantine_batch(store_root, [e.path(store_root) for e, _ in rejects], village_id, [why for _, why in rejects])
+                    for (e, why), r in zip(rejects, results):
+                        if r.ok:
+                            write_bundle_denial(store_root, village_id, e.bundle_id, why, sk)
+                    rejects = [x for x, r in zip(rejects, results) if r.ok]
+            report.scanned += len(part)
+            report.eligible += len(eligible)
+            report.rejected += len(rejects)
+            report.seconds = time.perf_counter() - t0
+            if progress is not None:
+                progress(report)
+        else:
+            report.completed = True
+    report.seconds = time.perf_counter() - t0
+    if not dry_run and report.total:
+        write_audit(store_root, AuditEvent(
+            action="quarantine.reevaluate",
+            village_id=village_id,
+            actor=actor,
+            policy_hash=compiled.policy_hash,
+            reason=f"scanned={report.scanned} rejected={report.rejected} eligible={report.eligible} errors={report.errors} completed={report.completed}",
+        ))
+        flush_audit(store_root)
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+REEVALUATE_MODES = ("background", "sync", "off")
+
+_jobs_lock = threading.Lock()
+_jobs: Dict[Tuple[str, str], threading.Thread] = {}
+_rerun: Set[Tuple[str, str]] = set()
+
+
+def job_status_path(store_root: Path, village_id: str) -> Path:
+    return quarantine_dir(store_root, village_id) / "reevaluation.state"
+
+
+def _record_job(store_root: Path, village_id: str, report: Optional[ReevaluationReport] = None, error: Optional[str] = None) -> None:
+    doc = {"village_id": village_id, "finished_at": iso_utc(utc_now()), "ok": error is None, "error": error, "report": report.to_dict() if report else None}
+    p = job_status_path(store_root, village_id)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(doc, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def last_background_job(store_root: Path, village_id: str) -> Optional[Dict[str, Any]]:
+    """Outcome of the village's last background re-evaluation, or None if none ran."""
+    try:
+        return json.loads(job_status_path(store_root, village_id).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _run_job(key: Tuple[str, str], store_root: Path, village_id: str, villages_root: Path) -> None:
+    while True:
+        try:
+            report = reevaluate_quarantine(store_root, village_id, villages_root, actor="policy.apply")
+        except Exception as exc:
+            log.exception("background quarantine re-evaluation of %s failed", village_id)
+            report, error = None, f"{type(exc).__name__}: {exc}"
+        else:
+            error = None
+        try:
+            _record_job(store_root, village_id, report, error)
+        except OSError:
+            log.exception("could not record quarantine re-evaluation status for %s", village_id)
+        with _jobs_lock:
+            if key in _rerun:
+                _rerun.discard(key)
+                continue
+            _jobs.pop(key, None)
+            return
+
+
+def schedule_reevaluation(
+    store_root: Path, village_id: str, villages_root: Path = Path("data"), mode: Optional[str] = None
+) -> Optional[ReevaluationReport]:
+    """Re-evaluate *village_id*'s quarantine; returns the report when run inline.
+
+    ``LINKS_QUARANTINE_REEVALUATE`` overrides *mode*, which defaults to
+    ``sync``; the server passes ``background``.
+    """
+    mode = os.environ.get("LINKS_QUARANTINE_REEVALUATE", "").strip().lower() or mode or "sync"
+    if mode not in REEVALUATE_MODES:
+        raise ValueError(f"unknown quarantine re-evaluation mode: {mode}")
+    if mode == "off" or not (store_root / "quarantine" / village_id).is_dir():
+        return None
+    if mode == "sync":
+        return reevaluate_quarantine(store_root, village_id, villages_root, actor="policy.apply")
+    key = (str(store_root), village_id)
+    with _jobs_lock:
+        if key in _jobs:
+            _rerun.add(key)
+            return None
+        t = threading.Thread(target=_run_job, args=(key, store_root, village_id, villages_root), name=f"quarantine-reeval-{village_id}", daemon=True)
+        _jobs[key] = t
+    t.start()
+    return None
+
+
+def wait_for_reevaluations(timeout: Optional[float] = None) -> bool:
+    """Block until scheduled background jobs finish; returns False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _jobs_lock:
+            threads = list(_jobs.values())
+        if not threads:
+            return True
+        for t in threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if deadline is not None and time.monotonic() >= deadline:
+            with _jobs_lock:
+                return not _jobs
+
+
+# A one-shot process that scheduled a background job waits for it instead of
+# exiting in the middle of a rejection batch.
+atexit.register(wait_for_reevaluations)
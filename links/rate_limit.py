@@ -0,0 +1,237 @@
+"""rate_limit — per-village request rate limiting with pluggable state.
+
+A strategy (``fixed_window``, ``sliding_window`` or ``token_bucket``) is a
+pure step function over a 3-float state; a backend applies it to one key
+atomically, either per process (:class:`MemoryBackend`) or shared by every
+worker through ``<store_root>/ratelimit/ratelimit.sqlite3``
+(:class:`SQLiteBackend`).  Each call evicts at most a few expired keys,
+earliest expiry first.
+
+Configuration (environment)
+---------------------------
+``LINKS_RATE_LIMIT_BACKEND``     ``memory`` (default) or ``sqlite``
+``LINKS_RATE_LIMIT_PER_MEMBER``  ``1`` to key on the bearer token as well
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+State = Tuple[float, float, float]
+
+# Expired keys evicted per call; keeps cleanup off the request's critical path.
+_EVICT_PER_CALL = 8
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        h = {"X-RateLimit-Limit": str(self.limit), "X-RateLimit-Remaining": str(max(0, self.remaining))}
+        if not self.allowed:
+            h["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return h
+
+
+# ---------------------------------------------------------------------------
+# Strategies
+# ---------------------------------------------------------------------------
+
+Step = Callable[[Optional[State], float, int, float], Tuple[State, RateLimitDecision, float]]
+
+
+def fixed_window(state: Optional[State], now: float, limit: int, window: float) -> Tuple[State, RateLimitDecision, float]:
+    start = math.floor(now / window) * window
+    count = state[1] if state is not None and state[0] == start else 0.0
+    end = start + window
+    if count + 1 > limit:
+        return (start, count, 0.0), RateLimitDecision(False, limit, 0, end - now), end
+    count += 1
+    return (start, count, 0.0), RateLimitDecision(True, limit, int(limit - count)), end
+
+
+def sliding_window(state: Optional[State], now: float, limit: int, window: float) -> Tuple[State, RateLimitDecision, float]:
+    start = math.floor(now / window) * window
+    if state is None or state[0] < start - window:
+        cur, prev = 0.0, 0.0
+    elif state[0] == start:
+        cur, prev = state[1], state[2]
+    else:  # state[0] == start - window: roll over
+        cur, prev = 0.0, state[1]
+    overlap = 1.0 - (now - start) / window
+    estimate = prev * overlap + cur
+    end = start + 2 * window
+    if estimate + 1 > limit:
+        # Wait until enough of the previous window has slid out (or the next window starts).
+        retry = (estimate + 1 - limit) / (prev / window) if prev > 0 else start + window - now
+        return (start, cur, prev), RateLimitDecision(False, limit, 0, min(retry, start + window - now)), end
+    cur += 1
+    return (start, cur, prev), RateLimitDecision(True, limit, int(limit - estimate - 1)), end
+
+
+def token_bucket(state: Optional[State], now: float, limit: int, window: float) -> Tuple[State, RateLimitDecision, float]:
+    rate = limit / window
+    if state is None:
+        tokens = float(limit)
+    else:
+        tokens = min(float(limit), state[0] + max(0.0, now - state[1]) * rate)
+    if tokens < 1:
+        return (tokens, now, 0.0), RateLimitDecision(False, limit, 0, (1 - tokens) / rate), now + (limit - tokens) / rate
+    tokens -= 1
+    # Once the bucket is full again the state equals a fresh one and can be dropped.
+    return (tokens, now, 0.0), RateLimitDecision(True, limit, int(tokens)), now + (limit - tokens) / rate
+
+
+STRATEGIES: Dict[str, Step] = {
+    "fixed_window": fixed_window,
+    "sliding_window": sliding_window,
+    "token_bucket": token_bucket,
+}
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+
+class MemoryBackend:
+    """Per-process state; a heap of ``(expires_at, key)`` yields expired keys first.
+
+    Heap entries are not removed when a key is touched again; a popped entry
+    whose time no longer matches the key's state is just dropped, and the
+    heap is rebuilt once stale entries outnumber live keys.
+    """
+
+    def __init__(self) -> None:
+        self._states: Dict[str, Tuple[State, float]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now and evicted < _EVICT_PER_CALL:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._states.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._states[key]
+                evicted += 1
+
+    def apply(self, key: str, step: Callable[[Optional[State]], Tuple[State, RateLimitDecision, float]], now: float) -> RateLimitDecision:
+        with self._lock:
+            self._evict(now)
+            entry = self._states.get(key)
+            state = entry[0] if entry is not None and entry[1] > now else None
+            new_state, decision, expires_at = step(state)
+            self._states[key] = (new_state, expires_at)
+            if entry is None or entry[1] != expires_at:
+                heapq.heappush(self._expiry, (expires_at, key))
+                if len(self._expiry) > 2 * len(self._states) + 64:
+                    self._expiry = [(e, k) for k, (_, e) in self._states.items()]
+                    heapq.heapify(self._expiry)
+            return decision
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key TEXT PRIMARY KEY,
+    s0 REAL NOT NULL,
+    s1 REAL NOT NULL,
+    s2 REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_limit_expires ON rate_limit(expires_at);
+"""
+
+
+class SQLiteBackend:
+    """State shared by every process that opens the same store root."""
+
+    def __init__(self, store_root: Path) -> None:
+        self.path = Path(store_root) / "ratelimit" / "ratelimit.sqlite3"
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def apply(self, key: str, step: Callable[[Optional[State]], Tuple[State, RateLimitDecision, float]], now: float) -> RateLimitDecision:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM rate_limit WHERE key IN (SELECT key FROM rate_limit WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+                (now, _EVICT_PER_CALL),
+            )
+            row = conn.execute("SELECT s0, s1, s2, expires_at FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            state = (row[0], row[1], row[2]) if row is not None and row[3] > now else None
+            new_state, decision, expires_at = step(state)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit(key, s0, s1, s2, expires_at) VALUES(?,?,?,?,?)",
+                (key, *new_state, expires_at),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return decision
+
+
+# ---------------------------------------------------------------------------
+# Limiter
+# ---------------------------------------------------------------------------
+
+
+class RateLimiter:
+    def __init__(self, backend, clock: Callable[[], float] = time.time) -> None:
+        self.backend = backend
+        self.clock = clock
+
+    def check(self, key: str, limit: int, strategy: str = "fixed_window", window: float = 60.0) -> RateLimitDecision:
+        """Count one request against *key* and return whether it is allowed.
+
+        Unknown strategies fall back to ``fixed_window``.
+        """
+        step = STRATEGIES.get(strategy, fixed_window)
+        limit = max(1, int(limit))
+        now = self.clock()
+        return self.backend.apply(key, lambda state: step(state, now, limit, window), now)
+
+
+def rate_limit_key(village_id: str, client: str, token_hash: Optional[str] = None) -> str:
+    key = f"{village_id}|{client}"
+    return f"{key}|{token_hash[:16]}" if token_hash else key
+
+
+def per_member_enabled() -> bool:
+    return os.environ.get("LINKS_RATE_LIMIT_PER_MEMBER", "").strip().lower() in {"1", "true", "yes"}
+
+
+def rate_limiter_from_env(store_root: Path) -> RateLimiter:
+    backend = os.environ.get("LINKS_RATE_LIMIT_BACKEND", "memory").strip().lower()
+    if backend == "sqlite":
+        return RateLimiter(SQLiteBackend(store_root))
+    if backend not in {"", "memory"}:
+        raise ValueError(f"unknown LINKS_RATE_LIMIT_BACKEND: {backend}")
+    return RateLimiter(MemoryBackend())
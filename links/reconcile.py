@@ -3,10 +3,11 @@ from __future__ import annotations
 from dataclasses import dataclass, asdict
 from datetime import timezone
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable
 import json
 
-from .policy_updates import VillagePolicyUpdate, compute_update_hash
+from .lineage import LineageIndex
+from .policy_updates import VillagePolicyUpdate
 
 
 @dataclass
@@ -28,6 +29,9 @@ class ReconciliationReport:
     selected_source: Optional[str]
     selection_reason: Optional[str]
     lineage_issues: List[Dict[str, Any]]
+    common_ancestor: Optional[str] = None
+    local_branch_length: Optional[int] = None
+    remote_branch_length: Optional[int] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -38,54 +42,42 @@ def _head(ups: List[VillagePolicyUpdate]) -> Optional[str]:
 
 
 def detect_forks(ups: List[VillagePolicyUpdate]) -> List[Dict[str, Any]]:
-    by_prev: Dict[Optional[str], List[VillagePolicyUpdate]] = {}
-    for u in ups:
-        by_prev.setdefault(u.previous_policy_hash, []).append(u)
-
-    forks: List[Dict[str, Any]] = []
-    for prev, children in by_prev.items():
-        if prev is None:
-            continue
-        uniq = {c.policy_hash for c in children}
-        if len(uniq) > 1:
-            forks.append({
-                'previous_policy_hash': prev,
-                'children': sorted([
-                    {
-                        'policy_hash': c.policy_hash,
-                        'created_at': c.created_at.isoformat(),
-                        'update_hash': compute_update_hash(c),
-                        'lifecycle_state': c.lifecycle_state,
-                    } for c in children
-                ], key=lambda x: (x['created_at'], x['policy_hash'])),
-            })
-    return forks
+    return LineageIndex.from_updates(ups).fork_reports()
 
 
 def _lineage_issues(ups: List[VillagePolicyUpdate]) -> List[Dict[str, Any]]:
-    seen = {u.policy_hash for u in ups}
-    issues: List[Dict[str, Any]] = []
-    for u in ups:
-        prev = u.previous_policy_hash
-        if prev and prev not in seen:
-            issues.append({
-                "policy_hash": u.policy_hash,
-                "previous_policy_hash": prev,
-                "issue": "missing_parent",
-            })
-    return issues
-
-
-def reconcile(local: List[VillagePolicyUpdate], remote: List[VillagePolicyUpdate], village_id: str) -> ReconciliationReport:
+    return LineageIndex.from_updates(ups).lineage_issues()
+
+
+def reconcile(
+    local: List[VillagePolicyUpdate],
+    remote: List[VillagePolicyUpdate],
+    village_id: str,
+    *,
+    local_index: Optional[LineageIndex] = None,
+) -> ReconciliationReport:
+    """Reconcile local and remote update histories.
+
+    ``local_index`` may be the village's persisted lineage index (covering
+    ``local``); remote updates are then overlaid on a copy of it instead of
+    rebuilding the DAG from both lists.
+    """
     local_set = {u.policy_hash for u in local}
     remote_set = {u.policy_hash for u in remote}
 
-    local_head = _head(local)
+    if local_index is not None:
+        local_head = local_index.head
+        merged = local_index.copy()
+    else:
+        merged = LineageIndex.from_updates(local)
+        local_head = merged.head
     remote_head = _head(remote)
+    merged.add_many(remote)
 
-    forks = detect_forks(local + remote)
+    forks = merged.fork_reports()
     shared = local_set & remote_set
-    lineage_issues = _lineage_issues(local + remote)
+    lineage_issues = merged.lineage_issues()
+    common_ancestor = merged.common_ancestor(local_head, remote_head) if (local_head and remote_head) else None
     drift = local_head != remote_head
 
     if remote_head and remote_head in local_set:
@@ -133,9 +125,27 @@ def reconcile(local: List[VillagePolicyUpdate], remote: List[VillagePolicyUpdate
         selected_source=selected_source,
         selection_reason=selection_reason,
         lineage_issues=lineage_issues,
+        common_ancestor=common_ancestor,
+        local_branch_length=merged.branch_length(local_head, common_ancestor) if common_ancestor else None,
+        remote_branch_length=merged.branch_length(remote_head, common_ancestor) if common_ancestor else None,
     )
 
 
+def remote_view_from_diff(
+    local: List[VillagePolicyUpdate],
+    fetched: List[VillagePolicyUpdate],
+    missing_remote: Iterable[str],
+) -> List[VillagePolicyUpdate]:
+    """Rebuild the remote update list from a set-reconciliation result.
+
+    The remote side holds every local update except ``missing_remote`` plus the
+    ``fetched`` updates we were missing, so ``reconcile(local, view)`` gives the
+    same report as reconciling against the remote's full download.
+    """
+    absent = set(missing_remote)
+    return [u for u in local if u.policy_hash not in absent] + list(fetched)
+
+
 def write_reconciliation_report(report: ReconciliationReport, out_path: Path) -> Path:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(
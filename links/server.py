@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import json
 import os
 import time
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Optional
 
 from fastapi import FastAPI, Header, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
-from nacl.signing import SigningKey
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from .policy_feed import (
     build_policy_feed_manifest,
@@ -22,18 +23,36 @@ from .policy_feed import (
     store_policy_update,
 )
 from .policy_updates import VillagePolicyUpdate, build_update
+from .gossip import feed_summary
+from .set_reconcile import policy_hash_index, respond_to_ranges
 from .validate import validate_village_id
-from .audit_export import export_audit_json, export_audit_csv, sign_digest_hex
+from .audit import flush_audit
+from .audit_chain import checkpoint_verify_key, list_checkpoints, verify_range
+from .audit_store import audit_log_exists, audit_snapshot, query_audit
+from .audit_export import (
+    HashingStream,
+    export_audit_csv,
+    export_audit_json,
+    sign_digest_hex,
+    stream_audit_csv,
+    stream_audit_json,
+)
+from .key_cache import signing_key as cached_signing_key
 from .keys import load_signing_key_from_env
 from .file_lock import locked_open
+from .io import LogTail
+from .notify import NotificationOutbox, NotificationWorker, configured_destinations
+from .rate_limit import SQLiteBackend, per_member_enabled, rate_limit_key, rate_limiter_from_env
+from .transparency import consistency_proof, inclusion_proof, latest_tree_head, served_checkpoint
 
 # Optional: if a richer villages module exists, use it for auth + apply + policy lookup.
 try:
-    from .villages import authorize, role_can, load_village, apply_policy_update  # type: ignore
+    from .villages import authorize, role_can, load_village, cached_village, apply_policy_update  # type: ignore
 except Exception:  # pragma: no cover
     authorize = None
     role_can = None
     load_village = None
+    cached_village = None
     apply_policy_update = None
 
 
@@ -46,9 +65,17 @@ def _bearer_token(authorization: str | None) -> str | None:
 def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path("data")) -> FastAPI:
     app = FastAPI(title="PolicyMesh Claim Exchange", version="0.15.0")
 
-    # Simple in-memory per-village rate limiter (minute bucket).
+    # Deliver queued webhook notifications in the background when destinations are configured
+    # (LINKS_NOTIFY_WEBHOOKS) or the worker is requested explicitly (LINKS_NOTIFY_WORKER=1).
+    if configured_destinations() or os.environ.get("LINKS_NOTIFY_WORKER", "").strip() == "1":
+        app.state.notify_worker = NotificationWorker(NotificationOutbox(store_root)).start()
+
+    # Per-village rate limiter (see links.rate_limit). Strategy and limit come from the village
+    # policy; state is per-process (memory) or shared across workers (LINKS_RATE_LIMIT_BACKEND=sqlite).
     # NOTE: In production, put PolicyMesh behind a proper gateway (Envoy/Nginx) with real rate limiting.
-    _buckets: Dict[Tuple[str, str], Tuple[int, int]] = {}  # (village_id, client_key) -> (minute_epoch, count)
+    limiter = rate_limiter_from_env(store_root)
+    per_member = per_member_enabled()
+    app.state.rate_limiter = limiter
 
     @app.middleware("http")
     async def rate_limit(request: Request, call_next):
@@ -61,39 +88,47 @@ def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path
                 try:
                     validate_village_id(village_id)
                 except Exception:
-                    raise HTTPException(status_code=400, detail="invalid village_id")
+                    return JSONResponse(status_code=400, content={"detail": "invalid village_id"})
 
-                limit = 60
-                if load_village:
+                limit, strategy = 60, "fixed_window"
+                if cached_village:
                     try:
-                        v = load_village(villages_root, village_id)
-                        limit = int(getattr(v, "policy").rate_limit_per_min)  # type: ignore[attr-defined]
+                        policy = cached_village(villages_root, village_id).policy
+                        limit, strategy = int(policy.rate_limit_per_min), policy.rate_limit_strategy
                     except Exception:
                         # Fail open to avoid breaking local/dev deployments.
-                        limit = 60
+                        limit, strategy = 60, "fixed_window"
 
                 client_host = request.client.host if request.client else "unknown"
-                client_key = client_host
-
-                minute = int(time.time() // 60)
-                k = (village_id, client_key)
-                m0, c0 = _buckets.get(k, (minute, 0))
-                if m0 != minute:
-                    m0, c0 = minute, 0
-                c0 += 1
-                _buckets[k] = (m0, c0)
-
-                # Opportunistic cleanup to keep memory bounded.
-                if len(_buckets) > 5000:
-                    cutoff = minute - 5
-                    for kk, (mm, _) in list(_buckets.items()):
-                        if mm < cutoff:
-                            _buckets.pop(kk, None)
-
-                if c0 > max(1, limit):
-                    raise HTTPException(status_code=429, detail="rate limit exceeded")
+                token = _bearer_token(request.headers.get("authorization")) if per_member else None
+                token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest() if token else None
+                key = rate_limit_key(village_id, client_host, token_hash)
+
+                try:
+                    if isinstance(limiter.backend, SQLiteBackend):
+                        decision = await run_in_threadpool(limiter.check, key, limit, strategy)
+                    else:
+                        decision = limiter.check(key, limit, strategy)
+                except Exception:
+                    # A locked/unavailable limiter store must not take the API down.
+                    decision = None
+
+                if decision is not None and not decision.allowed:
+                    # Exceptions raised in middleware bypass FastAPI's handlers; answer directly.
+                    return JSONResponse(status_code=429, content={"detail": "rate limit exceeded"}, headers=decision.headers())
+                response = await call_next(request)
+                if decision is not None:
+                    response.headers.update(decision.headers())
+                return response
         return await call_next(request)
 
+    @app.get("/cache/villages")
+    def village_cache_stats():
+        """Hit/miss/eviction counters of this worker's village config cache."""
+        from .villages import village_cache
+
+        return village_cache.stats()
+
     @app.get("/villages/{village_id}/policy/latest")
     def policy_latest(village_id: str):
         validate_village_id(village_id)
@@ -149,25 +184,39 @@ def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path
                 seed = base64.b64decode(sk_b64.strip(), validate=True)
                 if len(seed) < 32:
                     raise ValueError("seed too short")
-                sk = SigningKey(seed[:32])
-                m = sign_manifest(m, sk)
+                m = sign_manifest(m, cached_signing_key(seed[:32]))
             except Exception:
                 # Fail open (manifest still returned unsigned) to avoid breaking dev deployments.
                 pass
 
         return json.loads(m.model_dump_json())
 
+    @app.get("/villages/{village_id}/policy/summary")
+    def policy_summary(village_id: str):
+        """Compact feed summary (count, merkle root, chain head) used for gossip anti-entropy."""
+        validate_village_id(village_id)
+        return feed_summary(villages_root, village_id)
+
+    @app.post("/villages/{village_id}/policy/reconcile_ranges")
+    def policy_reconcile_ranges(village_id: str, body: dict):
+        """One round of range-based set reconciliation over stored policy hashes."""
+        validate_village_id(village_id)
+        try:
+            return respond_to_ranges(policy_hash_index(villages_root, village_id), body)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     @app.post("/villages/{village_id}/policy")
     def policy_update(village_id: str, body: dict, authorization: str | None = Header(default=None)):
         validate_village_id(village_id)
 
         # If auth system exists, require manage permission.
-        if authorize and role_can and load_village:
+        if authorize and role_can and cached_village:
             token = _bearer_token(authorization)
             member = authorize(villages_root, village_id, token) if token else None
             if not member:
                 raise HTTPException(status_code=403, detail="forbidden")
-            v = load_village(villages_root, village_id)
+            v = cached_village(villages_root, village_id)
             if not role_can(v.policy, member.get("role", "observer"), "manage"):
                 raise HTTPException(status_code=403, detail="forbidden")
             current_policy = v.policy.model_dump()
@@ -198,6 +247,8 @@ def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path
                 u.policy,
                 actor=actor,
                 update_meta={"policy_hash": u.policy_hash, "policy_update": "stored"},
+                # Re-evaluate the quarantine backlog without holding up the request.
+                reevaluation_mode="background",
             )
         return {"status": "ok", "village_id": village_id, "policy_hash": u.policy_hash}
 
@@ -209,9 +260,9 @@ def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path
         validate_village_id(village_id)
         env_ok = os.environ.get("LINKS_PUBLIC_POLICY", "").strip().lower() in {"1", "true", "yes"}
         per_village_ok = False
-        if load_village is not None:
+        if cached_village is not None:
             try:
-                v = load_village(villages_root, village_id)
+                v = cached_village(villages_root, village_id)
                 per_village_ok = bool(getattr(v.policy, "public_policy_endpoint", False)) or getattr(v.policy, "visibility", "private") == "public"
             except Exception:
                 per_village_ok = False
@@ -223,53 +274,250 @@ def create_app(store_root: Path = Path("data/store"), villages_root: Path = Path
         return u.model_dump()
 
     @app.get("/villages/{village_id}/transparency/policy_log")
-    def transparency_policy_log(village_id: str, limit: int = Query(default=500, ge=1, le=5000)):
-        """Return recent transparency log entries (JSONL)."""
+    def transparency_policy_log(
+        village_id: str,
+        limit: int = Query(default=500, ge=1, le=5000),
+        since_entry_hash: Optional[str] = Query(default=None, pattern="^[0-9a-f]{64}$"),
+        offset: Optional[int] = Query(default=None, ge=0),
+    ):
+        """Return transparency log entries (JSONL).
+
+        Without a cursor the last ``limit`` entries are returned.  With
+        ``since_entry_hash`` or ``offset`` the first ``limit`` entries after the
+        cursor are returned, oldest first.  ``X-Log-Offset`` carries the byte
+        offset to pass as ``offset`` on the next call.
+        """
         validate_village_id(village_id)
         p = store_root / "transparency" / village_id / "policy_log.jsonl"
         if not p.exists():
             raise HTTPException(status_code=404, detail="no transparency log")
 
-        def _iter():
-            with locked_open(p, "r") as f:
-                lines = f.readlines()
-            for line in lines[-limit:]:
-                yield line
+        with locked_open(p, "rb", shared=True):
+            view = LogTail(p)
+        if since_entry_hash is not None:
+            needle = since_entry_hash.encode("ascii")
 
-        return StreamingResponse(_iter(), media_type="application/x-ndjson")
+            def _match(line: bytes) -> bool:
+                if needle not in line:
+                    return False
+                try:
+                    return json.loads(line).get("entry_hash") == since_entry_hash
+                except Exception:
+                    return False
+
+            start = view.find(_match)
+            if start is None:
+                raise HTTPException(status_code=404, detail="entry_hash not found")
+            stop = view.after(start, limit)
+        elif offset is not None:
+            if not view.is_line_boundary(offset):
+                raise HTTPException(status_code=400, detail="offset is not a line boundary")
+            start, stop = offset, view.after(offset, limit)
+        else:
+            start, stop = view.last(limit), view.end
+
+        return StreamingResponse(
+            view.iter_range(start, stop),
+            media_type="application/x-ndjson",
+            headers={"X-Log-Offset": str(stop)},
+        )
+
+    @app.get("/villages/{village_id}/transparency/checkpoint")
+    def transparency_checkpoint(village_id: str, if_none_match: str | None = Header(default=None)):
+        """Current transparency checkpoint, signed with the node key when configured.
+
+        Served from a per-process cache invalidated by log appends; supports
+        ``If-None-Match`` so polling peers get ``304`` while nothing changed.
+        """
+        validate_village_id(village_id)
+        if not (store_root / "transparency" / village_id / "policy_log.jsonl").exists():
+            raise HTTPException(status_code=404, detail="no transparency log")
+        try:
+            sk = load_signing_key_from_env()
+        except Exception:
+            # Fail open (checkpoint served unsigned) like the policy manifest.
+            sk = None
+        checkpoint, etag = served_checkpoint(store_root, village_id, sk)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(checkpoint, headers=headers)
+
+    @app.get("/villages/{village_id}/transparency/tree_head")
+    def transparency_tree_head(village_id: str):
+        """Latest stored signed tree head (heads are signed on log append or by `links drift tree-head`)."""
+        validate_village_id(village_id)
+        if not (store_root / "transparency" / village_id / "policy_log.jsonl").exists():
+            raise HTTPException(status_code=404, detail="no transparency log")
+        sth = latest_tree_head(store_root, village_id)
+        if not sth:
+            raise HTTPException(status_code=404, detail="no signed tree head")
+        return sth
+
+    @app.get("/villages/{village_id}/transparency/proof/inclusion")
+    def transparency_inclusion_proof(
+        village_id: str,
+        entry_hash: str = Query(..., pattern="^[0-9a-f]{64}$"),
+        tree_size: Optional[int] = Query(default=None, ge=1),
+    ):
+        """Merkle audit path for one transparency entry."""
+        validate_village_id(village_id)
+        try:
+            return inclusion_proof(store_root, village_id, entry_hash, tree_size)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="entry_hash not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get("/villages/{village_id}/transparency/proof/consistency")
+    def transparency_consistency_proof(
+        village_id: str,
+        first: int = Query(..., ge=0),
+        second: Optional[int] = Query(default=None, ge=0),
+    ):
+        """Merkle consistency proof between two tree sizes of the transparency log."""
+        validate_village_id(village_id)
+        try:
+            return consistency_proof(store_root, village_id, first, second)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
     @app.get("/villages/{village_id}/audit/export")
-    def audit_export(village_id: str, fmt: str = Query(default="json", pattern="^(json|csv)$"), sign: bool = Query(default=True)):
-        """Export audit log for a village (best-effort filter) with optional digest signing."""
+    def audit_export(
+        village_id: str,
+        fmt: str = Query(default="json", pattern="^(json|csv)$"),
+        sign: bool = Query(default=True),
+        stream: bool = Query(default=False),
+        after_seq: int = Query(default=0, ge=0),
+    ):
+        """Export audit log for a village with optional digest signing.
+
+        By default the export is written under ``audit/exports/<village>/`` and
+        a summary is returned.  With ``stream=true`` the export body itself is
+        streamed; its digest and signature cannot precede the body, so they
+        are written to a manifest served at ``.../audit/export/<export_id>/manifest``
+        once the last byte has been sent (``X-Export-Id`` names it).
+
+        ``after_seq=N`` exports only the chained events after the village's
+        chain position N (``chain.to_seq`` of a previous export), reading from
+        the nearest checkpoint.  ``chain`` in the summary/manifest gives the
+        chain position the export ends at.
+        """
         validate_village_id(village_id)
-        audit_path = store_root / "audit" / "audit.log.jsonl"
-        if not audit_path.exists():
+        flush_audit(store_root)
+        if not audit_log_exists(store_root):
             raise HTTPException(status_code=404, detail="no audit log")
         out_dir = store_root / "audit" / "exports" / village_id
-        out_dir.mkdir(parents=True, exist_ok=True)
-        out_path = out_dir / f"audit.{fmt}"
-        tmp = out_dir / "audit.filtered.jsonl"
-        with locked_open(audit_path, "r") as f_in, locked_open(tmp, "w") as f_out:
-            for line in f_in:
-                try:
-                    ev = json.loads(line)
-                except Exception:
-                    continue
-                if ev.get("village_id") == village_id:
-                    f_out.write(json.dumps(ev, ensure_ascii=False, sort_keys=True) + "\n")
-        if fmt == "json":
-            digest, count = export_audit_json(tmp, out_path)
-        else:
-            digest, count = export_audit_csv(tmp, out_path)
-        sig_hex = None
-        if sign:
+
+        def _chain(snap) -> dict:
+            head = snap.head
+            return {"after_seq": after_seq, "to_seq": head.seq if head else after_seq, "to_chain": head.chain if head else None}
+
+        def _sign(digest: str) -> Optional[str]:
+            if not sign:
+                return None
             try:
-                sk = load_signing_key_from_env()
-                sig_hex = sign_digest_hex(digest, sk)
-                (out_path.with_suffix(out_path.suffix + ".sha256")).write_text(digest + "\n", encoding="utf-8")
-                (out_path.with_suffix(out_path.suffix + ".sighex")).write_text(sig_hex + "\n", encoding="utf-8")
+                return sign_digest_hex(digest, load_signing_key_from_env())
             except Exception:
-                pass
-        return {"village_id": village_id, "format": fmt, "count": count, "sha256": digest, "signed": bool(sig_hex)}
+                return None
+
+        if stream:
+            snap = audit_snapshot(store_root, village_id, after_seq=after_seq or None)
+            position = snap.position(store_root)
+            export_id = hashlib.sha256(f"{village_id}:{fmt}:{json.dumps(position, sort_keys=True)}:{time.time_ns()}".encode("utf-8")).hexdigest()[:24]
+            if fmt == "json":
+                count, chunks = stream_audit_json(snap)
+                counter = None
+            else:
+                counter = stream_audit_csv(snap)
+                chunks = iter(counter)
+            body = HashingStream(chunks)
+
+            def _emit():
+                yield from body
+                digest = body.hexdigest()
+                sig_hex = _sign(digest)
+                manifest = {
+                    "export_id": export_id,
+                    "village_id": village_id,
+                    "format": fmt,
+                    "count": counter.count if counter is not None else count,
+                    "bytes": body.size,
+                    "log_position": position,
+                    "chain": _chain(snap),
+                    "sha256": digest,
+                    "signature_hex": sig_hex,
+                    "signed": bool(sig_hex),
+                }
+                out_dir.mkdir(parents=True, exist_ok=True)
+                tmp = out_dir / f"{export_id}.manifest.json.tmp"
+                tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+                tmp.replace(out_dir / f"{export_id}.manifest.json")
+
+            media = "application/json" if fmt == "json" else "text/csv; charset=utf-8"
+            return StreamingResponse(_emit(), media_type=media, headers={"X-Export-Id": export_id})
+
+        out_path = out_dir / (f"audit.after-{after_seq}.{fmt}" if after_seq else f"audit.{fmt}")
+        snap = audit_snapshot(store_root, village_id, after_seq=after_seq or None)
+        if fmt == "json":
+            digest, count = export_audit_json(snap, out_path)
+        else:
+            digest, count = export_audit_csv(snap, out_path)
+        sig_hex = _sign(digest)
+        if sig_hex:
+            (out_path.with_suffix(out_path.suffix + ".sha256")).write_text(digest + "\n", encoding="utf-8")
+            (out_path.with_suffix(out_path.suffix + ".sighex")).write_text(sig_hex + "\n", encoding="utf-8")
+        return {"village_id": village_id, "format": fmt, "count": count, "sha256": digest, "signed": bool(sig_hex), "chain": _chain(snap)}
+
+    @app.get("/villages/{village_id}/audit/query")
+    def audit_query(
+        village_id: str,
+        action: Optional[str] = Query(default=None),
+        actor: Optional[str] = Query(default=None),
+        since: Optional[str] = Query(default=None, description="ISO date/time, inclusive"),
+        until: Optional[str] = Query(default=None, description="ISO date/time, exclusive"),
+        limit: int = Query(default=100, ge=1, le=1000),
+        order: str = Query(default="asc", pattern="^(asc|desc)$"),
+    ):
+        """Audit events of one village filtered by action, actor and time range.
+
+        With partitioned audit storage only the village's partitions covering
+        ``[since, until)`` are read (see ``links.audit_store``).
+        """
+        validate_village_id(village_id)
+        flush_audit(store_root)
+        try:
+            events = query_audit(store_root, village_id, action, actor, since, until, limit, descending=order == "desc")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"village_id": village_id, "count": len(events), "events": events}
+
+    @app.get("/villages/{village_id}/audit/checkpoints")
+    def audit_checkpoints(village_id: str):
+        """Signed hash-chain checkpoints of the village's audit events (oldest first)."""
+        validate_village_id(village_id)
+        cps = list_checkpoints(store_root, village_id)
+        return {"village_id": village_id, "count": len(cps), "checkpoints": cps}
+
+    @app.get("/villages/{village_id}/audit/verify")
+    def audit_verify(village_id: str, from_seq: int = Query(default=0, ge=0), to_seq: Optional[int] = Query(default=None, ge=1)):
+        """Re-hash the village's audit events between two checkpoints (default: genesis to the latest)."""
+        validate_village_id(village_id)
+        flush_audit(store_root)
+        # Pin the node's (or the configured) key: a checkpoint's own embedded key proves nothing.
+        key = checkpoint_verify_key()
+        r = verify_range(store_root, village_id, from_seq, to_seq, key)
+        return {"village_id": village_id, "ok": r.ok, "reason": r.reason, "from_seq": r.from_seq, "to_seq": r.to_seq, "checked": r.checked, "public_key": key}
+
+    @app.get("/villages/{village_id}/audit/export/{export_id}/manifest")
+    def audit_export_manifest(village_id: str, export_id: str):
+        """Digest, count and signature of a streamed export (404 until the stream has finished)."""
+        validate_village_id(village_id)
+        if not export_id.isalnum():
+            raise HTTPException(status_code=400, detail="invalid export_id")
+        p = store_root / "audit" / "exports" / village_id / f"{export_id}.manifest.json"
+        if not p.exists():
+            raise HTTPException(status_code=404, detail="manifest not available")
+        return json.loads(p.read_text(encoding="utf-8"))
 
     return app
@@ -0,0 +1,228 @@
+"""set_reconcile — range-based set reconciliation of policy hashes between peers.
+
+Instead of downloading a peer's full update list, two nodes exchange
+fingerprints (count plus sum of ``sha256(hash)`` mod 2**256) of half-open
+ranges over the sorted hash space.  Matching ranges are dropped, small ones
+are answered with their items, and the rest are split into ``branch``
+sub-ranges, so traffic stays roughly proportional to the difference.  The
+stateless server side, :func:`respond_to_ranges`, backs
+``POST /villages/<id>/policy/reconcile_ranges``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+_MOD = 1 << 256
+
+DEFAULT_LEAF_SIZE = 16
+DEFAULT_BRANCH = 16
+
+# Server-side bounds on one request: the endpoint is unauthenticated, so a
+# client must not be able to ask for unbounded work.  Clients send at most
+# MAX_RANGES ranges per request and split larger rounds.
+MAX_RANGES = 256
+MAX_LEAF_SIZE = 256
+MAX_BRANCH = 64
+
+# request payload -> response payload
+RangeExchange = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def _element(h: str) -> int:
+    return int.from_bytes(hashlib.sha256(h.encode("utf-8")).digest(), "big")
+
+
+# ---------------------------------------------------------------------------
+# Range index
+# ---------------------------------------------------------------------------
+
+
+class HashRangeIndex:
+    """Sorted hash set with O(log n) range counts and fingerprints."""
+
+    def __init__(self, hashes: Iterable[str]) -> None:
+        self.items: List[str] = sorted(set(hashes))
+        self._prefix: List[int] = [0]
+        acc = 0
+        for h in self.items:
+            acc = (acc + _element(h)) % _MOD
+            self._prefix.append(acc)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _bounds(self, lower: str, upper: Optional[str]) -> Tuple[int, int]:
+        i = bisect_left(self.items, lower or "")
+        j = len(self.items) if upper is None else bisect_left(self.items, upper)
+        return i, max(i, j)
+
+    def fingerprint(self, lower: str, upper: Optional[str]) -> Dict[str, Any]:
+        i, j = self._bounds(lower, upper)
+        fp = (self._prefix[j] - self._prefix[i]) % _MOD
+        return {"count": j - i, "fingerprint": f"{fp:064x}"}
+
+    def items_in(self, lower: str, upper: Optional[str]) -> List[str]:
+        i, j = self._bounds(lower, upper)
+        return self.items[i:j]
+
+    def split(self, lower: str, upper: Optional[str], branch: int) -> List[Tuple[str, Optional[str]]]:
+        """Split ``[lower, upper)`` into at most *branch* ranges at item boundaries."""
+        i, j = self._bounds(lower, upper)
+        n = j - i
+        branch = max(2, int(branch))
+        step = max(1, -(-n // branch))
+        cuts = [self.items[k] for k in range(i + step, j, step)]
+        bounds: List[Tuple[str, Optional[str]]] = []
+        lo = lower or ""
+        for c in cuts:
+            bounds.append((lo, c))
+            lo = c
+        bounds.append((lo, upper))
+        return bounds
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+
+def respond_to_ranges(index: HashRangeIndex, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one round of range fingerprints from a peer (stateless).
+
+    Raises ValueError for malformed requests or ones over ``MAX_RANGES``,
+    ``MAX_LEAF_SIZE`` or ``MAX_BRANCH``.
+    """
+    leaf_size = int(request.get("leaf_size") or DEFAULT_LEAF_SIZE)
+    branch = int(request.get("branch") or DEFAULT_BRANCH)
+    ranges = request.get("ranges", []) or []
+    if not isinstance(ranges, list) or not all(isinstance(r, dict) for r in ranges):
+        raise ValueError("ranges must be a list of objects")
+    if len(ranges) > MAX_RANGES:
+        raise ValueError(f"at most {MAX_RANGES} ranges per request")
+    if not 1 <= leaf_size <= MAX_LEAF_SIZE:
+        raise ValueError(f"leaf_size must be between 1 and {MAX_LEAF_SIZE}")
+    if not 2 <= branch <= MAX_BRANCH:
+        raise ValueError(f"branch must be between 2 and {MAX_BRANCH}")
+    out: List[Dict[str, Any]] = []
+    for r in ranges:
+        lower = str(r.get("lower") or "")
+        upper = r.get("upper")
+        if upper is not None and not isinstance(upper, str):
+            raise ValueError("range upper bound must be a string or null")
+        mine = index.fingerprint(lower, upper)
+        if mine["count"] == r.get("count") and mine["fingerprint"] == r.get("fingerprint"):
+            continue
+        if mine["count"] <= leaf_size:
+            out.append({"lower": lower, "upper": upper, "items": index.items_in(lower, upper)})
+            continue
+        for lo, hi in index.split(lower, upper, branch):
+            out.append({"lower": lo, "upper": hi, **index.fingerprint(lo, hi)})
+    return {"ranges": out}
+
+
+_INDEX_CACHE: Dict[str, Tuple[Tuple[int, int], HashRangeIndex]] = {}
+
+
+def policy_hash_index(villages_root: Path, village_id: str) -> HashRangeIndex:
+    """Return a cached :class:`HashRangeIndex` over a village's stored update hashes.
+
+    Hashes are read from update file names (``<ts>.<policy_hash>.json``) so no
+    update bodies are parsed.  The cache is keyed on the directory's mtime and
+    entry count, which change whenever an update file is added.
+    """
+    from .policy_feed import _updates_dir
+
+    d = _updates_dir(villages_root, village_id)
+    names = [p.name for p in d.glob("*.json")]
+    key = (d.stat().st_mtime_ns, len(names))
+    cached = _INDEX_CACHE.get(str(d))
+    if cached and cached[0] == key:
+        return cached[1]
+    hashes = [n[: -len(".json")].rsplit(".", 1)[-1] for n in names]
+    index = HashRangeIndex(hashes)
+    _INDEX_CACHE[str(d)] = (key, index)
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+
+def reconcile_hash_sets(
+    local_hashes: Iterable[str],
+    exchange: RangeExchange,
+    *,
+    leaf_size: int = DEFAULT_LEAF_SIZE,
+    branch: int = DEFAULT_BRANCH,
+    max_rounds: int = 64,
+) -> Tuple[Set[str], Set[str], Dict[str, int]]:
+    """Find the symmetric difference between *local_hashes* and a peer's set.
+
+    Returns ``(missing_local, missing_remote, stats)`` where *missing_local*
+    holds hashes only the peer has and *missing_remote* hashes only we have.
+
+    Raises
+    ------
+    RuntimeError
+        If the exchange does not converge within *max_rounds*.
+    """
+    index = local_hashes if isinstance(local_hashes, HashRangeIndex) else HashRangeIndex(local_hashes)
+    missing_local: Set[str] = set()
+    missing_remote: Set[str] = set()
+    stats = {"rounds": 0, "ranges_sent": 0, "items_received": 0}
+
+    pending: List[Tuple[str, Optional[str]]] = [("", None)]
+    while pending:
+        if stats["rounds"] >= max_rounds:
+            raise RuntimeError("range reconciliation did not converge")
+        stats["rounds"] += 1
+        stats["ranges_sent"] += len(pending)
+        replies: List[Dict[str, Any]] = []
+        for i in range(0, len(pending), MAX_RANGES):
+            request = {
+                "leaf_size": leaf_size,
+                "branch": branch,
+                "ranges": [{"lower": lo, "upper": hi, **index.fingerprint(lo, hi)} for lo, hi in pending[i : i + MAX_RANGES]],
+            }
+            replies.extend(exchange(request).get("ranges", []) or [])
+        pending = []
+        for r in replies:
+            lower = str(r.get("lower") or "")
+            upper = r.get("upper")
+            if "items" in r:
+                remote_items = set(r.get("items") or [])
+                stats["items_received"] += len(remote_items)
+                local_items = set(index.items_in(lower, upper))
+                missing_local |= remote_items - local_items
+                missing_remote |= local_items - remote_items
+                continue
+            mine = index.fingerprint(lower, upper)
+            if mine["count"] == r.get("count") and mine["fingerprint"] == r.get("fingerprint"):
+                continue
+            pending.append((lower, upper))
+    return missing_local, missing_remote, stats
+
+
+def http_range_exchange(
+    base_url: str,
+    village_id: str,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30,
+) -> RangeExchange:
+    """Return a :data:`RangeExchange` that POSTs to a remote node's reconcile_ranges endpoint."""
+    url = f"{base_url.rstrip('/')}/villages/{village_id}/policy/reconcile_ranges"
+
+    def _exchange(request: Dict[str, Any]) -> Dict[str, Any]:
+        resp = requests.post(url, json=request, headers=headers or {}, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    return _exchange
@@ -29,26 +29,12 @@ def ingest_bundle_file(bundle_path: Path, store_root: Path = Path("data/store"))
     if not verify_bundle(bundle):
         return False, "bundle failed verification (signature and/or bundle_id mismatch)"
 
-    subdir = store_root / "bundles"
-    village_id = getattr(bundle, "village_id", None)
-    if village_id:
-        subdir = subdir / str(village_id)
-        subdir.mkdir(parents=True, exist_ok=True)
-
-    bundle_out = subdir / f"{bundle.bundle_id}.json"
-
-    # Replay protection: reject if this bundle_id already exists in the store
-    if bundle_out.exists():
-        return False, "replay detected: bundle_id already ingested"
-    
-    # Atomic-ish write: write temp then replace
-    tmp_out = bundle_out.with_suffix(".json.tmp")
-    tmp_out.write_text(bundle.model_dump_json(indent=2), encoding="utf-8")
-    tmp_out.replace(bundle_out)
-    
-    rows = []
-    for c in bundle.claims:
-        rows.append({
+    return ingest_verified_bundles(store_root, [bundle])[0]
+
+
+def _claim_rows(bundle: ClaimBundle, village_id: Optional[str]) -> list[dict]:
+    return [
+        {
             "bundle_id": bundle.bundle_id,
             "issuer": bundle.issuer,
             "window_days": bundle.window_days,
@@ -57,28 +43,67 @@ def ingest_bundle_file(bundle_path: Path, store_root: Path = Path("data/store"))
             "visibility": getattr(bundle, "visibility", None),
             **c.model_dump(),
             "computed_at": iso_utc(c.computed_at),
-        })
+        }
+        for c in bundle.claims
+    ]
+
+
+def ingest_verified_bundles(store_root: Path, bundles: list[ClaimBundle]) -> list[tuple[bool, str]]:
+    """
+    Store bundles that were already verified (and policy-checked) by the caller.
+
+    Each bundle file is written on its own, but the claim rows of the whole
+    batch go to index/claims.jsonl under one lock (and one SQLite transaction
+    when enabled).  Returns one ``(ok, message)`` per bundle, in order.
+    """
+    ensure_dirs(store_root)
+    results: list[tuple[bool, str]] = []
+    stored: list[tuple[ClaimBundle, Optional[str], list[dict]]] = []
+    seen: set[Path] = set()
+    for bundle in bundles:
+        subdir = store_root / "bundles"
+        village_id = getattr(bundle, "village_id", None)
+        if village_id:
+            subdir = subdir / str(village_id)
+            subdir.mkdir(parents=True, exist_ok=True)
+
+        bundle_out = subdir / f"{bundle.bundle_id}.json"
+
+        # Replay protection: reject if this bundle_id already exists in the store
+        if bundle_out.exists() or bundle_out in seen:
+            results.append((False, "replay detected: bundle_id already ingested"))
+            continue
+        seen.add(bundle_out)
+
+        # Atomic-ish write: write temp then replace
+        tmp_out = bundle_out.with_suffix(".json.tmp")
+        tmp_out.write_text(bundle.model_dump_json(indent=2), encoding="utf-8")
+        tmp_out.replace(bundle_out)
+
+        rows = _claim_rows(bundle, village_id)
+        stored.append((bundle, village_id, rows))
+        results.append((True, f"ingested bundle {bundle.bundle_id} with {len(rows)} claims"))
 
+    if not stored:
+        return results
     idx = store_root / "index" / "claims.jsonl"
-    n = 0
     with locked_open(idx, "a") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
-            n += 1
+        f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for _, _, rows in stored for row in rows))
 
     if sqlite_enabled():
         with transaction(store_root) as conn:
-            write_bundle_and_claims(
-                conn,
-                bundle_id=bundle.bundle_id,
-                village_id=village_id,
-                issuer=bundle.issuer,
-                created_at=iso_utc(bundle.created_at),
-                payload_json=bundle.model_dump_json(indent=2),
-                claim_rows=rows,
-            )
-
-    return True, f"ingested bundle {bundle.bundle_id} with {n} claims"
+            for bundle, village_id, rows in stored:
+                write_bundle_and_claims(
+                    conn,
+                    bundle_id=bundle.bundle_id,
+                    village_id=village_id,
+                    issuer=bundle.issuer,
+                    created_at=iso_utc(bundle.created_at),
+                    payload_json=bundle.model_dump_json(indent=2),
+                    claim_rows=rows,
+                )
+
+    return results
 
 
 def iter_claim_rows(store_root: Path = Path("data/store")) -> Iterable[dict]:
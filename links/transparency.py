@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from nacl.signing import SigningKey
 
 from .file_lock import locked_open
+from .io import LogTail
+from .merkle import EMPTY_ROOT, MerkleLevels, frontier_append_nodes, frontier_root, leaf_hash
 from .policy_updates import canonical_json, sha256_hex
 from .storage_backend import sqlite_enabled, transaction, write_transparency_entry
 
+CHECKPOINT_ALG = "rfc6962-sha256"
+
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -39,43 +44,418 @@ def append_transparency_entry(
     }
     payload = canonical_json(entry)
     entry["entry_hash"] = sha256_hex(payload)
-    entry["signature"] = signing_key.sign(payload).signature.hex()
-    with locked_open(transparency_log_path(store_root, village_id), "a") as f:
-        f.write(json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n")
+    log_path = transparency_log_path(store_root, village_id)
+    levels = merkle_levels(store_root, village_id)
+    with locked_open(log_path, "a") as f:
+        state = _load_state(store_root, village_id) or _empty_state()
+        if state["log_offset"] != os.fstat(f.fileno()).st_size:
+            state = _scan_log(state, log_path, levels)
+        line = json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n"
+        f.write(line)
+        f.flush()
+        state["log_offset"] += len(line.encode("utf-8"))
+        _advance_state(state, entry, levels)
+        if _tree_head_due(state):
+            _sign_tree_head_locked(store_root, village_id, state, signing_key)
+        _write_state(store_root, village_id, state)
+    invalidate_checkpoint_cache(store_root, village_id)
     if sqlite_enabled():
         with transaction(store_root) as conn:
             write_transparency_entry(conn, entry)
     return entry
 
 
-def build_transparency_checkpoint(store_root: Path, village_id: str) -> Dict[str, Any]:
-    p = transparency_log_path(store_root, village_id)
-    entries = []
-    if p.exists():
-        with locked_open(p, "r") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entries.append(json.loads(line))
-                except Exception:
-                    continue
-    entry_hashes = [e.get("entry_hash") for e in entries if e.get("entry_hash")]
-    checkpoint_hash = sha256_hex(canonical_json(entry_hashes)) if entry_hashes else sha256_hex(b"")
-    latest = entries[-1] if entries else None
+def _iso_now() -> str:
+    return utc_now().astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# ---------------------------------------------------------------------------
+# Maintained checkpoint state
+# ---------------------------------------------------------------------------
+#
+# ``checkpoint_state.json`` sits next to the log and holds the Merkle frontier
+# (see ``links.merkle``), entry count, latest entry and the byte offset of the
+# log it covers.  ``append_transparency_entry`` advances it under the log lock
+# and replaces it atomically, so building a checkpoint is O(1) in log size.
+# If the log grew without the state (older writers, manual repair) only the
+# unseen tail is read; if the log shrank the state is rebuilt.
+
+
+def merkle_levels(store_root: Path, village_id: str) -> MerkleLevels:
+    return MerkleLevels(transparency_log_path(store_root, village_id).with_name("merkle"))
+
+
+def transparency_state_path(store_root: Path, village_id: str) -> Path:
+    return transparency_log_path(store_root, village_id).with_name("checkpoint_state.json")
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {
+        "alg": CHECKPOINT_ALG,
+        "entry_count": 0,
+        "tree_size": 0,
+        "frontier": [],
+        "root": EMPTY_ROOT.hex(),
+        "latest_entry_hash": None,
+        "latest_policy_hash": None,
+        "log_offset": 0,
+        "merkle_levels": True,
+        "tree_head_size": 0,
+        "tree_head_at": None,
+    }
+
+
+def _advance_state(state: Dict[str, Any], entry: Dict[str, Any], levels: Optional[MerkleLevels] = None) -> None:
+    state["entry_count"] += 1
+    state["latest_entry_hash"] = entry.get("entry_hash")
+    state["latest_policy_hash"] = entry.get("policy_hash")
+    h = entry.get("entry_hash")
+    if not h:
+        return
+    frontier = [bytes.fromhex(x) for x in state["frontier"]]
+    frontier, nodes = frontier_append_nodes(frontier, state["tree_size"], leaf_hash(bytes.fromhex(h)))
+    if levels is not None:
+        levels.put_nodes(nodes)
+    state["tree_size"] += 1
+    state["frontier"] = [x.hex() for x in frontier]
+    state["root"] = frontier_root(frontier).hex()
+
+
+def _scan_log(state: Dict[str, Any], log_path: Path, levels: Optional[MerkleLevels] = None) -> Dict[str, Any]:
+    """Advance *state* over complete log lines after ``state['log_offset']``.
+
+    When *levels* is given the persisted subtree hashes are advanced too.
+    """
+    if not log_path.exists():
+        return _empty_state()
+    if log_path.stat().st_size < state["log_offset"]:
+        state = _empty_state()
+    with log_path.open("rb") as f:
+        f.seek(state["log_offset"])
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            state["log_offset"] += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                _advance_state(state, json.loads(line), levels)
+            except Exception:
+                continue
+    if levels is not None:
+        levels.truncate(state["tree_size"])
+    return state
+
+
+def _load_state(store_root: Path, village_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        state = json.loads(transparency_state_path(store_root, village_id).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if not isinstance(state, dict) or state.get("alg") != CHECKPOINT_ALG or not state.get("merkle_levels"):
+        return None
+    return state
+
+
+def _write_state(store_root: Path, village_id: str, state: Dict[str, Any]) -> None:
+    p = transparency_state_path(store_root, village_id)
+    state = dict(state, updated_at=_iso_now())
+    tmp = p.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(p)
+
+
+def transparency_state(store_root: Path, village_id: str) -> Dict[str, Any]:
+    """Return the maintained checkpoint state, catching up with the log if needed."""
+    log_path = transparency_log_path(store_root, village_id)
+    state = _load_state(store_root, village_id)
+    size = log_path.stat().st_size if log_path.exists() else 0
+    if state is not None and state["log_offset"] == size:
+        return state
+    with locked_open(log_path, "a"):
+        state = _scan_log(_load_state(store_root, village_id) or _empty_state(), log_path, merkle_levels(store_root, village_id))
+        _write_state(store_root, village_id, state)
+    return state
+
+
+def recompute_transparency_state(store_root: Path, village_id: str) -> Dict[str, Any]:
+    """Recompute checkpoint state from the full log, ignoring the maintained state."""
+    log_path = transparency_log_path(store_root, village_id)
+    with locked_open(log_path, "a"):
+        return _scan_log(_empty_state(), log_path)
+
+
+def verify_transparency_state(store_root: Path, village_id: str) -> Tuple[bool, Dict[str, Any]]:
+    """Compare the maintained state with a full recomputation from the log.
+
+    Returns ``(ok, details)`` where *details* carries both roots and counts.
+    """
+    maintained = transparency_state(store_root, village_id)
+    recomputed = recompute_transparency_state(store_root, village_id)
+    keys = ("entry_count", "tree_size", "root", "latest_entry_hash", "latest_policy_hash")
+    ok = all(maintained.get(k) == recomputed.get(k) for k in keys)
+    return ok, {
+        "village_id": village_id,
+        "ok": ok,
+        "maintained": {k: maintained.get(k) for k in keys},
+        "recomputed": {k: recomputed.get(k) for k in keys},
+    }
+
+
+def _checkpoint_from_state(village_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "village_id": village_id,
+        "generated_at": _iso_now(),
+        "entry_count": state["entry_count"],
+        "checkpoint_hash": state["root"],
+        "checkpoint_alg": state["alg"],
+        "latest_entry_hash": state["latest_entry_hash"],
+        "latest_policy_hash": state["latest_policy_hash"],
+        "tree_size": state["tree_size"],
+    }
+
+
+def build_transparency_checkpoint(store_root: Path, village_id: str, *, verify: bool = False) -> Dict[str, Any]:
+    """Build a checkpoint from the maintained state.
+
+    With ``verify=True`` the state is recomputed from the full log and a
+    ``ValueError`` is raised if it disagrees with the maintained state.
+    """
+    if verify:
+        ok, details = verify_transparency_state(store_root, village_id)
+        if not ok:
+            raise ValueError(f"transparency state mismatch: {json.dumps(details, sort_keys=True)}")
+    return _checkpoint_from_state(village_id, transparency_state(store_root, village_id))
+
+
+# ---------------------------------------------------------------------------
+# Signed tree heads and proofs
+# ---------------------------------------------------------------------------
+#
+# Entries are not signed one by one.  The node signs a tree head
+# ``{village_id, tree_size, root_hash, timestamp}`` once per batch of
+# ``LINKS_TRANSPARENCY_STH_BATCH`` appends or when the previous head is older
+# than ``LINKS_TRANSPARENCY_STH_INTERVAL_SECONDS``; heads are appended to
+# ``tree_heads.jsonl``.  A signed head plus an inclusion proof shows an entry
+# is in the log, and a consistency proof between two heads shows the log only
+# grew.
+
+
+def _sth_batch() -> int:
+    try:
+        return max(1, int(os.environ.get("LINKS_TRANSPARENCY_STH_BATCH", "32")))
+    except ValueError:
+        return 32
+
+
+def _sth_interval_seconds() -> float:
+    try:
+        return max(0.0, float(os.environ.get("LINKS_TRANSPARENCY_STH_INTERVAL_SECONDS", "300")))
+    except ValueError:
+        return 300.0
+
+
+def tree_heads_path(store_root: Path, village_id: str) -> Path:
+    return transparency_log_path(store_root, village_id).with_name("tree_heads.jsonl")
+
+
+def _tree_head_due(state: Dict[str, Any]) -> bool:
+    unsigned = state["tree_size"] - state.get("tree_head_size", 0)
+    if unsigned <= 0:
+        return False
+    if unsigned >= _sth_batch() or not state.get("tree_head_at"):
+        return True
+    last = datetime.fromisoformat(state["tree_head_at"].replace("Z", "+00:00"))
+    return (utc_now() - last).total_seconds() >= _sth_interval_seconds()
+
+
+def _tree_head_body(village_id: str, tree_size: int, root_hex: str) -> Dict[str, Any]:
+    return {
+        "village_id": village_id,
+        "tree_size": tree_size,
+        "root_hash": root_hex,
+        "alg": CHECKPOINT_ALG,
+        "timestamp": _iso_now(),
+    }
+
+
+def _sign_tree_head_locked(store_root: Path, village_id: str, state: Dict[str, Any], signing_key: SigningKey) -> Dict[str, Any]:
+    sth = _tree_head_body(village_id, state["tree_size"], state["root"])
+    sth["signer_key_hash"] = sha256_hex(signing_key.verify_key.encode())
+    sth["signature"] = signing_key.sign(canonical_json({k: sth[k] for k in sth if k != "signature"})).signature.hex()
+    with tree_heads_path(store_root, village_id).open("a", encoding="utf-8") as f:
+        f.write(json.dumps(sth, ensure_ascii=False, sort_keys=True) + "\n")
+    state["tree_head_size"] = sth["tree_size"]
+    state["tree_head_at"] = sth["timestamp"]
+    return sth
+
+
+def sign_tree_head(store_root: Path, village_id: str, signing_key: SigningKey, *, force: bool = False) -> Dict[str, Any]:
+    """Sign the current tree head if it has unsigned entries (or *force*) and return the latest head."""
+    log_path = transparency_log_path(store_root, village_id)
+    transparency_state(store_root, village_id)
+    with locked_open(log_path, "a"):
+        state = _load_state(store_root, village_id) or _empty_state()
+        if force or state["tree_size"] > state.get("tree_head_size", 0) or not state.get("tree_head_at"):
+            sth = _sign_tree_head_locked(store_root, village_id, state, signing_key)
+            _write_state(store_root, village_id, state)
+            return sth
+    return latest_tree_head(store_root, village_id) or {}
+
+
+def latest_tree_head(store_root: Path, village_id: str) -> Optional[Dict[str, Any]]:
+    """Return the most recent signed tree head, or None if none was signed yet."""
+    p = tree_heads_path(store_root, village_id)
+    if not p.exists():
+        return None
+    view = LogTail(p)
+    for _, line in view.iter_reverse():
+        try:
+            return json.loads(line)
+        except Exception:
+            continue
+    return None
+
+
+def verify_tree_head(sth: Dict[str, Any], verify_key: Any) -> Tuple[bool, str]:
+    """Verify a signed tree head against a ``nacl`` VerifyKey (or its hex)."""
+    from nacl.signing import VerifyKey
+    from .key_cache import verify_key as cached_verify_key
+
+    sig = sth.get("signature")
+    if not sig:
+        return False, "no signature field"
+    body = {k: v for k, v in sth.items() if k != "signature"}
+    try:
+        vk = verify_key if isinstance(verify_key, VerifyKey) else cached_verify_key(bytes.fromhex(verify_key))
+        vk.verify(canonical_json(body), bytes.fromhex(sig))
+        return True, "ok"
+    except Exception as exc:  # noqa: BLE001
+        return False, str(exc)
+
+
+def _proof_tree_size(state: Dict[str, Any], tree_size: Optional[int]) -> int:
+    size = state["tree_size"] if tree_size is None else tree_size
+    if not 0 <= size <= state["tree_size"]:
+        raise ValueError(f"tree_size {size} exceeds log size {state['tree_size']}")
+    return size
+
+
+def inclusion_proof(store_root: Path, village_id: str, entry_hash: str, tree_size: Optional[int] = None) -> Dict[str, Any]:
+    """Audit path proving *entry_hash* is in the tree of *tree_size* leaves.
+
+    *tree_size* defaults to the latest signed tree head when it covers the
+    entry, otherwise to the current log size.  Raises ``KeyError`` if the
+    entry is not in the log and ``ValueError`` for an invalid *tree_size*.
+    """
+    state = transparency_state(store_root, village_id)
+    levels = merkle_levels(store_root, village_id)
+    leaf = leaf_hash(bytes.fromhex(entry_hash))
+    index = levels.leaf_index(leaf, state["tree_size"])
+    if index is None:
+        raise KeyError(entry_hash)
+    if tree_size is None and index < state.get("tree_head_size", 0):
+        tree_size = state["tree_head_size"]
+    size = _proof_tree_size(state, tree_size)
+    if index >= size:
+        raise ValueError(f"entry {index} is not covered by tree_size {size}")
     return {
         "village_id": village_id,
-        "generated_at": utc_now().astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
-        "entry_count": len(entries),
-        "checkpoint_hash": checkpoint_hash,
-        "latest_entry_hash": latest.get("entry_hash") if latest else None,
-        "latest_policy_hash": latest.get("policy_hash") if latest else None,
+        "entry_hash": entry_hash,
+        "leaf_index": index,
+        "tree_size": size,
+        "root_hash": levels.range_hash(0, size).hex(),
+        "audit_path": [h.hex() for h in levels.inclusion_path(index, size)],
     }
 
 
-def write_transparency_checkpoint(store_root: Path, village_id: str, out_path: Path) -> Path:
-    payload = build_transparency_checkpoint(store_root, village_id)
+def consistency_proof(store_root: Path, village_id: str, first: int, second: Optional[int] = None) -> Dict[str, Any]:
+    """Proof that the tree of *second* leaves (default: current) extends the tree of *first* leaves."""
+    state = transparency_state(store_root, village_id)
+    levels = merkle_levels(store_root, village_id)
+    second = _proof_tree_size(state, second)
+    if not 0 <= first <= second:
+        raise ValueError(f"invalid tree sizes {first} -> {second}")
+    return {
+        "village_id": village_id,
+        "first": first,
+        "second": second,
+        "first_root": levels.range_hash(0, first).hex() if first else EMPTY_ROOT.hex(),
+        "second_root": levels.range_hash(0, second).hex() if second else EMPTY_ROOT.hex(),
+        "proof": [h.hex() for h in levels.consistency_path(first, second)],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Served checkpoint cache
+# ---------------------------------------------------------------------------
+#
+# Peers poll ``GET /villages/<id>/transparency/checkpoint`` frequently.  The
+# signed checkpoint is cached per process and keyed on the (inode, mtime,
+# size) of the log and of ``checkpoint_state.json``: every append replaces the
+# state file, so appends from any process invalidate the entry, and a cache
+# hit costs two ``stat`` calls.  Appends in this process also drop the entry
+# directly.
+
+_CHECKPOINT_CACHE: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], Dict[str, Any], str]] = {}
+
+
+def _stat_key(p: Path) -> Tuple[int, int, int]:
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return (0, 0, 0)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def invalidate_checkpoint_cache(store_root: Path, village_id: str) -> None:
+    _CHECKPOINT_CACHE.pop((str(store_root), village_id), None)
+
+
+def served_checkpoint(store_root: Path, village_id: str, signing_key: Optional[SigningKey] = None) -> Tuple[Dict[str, Any], str]:
+    """Return ``(checkpoint, etag)``, signed with *signing_key* when given.
+
+    The ETag is derived from the log position and signer, not from
+    ``generated_at``, so every worker serving the same log state agrees on it.
+    """
+    from .checkpoint_exchange import sign_checkpoint
+
+    signer = sha256_hex(signing_key.verify_key.encode()) if signing_key is not None else ""
+    key = (
+        _stat_key(transparency_log_path(store_root, village_id)),
+        _stat_key(transparency_state_path(store_root, village_id)),
+        signer,
+    )
+    cache_key = (str(store_root), village_id)
+    hit = _CHECKPOINT_CACHE.get(cache_key)
+    if hit is not None and hit[0] == key:
+        return hit[1], hit[2]
+
+    checkpoint = build_transparency_checkpoint(store_root, village_id)
+    if signing_key is not None:
+        checkpoint = sign_checkpoint(checkpoint, signing_key)
+    tag = sha256_hex(canonical_json({
+        "village_id": village_id,
+        "tree_size": checkpoint["tree_size"],
+        "entry_count": checkpoint["entry_count"],
+        "checkpoint_hash": checkpoint["checkpoint_hash"],
+        "latest_entry_hash": checkpoint["latest_entry_hash"],
+        "signer": signer,
+    }))[:32]
+    etag = f'W/"{tag}"'
+    # Re-stat after building: a catch-up scan may have rewritten the state file.
+    key = (
+        _stat_key(transparency_log_path(store_root, village_id)),
+        _stat_key(transparency_state_path(store_root, village_id)),
+        signer,
+    )
+    _CHECKPOINT_CACHE[cache_key] = (key, checkpoint, etag)
+    return checkpoint, etag
+
+
+def write_transparency_checkpoint(store_root: Path, village_id: str, out_path: Path, *, verify: bool = False) -> Path:
+    payload = build_transparency_checkpoint(store_root, village_id, verify=verify)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
     return out_path
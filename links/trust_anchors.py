@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import base64
+import json
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Set, Tuple
 
 from pydantic import BaseModel, Field
 from nacl.signing import SigningKey
 
+from .file_lock import locked_open
+from .key_cache import verify_key_b64
+
 from .policy_updates import (
     SignatureEntry,
     canonical_json,
@@ -78,13 +84,10 @@ def add_anchor_signature(e: TrustAnchorEntry, signing_key: SigningKey) -> TrustA
 def verify_anchor_entry_any(e: TrustAnchorEntry) -> bool:
     if not e.signatures:
         return False
-    payload = _payload_for_signing(e)
+    message = canonical_json(_payload_for_signing(e))
     for s in e.signatures:
         try:
-            from nacl.signing import VerifyKey
-            from nacl.exceptions import BadSignatureError
-            vk = VerifyKey(base64.b64decode(s.public_key))
-            vk.verify(canonical_json(payload), base64.b64decode(s.signature))
+            verify_key_b64(s.public_key).verify(message, base64.b64decode(s.signature))
             return True
         except Exception:
             continue
@@ -97,6 +100,7 @@ def store_anchor_entry(villages_root: Path, e: TrustAnchorEntry) -> Path:
     keyh = e.anchor_key_hash or "na"
     p = d / f"{ts}.{e.action}.{keyh}.json"
     p.write_text(e.model_dump_json(indent=2), encoding="utf-8")
+    _apply_to_state(villages_root, e, p.name)
     return p
 
 
@@ -112,8 +116,8 @@ def iter_anchor_entries(villages_root: Path, village_id: str) -> List[TrustAncho
     return out
 
 
-def latest_active_anchor(villages_root: Path, village_id: str) -> Optional[TrustAnchorEntry]:
-    entries = iter_anchor_entries(villages_root, village_id)
+def replay_anchor_entries(entries: List[TrustAnchorEntry]) -> Dict[str, TrustAnchorEntry]:
+    """Active anchors by key hash after replaying *entries* in order (the reference semantics)."""
     active: Dict[str, TrustAnchorEntry] = {}
     for e in entries:
         if e.action in ("register", "rotate"):
@@ -122,7 +126,177 @@ def latest_active_anchor(villages_root: Path, village_id: str) -> Optional[Trust
         if e.action == "revoke":
             if e.anchor_key_hash and e.anchor_key_hash in active:
                 del active[e.anchor_key_hash]
-    if not active:
+    return active
+
+
+# ---------------------------------------------------------------------------
+# Materialized anchor state
+# ---------------------------------------------------------------------------
+#
+# `latest_active_anchor` used to parse every entry file and replay the whole
+# register/rotate/revoke history on each call.  Each village now keeps
+# villages/<id>/trust_anchor_state.json (outside trust_anchors/, so entry
+# readers never see it): active anchors by key hash, revoked key hashes, the
+# number of entries applied (`version`) and the sort key of the last one.
+# `store_anchor_entry` applies new entries incrementally under the state's
+# lock; an entry that sorts before the last applied one (a back-dated import)
+# triggers a full replay instead, so the state always equals
+# `replay_anchor_entries(iter_anchor_entries(...))`, which
+# `verify_anchor_state` cross-checks.
+
+ANCHOR_STATE_FORMAT = 1
+
+
+@dataclass
+class AnchorState:
+    version: int = 0
+    last_key: Tuple[str, str] = ("", "")
+    # key hash -> {"anchor_id", "created_at", "file"}
+    active: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    # key hash -> revoked_at (cleared if the key is registered again)
+    revoked: Dict[str, str] = field(default_factory=dict)
+
+    def is_active(self, key_hash: str) -> bool:
+        return key_hash in self.active
+
+    def is_revoked(self, key_hash: str) -> bool:
+        return key_hash in self.revoked
+
+    def apply(self, e: TrustAnchorEntry, file_name: str) -> None:
+        kh = e.anchor_key_hash
+        ts = _ts(e.created_at)
+        if kh and e.action in ("register", "rotate"):
+            self.active[kh] = {"anchor_id": e.anchor_id, "created_at": ts, "file": file_name}
+            self.revoked.pop(kh, None)
+        if kh and e.action == "revoke" and kh in self.active:
+            del self.active[kh]
+            self.revoked[kh] = ts
+        self.version += 1
+        self.last_key = max(self.last_key, _entry_key(e))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"format": ANCHOR_STATE_FORMAT, "version": self.version, "last_key": list(self.last_key), "active": self.active, "revoked": self.revoked}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "AnchorState":
+        return cls(version=int(d["version"]), last_key=tuple(d["last_key"]), active=dict(d["active"]), revoked=dict(d["revoked"]))  # type: ignore[arg-type]
+
+
+def _ts(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _entry_key(e: TrustAnchorEntry) -> Tuple[str, str]:
+    return (_ts(e.created_at), e.anchor_key_hash or "")
+
+
+def anchor_state_path(villages_root: Path, village_id: str) -> Path:
+    return villages_root / "villages" / village_id / "trust_anchor_state.json"
+
+
+_state_lock = threading.Lock()
+# state path -> ((ino, size, mtime_ns), AnchorState)
+_state_cache: Dict[str, Tuple[Tuple[int, int, int], AnchorState]] = {}
+
+
+def _replay_state(villages_root: Path, village_id: str) -> AnchorState:
+    d = _anchors_dir(villages_root, village_id)
+    state = AnchorState()
+    entries: List[Tuple[TrustAnchorEntry, str]] = []
+    for p in sorted(d.glob("*.json")):
+        try:
+            entries.append((TrustAnchorEntry.model_validate_json(p.read_text(encoding="utf-8")), p.name))
+        except Exception:
+            continue
+    entries.sort(key=lambda x: (x[0].created_at, x[0].anchor_key_hash or ""))
+    for e, name in entries:
+        state.apply(e, name)
+    return state
+
+
+def _save_state(path: Path, state: AnchorState) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state.to_dict()), encoding="utf-8")  # key order = activation order
+    tmp.replace(path)
+
+
+def _read_state(path: Path) -> Optional[AnchorState]:
+    try:
+        d = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if d.get("format") != ANCHOR_STATE_FORMAT:
+        return None
+    return AnchorState.from_dict(d)
+
+
+def _apply_to_state(villages_root: Path, e: TrustAnchorEntry, file_name: str) -> None:
+    path = anchor_state_path(villages_root, e.village_id)
+    with locked_open(path.with_name(path.name + ".lock"), "a"):
+        state = _read_state(path)
+        if state is None or _entry_key(e) < state.last_key:
+            state = _replay_state(villages_root, e.village_id)  # includes the new entry
+        else:
+            state.apply(e, file_name)
+        _save_state(path, state)
+
+
+def anchor_state(villages_root: Path, village_id: str) -> AnchorState:
+    """Materialized anchor state of a village (built from the entries on first use)."""
+    path = anchor_state_path(villages_root, village_id)
+    try:
+        st = path.stat()
+        sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        sig = None
+    with _state_lock:
+        hit = _state_cache.get(str(path))
+    if sig is not None and hit is not None and hit[0] == sig:
+        return hit[1]
+    state = _read_state(path) if sig is not None else None
+    if state is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with locked_open(path.with_name(path.name + ".lock"), "a"):
+            state = _read_state(path) or _replay_state(villages_root, village_id)
+            _save_state(path, state)
+        st = path.stat()
+        sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+    with _state_lock:
+        _state_cache[str(path)] = (sig, state)
+    return state
+
+
+def is_active_anchor(villages_root: Path, village_id: str, key_hash: str) -> bool:
+    return anchor_state(villages_root, village_id).is_active(key_hash)
+
+
+def verify_anchor_state(villages_root: Path, village_id: str, repair: bool = False) -> Dict[str, Any]:
+    """Cross-check the materialized state against a full replay of the entries.
+
+    Returns ``{"ok", "version", "missing", "unexpected", "revocation_mismatch"}``;
+    with *repair* a mismatching state is replaced by the replayed one.
+    """
+    state = anchor_state(villages_root, village_id)
+    replayed = replay_anchor_entries(iter_anchor_entries(villages_root, village_id))
+    ref = _replay_state(villages_root, village_id)
+    missing = sorted(set(replayed) - set(state.active))
+    unexpected = sorted(set(state.active) - set(replayed))
+    revocation_mismatch = sorted(set(state.revoked) ^ set(ref.revoked))
+    ok = not (missing or unexpected or revocation_mismatch)
+    if not ok and repair:
+        path = anchor_state_path(villages_root, village_id)
+        with locked_open(path.with_name(path.name + ".lock"), "a"):
+            _save_state(path, _replay_state(villages_root, village_id))
+    return {"ok": ok, "version": state.version, "missing": missing, "unexpected": unexpected, "revocation_mismatch": revocation_mismatch}
+
+
+def latest_active_anchor(villages_root: Path, village_id: str) -> Optional[TrustAnchorEntry]:
+    state = anchor_state(villages_root, village_id)
+    if not state.active:
         return None
     # pick latest by created_at
-    return sorted(active.values(), key=lambda x: x.created_at, reverse=True)[0]
+    latest = max(state.active.values(), key=lambda a: a["created_at"])
+    p = _anchors_dir(villages_root, village_id) / latest["file"]
+    return TrustAnchorEntry.model_validate_json(p.read_text(encoding="utf-8"))
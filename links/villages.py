@@ -2,6 +2,11 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -9,12 +14,15 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 from .file_lock import locked_open
+from .io import JsonlTailReader
 from .validate import validate_village_id
 
 from .audit import write_audit, AuditEvent, policy_hash
 from .transparency import append_transparency_entry
 from .storage_backend import sqlite_enabled, transaction, write_policy_apply_event
 from .keys import load_signing_key_from_env
+from .notify import enqueue_event
+from .policy_eval import compile_policy, issuer_key_hash
 
 # Default store root for audit events
 store_root = Path("data/store")
@@ -46,7 +54,7 @@ class VillagePolicy(BaseModel):
     allow_unverified: bool = False
     retention_days: int = 90
     rate_limit_per_min: int = 60
-    rate_limit_strategy: str = Field(default="fixed_window", description="fixed_window|token_bucket")
+    rate_limit_strategy: str = Field(default="fixed_window", description="fixed_window|sliding_window|token_bucket")
     submission_quota_per_day: int = Field(default=0, description="0 means unlimited")
     public_policy_endpoint: bool = Field(default=False, description="If true, allow unauthenticated read-only policy endpoint")
     policy_update_expires_minutes: int = Field(default=0, description="0 means no expiry enforcement; otherwise updates must have expires_at within this window")
@@ -119,6 +127,7 @@ def save_village(root: Path, v: Village) -> Path:
     tmp = p.with_suffix(".json.tmp")
     tmp.write_text(v.model_dump_json(indent=2), encoding="utf-8")
     tmp.replace(p)
+    village_cache.invalidate(root, v.village_id)
     _members_path(root, v.village_id).touch(exist_ok=True)
     _revocations_path(root, v.village_id).touch(exist_ok=True)
     return p
@@ -129,6 +138,106 @@ def load_village(root: Path, village_id: str) -> Village:
     return Village.model_validate_json(p.read_text(encoding="utf-8"))
 
 
+class VillageCache:
+    """
+    Bounded LRU of parsed `Village` objects keyed by (root, village_id).
+
+    Read paths that run per request (rate limiting, role checks, public
+    policy lookups) use `get` instead of `load_village`.  An entry is trusted
+    for `max_age_seconds` after it was last validated; after that the next
+    `get` stats village.json and re-parses only if (inode, size, mtime)
+    changed.  `save_village` invalidates the entry in this process
+    immediately, and since it replaces the file, other processes pick the
+    change up within `max_age_seconds` (the staleness bound).
+
+    The returned objects are shared between callers and must not be mutated;
+    read-modify-write paths keep using `load_village`.
+    """
+
+    def __init__(self, max_entries: int = 256, max_age_seconds: float = 1.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock
+        self._entries: OrderedDict[tuple[str, str], tuple[Village, tuple[int, int, int], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, root: Path, village_id: str) -> Village:
+        p = village_dir(root, village_id) / "village.json"
+        key = (str(root), village_id)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] < self.max_age_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        st = p.stat()
+        sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == sig:
+                self._entries[key] = (entry[0], sig, now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        v = Village.model_validate_json(p.read_text(encoding="utf-8"))
+        with self._lock:
+            if entry is not None:
+                self.reloads += 1
+            else:
+                self.misses += 1
+            self._entries[key] = (v, sig, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return v
+
+    def invalidate(self, root: Path, village_id: str) -> None:
+        with self._lock:
+            self._entries.pop((str(root), village_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.reloads
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_age_seconds": self.max_age_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+village_cache = VillageCache(
+    max_entries=max(1, _env_number("LINKS_VILLAGE_CACHE_SIZE", 256, int)),
+    max_age_seconds=max(0.0, _env_number("LINKS_VILLAGE_CACHE_MAX_AGE_SECONDS", 1.0, float)),
+)
+
+
+def cached_village(root: Path, village_id: str) -> Village:
+    """Shared, read-only `Village` from the process-wide cache (see `VillageCache`)."""
+    return village_cache.get(root, village_id)
+
+
 def save_village_policy(root: Path, village_id: str, policy: VillagePolicy) -> None:
     v = load_village(root, village_id)
     v = v.model_copy(update={"policy": policy})
@@ -139,38 +248,281 @@ def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
-def is_token_revoked(root: Path, village_id: str, token_hash: str) -> bool:
-    rp = _revocations_path(root, village_id)
-    if not rp.exists():
-        return False
-    with rp.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+# Membership storage: snapshot + tail
+#
+# members.jsonl and revocations.jsonl are append-only logs.  `compact_membership`
+# folds each log into `<name>.snapshot.jsonl` (live records only, written via
+# tmp + rename) and truncates the log in place to a header line
+# `{"_snapshot": <generation>}`; rows after the header follow that snapshot.
+# The whole compaction runs under the exclusive lock of both log files, and
+# readers hold the shared lock while reading snapshot + log, so they never see
+# a half-compacted state.  Files without a header are plain logs (generation 0).
+#
+# Crash safety: snapshots are written before the logs are truncated.  A log
+# whose header generation is older than its snapshot was already folded in
+# and is ignored by readers; the next append resets it under the lock.
+
+_SNAPSHOT_KEY = "_snapshot"
+
+
+def _snapshot_path(log_path: Path) -> Path:
+    return log_path.with_name(f"{log_path.stem}.snapshot.jsonl")
+
+
+def _parse_jsonl(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _split_header(rows: list[dict]) -> tuple[int, list[dict]]:
+    if rows and _SNAPSHOT_KEY in rows[0]:
+        return int(rows[0][_SNAPSHOT_KEY]), rows[1:]
+    return 0, rows
+
+
+def _snapshot_generation(log_path: Path) -> int:
+    sp = _snapshot_path(log_path)
+    if not sp.exists():
+        return 0
+    with sp.open("r", encoding="utf-8") as f:
+        first = f.readline()
+    return _split_header(_parse_jsonl(first))[0]
+
+
+def _merge_snapshot_and_log(log_path: Path, log_text: str) -> tuple[int, list[dict]]:
+    sp = _snapshot_path(log_path)
+    snap_gen, snap_rows = _split_header(_parse_jsonl(sp.read_text(encoding="utf-8"))) if sp.exists() else (0, [])
+    log_gen, log_rows = _split_header(_parse_jsonl(log_text))
+    if log_gen < snap_gen:
+        return snap_gen, snap_rows
+    return max(snap_gen, log_gen), snap_rows + log_rows
+
+
+def _read_membership_log(log_path: Path) -> list[dict]:
+    if not log_path.exists():
+        return []
+    with locked_open(log_path, "r", shared=True) as f:
+        return _merge_snapshot_and_log(log_path, f.read())[1]
+
+
+@contextmanager
+def _locked_log(log_path: Path):
+    """
+    Exclusively lock a membership log, retrying if write_membership replaced
+    the file while we waited (the lock would otherwise be on an orphaned inode).
+    """
+    while True:
+        with locked_open(log_path, "a+") as f:
+            try:
+                current = log_path.stat().st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(f.fileno()).st_ino:
+                yield f
+                return
+
+
+def _append_rows(log_path: Path, rows: list[dict]) -> None:
+    if not rows:
+        return
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with _locked_log(log_path) as f:
+        snap_gen = _snapshot_generation(log_path)
+        if snap_gen:
+            f.seek(0)
+            log_gen = _split_header(_parse_jsonl(f.readline()))[0]
+            if log_gen < snap_gen:
+                # Interrupted compaction: the log was already folded into the snapshot.
+                f.truncate(0)
+                f.write(json.dumps({_SNAPSHOT_KEY: snap_gen}) + "\n")
+        f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+
+
+def _write_snapshot(log_path: Path, generation: int, rows: list[dict]) -> None:
+    sp = _snapshot_path(log_path)
+    tmp = sp.with_suffix(".jsonl.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps({_SNAPSHOT_KEY: generation, "compacted_at": iso_utc(utc_now()), "count": len(rows)}) + "\n")
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(sp)
+
+
+def _stat_sig(path: Path) -> Optional[tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def compact_membership(root: Path, village_id: str, actor: Optional[str] = None) -> dict:
+    """
+    Fold members.jsonl and revocations.jsonl into snapshots of current state.
+
+    Member records whose token was revoked (or that are marked revoked) are
+    dropped; revocations are de-duplicated by token hash and kept, since they
+    must keep overriding any later record carrying the same token.
+    """
+    mp, rp = _members_path(root, village_id), _revocations_path(root, village_id)
+    mp.parent.mkdir(parents=True, exist_ok=True)
+    # Lock order: members, then revocations (same as every other writer taking both).
+    with _locked_log(mp) as mf, _locked_log(rp) as rf:
+        mf.seek(0)
+        rf.seek(0)
+        m_gen, members = _merge_snapshot_and_log(mp, mf.read())
+        r_gen, revocations = _merge_snapshot_and_log(rp, rf.read())
+
+        revoked: dict[str, dict] = {}
+        for r in revocations:
+            th = r.get("token_hash")
+            if th and th not in revoked:
+                revoked[th] = r
+        live = [m for m in members if not m.get("is_revoked", False) and m.get("token_hash") not in revoked]
+
+        generation = max(m_gen, r_gen) + 1
+        _write_snapshot(mp, generation, live)
+        _write_snapshot(rp, generation, list(revoked.values()))
+        for f in (mf, rf):
+            f.truncate(0)
+            f.write(json.dumps({_SNAPSHOT_KEY: generation}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    stats = {
+        "village_id": village_id,
+        "generation": generation,
+        "members_before": len(members),
+        "members_after": len(live),
+        "revocations_before": len(revocations),
+        "revocations_after": len(revoked),
+    }
+    write_audit(store_root, AuditEvent(action="member.compact", village_id=village_id, actor=actor, reason=f"generation={generation} members={len(members)}->{len(live)}"))
+    return stats
+
+
+def write_membership(root: Path, village_id: str, members: list[dict], revocations: list[dict]) -> None:
+    """
+    Replace a village's membership state wholesale (registry import).
+
+    The rows become a new-generation snapshot and the log is swapped for an
+    empty one of the same generation, both via rename: a crash in between
+    leaves the snapshot authoritative (older log generations are ignored),
+    and tail readers see a new inode and rebuild instead of missing a
+    same-size rewrite.
+    """
+    mp, rp = _members_path(root, village_id), _revocations_path(root, village_id)
+    mp.parent.mkdir(parents=True, exist_ok=True)
+    with _locked_log(mp) as mf, _locked_log(rp) as rf:
+        generation = 0
+        for log_path, f in ((mp, mf), (rp, rf)):
+            f.seek(0)
+            generation = max(generation, _snapshot_generation(log_path), _split_header(_parse_jsonl(f.readline()))[0])
+        generation += 1
+        for log_path, rows in ((mp, members), (rp, revocations)):
+            _write_snapshot(log_path, generation, rows)
+            tmp = log_path.with_suffix(".jsonl.tmp")
+            with tmp.open("w", encoding="utf-8") as out:
+                out.write(json.dumps({_SNAPSHOT_KEY: generation}) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, log_path)
+
+
+class MemberTokenIndex:
+    """
+    Per-process index of a village's members and revocations keyed by token hash.
+
+    The logs are append-only between compactions, so the index follows them
+    with JsonlTailReader: every lookup costs a stat per file plus parsing of
+    lines appended since the last lookup, whichever process (or uvicorn
+    worker) appended them.  A new snapshot (compaction) or a rewritten log
+    triggers a rebuild from snapshot + log.  Lookups are O(1) dict/set probes.
+    """
+
+    def __init__(self, root: Path, village_id: str):
+        self._members_path = _members_path(root, village_id)
+        self._revocations_path = _revocations_path(root, village_id)
+        self._members_reader = JsonlTailReader(self._members_path)
+        self._revocations_reader = JsonlTailReader(self._revocations_path)
+        self._snapshot_sigs: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.by_token_hash: dict[str, dict] = {}
+        self.revoked: set[str] = set()
+
+    def _snapshot_state(self) -> tuple:
+        return (_stat_sig(_snapshot_path(self._members_path)), _stat_sig(_snapshot_path(self._revocations_path)))
+
+    def _add_members(self, rows: list[dict]) -> None:
+        for m in rows:
+            th = m.get("token_hash")
+            # authorize() historically returned the first matching, non-revoked record.
+            if th and not m.get("is_revoked", False) and th not in self.by_token_hash:
+                self.by_token_hash[th] = m
+
+    def _rebuild(self) -> None:
+        self.by_token_hash, self.revoked = {}, set()
+        self._members_reader = JsonlTailReader(self._members_path)
+        self._revocations_reader = JsonlTailReader(self._revocations_path)
+        for log_path, reader in ((self._members_path, self._members_reader), (self._revocations_path, self._revocations_reader)):
+            if not log_path.exists():
                 continue
-            r = json.loads(line)
-            if r.get("token_hash") == token_hash:
-                return True
-    return False
+            # The shared lock keeps compaction out while snapshot and log are read.
+            with locked_open(log_path, "r", shared=True):
+                sp = _snapshot_path(log_path)
+                snap_gen, rows = _split_header(_parse_jsonl(sp.read_text(encoding="utf-8"))) if sp.exists() else (0, [])
+                log_gen, log_rows = _split_header(reader.read_new()[1])
+                if log_gen >= snap_gen:
+                    rows += log_rows
+            if log_path == self._members_path:
+                self._add_members(rows)
+            else:
+                self.revoked.update(r["token_hash"] for r in rows if r.get("token_hash"))
+        self._snapshot_sigs = self._snapshot_state()
+
+    def refresh(self) -> "MemberTokenIndex":
+        with self._lock:
+            if self._snapshot_sigs is None or self._snapshot_state() != self._snapshot_sigs:
+                self._rebuild()
+                return self
+            m_reset, m_rows = self._members_reader.read_new()
+            r_reset, r_rows = self._revocations_reader.read_new()
+            if m_reset or r_reset or self._snapshot_state() != self._snapshot_sigs:
+                self._rebuild()
+                return self
+            self._add_members(m_rows)
+            self.revoked.update(r["token_hash"] for r in r_rows if r.get("token_hash"))
+        return self
+
+
+_TOKEN_INDEXES: dict[tuple[str, str], MemberTokenIndex] = {}
+_TOKEN_INDEXES_LOCK = threading.Lock()
+
+
+def member_token_index(root: Path, village_id: str) -> MemberTokenIndex:
+    key = (str(root), village_id)
+    idx = _TOKEN_INDEXES.get(key)
+    if idx is None:
+        with _TOKEN_INDEXES_LOCK:
+            idx = _TOKEN_INDEXES.setdefault(key, MemberTokenIndex(root, village_id))
+    return idx.refresh()
+
+
+def is_token_revoked(root: Path, village_id: str, token_hash: str) -> bool:
+    return token_hash in member_token_index(root, village_id).revoked
+
+
+def _revocation_row(token_hash: str, actor: Optional[str], reason: str) -> dict:
+    return {"ts": iso_utc(utc_now()), "token_hash": token_hash, "actor": actor, "reason": reason}
 
 
 def revoke_token_hash(root: Path, village_id: str, token_hash: str, actor: Optional[str] = None, reason: str = "revoked") -> None:
-    rp = _revocations_path(root, village_id)
-    rp.parent.mkdir(parents=True, exist_ok=True)
-    with locked_open(rp, "a") as f:
-        f.write(json.dumps({
-            "ts": iso_utc(utc_now()),
-            "token_hash": token_hash,
-            "actor": actor,
-            "reason": reason,
-        }, ensure_ascii=False) + "\n")
+    _append_rows(_revocations_path(root, village_id), [_revocation_row(token_hash, actor, reason)])
     write_audit(store_root, AuditEvent(action="member.revoke", village_id=village_id, actor=actor, reason=reason))
 
 
-def add_member(root: Path, village_id: str, member_id: str, role: str, token_plain: str, actor: Optional[str] = None) -> VillageMember:
-    vd = village_dir(root, village_id)
-    if not (vd / "village.json").exists():
-        raise FileNotFoundError("Village not found")
+def _new_member_row(member_id: str, role: str, token_plain: str) -> tuple[VillageMember, dict]:
     m = VillageMember(
         member_id=member_id,
         role=role,
@@ -178,31 +530,76 @@ def add_member(root: Path, village_id: str, member_id: str, role: str, token_pla
         token_hash=hash_token(token_plain),
         is_revoked=False,
     )
-    mp = _members_path(root, village_id)
-    with locked_open(mp, "a") as f:
-        f.write(json.dumps({
-            "member_id": m.member_id,
-            "role": m.role,
-            "added_at": iso_utc(m.added_at),
-            "token_hash": m.token_hash,
-            "is_revoked": False,
-        }, ensure_ascii=False) + "\n")
+    return m, {
+        "member_id": m.member_id,
+        "role": m.role,
+        "added_at": iso_utc(m.added_at),
+        "token_hash": m.token_hash,
+        "is_revoked": False,
+    }
+
+
+def add_member(root: Path, village_id: str, member_id: str, role: str, token_plain: str, actor: Optional[str] = None) -> VillageMember:
+    vd = village_dir(root, village_id)
+    if not (vd / "village.json").exists():
+        raise FileNotFoundError("Village not found")
+    m, row = _new_member_row(member_id, role, token_plain)
+    _append_rows(_members_path(root, village_id), [row])
     write_audit(store_root, AuditEvent(action="member.add", village_id=village_id, actor=actor, reason=f"role={role}"))
     return m
 
 
+def _read_log_since(log_path: Path, position: Optional[dict]) -> tuple[list[dict], dict, bool]:
+    """
+    Rows appended to a membership log after *position* (``{"generation", "offset"}``).
+
+    Returns ``(rows, new_position, rebased)``.  When the log was compacted since
+    *position* (or no position is given) the full current state is returned
+    with ``rebased=True``: rows folded into a snapshot cannot be told apart.
+    """
+    if not log_path.exists():
+        return [], {"generation": 0, "offset": 0}, position is None
+    with locked_open(log_path, "rb", shared=True) as f:
+        snap_gen = _snapshot_generation(log_path)
+        log_gen = _split_header(_parse_jsonl(f.readline().decode("utf-8")))[0]
+        generation = max(snap_gen, log_gen)
+        size = os.fstat(f.fileno()).st_size
+        if log_gen < snap_gen:
+            # Interrupted compaction: the log is stale and will be reset by the next append.
+            size = 0
+        if position is None or int(position.get("generation", -1)) != generation or int(position.get("offset", 0)) > size:
+            f.seek(0)
+            _, rows = _merge_snapshot_and_log(log_path, f.read(size).decode("utf-8"))
+            return rows, {"generation": generation, "offset": size}, True
+        f.seek(int(position["offset"]))
+        chunk = f.read(size - int(position["offset"]))
+    end = chunk.rfind(b"\n") + 1  # leave a partially written last line for later
+    rows = [r for r in _parse_jsonl(chunk[:end].decode("utf-8")) if _SNAPSHOT_KEY not in r]
+    return rows, {"generation": generation, "offset": int(position["offset"]) + end}, False
+
+
+def members_since(root: Path, village_id: str, position: Optional[dict] = None) -> tuple[list[dict], dict, bool]:
+    """Member rows added after *position*; see `_read_log_since`."""
+    return _read_log_since(_members_path(root, village_id), position)
+
+
+def revocations_since(root: Path, village_id: str, position: Optional[dict] = None) -> tuple[list[dict], dict, bool]:
+    """Revocation rows added after *position*; see `_read_log_since`."""
+    return _read_log_since(_revocations_path(root, village_id), position)
+
+
+def append_membership(root: Path, village_id: str, members: list[dict], revocations: list[dict]) -> None:
+    """Append member and revocation rows as-is (registry delta import)."""
+    _append_rows(_members_path(root, village_id), members)
+    _append_rows(_revocations_path(root, village_id), revocations)
+
+
 def list_members(root: Path, village_id: str) -> list[dict]:
-    mp = _members_path(root, village_id)
-    if not mp.exists():
-        return []
-    out = []
-    with mp.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            out.append(json.loads(line))
-    return out
+    return _read_membership_log(_members_path(root, village_id))
+
+
+def list_revocations(root: Path, village_id: str) -> list[dict]:
+    return _read_membership_log(_revocations_path(root, village_id))
 
 
 def authorize(root: Path, village_id: str, token_plain: str) -> Optional[dict]:
@@ -210,12 +607,36 @@ def authorize(root: Path, village_id: str, token_plain: str) -> Optional[dict]:
     Auth: bearer token hashed and matched. Revocations override membership records.
     """
     want = hash_token(token_plain)
-    if is_token_revoked(root, village_id, want):
+    idx = member_token_index(root, village_id)
+    if want in idx.revoked:
         return None
-    for m in list_members(root, village_id):
-        if m.get("token_hash") == want and not m.get("is_revoked", False):
-            return m
-    return None
+    m = idx.by_token_hash.get(want)
+    return dict(m) if m is not None else None
+
+
+def _revoke_in_members(root: Path, village_id: str, members: list[dict], member_ids: set[str], actor: Optional[str], reason: str) -> dict[str, int]:
+    revoked = set(member_token_index(root, village_id).revoked)
+    counts = {mid: 0 for mid in member_ids}
+    rows = []
+    for m in members:
+        mid = m.get("member_id")
+        th = m.get("token_hash")
+        if mid in counts and th and th not in revoked:
+            revoked.add(th)
+            rows.append(_revocation_row(th, actor, reason))
+            counts[mid] += 1
+    _append_rows(_revocations_path(root, village_id), rows)
+    for _ in rows:
+        write_audit(store_root, AuditEvent(action="member.revoke", village_id=village_id, actor=actor, reason=reason))
+    return counts
+
+
+def revoke_members(root: Path, village_id: str, member_ids: list[str], actor: Optional[str] = None, reason: str = "revoked") -> dict[str, int]:
+    """
+    Revoke every current token of each member in one pass over the membership
+    state and one locked append.  Returns revoked-token counts per member_id.
+    """
+    return _revoke_in_members(root, village_id, list_members(root, village_id), set(member_ids), actor, reason)
 
 
 def revoke_member(root: Path, village_id: str, member_id: str, actor: Optional[str] = None, reason: str = "revoked") -> int:
@@ -223,43 +644,42 @@ def revoke_member(root: Path, village_id: str, member_id: str, actor: Optional[s
     Revoke all tokens currently associated with member_id by writing revocations for their token hashes.
     Returns count revoked.
     """
-    count = 0
-    for m in list_members(root, village_id):
-        if m.get("member_id") == member_id:
-            th = m.get("token_hash")
-            if th and not is_token_revoked(root, village_id, th):
-                revoke_token_hash(root, village_id, th, actor=actor, reason=reason)
-                count += 1
-    return count
+    return revoke_members(root, village_id, [member_id], actor=actor, reason=reason)[member_id]
+
+
+def rotate_member_tokens(root: Path, village_id: str, new_tokens: dict[str, str], actor: Optional[str] = None) -> list[VillageMember]:
+    """
+    Rotate several members at once: revoke their current tokens and add the new
+    ones (keeping each member's latest role), reading membership state once.
+    """
+    members = list_members(root, village_id)
+    _revoke_in_members(root, village_id, members, set(new_tokens), actor, "rotated")
+    roles: dict[str, str] = {}
+    for m in members:
+        if m.get("member_id") in new_tokens:
+            roles[m["member_id"]] = m.get("role", "member")
+    added, rows = [], []
+    for member_id, token_plain in new_tokens.items():
+        m, row = _new_member_row(member_id, roles.get(member_id, "member"), token_plain)
+        added.append(m)
+        rows.append(row)
+    _append_rows(_members_path(root, village_id), rows)
+    for m in added:
+        write_audit(store_root, AuditEvent(action="member.add", village_id=village_id, actor=actor, reason=f"role={m.role}"))
+        write_audit(store_root, AuditEvent(action="member.rotate", village_id=village_id, actor=actor, reason=f"member_id={m.member_id}"))
+    return added
 
 
 def rotate_member_token(root: Path, village_id: str, member_id: str, new_token_plain: str, actor: Optional[str] = None) -> None:
-    # revoke existing tokens
-    revoke_member(root, village_id, member_id, actor=actor, reason="rotated")
-    # add new token with same role as latest record
-    role = "member"
-    for m in reversed(list_members(root, village_id)):
-        if m.get("member_id") == member_id:
-            role = m.get("role", "member")
-            break
-    add_member(root, village_id, member_id, role=role, token_plain=new_token_plain, actor=actor)
-    write_audit(store_root, AuditEvent(action="member.rotate", village_id=village_id, actor=actor, reason=f"member_id={member_id}"))
+    rotate_member_tokens(root, village_id, {member_id: new_token_plain}, actor=actor)
 
 
 def issuer_key_hash_from_public_key_b64(public_key_b64: str) -> str:
-    import base64
-    pk = base64.b64decode(public_key_b64)
-    return hashlib.sha256(pk).hexdigest()
+    return issuer_key_hash(public_key_b64)
 
 
 def issuer_allowed(policy: VillagePolicy, issuer_key_hash: str) -> bool:
-    if issuer_key_hash in set(policy.issuer_blocklist):
-        return False
-    if policy.require_issuer_allowlist:
-        return issuer_key_hash in set(policy.issuer_allowlist)
-    if policy.issuer_allowlist:
-        return issuer_key_hash in set(policy.issuer_allowlist)
-    return True
+    return compile_policy(policy).issuer_key_allowed(issuer_key_hash)
 
 
 def add_issuer_allow(root: Path, village_id: str, issuer_key_hash: str, actor: Optional[str] = None) -> None:
@@ -281,16 +701,11 @@ def add_issuer_block(root: Path, village_id: str, issuer_key_hash: str, actor: O
 
 
 def enforce_policy_on_bundle(village: Village, bundle: dict) -> tuple[bool, str]:
-    # window guard
-    window = int(bundle.get("window_days", 0))
-    if window > village.policy.max_window_days:
-        return False, f"bundle window_days={window} exceeds max_window_days={village.policy.max_window_days}"
-    # predicate allowlist
-    allowed = set(village.policy.allowed_predicates)
-    for c in bundle.get("claims", []):
-        pred = c.get("predicate")
-        if pred and pred not in allowed:
-            return False, f"predicate '{pred}' not allowed"
+    """Window and predicate rules only; see `CompiledVillagePolicy.evaluate` for the full check."""
+    compiled = compile_policy(village.policy)
+    for d in (compiled.check_window(bundle), compiled.check_predicates(bundle)):
+        if not d.allowed:
+            return False, d.reason
     return True, "ok"
 
 
@@ -306,11 +721,7 @@ def role_can(policy: VillagePolicy, role: str, action: str) -> bool:
 
 
 def issuer_id_allowed(policy: VillagePolicy, issuer_id: str) -> bool:
-    if issuer_id in set(policy.issuer_id_blocklist):
-        return False
-    if policy.issuer_id_allowlist:
-        return issuer_id in set(policy.issuer_id_allowlist)
-    return True
+    return compile_policy(policy).issuer_id_allowed(issuer_id)
 
 
 def policy_history_path(root: Path, village_id: str) -> Path:
@@ -325,9 +736,17 @@ def append_policy_history(root: Path, village_id: str, update_obj: dict) -> None
         f.write(json.dumps(update_obj, ensure_ascii=False) + "\n")
 
 
-def apply_policy_update(root: Path, village_id: str, policy_obj: dict, actor: Optional[str] = None, update_meta: Optional[dict] = None) -> None:
+def apply_policy_update(
+    root: Path,
+    village_id: str,
+    policy_obj: dict,
+    actor: Optional[str] = None,
+    update_meta: Optional[dict] = None,
+    reevaluation_mode: Optional[str] = None,
+) -> None:
     v = load_village(root, village_id)
     incoming = VillagePolicy.model_validate(policy_obj)
+    rules_changed = not compile_policy(v.policy).same_rules(compile_policy(incoming))
     v = v.model_copy(update={"policy": incoming})
     save_village(root, v)
     if update_meta is None:
@@ -348,6 +767,8 @@ def apply_policy_update(root: Path, village_id: str, policy_obj: dict, actor: Op
     }
     write_audit(store_root, AuditEvent(action="policy.apply", village_id=village_id, actor=actor, reason=audit_row["reason"], policy_hash=audit_row["policy_hash"]))
 
+    enqueue_event(store_root, "policy.apply", {"village_id": village_id, "actor": actor, "policy_hash": audit_row["policy_hash"], "applied_at": applied_at})
+
     transparency_entry = None
     try:
         sk = load_signing_key_from_env()
@@ -367,3 +788,8 @@ def apply_policy_update(root: Path, village_id: str, policy_obj: dict, actor: Op
                 update_hash=(update_meta or {}).get("policy_hash") if isinstance(update_meta, dict) else None,
                 history_row=history_row,
             )
+
+    if rules_changed:
+        # Sort the quarantine backlog under the new rules (see LINKS_QUARANTINE_REEVALUATE).
+        from .quarantine_reeval import schedule_reevaluation
+        schedule_reevaluation(store_root, village_id, villages_root=root, mode=reevaluation_mode)
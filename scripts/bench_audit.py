@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Audit write throughput: per-event open/lock/write (the old write_audit) vs AuditWriter modes.
+
+    PYTHONPATH=. python scripts/bench_audit.py [N]
+
+Set LINKS_STORAGE_BACKEND=sqlite to include the SQLite mirror in the numbers.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from links.audit import AuditEvent, AuditWriter, _audit_row, audit_log_path
+from links.file_lock import locked_open
+from links.storage_backend import sqlite_enabled, transaction, write_audit_event
+
+
+def _legacy_write(store_root: Path, ev: AuditEvent) -> None:
+    p = audit_log_path(store_root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    row = _audit_row(ev)
+    with locked_open(p, "a") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    if sqlite_enabled():
+        with transaction(store_root) as conn:
+            write_audit_event(conn, row)
+
+
+def _run(label: str, n: int, fn) -> dict:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    return {"mode": label, "events": n, "seconds": round(dt, 4), "events_per_second": round(n / dt, 1)}
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    events = [AuditEvent(action="member.add", village_id="bench", actor="bench", reason=f"i={i}") for i in range(n)]
+    results = []
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d) / "legacy"
+        results.append(_run("legacy-per-event", n, lambda: [_legacy_write(root, ev) for ev in events]))
+        for mode in ("event", "interval", "fsync"):
+            w = AuditWriter(Path(d) / mode, durability=mode, flush_interval_ms=50, max_batch=512)
+
+            def go(w=w):
+                for ev in events:
+                    w.write(_audit_row(ev))
+                w.flush()
+
+            results.append({**_run(mode, n, go), "batches": w.batches_written})
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
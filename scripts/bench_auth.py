@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Compare bearer-token authorization against a large members file.
+
+Writes N members (default 100000) into a scratch village and times the old
+full-scan lookup against the cached `authorize`.
+
+    PYTHONPATH=. python scripts/bench_auth.py [N]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from links.villages import (
+    Village,
+    VillageGovernance,
+    VillagePolicy,
+    _members_path,
+    authorize,
+    hash_token,
+    list_members,
+    save_village,
+)
+
+
+def _scan_authorize(root: Path, village_id: str, token: str):
+    want = hash_token(token)
+    for m in list_members(root, village_id):
+        if m.get("token_hash") == want and not m.get("is_revoked", False):
+            return m
+    return None
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lookups = 200
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        save_village(root, Village(
+            village_id="bench",
+            name="bench",
+            description="",
+            created_at=datetime.now(timezone.utc),
+            governance=VillageGovernance(admins=["admin"]),
+            policy=VillagePolicy(),
+        ))
+        with _members_path(root, "bench").open("w", encoding="utf-8") as f:
+            for i in range(n):
+                f.write(json.dumps({"member_id": f"m{i}", "role": "member", "token_hash": hash_token(f"t{i}"), "is_revoked": False}) + "\n")
+        tokens = [f"t{(i * 7919) % n}" for i in range(lookups)]
+
+        t0 = time.perf_counter()
+        for tok in tokens[:10]:
+            assert _scan_authorize(root, "bench", tok) is not None
+        scan = (time.perf_counter() - t0) / 10
+
+        t0 = time.perf_counter()
+        authorize(root, "bench", tokens[0])
+        warm = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for tok in tokens:
+            assert authorize(root, "bench", tok) is not None
+        cached = (time.perf_counter() - t0) / lookups
+
+    print(json.dumps({
+        "members": n,
+        "scan_ms_per_lookup": round(scan * 1000, 3),
+        "index_build_ms": round(warm * 1000, 3),
+        "cached_ms_per_lookup": round(cached * 1000, 4),
+        "speedup": round(scan / cached, 1) if cached else None,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
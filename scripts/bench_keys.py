@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Compare signature verification throughput with the key cache on and off.
+
+Signs N bundles (default 5000) with K issuer keys (default 20) and times
+`claims.verify_bundle`, then N/10 ECDSA P-256 `crypto.verify_bytes` calls,
+first with the key cache disabled (`configure_key_cache(0)`, like
+`LINKS_KEY_CACHE_SIZE=0`) and then enabled.
+
+    PYTHONPATH=. python scripts/bench_keys.py [N] [K]
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from nacl.signing import SigningKey
+
+from links.claims import build_bundle_from_edges, sign_bundle, verify_bundle
+from links.crypto import sign_bytes, verify_bytes
+from links.key_cache import configure_key_cache, key_cache_stats
+
+
+def _rate(fn, items) -> float:
+    t0 = time.perf_counter()
+    for it in items:
+        assert fn(it)
+    return len(items) / (time.perf_counter() - t0)
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    keys = [SigningKey.generate() for _ in range(k)]
+    with tempfile.TemporaryDirectory() as d:
+        edges = Path(d) / "edges.json"
+        edges.write_text(json.dumps([{"from_entity_id": "a", "to_entity_id": "b", "weight": 1.0, "window_days": 30}]), encoding="utf-8")
+        base = build_bundle_from_edges(edges, issuer="bench", window_days=30)
+        signed = [sign_bundle(base, keys[i % k]) for i in range(k)]
+    bundles = [signed[i % k] for i in range(n)]
+
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    priv = ec.generate_private_key(ec.SECP256R1())
+    pub_b64 = base64.b64encode(priv.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)).decode()
+    priv_b64 = base64.b64encode(priv.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())).decode()
+    msgs = [b"msg-%d" % i for i in range(max(1, n // 10))]
+    sigs = [sign_bytes(m, alg="ecdsa_p256", signing_key_b64=priv_b64) for m in msgs]
+    p256 = list(zip(msgs, sigs))
+
+    def _p256(item) -> bool:
+        return verify_bytes(item[0], alg="ecdsa_p256", public_key_b64=pub_b64, signature_b64=item[1])
+
+    out = {"bundles": n, "issuer_keys": k}
+    for label, size in (("off", 0), ("on", 4096)):
+        configure_key_cache(size)
+        out[f"ed25519_bundles_per_s_cache_{label}"] = round(_rate(verify_bundle, bundles))
+        out[f"p256_verifies_per_s_cache_{label}"] = round(_rate(_p256, p256))
+    out["cache"] = key_cache_stats()
+    print(json.dumps(out, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Gossip convergence harness.
+
+Runs N in-process PolicyMesh nodes (FastAPI test clients on a shared in-memory
+"localhost" transport), seeds policy updates on one node, then runs gossip
+rounds until every node reports the same feed summary.  Prints rounds to
+convergence, simulated latency (rounds x interval), wall time and total
+messages exchanged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from links.gossip import GossipConfig, GossipNode, feed_summary, summaries_match
+from links.policy_feed import store_policy_update
+from links.policy_updates import build_update
+from links.server import create_app
+
+
+def build_mesh(root: Path, n: int, village_id: str, fanout: int, interval: float, seed: int):
+    clients = {}
+    roots = []
+    for i in range(n):
+        node_root = root / f"node{i}"
+        node_root.mkdir(parents=True, exist_ok=True)
+        roots.append(node_root)
+        clients[f"http://node{i}.localhost"] = TestClient(create_app(store_root=node_root / "store", villages_root=node_root))
+
+    def transport(method, url, payload=None):
+        for base, client in clients.items():
+            if url.startswith(base):
+                resp = client.request(method, url[len(base):], json=payload)
+                return resp.status_code, (resp.json() if resp.status_code == 200 else None)
+        return 404, None
+
+    rng = random.Random(seed)
+    nodes = []
+    for i, node_root in enumerate(roots):
+        peers = [b for j, b in enumerate(clients) if j != i]
+        cfg = GossipConfig(peers=peers, village_ids=[village_id], fanout=fanout, interval_seconds=interval)
+        nodes.append(GossipNode(node_root, cfg, transport=transport, rng=random.Random(rng.random())))
+    return roots, nodes
+
+
+def converged(roots, village_id: str) -> bool:
+    summaries = [feed_summary(r, village_id) for r in roots]
+    return all(summaries_match(summaries[0], s) for s in summaries[1:])
+
+
+def run(n: int, updates: int, fanout: int, interval: float, max_rounds: int, seed: int) -> dict:
+    village_id = "ops"
+    with tempfile.TemporaryDirectory() as tmp:
+        roots, nodes = build_mesh(Path(tmp), n, village_id, fanout, interval, seed)
+        prev = None
+        for k in range(updates):
+            u = build_update(village_id, {"visibility": "village", "retention_days": 90 + k}, actor="seed", previous_policy_hash=prev)
+            store_policy_update(roots[0], u)
+            prev = u.policy_hash
+
+        t0 = time.perf_counter()
+        rounds = 0
+        while rounds < max_rounds and not converged(roots, village_id):
+            for node in nodes:
+                node.run_round()
+            rounds += 1
+        wall = time.perf_counter() - t0
+        return {
+            "nodes": n,
+            "updates": updates,
+            "fanout": fanout,
+            "converged": converged(roots, village_id),
+            "rounds": rounds,
+            "simulated_latency_seconds": rounds * interval,
+            "wall_seconds": round(wall, 4),
+            "messages": sum(node.metrics.messages_sent for node in nodes),
+            "updates_fetched": sum(node.metrics.updates_fetched for node in nodes),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure gossip convergence across in-process PolicyMesh nodes.")
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=30.0, help="Configured gossip interval used for simulated latency")
+    parser.add_argument("--max-rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    result = run(args.nodes, args.updates, args.fanout, args.interval, args.max_rounds, args.seed)
+    print(json.dumps(result, indent=2))
+    return 0 if result["converged"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,14 +5,21 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-from links.transparency import write_transparency_checkpoint
+from links.transparency import verify_transparency_state, write_transparency_checkpoint
 
 
 def main() -> int:
-    if len(sys.argv) < 2:
-        print("usage: python scripts/transparency_checkpoint.py <village_id>", file=sys.stderr)
+    args = [a for a in sys.argv[1:] if a != "--verify"]
+    verify = "--verify" in sys.argv[1:]
+    if len(args) != 1:
+        print("usage: python scripts/transparency_checkpoint.py <village_id> [--verify]", file=sys.stderr)
         return 2
-    village_id = sys.argv[1]
+    village_id = args[0]
+    if verify:
+        ok, details = verify_transparency_state(Path("data/store"), village_id)
+        if not ok:
+            print(json.dumps(details, indent=2, sort_keys=True), file=sys.stderr)
+            return 1
     stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     out = Path("artifacts/transparency") / village_id / f"checkpoint.{stamp}.json"
     write_transparency_checkpoint(Path("data/store"), village_id, out)
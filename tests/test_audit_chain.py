@@ -0,0 +1,106 @@
+import base64
+import json
+
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+
+from links.audit import AuditEvent, audit_log_path, flush_audit, write_audit
+from links.audit_chain import (
+    GENESIS,
+    chain_head,
+    iter_chain_events,
+    list_checkpoints,
+    record_checkpoint,
+    verify_chain,
+    verify_checkpoint_signature,
+    verify_range,
+)
+from links.audit_store import append_partitioned, audit_snapshot, migrate_audit_log, partition_path
+from links.server import create_app
+
+
+def _write(store, n, start=0):
+    for i in range(start, start + n):
+        write_audit(store, AuditEvent(action="member.add", village_id="fin" if i % 3 == 0 else "ops", actor=f"u{i}"))
+    flush_audit(store)
+
+
+def _signed(monkeypatch):
+    sk = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(sk)).decode())
+    monkeypatch.setenv("LINKS_AUDIT_CHECKPOINT_EVERY", "10")
+    return base64.b64encode(sk.verify_key.encode()).decode()
+
+
+def test_rows_chain_per_village_with_signed_checkpoints(tmp_path, monkeypatch):
+    pub = _signed(monkeypatch)
+    _write(tmp_path, 45)
+
+    ops = [r for r in map(json.loads, audit_log_path(tmp_path).read_text().splitlines()) if r["village_id"] == "ops"]
+    assert [r["seq"] for r in ops] == list(range(1, 31))
+    assert verify_chain(ops).ok
+    assert chain_head(tmp_path, "ops").chain == ops[-1]["chain"]
+
+    cps = list_checkpoints(tmp_path, "ops")
+    assert [cp["seq"] for cp in cps] == [10, 20, 30]
+    assert all(verify_checkpoint_signature(cp, pub) for cp in cps)
+    r = verify_range(tmp_path, "ops", 10, 20, public_key_b64=pub)
+    assert r.ok and r.checked == 10
+
+    # Tamper with ops event 15: only ranges covering it fail.
+    log = audit_log_path(tmp_path)
+    lines = log.read_text().splitlines()
+    i = next(i for i, l in enumerate(lines) if json.loads(l)["village_id"] == "ops" and json.loads(l)["seq"] == 15)
+    lines[i] = lines[i].replace('"actor": "u', '"actor": "x')
+    log.write_text("\n".join(lines) + "\n")
+    assert not verify_range(tmp_path, "ops", 10, 20).ok
+    assert verify_range(tmp_path, "ops", 0, 10).ok and verify_range(tmp_path, "ops", 20, 30).ok
+
+
+def test_incremental_export_continues_the_chain(tmp_path, monkeypatch):
+    pub = _signed(monkeypatch)
+    store = tmp_path / "store"
+    _write(store, 30)
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+    first = client.get("/villages/ops/audit/export", params={"sign": "false"}).json()
+    assert first["count"] == 20 and first["chain"]["to_seq"] == 20
+
+    _write(store, 15, start=30)
+    r = client.get("/villages/ops/audit/export", params={"after_seq": 20, "stream": "true"})
+    events = json.loads(r.content)["events"]
+    manifest = client.get(f"/villages/ops/audit/export/{r.headers['X-Export-Id']}/manifest").json()
+    assert [e["seq"] for e in events] == list(range(21, 31))
+    assert manifest["chain"] == {"after_seq": 20, "to_seq": 30, "to_chain": events[-1]["chain"]}
+    assert verify_chain(events, (20, first["chain"]["to_chain"]), (30, manifest["chain"]["to_chain"])).ok
+
+    # The export starts reading at the checkpoint for seq 20, not at the top of the log.
+    snap = audit_snapshot(store, "ops", after_seq=20)
+    assert snap.start is not None and snap.start[1] > 0
+    assert client.get("/villages/ops/audit/verify").json()["ok"] is True
+
+    # Checkpoints signed with another key, or unsigned, fail against the node's key.
+    monkeypatch.setenv("LINKS_AUDIT_CHECKPOINT_EVERY", "0")
+    forger = SigningKey.generate()
+    for key in (forger, None):
+        _write(store, 3, start=45)
+        cp = record_checkpoint(store, "ops", key)
+        assert verify_checkpoint_signature(cp) is (key is not None)
+        verdict = client.get("/villages/ops/audit/verify").json()
+        assert verdict["ok"] is False and verdict["public_key"] == pub
+
+
+def test_chains_survive_migration_and_partition_boundaries(tmp_path, monkeypatch):
+    _signed(monkeypatch)
+    _write(tmp_path, 12)
+    migrate_audit_log(tmp_path)
+    _write(tmp_path, 12, start=12)
+    assert [e["seq"] for e in iter_chain_events(tmp_path, "ops")] == list(range(1, 17))
+    record_checkpoint(tmp_path, "ops")
+    assert verify_range(tmp_path, "ops").ok
+
+    # A row stamped in an earlier period than the village's newest partition stays in the newest one.
+    rows = [{"ts": "2026-02-01T00:00:00.100000Z", "action": "a", "village_id": "late"},
+            {"ts": "2026-01-31T23:59:59.900000Z", "action": "b", "village_id": "late"}]
+    append_partitioned(tmp_path, rows, "month")
+    assert not partition_path(tmp_path, "late", "2026-01").exists()
+    assert verify_chain(list(iter_chain_events(tmp_path, "late")), (0, GENESIS), (2, rows[1]["chain"])).ok
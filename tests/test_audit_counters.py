@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timezone
+
+from links.audit import AuditEvent, audit_log_path, write_audit
+from links.audit_counters import audit_action_count, counters_path, daily_counts, rebuild_audit_counters
+
+
+def test_counters_follow_audit_writes_and_rebuild(tmp_path):
+    today = datetime.now(timezone.utc).date().isoformat()
+    for _ in range(3):
+        write_audit(tmp_path, AuditEvent(action="quarantine.approve", village_id="ops"))
+    write_audit(tmp_path, AuditEvent(action="quarantine.approve", village_id="fin"))
+    write_audit(tmp_path, AuditEvent(action="member.add", village_id="ops"))
+    assert not counters_path(tmp_path).exists()  # per-event durability: synced lazily by readers
+    assert audit_action_count(tmp_path, "ops", "quarantine.approve") == 3
+    assert audit_action_count(tmp_path, "ops", "quarantine.approve", day="2000-01-01") == 0
+
+    # Lines appended by another process (or older code) are picked up on the next read.
+    with audit_log_path(tmp_path).open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": "2000-01-01T23:59:59Z", "action": "quarantine.approve", "village_id": "ops"}) + "\n")
+        f.write('{"ts": "2000-01-01T00:00:00Z", "act')  # partial line left for later
+    assert daily_counts(tmp_path, "ops")["ops"] == {
+        "2000-01-01": {"quarantine.approve": 1},
+        today: {"member.add": 1, "quarantine.approve": 3},
+    }
+
+    # A rewritten log invalidates the counters.
+    p = audit_log_path(tmp_path)
+    p.write_text("\n".join(p.read_text(encoding="utf-8").splitlines()[:2]) + "\n", encoding="utf-8")
+    assert audit_action_count(tmp_path, "ops", "quarantine.approve") == 2
+    assert rebuild_audit_counters(tmp_path) == 2
+
+
+def test_batched_writer_syncs_counters_once_per_batch(tmp_path, monkeypatch):
+    from links.audit import audit_writer, flush_audit
+
+    monkeypatch.setenv("LINKS_AUDIT_DURABILITY", "interval")
+    monkeypatch.setenv("LINKS_AUDIT_FLUSH_INTERVAL_MS", "60000")
+    for _ in range(4):
+        write_audit(tmp_path, AuditEvent(action="quarantine.approve", village_id="ops"))
+    assert not counters_path(tmp_path).exists()
+    assert flush_audit(tmp_path) == 4 and audit_writer(tmp_path).batches_written == 1
+    assert counters_path(tmp_path).exists()  # synced by the writer's flush hook
+    assert daily_counts(tmp_path, "ops")["ops"][datetime.now(timezone.utc).date().isoformat()] == {"quarantine.approve": 4}
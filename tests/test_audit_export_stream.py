@@ -0,0 +1,51 @@
+import base64
+import hashlib
+import json
+
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+
+from links.audit import audit_log_path
+from links.audit_export import export_audit_json, stream_audit_json
+from links.server import create_app
+
+
+def _seed(store_root, n=2000):
+    p = audit_log_path(store_root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"ts": "2026-01-01T00:00:00Z", "action": "member.add", "village_id": "ops" if i % 3 else "fin", "reason": f"ü{i}"}) + "\n")
+        f.write('{"ts": "partial')  # writer mid-append: excluded from the snapshot
+
+
+def test_stream_matches_file_export(tmp_path):
+    _seed(tmp_path)
+    digest, count = export_audit_json(audit_log_path(tmp_path), tmp_path / "out.json", village_id="ops")
+    n, chunks = stream_audit_json(audit_log_path(tmp_path), "ops")
+    body = b"".join(chunks)
+    assert n == count == 1333
+    assert hashlib.sha256(body).hexdigest() == digest
+    assert json.loads(body)["format"] == "links.audit.export.v1"
+
+
+def test_streamed_endpoint_publishes_signed_manifest(tmp_path, monkeypatch):
+    sk = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(sk)).decode())
+    store = tmp_path / "store"
+    _seed(store)
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+
+    summary = client.get("/villages/ops/audit/export").json()
+    for fmt in ("json", "csv"):
+        r = client.get(f"/villages/ops/audit/export?stream=true&fmt={fmt}")
+        assert r.status_code == 200
+        manifest = client.get(f"/villages/ops/audit/export/{r.headers['X-Export-Id']}/manifest").json()
+        assert manifest["sha256"] == hashlib.sha256(r.content).hexdigest()
+        assert manifest["count"] == 1333 and manifest["bytes"] == len(r.content)
+        sk.verify_key.verify(bytes.fromhex(manifest["sha256"]), bytes.fromhex(manifest["signature_hex"]))
+        if fmt == "json":
+            assert manifest["sha256"] == summary["sha256"]
+        else:
+            assert len(r.text.splitlines()) == 1334
+    assert client.get("/villages/ops/audit/export/abc123/manifest").status_code == 404
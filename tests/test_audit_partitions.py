@@ -0,0 +1,107 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from links.audit import AuditEvent, audit_log_path, flush_audit, iso_utc, write_audit
+from links.audit_counters import audit_action_count
+from links.audit_export import export_audit_json
+from links.audit_store import (
+    _seek_offset,
+    audit_layout,
+    audit_snapshot,
+    index_path,
+    list_partitions,
+    migrate_audit_log,
+    partition_path,
+    query_audit,
+    ts_key,
+)
+from links.server import create_app
+
+T0 = datetime(2026, 1, 30, tzinfo=timezone.utc)
+
+
+def _rows(n=600):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "ts": iso_utc(T0 + timedelta(hours=2 * i)),
+            "action": "quarantine.approve" if i % 4 == 0 else "member.add",
+            "village_id": ("ops", "fin", None)[i % 3],
+            "actor": f"a{i % 5}",
+        })
+    return rows
+
+
+def _seed(store_root, rows):
+    p = audit_log_path(store_root)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def _brute(rows, village_id=None, action=None, actor=None, since=None, until=None):
+    lo, hi = ts_key(since) if since else None, ts_key(until) if until else None
+    return [
+        r for r in rows
+        if (village_id is None or r["village_id"] == village_id)
+        and (action is None or r["action"] == action)
+        and (actor is None or r["actor"] == actor)
+        and (lo is None or ts_key(r["ts"]) >= lo)
+        and (hi is None or ts_key(r["ts"]) < hi)
+    ]
+
+
+def test_migrate_splits_by_village_and_month(tmp_path):
+    rows = _rows()
+    _seed(tmp_path, rows)
+    before = audit_action_count(tmp_path, "ops", "quarantine.approve", "2026-02-01")
+    single = query_audit(tmp_path, "ops", since="2026-02-03", until="2026-02-05T12:00:00Z", limit=None)
+
+    summary = migrate_audit_log(tmp_path)
+    assert summary["events"] == 600 and summary["partitions"] == 9
+    assert audit_layout(tmp_path) == "partitioned"
+    assert not audit_log_path(tmp_path).exists()
+    assert [p.stem for p in list_partitions(tmp_path, "ops")] == ["2026-01", "2026-02", "2026-03"]
+    assert list_partitions(tmp_path, "ops", ts_key("2026-02-10"), ts_key("2026-02-11")) == [partition_path(tmp_path, "ops", "2026-02")]
+
+    assert query_audit(tmp_path, "ops", since="2026-02-03", until="2026-02-05T12:00:00Z", limit=None) == single
+    assert query_audit(tmp_path, action="quarantine.approve", actor="a0", limit=None) == _brute(rows, action="quarantine.approve", actor="a0")
+    assert query_audit(tmp_path, "fin", limit=3, descending=True) == _brute(rows, "fin")[::-1][:3]
+    assert audit_action_count(tmp_path, "ops", "quarantine.approve", "2026-02-01") == before > 0
+
+
+def test_sparse_index_seeks_into_partition(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINKS_AUDIT_INDEX_BYTES", "512")
+    rows = _rows()
+    _seed(tmp_path, rows)
+    migrate_audit_log(tmp_path)
+
+    part = partition_path(tmp_path, "ops", "2026-02")
+    entries = [json.loads(l) for l in index_path(part).read_text().splitlines()]
+    assert len(entries) > 5 and entries[0]["o"] == 0
+    assert _seek_offset(part, ts_key("2026-02-20")) > 0
+    for since, until in [("2026-02-20", "2026-02-21"), ("2026-01-31T05:00:00Z", None), (None, "2026-02-02")]:
+        assert query_audit(tmp_path, "ops", since=since, until=until, limit=None) == _brute(rows, "ops", since=since, until=until)
+
+
+def test_partitioned_store_writes_queries_and_exports(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINKS_AUDIT_LAYOUT", "partitioned")
+    store = tmp_path / "store"
+    for i in range(5):
+        write_audit(store, AuditEvent(action="member.add", village_id="ops" if i % 2 else "fin", actor=f"u{i}"))
+    flush_audit(store)
+    assert audit_layout(store) == "partitioned"
+    assert not audit_log_path(store).exists()
+    month = datetime.now(timezone.utc).strftime("%Y-%m")
+    assert partition_path(store, "ops", month).exists()
+    assert audit_action_count(store, "fin", "member.add") == 3
+
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+    r = client.get("/villages/ops/audit/query", params={"actor": "u3"})
+    assert r.status_code == 200 and [e["actor"] for e in r.json()["events"]] == ["u3"]
+    assert client.get("/villages/ops/audit/query", params={"since": "yesterday"}).status_code == 400
+    summary = client.get("/villages/ops/audit/export", params={"sign": "false"}).json()
+    assert summary["count"] == 2
+    digest, count = export_audit_json(audit_snapshot(store, "ops"), tmp_path / "ops.json")
+    assert (digest, count) == (summary["sha256"], 2)
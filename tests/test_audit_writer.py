@@ -0,0 +1,129 @@
+import json
+import threading
+
+from links.audit import AuditEvent, AuditWriter, audit_log_path, audit_writer, flush_audit, write_audit
+
+
+def _rows(store_root):
+    p = audit_log_path(store_root)
+    return [json.loads(l) for l in p.read_text(encoding="utf-8").splitlines()] if p.exists() else []
+
+
+def test_event_mode_writes_synchronously(tmp_path):
+    write_audit(tmp_path, AuditEvent(action="a.one", village_id="ops"))
+    assert [r["action"] for r in _rows(tmp_path)] == ["a.one"]
+    assert audit_writer(tmp_path).durability == "event"
+
+
+def test_interval_mode_batches_in_order_and_flushes(tmp_path):
+    w = AuditWriter(tmp_path, durability="fsync", flush_interval_ms=60_000, max_batch=100)
+    seen = []
+    w.flush_hooks.append(lambda root, batch: seen.append(len(batch)))
+
+    def produce(tid):
+        for i in range(30):
+            w.write({"action": "x", "reason": f"{tid}:{i}"})
+
+    threads = [threading.Thread(target=produce, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 120 rows with max_batch=100: one size-triggered batch, the rest still buffered.
+    assert len(_rows(tmp_path)) == 100
+    assert w.flush() == 20
+    rows = _rows(tmp_path)
+    assert len(rows) == 120 and w.events_written == 120 and sum(seen) == 120
+    for tid in range(4):
+        mine = [int(r["reason"].split(":")[1]) for r in rows if r["reason"].startswith(f"{tid}:")]
+        assert mine == list(range(30))  # per-producer order preserved
+
+
+def test_env_configured_writer_and_flush_audit(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINKS_AUDIT_DURABILITY", "interval")
+    monkeypatch.setenv("LINKS_AUDIT_FLUSH_INTERVAL_MS", "60000")
+    root = tmp_path / "store"
+    write_audit(root, AuditEvent(action="buffered"))
+    assert _rows(root) == []
+    assert flush_audit(root) == 1
+    assert [r["action"] for r in _rows(root)] == ["buffered"]
+
+
+def test_failed_batch_is_requeued_and_logged(tmp_path, caplog):
+    w = AuditWriter(tmp_path, durability="interval", flush_interval_ms=60_000, max_batch=100)
+    real_append, fail = w._append, [True]
+
+    def flaky(batch):
+        if fail[0]:
+            raise OSError("disk full")
+        real_append(batch)
+
+    w._append = flaky
+    w.flush_hooks.append(lambda root, batch: 1 / 0)
+    for i in range(3):
+        w.write({"action": "x", "reason": str(i)})
+    try:
+        w.flush()
+    except OSError:
+        pass
+    w.write({"action": "x", "reason": "3"})
+    assert _rows(tmp_path) == [] and len(w._pending) == 4
+
+    fail[0] = False
+    assert w.flush() == 4
+    assert [r["reason"] for r in _rows(tmp_path)] == ["0", "1", "2", "3"]
+    assert "flush hook" in caplog.text
+
+
+def test_failed_write_leaves_no_partial_rows_and_keeps_the_chain(tmp_path, monkeypatch):
+    import links.io
+    from links.audit_chain import verify_chain
+
+    w = AuditWriter(tmp_path, durability="fsync", flush_interval_ms=60_000, max_batch=100)
+    w.write({"action": "x", "village_id": "ops", "reason": "0"})
+    assert w.flush() == 1  # chain heads are now cached
+
+    real_write, real_fsync = links.io.os.write, links.io.os.fsync
+    monkeypatch.setattr(links.io.os, "write", lambda fd, data: real_write(fd, bytes(data[: len(data) // 2])) if len(data) > 1 else 1 / 0)
+    for i in (1, 2):
+        w.write({"action": "x", "village_id": "ops", "reason": str(i)})
+    try:
+        w.flush()
+    except ZeroDivisionError:
+        pass
+    monkeypatch.setattr(links.io.os, "write", real_write)
+    monkeypatch.setattr(links.io.os, "fsync", lambda fd: (_ for _ in ()).throw(OSError("fsync failed")))
+    try:
+        w.flush()
+    except OSError:
+        pass
+    assert [r["reason"] for r in _rows(tmp_path)] == ["0"]
+    assert all("seq" not in r and "chain" not in r for r in w._pending)
+
+    monkeypatch.setattr(links.io.os, "fsync", real_fsync)
+    assert w.flush() == 2
+    rows = _rows(tmp_path)
+    assert [(r["reason"], r["seq"]) for r in rows] == [("0", 1), ("1", 2), ("2", 3)]
+    assert verify_chain(rows).ok
+
+
+def test_rows_are_retried_in_sqlite_when_the_mirror_fails(tmp_path, monkeypatch, caplog):
+    import links.audit
+
+    monkeypatch.setenv("LINKS_STORAGE_BACKEND", "sqlite")
+    stored = []
+    fail = [True]
+
+    def insert(conn, row):
+        if fail[0]:
+            raise RuntimeError("database is locked")
+        stored.append(row["reason"])
+
+    monkeypatch.setattr(links.audit, "write_audit_event", insert)
+    w = AuditWriter(tmp_path, durability="event")
+    w.write({"action": "x", "reason": "0"})
+    assert [r["reason"] for r in _rows(tmp_path)] == ["0"] and w.events_written == 1
+    assert "not SQLite" in caplog.text
+    fail[0] = False
+    w.write({"action": "x", "reason": "1"})
+    assert stored == ["0", "1"] and w._db_pending == []
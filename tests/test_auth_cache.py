@@ -0,0 +1,56 @@
+import json
+from datetime import datetime, timezone
+
+from links.villages import (
+    Village,
+    VillageGovernance,
+    VillagePolicy,
+    _members_path,
+    add_member,
+    authorize,
+    hash_token,
+    is_token_revoked,
+    member_token_index,
+    revoke_member,
+    rotate_member_token,
+    save_village,
+)
+
+
+def _village(root):
+    save_village(root, Village(
+        village_id="ops",
+        name="Ops",
+        description="",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["admin"]),
+        policy=VillagePolicy(),
+    ))
+
+
+def test_token_index_follows_appends_revocations_and_rewrites(tmp_path):
+    _village(tmp_path)
+    add_member(tmp_path, "ops", "alice", "member", token_plain="t-alice")
+    assert authorize(tmp_path, "ops", "t-alice")["member_id"] == "alice"
+    assert authorize(tmp_path, "ops", "t-bob") is None
+
+    # Appended by "another process": picked up on the next lookup.
+    with _members_path(tmp_path, "ops").open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"member_id": "bob", "role": "admin", "token_hash": hash_token("t-bob")}) + "\n")
+    assert authorize(tmp_path, "ops", "t-bob")["role"] == "admin"
+
+    rotate_member_token(tmp_path, "ops", "alice", "t-alice-2")
+    assert authorize(tmp_path, "ops", "t-alice") is None
+    assert is_token_revoked(tmp_path, "ops", hash_token("t-alice"))
+    assert authorize(tmp_path, "ops", "t-alice-2")["member_id"] == "alice"
+    assert revoke_member(tmp_path, "ops", "alice") == 1
+    assert revoke_member(tmp_path, "ops", "alice") == 0
+
+    # A rewritten (replaced) members file rebuilds the index.
+    mp = _members_path(tmp_path, "ops")
+    tmp = mp.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"member_id": "carol", "role": "member", "token_hash": hash_token("t-carol")}) + "\n", encoding="utf-8")
+    tmp.replace(mp)
+    assert authorize(tmp_path, "ops", "t-bob") is None
+    assert authorize(tmp_path, "ops", "t-carol")["member_id"] == "carol"
+    assert len(member_token_index(tmp_path, "ops").by_token_hash) == 1
@@ -0,0 +1,137 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from links.audit import AuditEvent, flush_audit, write_audit
+from links.deltas import (
+    DeltaOrderError,
+    apply_audit_delta,
+    export_audit,
+    export_registry,
+    import_registry,
+    load_manifest,
+    manifest_path_for,
+)
+from nacl.signing import SigningKey
+
+from links.trust_anchors import TrustAnchorEntry, add_anchor_signature, is_active_anchor, iter_anchor_entries, store_anchor_entry
+from links.villages import (
+    Village,
+    VillageGovernance,
+    VillagePolicy,
+    add_member,
+    compact_membership,
+    list_members,
+    list_revocations,
+    revoke_member,
+    save_village,
+)
+
+
+def _village(root):
+    save_village(root, Village(
+        village_id="ops",
+        name="Ops",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["admin"]),
+        policy=VillagePolicy(),
+    ))
+
+
+SK = SigningKey.generate()
+
+
+def _anchor(root, anchor_id, village_id="ops"):
+    store_anchor_entry(root, add_anchor_signature(TrustAnchorEntry(
+        village_id=village_id, created_at=datetime.now(timezone.utc), action="register", anchor_id=anchor_id, anchor_key_hash=anchor_id * 8,
+    ), SK))
+
+
+def test_registry_deltas_chain_and_apply_in_order(tmp_path):
+    src, dst, out = tmp_path / "src", tmp_path / "dst", tmp_path / "out"
+    _village(src)
+    for mid in ("alice", "bob"):
+        add_member(src, "ops", mid, "member", token_plain=f"{mid}-0")
+    _anchor(src, "a1")
+    m1 = export_registry(src, "ops", out / "r1.json")
+    assert m1["base"] and m1["counts"] == {"members": 2, "revocations": 0, "trust_anchors": 1}
+
+    add_member(src, "ops", "carol", "member", token_plain="carol-0")
+    revoke_member(src, "ops", "bob")
+    _anchor(src, "a2")
+    m2 = export_registry(src, "ops", out / "r2.json", since=m1)
+    assert not m2["base"] and m2["prev_manifest_sha256"] == m1["manifest_sha256"]
+    assert m2["counts"] == {"members": 1, "revocations": 1, "trust_anchors": 1}
+    assert load_manifest(manifest_path_for(out / "r2.json")) == m2
+
+    with pytest.raises(DeltaOrderError):
+        import_registry(dst, out / "r2.json")
+    import_registry(dst, out / "r1.json")
+    import_registry(dst, out / "r2.json")
+    assert list_members(dst, "ops") == list_members(src, "ops")
+    assert list_revocations(dst, "ops") == list_revocations(src, "ops")
+    assert [a.anchor_id for a in iter_anchor_entries(dst, "ops")] == ["a1", "a2"]
+    with pytest.raises(DeltaOrderError):
+        import_registry(dst, out / "r2.json")
+
+    # Compaction folds rows into a snapshot: the next export is a new base.
+    compact_membership(src, "ops")
+    m3 = export_registry(src, "ops", out / "r3.json", since=m2)
+    assert m3["base"] and m3["seq"] == 3
+    import_registry(dst, out / "r3.json")
+    assert list_members(dst, "ops") == list_members(src, "ops")
+
+
+def test_registry_import_rejects_foreign_or_unsigned_anchors(tmp_path):
+    src, dst, out = tmp_path / "src", tmp_path / "dst", tmp_path / "out"
+    _village(src)
+    _anchor(src, "a1")
+    export_registry(src, "ops", out / "r1.json")
+    p = out / "r1.json"
+    payload = json.loads(p.read_text())
+    good = payload["trust_anchors"][0]
+
+    unsigned = dict(good, village_id="beta", anchor_key_hash="de" * 32, signatures=[])
+    payload["trust_anchors"] = [good, unsigned]
+    p.write_text(json.dumps(payload))
+    manifest_path_for(p).unlink()
+    with pytest.raises(ValueError):
+        import_registry(dst, p)
+    assert not is_active_anchor(dst, "beta", "de" * 32)
+    assert not (dst / "villages" / "ops").exists() and list_members(dst, "ops") == []
+
+    payload["trust_anchors"] = [dict(good, anchor_id="forged")]
+    p.write_text(json.dumps(payload))
+    with pytest.raises(ValueError):
+        import_registry(dst, p)
+
+    # Deltas only make sense on top of a chain: without a manifest they are refused.
+    payload.update(format="links.registry.delta.v1", trust_anchors=[])
+    p.write_text(json.dumps(payload))
+    with pytest.raises(DeltaOrderError):
+        import_registry(dst, p)
+
+
+def test_audit_delta_continues_chain_into_mirror(tmp_path):
+    store, out, mirror = tmp_path / "store", tmp_path / "out", tmp_path / "mirror" / "ops.jsonl"
+    for i in range(5):
+        write_audit(store, AuditEvent(action="member.add", village_id="ops", actor=f"u{i}"))
+    flush_audit(store)
+    m1 = export_audit(store, "ops", out / "a1.json")
+    assert m1["position"]["seq"] == 5 and apply_audit_delta(manifest_path_for(out / "a1.json"), mirror) == 5
+
+    for i in range(5, 8):
+        write_audit(store, AuditEvent(action="member.add", village_id="ops", actor=f"u{i}"))
+    flush_audit(store)
+    m2 = export_audit(store, "ops", out / "a2.json", since=m1)
+    assert m2["counts"] == {"events": 3} and m2["position"]["seq"] == 8
+    assert apply_audit_delta(manifest_path_for(out / "a2.json"), mirror) == 3
+    assert [json.loads(l)["seq"] for l in mirror.read_text().splitlines()] == list(range(1, 9))
+
+    # A tampered payload is refused before anything is appended.
+    p = out / "a3.json"
+    export_audit(store, "ops", p, since=m2)
+    p.write_text(p.read_text().replace("[]", "[{}]"))
+    with pytest.raises(ValueError):
+        apply_audit_delta(manifest_path_for(p), mirror)
@@ -0,0 +1,94 @@
+import json
+import random
+import urllib.request
+
+from nacl.signing import SigningKey
+
+from links.drift_monitor import DriftMonitor, MonitorConfig
+from links.fleet import FleetInventory
+from links.transparency import append_transparency_entry, build_transparency_checkpoint
+
+
+class FakePeer:
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self.up = True
+        self.requests = 0
+
+    def fetch(self, url, headers):
+        self.requests += 1
+        if not self.up:
+            raise ConnectionError("down")
+        etag = f'W/"{self.checkpoint["checkpoint_hash"]}{self.checkpoint["latest_policy_hash"]}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, dict(self.checkpoint), {"ETag": etag}
+
+
+def _monitor(tmp_path, peer, now):
+    store = tmp_path / "store"
+    inv = FleetInventory.from_dict({"villages": ["ops"], "peers": ["http://peer.test"]})
+    alerts = []
+    cfg = MonitorConfig(interval_seconds=60, jitter=0.1, max_backoff_seconds=600, state_path=tmp_path / "state" / "monitor_state.json")
+    mon = DriftMonitor(store, inv, cfg, fetch_factory=lambda p: peer.fetch, alert_sink=alerts.append, rng=random.Random(1), clock=lambda: now[0])
+    return mon, alerts
+
+
+def test_monitor_alerts_on_transitions_and_persists_state(tmp_path):
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    append_transparency_entry(store, "ops", "p1", None, sk)
+    peer = FakePeer(build_transparency_checkpoint(store, "ops"))
+    now = [1000.0]
+    mon, alerts = _monitor(tmp_path, peer, now)
+
+    now[0] += 10
+    assert mon.tick() == 1
+    assert alerts == []  # first observation aligned: nothing to report
+    assert mon.tick() == 0  # not due yet
+
+    now[0] += 70
+    mon.tick()
+    assert mon.metrics.not_modified == 1 and mon.metrics.comparisons == 1
+
+    peer.checkpoint = dict(peer.checkpoint, latest_policy_hash="p2")
+    now[0] += 70
+    mon.tick()
+    assert [a["drift_class"] for a in alerts] == ["policy_divergence"]
+    assert alerts[0]["previous_class"] == "aligned" and alerts[0]["escalated"]
+
+    # A restarted monitor resumes from the persisted state: no duplicate alert.
+    now[0] += 70
+    mon2, alerts2 = _monitor(tmp_path, peer, now)
+    mon2.tick()
+    assert alerts2 == []
+    assert mon2.pairs["http://peer.test|ops"].drift_class == "policy_divergence"
+    assert len((tmp_path / "state" / "alerts.jsonl").read_text().splitlines()) == 1
+
+
+def test_failing_peer_backs_off_and_metrics_are_served(tmp_path):
+    store = tmp_path / "store"
+    append_transparency_entry(store, "ops", "p1", None, SigningKey.generate())
+    peer = FakePeer(build_transparency_checkpoint(store, "ops"))
+    peer.up = False
+    now = [1000.0]
+    mon, _ = _monitor(tmp_path, peer, now)
+    ps = mon.pairs["http://peer.test|ops"]
+
+    gaps = []
+    for _ in range(4):
+        now[0] = ps.next_due
+        mon.tick()
+        gaps.append(ps.next_due - now[0])
+    assert ps.failures == 4
+    assert gaps[1] > gaps[0] * 1.5 and gaps[3] <= 600 * 1.1
+
+    server = mon.serve_metrics(0)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        assert "links_drift_monitor_failures_total 4" in body
+        health = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz").read())
+        assert health["failing_pairs"] == ["http://peer.test|ops"]
+    finally:
+        server.shutdown()
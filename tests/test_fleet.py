@@ -0,0 +1,94 @@
+import time
+
+from nacl.signing import SigningKey
+
+from links.fleet import FleetInventory, scan_fleet
+from links.transparency import append_transparency_entry, build_transparency_checkpoint
+
+
+def test_fleet_scan_is_concurrent_and_rolls_up(tmp_path):
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    villages = [f"v{i}" for i in range(5)]
+    for v in villages:
+        append_transparency_entry(store, v, "p1", None, sk)
+    local = {v: build_transparency_checkpoint(store, v) for v in villages}
+
+    peers = [f"http://peer{i}.test" for i in range(6)]
+    delay = 0.05
+
+    def factory(peer):
+        def transport(method, url, payload=None):
+            time.sleep(delay)
+            village = url.split("/villages/")[1].split("/")[0]
+            if url.endswith("/policy/summary"):
+                return 200, {"count": 1, "head_policy_hash": "x", "merkle_root": "y"}
+            ckpt = dict(local[village])
+            if peer.url.endswith("peer1.test") and village == "v2":
+                ckpt["latest_policy_hash"] = "other"
+            if peer.url.endswith("peer2.test"):
+                ckpt["entry_count"] = 0
+            return 200, ckpt
+        return transport
+
+    inv = FleetInventory.from_dict({"villages": villages, "peers": peers})
+    t0 = time.perf_counter()
+    report = scan_fleet(store, inv, per_peer_limit=5, transport_factory=factory)
+    elapsed = time.perf_counter() - t0
+
+    # 30 pairs at 50ms each would take 1.5s serially.
+    assert elapsed < 0.6
+    assert report["pairs"] == 30
+    assert report["matrix"]["http://peer1.test"]["v2"]["drift_class"] == "policy_divergence"
+    assert report["matrix"]["http://peer0.test"]["v0"]["drift_class"] == "aligned"
+    assert report["rollups"]["by_peer"]["http://peer2.test"] == "publication_lag"
+    assert report["rollups"]["by_village"]["v2"] == "policy_divergence"
+    assert report["rollups"]["most_severe"] == "policy_divergence"
+    assert report["matrix"]["http://peer1.test"]["v2"]["peer_feed"]["head_policy_hash"] == "x"
+
+
+def test_slow_peer_does_not_stall_the_scan(tmp_path):
+    store = tmp_path / "store"
+    append_transparency_entry(store, "ops", "p1", None, SigningKey.generate())
+    ckpt = build_transparency_checkpoint(store, "ops")
+
+    def factory(peer):
+        def transport(method, url, payload=None):
+            if "slow" in url:
+                time.sleep(1.0)
+            return 200, ckpt
+        return transport
+
+    inv = FleetInventory.from_dict({"villages": ["ops"], "peers": ["http://fast.test", "http://slow.test"]})
+    t0 = time.perf_counter()
+    report = scan_fleet(store, inv, scan_timeout=0.2, transport_factory=factory)
+    assert time.perf_counter() - t0 < 0.5
+    assert report["matrix"]["http://fast.test"]["ops"]["drift_class"] == "aligned"
+    assert report["matrix"]["http://slow.test"]["ops"]["status"] == "timeout"
+    assert report["rollups"]["most_severe"] == "unknown"
+
+
+def test_bad_village_answer_does_not_mark_the_peer_down(tmp_path):
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    for v in ("ops", "finance", "hr"):
+        append_transparency_entry(store, v, "p1", None, sk)
+    local = {v: build_transparency_checkpoint(store, v) for v in ("ops", "finance", "hr")}
+
+    def factory(peer):
+        def transport(method, url, payload=None):
+            village = url.split("/villages/")[1].split("/")[0]
+            if "down" in peer.url:
+                raise ConnectionError("refused")
+            if village == "finance":
+                raise ValueError("bad json")
+            return 200, local[village]
+        return transport
+
+    inv = FleetInventory.from_dict({"villages": ["ops", "finance", "hr"], "peers": ["http://up.test", "http://down.test"]})
+    report = scan_fleet(store, inv, per_peer_limit=1, transport_factory=factory)
+    up = report["matrix"]["http://up.test"]
+    assert up["finance"]["status"] == "error"
+    assert up["ops"]["status"] == up["hr"]["status"] == "ok"
+    assert list(report["unreachable_peers"]) == ["http://down.test"]
+    assert sorted(c["status"] for c in report["matrix"]["http://down.test"].values()) == ["error", "skipped", "skipped"]
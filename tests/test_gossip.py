@@ -0,0 +1,63 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from links.gossip import GossipConfig, GossipNode, feed_summary, summaries_match
+from links.policy_feed import list_policy_updates, store_policy_update
+from links.policy_updates import build_update
+from links.server import create_app
+
+
+def _mesh(tmp_path, n):
+    clients = {}
+    roots = []
+    for i in range(n):
+        root = tmp_path / f"node{i}"
+        root.mkdir()
+        roots.append(root)
+        clients[f"http://node{i}"] = TestClient(create_app(store_root=root / "store", villages_root=root))
+
+    def transport(method, url, payload=None):
+        for base, client in clients.items():
+            if url.startswith(base + "/"):
+                resp = client.request(method, url[len(base):], json=payload)
+                return resp.status_code, (resp.json() if resp.status_code == 200 else None)
+        return 404, None
+
+    nodes = []
+    for i, root in enumerate(roots):
+        peers = [b for j, b in enumerate(clients) if j != i]
+        cfg = GossipConfig(peers=peers, village_ids=["ops"], fanout=1, interval_seconds=0)
+        nodes.append(GossipNode(root, cfg, transport=transport, rng=random.Random(i)))
+    return roots, nodes
+
+
+def test_summary_endpoint_matches_feed_summary(tmp_path):
+    store_policy_update(tmp_path, build_update("ops", {"visibility": "village"}, actor="alice"))
+    client = TestClient(create_app(store_root=tmp_path / "store", villages_root=tmp_path))
+    resp = client.get("/villages/ops/policy/summary")
+    assert resp.status_code == 200
+    assert summaries_match(resp.json(), feed_summary(tmp_path, "ops"))
+    assert "items" not in resp.json()
+
+
+def test_gossip_mesh_converges_and_fetches_only_missing(tmp_path):
+    roots, nodes = _mesh(tmp_path, 4)
+    u1 = build_update("ops", {"visibility": "village"}, actor="alice")
+    u2 = build_update("ops", {"visibility": "public"}, actor="alice", previous_policy_hash=u1.policy_hash)
+    for root in roots:
+        store_policy_update(root, u1)
+    store_policy_update(roots[0], u2)
+
+    for _ in range(20):
+        for node in nodes:
+            node.run_round()
+        summaries = [feed_summary(r, "ops") for r in roots]
+        if all(summaries_match(summaries[0], s) for s in summaries[1:]):
+            break
+
+    for root in roots:
+        assert [u.policy_hash for u in list_policy_updates(root, "ops")] == [u1.policy_hash, u2.policy_hash]
+    # Only u2 was ever missing, and each lagging node fetched it once.
+    assert sum(n.metrics.updates_fetched for n in nodes) == 3
+    assert all(n.metrics.messages_sent > 0 for n in nodes)
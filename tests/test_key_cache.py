@@ -0,0 +1,74 @@
+import base64
+
+from nacl.signing import SigningKey
+
+from links.crypto import sign_bytes, verify_bytes
+from links.key_cache import KeyCache, clear_key_cache, configure_key_cache, key_cache_stats, verify_key_b64
+from links.keys import load_signing_key_from_env, node_signer
+
+
+def test_lru_bounds_and_failures_are_not_cached():
+    cache = KeyCache(maxsize=2)
+    loads = []
+
+    def load(raw):
+        loads.append(raw)
+        if raw == b"bad":
+            raise ValueError("bad key")
+        return object()
+
+    a = cache.get("k", b"a", load)
+    cache.get("k", b"b", load)
+    assert cache.get("k", b"a", load) is a  # hit; "b" is now least recent
+    cache.get("k", b"c", load)
+    assert cache.stats()["size"] == 2 and loads == [b"a", b"b", b"c"]
+    cache.get("k", b"b", load)
+    assert loads[-1] == b"b"
+    for _ in range(2):
+        try:
+            cache.get("k", b"bad", load)
+        except ValueError:
+            pass
+    assert loads.count(b"bad") == 2
+
+
+def test_signature_paths_share_cached_keys(monkeypatch):
+    clear_key_cache()
+    sk = SigningKey.generate()
+    pub = base64.b64encode(sk.verify_key.encode()).decode()
+    seed = base64.b64encode(bytes(sk)).decode()
+
+    sig = sign_bytes(b"msg", alg="ed25519", signing_key_b64=seed)
+    assert verify_bytes(b"msg", alg="ed25519", public_key_b64=pub, signature_b64=sig)
+    assert not verify_bytes(b"other", alg="ed25519", public_key_b64=pub, signature_b64=sig)
+    assert verify_key_b64(pub) is verify_key_b64(pub)
+    assert key_cache_stats()["hits"] >= 2
+
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", seed)
+    signer = node_signer()
+    assert node_signer() is signer and load_signing_key_from_env() is signer.signing_key
+    assert signer.public_key_b64 == pub
+    other = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(other)).decode())
+    assert node_signer().public_key == other.verify_key.encode()
+
+    configure_key_cache(0)
+    try:
+        assert verify_key_b64(pub) is not verify_key_b64(pub)
+    finally:
+        configure_key_cache(4096)
+
+
+def test_ecdsa_p256_keys_are_parsed_once():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    clear_key_cache()
+    priv = ec.generate_private_key(ec.SECP256R1())
+    priv_b64 = base64.b64encode(priv.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())).decode()
+    pub_b64 = base64.b64encode(priv.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)).decode()
+
+    sigs = [sign_bytes(b"m%d" % i, alg="ecdsa_p256", signing_key_b64=priv_b64) for i in range(3)]
+    assert all(verify_bytes(b"m%d" % i, alg="ecdsa_p256", public_key_b64=pub_b64, signature_b64=s) for i, s in enumerate(sigs))
+    assert key_cache_stats()["misses"] == 2
+    assert not verify_bytes(b"m0", alg="ecdsa_p256", public_key_b64=priv_b64, signature_b64=sigs[0])
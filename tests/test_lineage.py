@@ -0,0 +1,66 @@
+from links.lineage import LineageIndex, lineage_index_path, load_lineage_index, rebuild_lineage_index
+from links.policy_feed import store_policy_update
+from links.policy_updates import build_update
+from links.reconcile import reconcile
+
+
+def _chain():
+    root = build_update("ops", {"retention_days": 1}, actor="a")
+    mid = build_update("ops", {"retention_days": 2}, actor="a", previous_policy_hash=root.policy_hash)
+    left = build_update("ops", {"retention_days": 3}, actor="a", previous_policy_hash=mid.policy_hash)
+    right = build_update("ops", {"retention_days": 4}, actor="b", previous_policy_hash=mid.policy_hash)
+    right2 = build_update("ops", {"retention_days": 5}, actor="b", previous_policy_hash=right.policy_hash)
+    return root, mid, left, right, right2
+
+
+def test_lineage_index_lookups_and_fork_point():
+    root, mid, left, right, right2 = _chain()
+    idx = LineageIndex.from_updates([right2, left, root, right, mid])  # out of order on purpose
+    assert idx.parent(left.policy_hash) == mid.policy_hash
+    assert sorted(idx.children(mid.policy_hash)) == sorted([left.policy_hash, right.policy_hash])
+    assert list(idx.ancestors(right2.policy_hash)) == [right.policy_hash, mid.policy_hash, root.policy_hash]
+    assert idx.common_ancestor(left.policy_hash, right2.policy_hash) == mid.policy_hash
+    assert idx.branch_length(right2.policy_hash, mid.policy_hash) == 2
+    assert idx.fork_points() == [mid.policy_hash]
+    assert idx.lineage_issues() == []
+    assert idx.head == right2.policy_hash
+
+
+def test_persisted_index_is_updated_incrementally(tmp_path):
+    root, mid, left, right, right2 = _chain()
+    for u in (root, mid, left):
+        store_policy_update(tmp_path, u)
+    idx = load_lineage_index(tmp_path, "ops")
+    assert idx.head == left.policy_hash
+    store_policy_update(tmp_path, right)
+    store_policy_update(tmp_path, right)  # idempotent
+    assert len(load_lineage_index(tmp_path, "ops")) == 4
+    assert len(lineage_index_path(tmp_path, "ops").read_text(encoding="utf-8").splitlines()) == 4
+    assert len(rebuild_lineage_index(tmp_path, "ops")) == 4
+
+
+def test_reconcile_reports_fork_point_with_local_index():
+    root, mid, left, right, right2 = _chain()
+    local = [root, mid, left]
+    remote = [root, mid, right, right2]
+    report = reconcile(local, remote, village_id="ops", local_index=LineageIndex.from_updates(local))
+    assert report.status == "fork"
+    assert report.common_ancestor == mid.policy_hash
+    assert report.local_branch_length == 1
+    assert report.remote_branch_length == 2
+    assert report.forks[0]["previous_policy_hash"] == mid.policy_hash
+
+
+def test_latest_update_sees_files_written_outside_the_store(tmp_path):
+    from links.policy_feed import latest_policy_update
+
+    root, mid, left, right, right2 = _chain()
+    for u in (root, mid):
+        store_policy_update(tmp_path, u)
+    assert latest_policy_update(tmp_path, "ops").policy_hash == mid.policy_hash
+    # Copied in by hand (restore, rsync): no lineage record was appended for it.
+    d = tmp_path / "villages" / "ops" / "policy_updates"
+    (d / f"copied.{left.policy_hash}.json").write_text(left.model_dump_json(), encoding="utf-8")
+    (d / "no-hash-in-name.json").write_text(right2.model_dump_json(), encoding="utf-8")
+    assert latest_policy_update(tmp_path, "ops").policy_hash == right2.policy_hash
+    assert len(lineage_index_path(tmp_path, "ops").read_text(encoding="utf-8").splitlines()) == 4
@@ -0,0 +1,43 @@
+import json
+
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+
+from links.io import LogTail
+from links.server import create_app
+from links.transparency import append_transparency_entry
+
+
+def test_log_tail_reads_from_the_end_in_small_blocks(tmp_path):
+    p = tmp_path / "log.jsonl"
+    rows = [{"i": i, "pad": "x" * (i % 7)} for i in range(200)]
+    p.write_text("".join(json.dumps(r) + "\n" for r in rows) + '{"partial": ', encoding="utf-8")
+    view = LogTail(p, block_size=16)
+    assert view.end == p.stat().st_size - len('{"partial": ')
+    assert [json.loads(line)["i"] for line in view.iter_range(view.last(5))] == [195, 196, 197, 198, 199]
+    assert [json.loads(line)["i"] for _, line in view.iter_reverse()] == list(range(199, -1, -1))
+    cursor = view.find(lambda line: json.loads(line)["i"] == 10)
+    assert view.is_line_boundary(cursor) and not view.is_line_boundary(cursor + 1)
+    assert [json.loads(line)["i"] for line in view.iter_range(cursor, view.after(cursor, 3))] == [11, 12, 13]
+
+
+def test_transparency_log_endpoint_follows_with_cursors(tmp_path):
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    entries = [append_transparency_entry(store, "ops", f"hash{i}", None, sk) for i in range(6)]
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+
+    r = client.get("/villages/ops/transparency/policy_log", params={"limit": 2})
+    assert [json.loads(x)["policy_hash"] for x in r.text.splitlines()] == ["hash4", "hash5"]
+
+    r = client.get("/villages/ops/transparency/policy_log", params={"since_entry_hash": entries[1]["entry_hash"], "limit": 2})
+    assert [json.loads(x)["policy_hash"] for x in r.text.splitlines()] == ["hash2", "hash3"]
+
+    r = client.get("/villages/ops/transparency/policy_log", params={"offset": r.headers["X-Log-Offset"], "limit": 10})
+    assert [json.loads(x)["policy_hash"] for x in r.text.splitlines()] == ["hash4", "hash5"]
+    append_transparency_entry(store, "ops", "hash6", None, sk)
+    r = client.get("/villages/ops/transparency/policy_log", params={"offset": r.headers["X-Log-Offset"]})
+    assert [json.loads(x)["policy_hash"] for x in r.text.splitlines()] == ["hash6"]
+
+    assert client.get("/villages/ops/transparency/policy_log", params={"offset": 3}).status_code == 400
+    assert client.get("/villages/ops/transparency/policy_log", params={"since_entry_hash": "0" * 64}).status_code == 404
@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timezone
+
+from links.villages import (
+    Village,
+    VillageGovernance,
+    VillagePolicy,
+    _members_path,
+    _revocations_path,
+    _snapshot_path,
+    add_member,
+    authorize,
+    compact_membership,
+    hash_token,
+    list_members,
+    list_revocations,
+    revoke_members,
+    rotate_member_tokens,
+    save_village,
+    write_membership,
+)
+
+
+def _village(root):
+    save_village(root, Village(
+        village_id="ops",
+        name="Ops",
+        description="",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["admin"]),
+        policy=VillagePolicy(),
+    ))
+
+
+def test_compaction_keeps_state_and_readers_follow(tmp_path):
+    _village(tmp_path)
+    for mid in ("alice", "bob", "carol"):
+        add_member(tmp_path, "ops", mid, "admin" if mid == "alice" else "member", token_plain=f"{mid}-0")
+    assert authorize(tmp_path, "ops", "alice-0") is not None  # warm the index before compaction
+    for week in range(1, 6):
+        rotate_member_tokens(tmp_path, "ops", {"alice": f"alice-{week}", "bob": f"bob-{week}"})
+    assert revoke_members(tmp_path, "ops", ["carol", "nobody"]) == {"carol": 1, "nobody": 0}
+    assert len(list_members(tmp_path, "ops")) == 13
+
+    stats = compact_membership(tmp_path, "ops")
+    assert (stats["members_before"], stats["members_after"]) == (13, 2)
+    assert stats["revocations_after"] == 11
+    mp = _members_path(tmp_path, "ops")
+    assert mp.read_text(encoding="utf-8") == json.dumps({"_snapshot": 1}) + "\n"
+    assert {m["member_id"]: m["role"] for m in list_members(tmp_path, "ops")} == {"alice": "admin", "bob": "member"}
+
+    assert authorize(tmp_path, "ops", "alice-5")["role"] == "admin"
+    assert authorize(tmp_path, "ops", "alice-4") is None
+    assert authorize(tmp_path, "ops", "carol-0") is None
+
+    # Appends after compaction land in the tail and are visible to every reader.
+    rotate_member_tokens(tmp_path, "ops", {"bob": "bob-6"})
+    assert authorize(tmp_path, "ops", "bob-6")["member_id"] == "bob"
+    assert authorize(tmp_path, "ops", "bob-5") is None
+    assert len(list_members(tmp_path, "ops")) == 3
+    assert compact_membership(tmp_path, "ops")["generation"] == 2
+    assert len(list_revocations(tmp_path, "ops")) == 12
+
+
+def test_interrupted_compaction_is_recovered(tmp_path):
+    _village(tmp_path)
+    add_member(tmp_path, "ops", "alice", "member", token_plain="a0")
+    compact_membership(tmp_path, "ops")
+    mp = _members_path(tmp_path, "ops")
+    # Simulate a crash after the snapshot was written but before the log was truncated.
+    snap = _snapshot_path(mp).read_text(encoding="utf-8").splitlines()
+    _snapshot_path(mp).write_text("\n".join([json.dumps({"_snapshot": 2})] + snap[1:]) + "\n", encoding="utf-8")
+    mp.write_text(json.dumps({"_snapshot": 1}) + "\n" + snap[1] + "\n", encoding="utf-8")
+    assert len(list_members(tmp_path, "ops")) == 1  # stale log already folded in
+
+    add_member(tmp_path, "ops", "bob", "member", token_plain="b0")
+    assert mp.read_text(encoding="utf-8").splitlines()[0] == json.dumps({"_snapshot": 2})
+    assert [m["member_id"] for m in list_members(tmp_path, "ops")] == ["alice", "bob"]
+    assert authorize(tmp_path, "ops", "b0") is not None
+    assert hash_token("b0") in {m["token_hash"] for m in list_members(tmp_path, "ops")}
+    assert _revocations_path(tmp_path, "ops").exists()
+
+
+def test_write_membership_replaces_state_for_warm_readers(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    for root in (src, dst):
+        _village(root)
+    for mid in ("alice", "bob", "carol"):
+        add_member(src, "ops", mid, "member", token_plain=f"{mid}-0")
+    rows = {m["member_id"]: m for m in list_members(src, "ops")}
+
+    write_membership(dst, "ops", [rows["alice"]], [])
+    assert authorize(dst, "ops", "alice-0") is not None  # warm the index
+    # Same-size rewrite: only the inode change tells a tail reader to start over.
+    write_membership(dst, "ops", [rows["bob"], rows["carol"]], [])
+    assert authorize(dst, "ops", "alice-0") is None
+    assert authorize(dst, "ops", "bob-0") is not None and authorize(dst, "ops", "carol-0") is not None
+    assert [m["member_id"] for m in list_members(dst, "ops")] == ["bob", "carol"]
+
+    # Crash after the snapshot rename but before the log swap: the snapshot wins.
+    mp = _members_path(dst, "ops")
+    stale = mp.with_name("stale.jsonl")
+    stale.write_text(json.dumps({"_snapshot": 1}) + "\n" + json.dumps(rows["alice"]) + "\n", encoding="utf-8")
+    stale.replace(mp)
+    assert [m["member_id"] for m in list_members(dst, "ops")] == ["bob", "carol"]
+    assert authorize(dst, "ops", "alice-0") is None
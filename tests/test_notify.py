@@ -0,0 +1,86 @@
+import random
+
+from links.notify import NotificationOutbox, enqueue_event
+
+
+def _outbox(tmp_path, sender, now, **kw):
+    return NotificationOutbox(tmp_path, sender=sender, clock=lambda: now[0], rng=random.Random(0), **kw)
+
+
+def test_notifications_are_batched_per_destination(tmp_path):
+    sent = []
+    now = [1000.0]
+    outbox = _outbox(tmp_path, lambda url, body: sent.append((url, body)) or 204, now, batch_size=3)
+    for i in range(4):
+        outbox.enqueue("http://a.test/hook", "drift.check", {"i": i})
+    outbox.enqueue("http://b.test/hook", "policy.apply", {"i": 9})
+
+    now[0] += 1.5
+    assert outbox.drain() == {"delivered": 4, "retried": 0, "dead": 0}
+    assert sorted((url, len(body["notifications"])) for url, body in sent) == [
+        ("http://a.test/hook", 3), ("http://b.test/hook", 1),
+    ]
+    assert outbox.drain()["delivered"] == 1  # the fourth "a" notification
+    stats = outbox.stats()
+    assert stats["by_status"] == {"delivered": 5}
+    assert stats["delivery_latency_seconds"]["max"] == 1.5
+
+
+def test_failed_deliveries_back_off_then_dead_letter(tmp_path):
+    now = [1000.0]
+    status = [503]
+    outbox = _outbox(tmp_path, lambda url, body: status[0], now, max_attempts=3, base_backoff_seconds=10)
+    outbox.enqueue("http://a.test/hook", "quarantine.reject", {"bundle_id": "b1"})
+
+    assert outbox.drain()["retried"] == 1
+    assert outbox.drain() == {"delivered": 0, "retried": 0, "dead": 0}  # not due yet
+    now[0] += 13
+    assert outbox.drain()["retried"] == 1
+    now[0] += 25
+    assert outbox.drain()["dead"] == 1
+    assert outbox.stats()["by_status"] == {"dead": 1}
+
+    status[0] = 200
+    assert outbox.retry_dead() == 1
+    assert outbox.drain()["delivered"] == 1
+
+
+def test_enqueue_event_uses_configured_destinations(tmp_path, monkeypatch):
+    monkeypatch.delenv("LINKS_NOTIFY_WEBHOOKS", raising=False)
+    assert enqueue_event(tmp_path, "policy.apply", {"x": 1}) == []
+    assert not (tmp_path / "notify").exists()
+    monkeypatch.setenv("LINKS_NOTIFY_WEBHOOKS", "http://a.test, http://b.test")
+    assert len(enqueue_event(tmp_path, "policy.apply", {"x": 1})) == 2
+    assert NotificationOutbox(tmp_path).stats()["by_status"] == {"pending": 2}
+
+
+def test_lease_covers_every_destination_send(tmp_path):
+    now = [1000.0]
+    reclaimed = []
+
+    def slow(url, body):
+        now[0] += 9.5  # each POST takes nearly its whole timeout
+        if url.endswith("/7"):
+            reclaimed.append(other.drain())
+        return 204
+
+    outbox = _outbox(tmp_path, slow, now, lease_seconds=30, send_timeout=10)
+    other = _outbox(tmp_path, lambda url, body: 204, now)
+    for d in range(8):
+        outbox.enqueue(f"http://h.test/{d}", "drift.check", {"d": d})
+    assert outbox.drain()["delivered"] == 8
+    assert reclaimed == [{"delivered": 0, "retried": 0, "dead": 0}]  # 76s in, the rows are still leased
+
+
+def test_drain_can_deliver_only_the_given_notifications(tmp_path):
+    sent = []
+    now = [1000.0]
+    outbox = _outbox(tmp_path, lambda url, body: sent.append((url, [n["id"] for n in body["notifications"]])) or 204, now)
+    backlog = outbox.enqueue("http://slow.test/hook", "quarantine.reject", {"bundle_id": "b1"})
+    mine = [outbox.enqueue("http://a.test/hook", "drift.check", {"x": 1}), outbox.enqueue("http://slow.test/hook", "drift.check", {"x": 1})]
+
+    assert outbox.drain(ids=mine)["delivered"] == 2
+    assert sorted(sent) == [("http://a.test/hook", [mine[0]]), ("http://slow.test/hook", [mine[1]])]
+    assert outbox.drain(ids=[]) == {"delivered": 0, "retried": 0, "dead": 0}
+    assert outbox.stats()["by_status"] == {"delivered": 2, "pending": 1}
+    assert outbox.drain()["delivered"] == 1 and sent[-1] == ("http://slow.test/hook", [backlog])
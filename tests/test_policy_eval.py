@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+from nacl.signing import SigningKey
+
+from links.claims import build_bundle_from_edges, sign_bundle
+from links.policy_eval import CompiledVillagePolicy, compile_policy, compiled_policy_for_village, evaluate_bundles
+from links.quarantine import approve_quarantine
+from links.villages import Village, VillageGovernance, VillagePolicy, issuer_key_hash_from_public_key_b64, save_village, save_village_policy
+
+
+def _bundle(tmp_path, issuer="node-a", window_days=30):
+    edges = tmp_path / "edges.json"
+    edges.write_text(json.dumps([{"from_entity_id": "a", "to_entity_id": "b", "weight": 1.0, "window_days": window_days}]), encoding="utf-8")
+    sk = SigningKey.generate()
+    signed = sign_bundle(build_bundle_from_edges(edges, issuer=issuer, window_days=window_days), sk)
+    return json.loads(signed.model_dump_json()), sk
+
+
+def test_evaluate_covers_every_rule(tmp_path):
+    bundle, sk = _bundle(tmp_path)
+    kh = issuer_key_hash_from_public_key_b64(base64.b64encode(sk.verify_key.encode()).decode())
+    allow = [f"{i:064x}" for i in range(20000)] + [kh]
+
+    policy = VillagePolicy(max_window_days=60, issuer_allowlist=allow, issuer_id_blocklist=["evil"])
+    compiled = compile_policy(policy)
+    assert isinstance(compiled, CompiledVillagePolicy)
+    assert compile_policy(policy.model_copy(deep=True)) is compiled  # cached by policy hash
+    assert compiled.evaluate(bundle).allowed
+
+    assert compile_policy(VillagePolicy(max_window_days=7)).evaluate(bundle).rule == "window"
+    assert compile_policy(VillagePolicy(allowed_predicates=["other"])).evaluate(bundle).rule == "predicate"
+    assert compile_policy(VillagePolicy(issuer_blocklist=[kh])).evaluate(bundle).rule == "issuer_key"
+    assert compile_policy(VillagePolicy(require_issuer_allowlist=True)).evaluate(bundle).rule == "issuer_key"
+    evil = dict(bundle, issuer="evil")
+    assert [d.rule for d in compiled.evaluate_many([bundle, evil])] == [None, "issuer_id"]
+
+
+def test_policy_checks_follow_in_place_edits():
+    from links.villages import issuer_allowed, issuer_id_allowed
+
+    kh = f"{7:064x}"
+    policy = VillagePolicy()
+    assert issuer_allowed(policy, kh) and issuer_id_allowed(policy, "node-a")
+    policy.issuer_blocklist.append(kh)
+    policy.issuer_id_blocklist.append("node-a")
+    assert not issuer_allowed(policy, kh)
+    assert not issuer_id_allowed(policy, "node-a")
+
+
+def test_batch_evaluation_and_quarantine_approval_use_current_policy(tmp_path):
+    data_root = tmp_path / "data"
+    store_root = tmp_path / "store"
+    save_village(data_root, Village(
+        village_id="ops",
+        name="Ops",
+        description="",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["alice"]),
+        policy=VillagePolicy(),
+    ))
+    bundle, _ = _bundle(tmp_path)
+    bundle["village_id"] = "ops"
+    first = compiled_policy_for_village(data_root, "ops")
+    assert compiled_policy_for_village(data_root, "ops") is first
+
+    decisions = evaluate_bundles(data_root, [bundle, dict(bundle, village_id="nope"), {k: v for k, v in bundle.items() if k != "village_id"}])
+    assert [d.allowed for d in decisions] == [True, False, True]
+
+    save_village_policy(data_root, "ops", VillagePolicy(issuer_id_blocklist=["node-a"]))
+    qp = store_root / "quarantine" / "ops" / "b1.json"
+    qp.parent.mkdir(parents=True)
+    qp.write_text(json.dumps(bundle), encoding="utf-8")
+    assert approve_quarantine(store_root, qp, villages_root=data_root) == (False, "policy no longer allows issuer")
+
+    save_village_policy(data_root, "ops", VillagePolicy())
+    ok, msg = approve_quarantine(store_root, qp, villages_root=data_root)
+    assert ok, msg
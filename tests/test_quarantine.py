@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone
+
+from nacl.signing import SigningKey
+
+from links.audit import audit_log_path
+from links.claims import build_bundle_from_edges, sign_bundle
+from links.quarantine import (
+    approve_quarantine_batch,
+    list_quarantine,
+    quarantine_bundle,
+    quarantine_dir,
+    quarantine_entries,
+    reject_quarantine_batch,
+)
+from links.store import query_claims
+from links.villages import Village, VillageGovernance, VillagePolicy, save_village
+
+
+def _bundles(tmp_path, issuer, n):
+    sk = SigningKey.generate()
+    out = []
+    for i in range(n):
+        edges = tmp_path / "edges.json"
+        edges.write_text(json.dumps([{"from_entity_id": f"{issuer}-{i}", "to_entity_id": "b", "weight": 1.0, "window_days": 30}]), encoding="utf-8")
+        b = json.loads(sign_bundle(build_bundle_from_edges(edges, issuer=issuer, window_days=30), sk).model_dump_json())
+        b["village_id"] = "ops"
+        out.append(b)
+    return out
+
+
+def _setup(tmp_path, quota=0):
+    data_root, store_root = tmp_path / "data", tmp_path / "store"
+    save_village(data_root, Village(
+        village_id="ops",
+        name="Ops",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["alice"]),
+        policy=VillagePolicy(submission_quota_per_day=quota),
+    ))
+    for issuer, n in (("node-a", 4), ("node-b", 2)):
+        for b in _bundles(tmp_path, issuer, n):
+            quarantine_bundle(store_root, b, b["bundle_id"], "ops", f"external issuer {issuer}")
+    return data_root, store_root
+
+
+def test_index_filters_without_opening_bundles(tmp_path):
+    _, store_root = _setup(tmp_path)
+    entries = quarantine_entries(store_root, "ops", issuer="node-b")
+    assert [e.issuer for e in entries] == ["node-b", "node-b"]
+    assert all(e.claims == 1 and e.size > 0 and len(e.issuer_key_hash) == 64 for e in entries)
+    assert len(quarantine_entries(store_root, "ops", reason="node-a", limit=3)) == 3
+
+    # A lost index is rebuilt from the bundle files.
+    (quarantine_dir(store_root, "ops") / "index.jsonl").unlink()
+    assert len(list_quarantine(store_root, "ops")) == 6
+    kh = entries[0].issuer_key_hash
+    assert {e.bundle_id for e in quarantine_entries(store_root, "ops", issuer_key_hash=kh)} == {e.bundle_id for e in entries}
+
+
+def test_batch_approve_and_reject(tmp_path):
+    data_root, store_root = _setup(tmp_path, quota=3)
+    a = [e.path(store_root) for e in quarantine_entries(store_root, "ops", issuer="node-a")]
+    tampered = json.loads(a[0].read_text())
+    tampered["signature"] = json.loads(a[1].read_text())["signature"]
+    a[0].write_text(json.dumps(tampered))
+
+    results = approve_quarantine_batch(store_root, a, villages_root=data_root, workers=4)
+    assert [r.ok for r in results] == [False, True, True, True]
+    assert results[0].message.startswith("bundle failed verification")
+    assert len(query_claims(issuer="node-a", store_root=store_root)) == 3
+
+    # Quota (3/day) is used up by the batch above.
+    b = [e.path(store_root) for e in quarantine_entries(store_root, "ops", issuer="node-b")]
+    assert approve_quarantine_batch(store_root, b[:1], villages_root=data_root)[0].message.startswith("submission quota exceeded")
+
+    assert all(r.ok for r in reject_quarantine_batch(store_root, b, "ops", "spam"))
+    assert [e.bundle_id for e in quarantine_entries(store_root, "ops")] == [a[0].stem]
+    actions = [json.loads(l)["action"] for l in audit_log_path(store_root).read_text().splitlines()]
+    assert actions.count("quarantine.approve") == 3 and actions.count("quarantine.reject") == 2
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+from nacl.signing import SigningKey
+
+import links.quarantine_reeval as quarantine_reeval
+import links.villages as villages
+from links.audit import audit_log_path
+from links.claims import build_bundle_from_edges, sign_bundle
+from links.policy_eval import compiled_policy_for_village
+from links.quarantine import approve_quarantine, quarantine_bundle, quarantine_entries, rejected_dir
+from links.quarantine_reeval import last_background_job, reevaluate_quarantine, schedule_reevaluation, wait_for_reevaluations
+from links.server import create_app
+from links.villages import Village, VillageGovernance, VillagePolicy, apply_policy_update, save_village
+
+
+def _quarantine(tmp_path, store_root, issuer, window_days, n):
+    sk = SigningKey.generate()
+    for i in range(n):
+        edges = tmp_path / "edges.json"
+        edges.write_text(json.dumps([{"from_entity_id": f"{issuer}-{i}", "to_entity_id": "b", "weight": 1.0, "window_days": window_days}]), encoding="utf-8")
+        b = json.loads(sign_bundle(build_bundle_from_edges(edges, issuer=issuer, window_days=window_days), sk).model_dump_json())
+        b["village_id"] = "ops"
+        quarantine_bundle(store_root, b, b["bundle_id"], "ops", "external")
+
+
+def _setup(tmp_path):
+    data_root, store_root = tmp_path / "data", tmp_path / "store"
+    save_village(data_root, Village(
+        village_id="ops",
+        name="Ops",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["alice"]),
+        policy=VillagePolicy(max_window_days=90),
+    ))
+    _quarantine(tmp_path, store_root, "node-a", 60, 5)
+    _quarantine(tmp_path, store_root, "node-b", 30, 7)
+    return data_root, store_root
+
+
+def test_reevaluation_rejects_denied_and_marks_eligible(tmp_path, monkeypatch):
+    sk = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(sk)).decode())
+    data_root, store_root = _setup(tmp_path)
+    villages.save_village_policy(data_root, "ops", VillagePolicy(max_window_days=30))
+
+    seen = []
+    report = reevaluate_quarantine(store_root, "ops", data_root, workers=4, chunk=5, progress=lambda r: seen.append(r.scanned))
+    assert (report.total, report.rejected, report.eligible, report.errors, report.completed) == (12, 5, 7, 0, True)
+    assert seen == [5, 10, 12] and report.per_second > 0
+
+    policy_hash = compiled_policy_for_village(data_root, "ops").policy_hash
+    left = quarantine_entries(store_root, "ops")
+    assert {e.issuer for e in left} == {"node-b"} and all(e.eligible == policy_hash for e in left)
+    assert len(list(rejected_dir(store_root, "ops").glob("*.denial.json"))) == 5
+
+    # Already-marked bundles are skipped; approval still re-checks and ingests.
+    assert reevaluate_quarantine(store_root, "ops", data_root).total == 0
+    assert approve_quarantine(store_root, left[0].path(store_root), villages_root=data_root)[0]
+    actions = [json.loads(l)["action"] for l in audit_log_path(store_root).read_text().splitlines()]
+    assert actions.count("quarantine.reject") == 5 and actions.count("quarantine.reevaluate") == 1
+
+
+def test_policy_apply_triggers_reevaluation_only_when_rules_change(tmp_path, monkeypatch):
+    # Outside the server the re-evaluation runs inline, so a CLI apply never exits mid-batch.
+    monkeypatch.delenv("LINKS_QUARANTINE_REEVALUATE", raising=False)
+    data_root, store_root = _setup(tmp_path)
+    monkeypatch.setattr(villages, "store_root", store_root)
+
+    apply_policy_update(data_root, "ops", VillagePolicy(max_window_days=90, visibility="public").model_dump(), actor="alice")
+    assert all(e.eligible is None for e in quarantine_entries(store_root, "ops"))
+
+    apply_policy_update(data_root, "ops", VillagePolicy(max_window_days=90, issuer_id_blocklist=["node-b"]).model_dump(), actor="alice")
+    left = quarantine_entries(store_root, "ops")
+    assert {e.issuer for e in left} == {"node-a"} and all(e.eligible for e in left)
+
+    # Building an app does not change how library callers re-evaluate; the server asks for background.
+    create_app(store_root=store_root, villages_root=data_root)
+    assert quarantine_reeval.schedule_reevaluation(store_root, "ops", data_root) is not None
+    apply_policy_update(data_root, "ops", VillagePolicy(max_window_days=30).model_dump(), actor="alice", reevaluation_mode="background")
+    assert wait_for_reevaluations(timeout=30)
+    assert quarantine_entries(store_root, "ops") == []
+
+
+def test_failed_background_job_is_logged_and_recorded(tmp_path, monkeypatch, caplog):
+    monkeypatch.delenv("LINKS_QUARANTINE_REEVALUATE", raising=False)
+    data_root, store_root = _setup(tmp_path)
+    real = quarantine_reeval.reevaluate_quarantine
+    monkeypatch.setattr(quarantine_reeval, "reevaluate_quarantine", lambda *a, **kw: 1 / 0)
+    assert last_background_job(store_root, "ops") is None
+
+    schedule_reevaluation(store_root, "ops", data_root, mode="background")
+    assert wait_for_reevaluations(timeout=30)
+    job = last_background_job(store_root, "ops")
+    assert not job["ok"] and job["error"].startswith("ZeroDivisionError")
+    assert "re-evaluation of ops failed" in caplog.text
+
+    monkeypatch.setattr(quarantine_reeval, "reevaluate_quarantine", real)
+    schedule_reevaluation(store_root, "ops", data_root, mode="background")
+    assert wait_for_reevaluations(timeout=30)
+    job = last_background_job(store_root, "ops")
+    assert job["ok"] and job["report"]["total"] == 12
+    assert len(quarantine_entries(store_root, "ops")) == 12  # the state file is not a bundle
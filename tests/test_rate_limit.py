@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from links.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend
+from links.server import create_app
+from links.villages import Village, VillageGovernance, VillagePolicy, save_village
+
+
+class _Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def _allowed(limiter, key, n, **kw):
+    return [limiter.check(key, **kw).allowed for _ in range(n)]
+
+
+def test_strategies():
+    clock = _Clock()
+    lim = RateLimiter(MemoryBackend(), clock=clock)
+
+    assert _allowed(lim, "f", 4, limit=3, strategy="fixed_window") == [True, True, True, False]
+    clock.t = 1020.0  # next aligned minute
+    assert lim.check("f", limit=3, strategy="fixed_window").allowed
+
+    clock.t = 1000.0
+    assert _allowed(lim, "t", 4, limit=3, strategy="token_bucket") == [True, True, True, False]
+    d = lim.check("t", limit=3, strategy="token_bucket")
+    assert not d.allowed and 0 < d.retry_after <= 20 and d.headers()["Retry-After"] == "20"
+    clock.t = 1020.0  # one token refilled (3 per 60s)
+    assert _allowed(lim, "t", 2, limit=3, strategy="token_bucket") == [True, False]
+
+    # Sliding window: a burst at the end of one minute still counts early in the next.
+    clock.t = 1199.0
+    assert _allowed(lim, "s", 3, limit=3, strategy="sliding_window") == [True, True, True]
+    clock.t = 1201.0
+    assert not lim.check("s", limit=3, strategy="sliding_window").allowed
+    clock.t = 1250.0  # previous minute weighs ~1/6 by now
+    assert _allowed(lim, "s", 3, limit=3, strategy="sliding_window") == [True, True, False]
+
+
+def test_memory_backend_expires_keys_incrementally():
+    clock = _Clock()
+    backend = MemoryBackend()
+    lim = RateLimiter(backend, clock=clock)
+    for i in range(20):
+        lim.check(f"k{i}", limit=5, strategy="fixed_window")
+    clock.t += 120
+    lim.check("fresh", limit=5)
+    assert len(backend) == 20 - 8 + 1  # bounded eviction per call
+    lim.check("fresh", limit=5)
+    lim.check("fresh", limit=5)
+    assert len(backend) == 1
+
+
+def test_memory_backend_evicts_by_expiry_not_last_touch():
+    clock = _Clock()
+    backend = MemoryBackend()
+    lim = RateLimiter(backend, clock=clock)
+    lim.check("hourly", limit=5, window=3600, strategy="token_bucket")  # touched first, expires last
+    for i in range(5):
+        lim.check(f"k{i}", limit=5, strategy="fixed_window")
+    clock.t += 120
+    lim.check("hourly", limit=5, window=3600, strategy="token_bucket")
+    assert len(backend) == 1  # the five expired keys went despite the older live one
+
+
+def test_sqlite_backend_is_shared_between_limiters(tmp_path):
+    clock = _Clock()
+    worker_a = RateLimiter(SQLiteBackend(tmp_path), clock=clock)
+    worker_b = RateLimiter(SQLiteBackend(tmp_path), clock=clock)
+    got = [w.check("ops|1.2.3.4", limit=4, strategy="token_bucket").allowed for w in (worker_a, worker_b) * 3]
+    assert got == [True, True, True, True, False, False]
+
+
+def test_middleware_uses_policy_strategy_and_returns_429(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINKS_RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.setenv("LINKS_RATE_LIMIT_PER_MEMBER", "1")
+    save_village(tmp_path, Village(
+        village_id="ops",
+        name="Ops",
+        description="",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["admin"]),
+        policy=VillagePolicy(rate_limit_per_min=2, rate_limit_strategy="token_bucket"),
+    ))
+    client = TestClient(create_app(store_root=tmp_path / "store", villages_root=tmp_path))
+    r = [client.get("/villages/ops/policy/latest") for _ in range(3)]
+    assert [x.status_code for x in r] == [404, 404, 429]
+    assert r[0].headers["X-RateLimit-Remaining"] == "1"
+    assert int(r[2].headers["Retry-After"]) >= 1
+    # A different member behind the same address has its own budget.
+    assert client.get("/villages/ops/policy/latest", headers={"Authorization": "Bearer other"}).status_code == 404
@@ -0,0 +1,90 @@
+import hashlib
+
+from fastapi.testclient import TestClient
+
+from links.policy_feed import list_policy_updates, store_policy_update
+from links.policy_updates import build_update
+from links.reconcile import reconcile, remote_view_from_diff
+from links.server import create_app
+from links.set_reconcile import MAX_RANGES, HashRangeIndex, reconcile_hash_sets, respond_to_ranges
+
+
+def _hashes(prefix, n):
+    return {hashlib.sha256(f"{prefix}{i}".encode()).hexdigest() for i in range(n)}
+
+
+def test_range_reconciliation_finds_symmetric_difference():
+    shared = _hashes("shared", 5000)
+    only_local = _hashes("local", 3)
+    only_remote = _hashes("remote", 4)
+    remote_index = HashRangeIndex(shared | only_remote)
+
+    transferred = []
+
+    def exchange(request):
+        response = respond_to_ranges(remote_index, request)
+        transferred.extend(h for r in response["ranges"] for h in r.get("items", []))
+        return response
+
+    missing_local, missing_remote, stats = reconcile_hash_sets(shared | only_local, exchange)
+    assert missing_local == only_remote
+    assert missing_remote == only_local
+    # Traffic tracks the difference, not the 5000-item history.
+    assert len(transferred) < 200
+    assert stats["rounds"] <= 6
+
+
+def test_identical_sets_reconcile_in_one_round():
+    hs = _hashes("x", 100)
+    missing_local, missing_remote, stats = reconcile_hash_sets(hs, lambda req: respond_to_ranges(HashRangeIndex(hs), req))
+    assert not missing_local and not missing_remote
+    assert stats["rounds"] == 1
+
+
+def test_reconcile_ranges_endpoint_and_remote_view(tmp_path):
+    u1 = build_update("ops", {"visibility": "village"}, actor="alice")
+    u2 = build_update("ops", {"visibility": "public"}, actor="bob", previous_policy_hash=u1.policy_hash)
+    remote_root = tmp_path / "remote"
+    store_policy_update(remote_root, u1)
+    store_policy_update(remote_root, u2)
+    client = TestClient(create_app(store_root=remote_root / "store", villages_root=remote_root))
+
+    def exchange(request):
+        resp = client.post("/villages/ops/policy/reconcile_ranges", json=request)
+        assert resp.status_code == 200
+        return resp.json()
+
+    local = [u1]
+    missing_local, missing_remote, _ = reconcile_hash_sets({u1.policy_hash}, exchange)
+    assert missing_local == {u2.policy_hash}
+    assert missing_remote == set()
+
+    view = remote_view_from_diff(local, [u2], missing_remote)
+    expected = reconcile(local, list_policy_updates(remote_root, "ops"), village_id="ops")
+    report = reconcile(local, view, village_id="ops")
+    assert report.missing_local == expected.missing_local == [u2.policy_hash]
+    assert report.remote_head == expected.remote_head
+
+    # The endpoint is unauthenticated: oversized requests are refused instead of served.
+    ok_range = {"lower": "", "upper": None, "count": 0, "fingerprint": "0"}
+    for bad in (
+        {"ranges": [ok_range] * (MAX_RANGES + 1)},
+        {"ranges": [ok_range], "leaf_size": 10**9},
+        {"ranges": [ok_range], "branch": 10**6},
+        {"ranges": "everything"},
+    ):
+        assert client.post("/villages/ops/policy/reconcile_ranges", json=bad).status_code == 400
+
+
+def test_large_rounds_are_split_into_bounded_requests():
+    local = _hashes("l", 20000)
+    remote = HashRangeIndex(_hashes("r", 20000))
+    sizes = []
+
+    def exchange(request):
+        sizes.append(len(request["ranges"]))
+        return respond_to_ranges(remote, request)
+
+    missing_local, missing_remote, _ = reconcile_hash_sets(local, exchange, branch=64)
+    assert len(missing_local) == len(missing_remote) == 20000
+    assert max(sizes) == MAX_RANGES
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 from nacl.signing import SigningKey
@@ -14,3 +15,34 @@ def test_transparency_checkpoint_has_stable_shape(tmp_path):
     assert checkpoint["entry_count"] == 2
     assert checkpoint["latest_policy_hash"] == "hash2"
     assert checkpoint["checkpoint_hash"]
+
+
+def test_checkpoint_state_is_maintained_and_verifiable(tmp_path):
+    from links.merkle import leaf_hash, root_from_leaves
+    from links.transparency import transparency_log_path, transparency_state_path, verify_transparency_state
+
+    sk = SigningKey.generate()
+    entries = [append_transparency_entry(tmp_path, "ops", f"hash{i}", None, sk) for i in range(7)]
+    state = json.loads(transparency_state_path(tmp_path, "ops").read_text(encoding="utf-8"))
+    assert state["entry_count"] == 7
+    assert len(state["frontier"]) == 3  # 7 = 4 + 2 + 1
+
+    expected = root_from_leaves(leaf_hash(bytes.fromhex(e["entry_hash"])) for e in entries).hex()
+    checkpoint = build_transparency_checkpoint(tmp_path, "ops", verify=True)
+    assert checkpoint["checkpoint_hash"] == expected
+    assert checkpoint["checkpoint_alg"] == "rfc6962-sha256"
+    assert checkpoint["latest_entry_hash"] == entries[-1]["entry_hash"]
+
+    # A log line written behind the state's back is picked up incrementally.
+    extra = dict(entries[0], policy_hash="manual", entry_hash="ab" * 32)
+    with transparency_log_path(tmp_path, "ops").open("a", encoding="utf-8") as f:
+        f.write(json.dumps(extra) + "\n")
+    assert build_transparency_checkpoint(tmp_path, "ops")["entry_count"] == 8
+    assert verify_transparency_state(tmp_path, "ops")[0]
+
+    # Tampering with the maintained state is caught by verify mode.
+    state = json.loads(transparency_state_path(tmp_path, "ops").read_text(encoding="utf-8"))
+    state["root"] = "00" * 32
+    transparency_state_path(tmp_path, "ops").write_text(json.dumps(state), encoding="utf-8")
+    ok, details = verify_transparency_state(tmp_path, "ops")
+    assert not ok and details["recomputed"]["root"] != details["maintained"]["root"]
@@ -0,0 +1,127 @@
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+
+from links.checkpoint_exchange import compare_checkpoints
+from links.merkle import leaf_hash, verify_inclusion
+from links.server import create_app
+from links.transparency import (
+    append_transparency_entry,
+    build_transparency_checkpoint,
+    consistency_proof,
+    inclusion_proof,
+    latest_tree_head,
+    verify_tree_head,
+)
+
+
+def test_tree_heads_are_signed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINKS_TRANSPARENCY_STH_BATCH", "4")
+    monkeypatch.setenv("LINKS_TRANSPARENCY_STH_INTERVAL_SECONDS", "3600")
+    sk = SigningKey.generate()
+    entries = [append_transparency_entry(tmp_path, "ops", f"h{i}", None, sk) for i in range(9)]
+    assert "signature" not in entries[0]
+    sth = latest_tree_head(tmp_path, "ops")
+    # First append signs (no head yet), then every 4 appends: sizes 1, 5, 9.
+    assert sth["tree_size"] == 9
+    assert (tmp_path / "transparency" / "ops" / "tree_heads.jsonl").read_text().count("\n") == 3
+    assert verify_tree_head(sth, sk.verify_key) == (True, "ok")
+    assert sth["root_hash"] == build_transparency_checkpoint(tmp_path, "ops")["checkpoint_hash"]
+
+
+def test_inclusion_and_consistency_proofs_verify(tmp_path):
+    sk = SigningKey.generate()
+    entries = [append_transparency_entry(tmp_path, "ops", f"h{i}", None, sk) for i in range(5)]
+    old = build_transparency_checkpoint(tmp_path, "ops")
+    # Same current policy, more entries: the peer simply published further.
+    entries += [append_transparency_entry(tmp_path, "ops", "h4", None, sk, meta={"n": i}) for i in range(5, 11)]
+    new = build_transparency_checkpoint(tmp_path, "ops")
+
+    proof = inclusion_proof(tmp_path, "ops", entries[3]["entry_hash"], tree_size=11)
+    assert verify_inclusion(
+        leaf_hash(bytes.fromhex(entries[3]["entry_hash"])),
+        proof["leaf_index"],
+        proof["tree_size"],
+        [bytes.fromhex(h) for h in proof["audit_path"]],
+        bytes.fromhex(new["checkpoint_hash"]),
+    )
+
+    cons = consistency_proof(tmp_path, "ops", old["tree_size"], new["tree_size"])
+    report = compare_checkpoints(old, new, consistency_proof=cons)
+    assert report.consistency == "verified"
+    assert report.drift_class == "publication_lag"
+
+    forged = dict(old, checkpoint_hash="00" * 32)
+    report = compare_checkpoints(forged, new, consistency_proof=cons)
+    assert report.consistency == "failed"
+    assert report.drift_class == "history_only_divergence"
+
+
+def test_leaf_lookup_uses_the_persisted_index(tmp_path, monkeypatch):
+    from links.merkle import MerkleLevels
+    from links.transparency import merkle_levels
+
+    sk = SigningKey.generate()
+    entries = [append_transparency_entry(tmp_path, "ops", f"h{i}", None, sk) for i in range(6)]
+    backfilled = []
+    real = MerkleLevels._index_leaves
+    monkeypatch.setattr(MerkleLevels, "_index_leaves", lambda self, conn, leaves: backfilled.append(len(leaves)) or real(self, conn, leaves))
+    assert inclusion_proof(tmp_path, "ops", entries[4]["entry_hash"])["leaf_index"] == 4
+    assert backfilled == []  # indexed at append time, no scan of level 0
+
+    # A store written before the index existed is indexed once, on first lookup.
+    levels = merkle_levels(tmp_path, "ops")
+    (levels.directory / "leaves.sqlite3").unlink()
+    assert inclusion_proof(tmp_path, "ops", entries[5]["entry_hash"])["leaf_index"] == 5
+    assert inclusion_proof(tmp_path, "ops", entries[0]["entry_hash"])["leaf_index"] == 0
+    assert backfilled == [6]
+    levels.truncate(3)
+    assert levels.leaf_index(leaf_hash(bytes.fromhex(entries[4]["entry_hash"])), 6) is None
+
+
+def test_proof_endpoints(tmp_path, monkeypatch):
+    import base64
+
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(sk)).decode())
+    monkeypatch.setenv("LINKS_TRANSPARENCY_STH_INTERVAL_SECONDS", "3600")
+    entries = [append_transparency_entry(store, "ops", f"h{i}", None, sk) for i in range(3)]
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+
+    # A head is due now, but an unauthenticated GET only serves the stored one.
+    monkeypatch.setenv("LINKS_TRANSPARENCY_STH_INTERVAL_SECONDS", "0")
+    heads = store / "transparency" / "ops" / "tree_heads.jsonl"
+    before = heads.read_text()
+    assert client.get("/villages/ops/transparency/tree_head").json() == latest_tree_head(store, "ops")
+    assert heads.read_text() == before and latest_tree_head(store, "ops")["tree_size"] == 1
+    r = client.get("/villages/ops/transparency/proof/inclusion", params={"entry_hash": entries[2]["entry_hash"], "tree_size": 3})
+    assert r.status_code == 200 and r.json()["leaf_index"] == 2
+    assert client.get("/villages/ops/transparency/proof/inclusion", params={"entry_hash": "0" * 64}).status_code == 404
+    r = client.get("/villages/ops/transparency/proof/consistency", params={"first": 1, "second": 3})
+    assert r.status_code == 200 and r.json()["proof"]
+    assert client.get("/villages/ops/transparency/proof/consistency", params={"first": 4}).status_code == 400
+
+
+def test_checkpoint_endpoint_is_signed_cached_and_revalidated(tmp_path, monkeypatch):
+    import base64
+
+    from links.checkpoint_exchange import verify_checkpoint_signature
+
+    store = tmp_path / "store"
+    sk = SigningKey.generate()
+    monkeypatch.setenv("LINKS_NODE_SIGNING_KEY_B64", base64.b64encode(bytes(sk)).decode())
+    client = TestClient(create_app(store_root=store, villages_root=tmp_path))
+    assert client.get("/villages/ops/transparency/checkpoint").status_code == 404
+
+    append_transparency_entry(store, "ops", "h0", None, sk)
+    r1 = client.get("/villages/ops/transparency/checkpoint")
+    assert r1.status_code == 200
+    assert verify_checkpoint_signature(r1.json(), sk.verify_key) == (True, "ok")
+    r2 = client.get("/villages/ops/transparency/checkpoint")
+    assert r2.json() == r1.json()  # same cached artifact, generated_at included
+    assert client.get("/villages/ops/transparency/checkpoint", headers={"If-None-Match": r1.headers["ETag"]}).status_code == 304
+
+    append_transparency_entry(store, "ops", "h1", None, sk)
+    r3 = client.get("/villages/ops/transparency/checkpoint", headers={"If-None-Match": r1.headers["ETag"]})
+    assert r3.status_code == 200
+    assert r3.json()["entry_count"] == 2 and r3.headers["ETag"] != r1.headers["ETag"]
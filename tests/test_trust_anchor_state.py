@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from nacl.signing import SigningKey
+
+from links.trust_anchors import (
+    TrustAnchorEntry,
+    add_anchor_signature,
+    anchor_state,
+    anchor_state_path,
+    is_active_anchor,
+    iter_anchor_entries,
+    latest_active_anchor,
+    replay_anchor_entries,
+    store_anchor_entry,
+    verify_anchor_entry_any,
+    verify_anchor_state,
+)
+
+T0 = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _entry(action, kh, minutes, anchor_id=None):
+    return TrustAnchorEntry(village_id="ops", created_at=T0 + timedelta(minutes=minutes), action=action, anchor_id=anchor_id or f"anchor-{kh}", anchor_key_hash=kh * 64)
+
+
+def test_state_tracks_register_rotate_revoke_incrementally(tmp_path):
+    store_anchor_entry(tmp_path, _entry("register", "a", 0))
+    store_anchor_entry(tmp_path, _entry("register", "b", 1))
+    store_anchor_entry(tmp_path, _entry("rotate", "c", 2))
+    store_anchor_entry(tmp_path, _entry("revoke", "a", 3))
+
+    state = anchor_state(tmp_path, "ops")
+    assert state.version == 4
+    assert set(state.active) == {"b" * 64, "c" * 64} and state.is_revoked("a" * 64)
+    assert is_active_anchor(tmp_path, "ops", "c" * 64) and not is_active_anchor(tmp_path, "ops", "a" * 64)
+    assert latest_active_anchor(tmp_path, "ops").anchor_id == "anchor-c"
+    assert set(replay_anchor_entries(iter_anchor_entries(tmp_path, "ops"))) == set(state.active)
+
+    # A back-dated entry (e.g. a registry import) forces a replay, so order still matches the history.
+    store_anchor_entry(tmp_path, _entry("revoke", "c", -1))
+    assert is_active_anchor(tmp_path, "ops", "c" * 64)
+    store_anchor_entry(tmp_path, _entry("register", "a", 4))
+    assert is_active_anchor(tmp_path, "ops", "a" * 64) and not anchor_state(tmp_path, "ops").is_revoked("a" * 64)
+    assert verify_anchor_state(tmp_path, "ops")["ok"]
+
+
+def test_verifier_detects_and_repairs_drift(tmp_path):
+    store_anchor_entry(tmp_path, _entry("register", "a", 0))
+    store_anchor_entry(tmp_path, _entry("register", "b", 1))
+    p = anchor_state_path(tmp_path, "ops")
+    doc = json.loads(p.read_text())
+    del doc["active"]["b" * 64]
+    p.write_text(json.dumps(doc))
+
+    result = verify_anchor_state(tmp_path, "ops", repair=True)
+    assert not result["ok"] and result["missing"] == ["b" * 64]
+    assert verify_anchor_state(tmp_path, "ops")["ok"]
+
+    # A missing state file is rebuilt from the entries.
+    p.unlink()
+    assert anchor_state(tmp_path, "ops").version == 2
+
+
+def test_anchor_signature_verification_uses_cached_keys(tmp_path):
+    sk = SigningKey.generate()
+    e = add_anchor_signature(_entry("register", "a", 0), sk)
+    assert verify_anchor_entry_any(e) and verify_anchor_entry_any(e)
+    forged = e.model_copy(update={"anchor_id": "other"})
+    assert not verify_anchor_entry_any(forged)
+    assert e.signatures[0].public_key == base64.b64encode(sk.verify_key.encode()).decode()
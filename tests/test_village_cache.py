@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from links.server import create_app
+from links.villages import (
+    Village,
+    VillageCache,
+    VillageGovernance,
+    VillagePolicy,
+    load_village,
+    save_village,
+    save_village_policy,
+    village_dir,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _village(root, vid="ops", rate=60):
+    save_village(root, Village(
+        village_id=vid,
+        name=vid,
+        description="",
+        created_at=datetime.now(timezone.utc),
+        governance=VillageGovernance(admins=["admin"]),
+        policy=VillagePolicy(rate_limit_per_min=rate),
+    ))
+
+
+def test_cache_shares_objects_revalidates_and_evicts(tmp_path):
+    clock = _Clock()
+    cache = VillageCache(max_entries=2, max_age_seconds=5.0, clock=clock)
+    for vid in ("a", "b", "c"):
+        _village(tmp_path, vid)
+
+    first = cache.get(tmp_path, "a")
+    assert cache.get(tmp_path, "a") is first
+    clock.t = 10.0  # past the staleness bound, file unchanged: revalidated, not re-parsed
+    assert cache.get(tmp_path, "a") is first
+
+    # Written by another process: invisible until the bound expires, then reloaded.
+    other = load_village(tmp_path, "a").model_copy(update={"name": "renamed"})
+    p = village_dir(tmp_path, "a") / "village.json"
+    p.with_suffix(".x").write_text(other.model_dump_json(), encoding="utf-8")
+    p.with_suffix(".x").replace(p)
+    assert cache.get(tmp_path, "a").name == "a"
+    clock.t = 20.0
+    assert cache.get(tmp_path, "a").name == "renamed"
+
+    cache.get(tmp_path, "b")
+    cache.get(tmp_path, "c")
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"], stats["reloads"]) == (3, 3, 1)
+
+
+def test_policy_apply_is_visible_to_rate_limiter(tmp_path):
+    _village(tmp_path, rate=2)
+    client = TestClient(create_app(store_root=tmp_path / "store", villages_root=tmp_path))
+    codes = [client.get("/villages/ops/policy/latest").status_code for _ in range(3)]
+    assert codes[-1] == 429
+
+    # save_village invalidates this process's entry immediately.
+    save_village_policy(tmp_path, "ops", VillagePolicy(rate_limit_per_min=100))
+    assert client.get("/villages/ops/policy/latest").status_code == 404
+    assert client.get("/cache/villages").json()["hits"] >= 2